@@ -0,0 +1,172 @@
+# benchmarks/historico_inventarios.py
+"""Benchmark do histórico de inventários finalizados com muitos inventários sintéticos
+
+Uso (a partir de inventario_ativos/):
+
+    python -m benchmarks.historico_inventarios --inventarios 50 --lojas 2000 --repeticoes 5
+
+Compara, sobre o mesmo banco temporário:
+- juncao_cartesiana: consulta original (LEFT JOIN de contagem_lojas e contagem_cd em
+  inventario_meta, que gera lojas × setores linhas por inventário antes do COUNT DISTINCT)
+  mais o cálculo dos totais de cada inventário;
+- subconsultas_correlacionadas: contagens em subconsultas correlacionadas e a matriz de
+  totais de cada inventário (sem o produto cartesiano, mas ainda uma ida ao banco por inventário);
+- snapshots: RelatorioService.get_historico_inventarios (uma consulta em inventario_snapshot);
+- tendencia: RelatorioService.get_tendencia_inventarios (série completa, com variações, em uma consulta).
+
+Lojas, setores e total geral de cada inventário devem ser iguais em todas as implementações.
+"""
+import os
+import sys
+import math
+import argparse
+import datetime
+import tempfile
+import statistics
+import time
+
+DIRETORIO_APP = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if DIRETORIO_APP not in sys.path:
+    sys.path.insert(0, DIRETORIO_APP)
+
+from database.database_manager import DatabaseManager
+from business.relatorio_service import RelatorioService
+from benchmarks.totais_por_tipo import popular_banco
+
+
+def criar_inventarios(db_manager, quantidade, lojas):
+    """Cria e finaliza os inventários (códigos próprios: o código padrão muda só a cada segundo)"""
+    codigos = []
+    inicio = datetime.datetime(2024, 1, 1)
+    for i in range(quantidade):
+        cod_inventario = f'INV-BENCH-{i:04d}'
+        data_inicio = inicio + datetime.timedelta(days=7 * i)
+        with db_manager.transacao() as conn:
+            conn.execute('''
+            INSERT INTO inventario_meta (cod_inventario, data_inicio, descricao, status)
+            VALUES (?, ?, ?, 'em_andamento')
+            ''', (cod_inventario, data_inicio.isoformat(), 'Benchmark de histórico'))
+        popular_banco(db_manager, cod_inventario, lojas, semente=i)
+        db_manager.finalizar_inventario(cod_inventario)
+        codigos.append(cod_inventario)
+    return codigos
+
+
+def historico_juncao_cartesiana(servico, limite):
+    """Implementação original: junção das duas tabelas de contagem e totais por inventário"""
+    with servico.db_manager.leitura() as conn:
+        inventarios = conn.execute('''
+        SELECT im.cod_inventario,
+               COUNT(DISTINCT cl.loja) as total_lojas,
+               COUNT(DISTINCT cd.setor) as total_setores
+        FROM inventario_meta im
+        LEFT JOIN contagem_lojas cl ON im.cod_inventario = cl.cod_inventario
+        LEFT JOIN contagem_cd cd ON im.cod_inventario = cd.cod_inventario
+        WHERE im.status = 'finalizado'
+        GROUP BY im.cod_inventario
+        ORDER BY im.data_fim DESC
+        LIMIT ?
+        ''', (limite,)).fetchall()
+
+    return [
+        (inv['cod_inventario'], inv['total_lojas'], inv['total_setores'],
+         servico.get_totais_por_tipo(inv['cod_inventario'])['total_geral'])
+        for inv in inventarios
+    ]
+
+
+def historico_subconsultas(servico, limite):
+    """Contagens em subconsultas correlacionadas (pelos índices de cod_inventario) e totais por inventário"""
+    with servico.db_manager.leitura() as conn:
+        inventarios = conn.execute('''
+        SELECT im.cod_inventario,
+               (SELECT COUNT(DISTINCT loja) FROM contagem_lojas cl
+                WHERE cl.cod_inventario = im.cod_inventario) AS total_lojas,
+               (SELECT COUNT(DISTINCT setor) FROM contagem_cd cd
+                WHERE cd.cod_inventario = im.cod_inventario) AS total_setores
+        FROM inventario_meta im
+        WHERE im.status = 'finalizado'
+        ORDER BY im.data_fim DESC
+        LIMIT ?
+        ''', (limite,)).fetchall()
+
+    return [
+        (inv['cod_inventario'], inv['total_lojas'], inv['total_setores'],
+         servico.get_totais_por_tipo(inv['cod_inventario'])['total_geral'])
+        for inv in inventarios
+    ]
+
+
+def historico_snapshots(servico, limite):
+    return [
+        (inv['cod_inventario'], inv['total_lojas'], inv['total_setores'], inv['total_geral'])
+        for inv in servico.get_historico_inventarios(limite)
+    ]
+
+
+def historico_tendencia(servico, limite):
+    # A série vem do mais antigo para o mais recente
+    return [
+        (ponto['cod_inventario'], ponto['total_lojas'], ponto['total_setores'], ponto['totais']['total_geral'])
+        for ponto in reversed(servico.get_tendencia_inventarios(limite))
+    ]
+
+
+def medir(funcao, repeticoes):
+    """Executa a função várias vezes e retorna (mediana em ms, último resultado)"""
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = funcao()
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    return statistics.median(tempos), resultado
+
+
+def iguais(resultado, referencia):
+    """Mesmos inventários, na mesma ordem, com as mesmas contagens e total geral"""
+    return len(resultado) == len(referencia) and all(
+        a[:3] == b[:3] and math.isclose(a[3], b[3], rel_tol=1e-9)
+        for a, b in zip(resultado, referencia)
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--inventarios', type=int, default=50)
+    parser.add_argument('--lojas', type=int, default=2000)
+    parser.add_argument('--repeticoes', type=int, default=5)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        db_manager = DatabaseManager(os.path.join(diretorio, 'benchmark.db'))
+        servico = RelatorioService(db_manager)
+
+        # Avisos de tipo desconhecido do trânsito seriam repetidos a cada inventário
+        stdout = sys.stdout
+        sys.stdout = open(os.devnull, 'w')
+        try:
+            criar_inventarios(db_manager, args.inventarios, args.lojas)
+            limite = args.inventarios
+            medicoes = {
+                'juncao_cartesiana': medir(lambda: historico_juncao_cartesiana(servico, limite), args.repeticoes),
+                'subconsultas_correlacionadas': medir(lambda: historico_subconsultas(servico, limite), args.repeticoes),
+                'snapshots': medir(lambda: historico_snapshots(servico, limite), args.repeticoes),
+                'tendencia': medir(lambda: historico_tendencia(servico, limite), args.repeticoes),
+            }
+        finally:
+            sys.stdout.close()
+            sys.stdout = stdout
+
+        referencia_ms, referencia = medicoes['juncao_cartesiana']
+        print(f"{args.inventarios} inventários de {args.lojas} lojas, mediana de {args.repeticoes} execuções:")
+        for nome, (tempo_ms, resultado) in medicoes.items():
+            comparacao = 'igual' if iguais(resultado, referencia) else 'DIFERENTE'
+            print(f"  {nome:<30} {tempo_ms:10.2f} ms  {referencia_ms / tempo_ms:8.1f}x  {comparacao}")
+
+        # Fechar as conexões antes de apagar o diretório temporário
+        db_manager.pool.fechar_livres()
+        db_manager.pool_leitura.fechar_livres()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,279 @@
+# benchmarks/totais_por_tipo.py
+"""Benchmark de RelatorioService.get_totais_por_tipo com um inventário sintético grande
+
+Uso (a partir de inventario_ativos/):
+
+    python -m benchmarks.totais_por_tipo --lojas 10000 --repeticoes 20
+
+Compara, sobre o mesmo banco temporário:
+- consultas_por_origem: implementação original (uma consulta por origem, somas das sete
+  colunas e normalização dos tipos do trânsito em laços Python);
+- destino_python: leitura de inventario_totais com a distribuição feita em Python;
+- matriz_sql: a matriz origem × tipo completa resolvida no SQL (implementação atual);
+- matriz_sql_itens: a mesma matriz recalculada direto de contagem_item.
+
+O resultado de destino_python deve ser idêntico ao atual; o da implementação original é
+comparado com tolerância, pois ela dividia o trânsito sem CD setor a setor.
+
+Regras fixadas pela implementação atual (verificadas com igualdade exata contra as linhas
+brutas, veja verificar_regras):
+- trânsito sem SP/ES/RJ no setor: o total de cada tipo é somado e dividido uma única vez
+  por três entre transito_sp, transito_es e transito_rj (a implementação original dividia
+  cada setor e somava as partes, o que só muda o arredondamento de ponto flutuante);
+- fornecedores: cada célula fornecedor_<tipo> é a soma de todas as linhas de todos os
+  fornecedores daquele tipo, já feita no SQL; o serviço apenas atribui a célula.
+"""
+import os
+import sys
+import math
+import random
+import argparse
+import tempfile
+import statistics
+import time
+
+DIRETORIO_APP = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if DIRETORIO_APP not in sys.path:
+    sys.path.insert(0, DIRETORIO_APP)
+
+from database.database_manager import DatabaseManager, ORIGENS_TOTAIS
+from business.relatorio_service import RelatorioService
+
+COLUNAS_LOJA = ['caixa_hb_623', 'caixa_hb_618', 'caixa_hnt_g', 'caixa_hnt_p',
+                'caixa_chocolate', 'caixa_bin', 'pallets_pbr']
+
+# Grafias variadas, como chegam nos CSVs de trânsito
+TIPOS_TRANSITO = ['CAIXA HB 623', 'hb618', 'HNT G', 'caixa_hnt_p', 'Chocolate', 'BIN', 'pallets', 'PBR']
+SETORES_TRANSITO = ['SP - DOCA 1', 'ES - DOCA 2', 'RJ - DOCA 3', 'DOCA EXTERNA', 'PATIO']
+
+
+def popular_banco(db_manager, cod_inventario, lojas, semente=42):
+    """Grava lojas, CDs, setores, trânsito e fornecedores aleatórios no inventário"""
+    aleatorio = random.Random(semente)
+
+    def contagem(**campos):
+        dados = {coluna: aleatorio.randint(0, 300) for coluna in COLUNAS_LOJA}
+        dados.update(campos)
+        return dados
+
+    registros_lojas = [contagem(loja=f'LOJA {i:05d}', regional=f'REGIONAL {i % 12}') for i in range(lojas)]
+    registros_lojas += [contagem(loja=cd, regional='CENTRO_DISTRIBUICAO') for cd in ('CD SP', 'CD ES', 'CD MG')]
+    db_manager.inserir_contagens_lojas_bulk(registros_lojas, cod_inventario)
+
+    db_manager.inserir_contagens_cd_bulk(
+        [contagem(setor=f'SETOR {i:03d}') for i in range(max(lojas // 200, 5))], cod_inventario
+    )
+    db_manager.inserir_dados_transito_bulk(
+        [{'setor': aleatorio.choice(SETORES_TRANSITO), 'tipo_caixa': aleatorio.choice(TIPOS_TRANSITO),
+          'quantidade': aleatorio.randint(1, 500)}
+         for _ in range(max(lojas // 20, 50))],
+        cod_inventario
+    )
+    db_manager.inserir_dados_fornecedor_bulk(
+        [{'tipo_fornecedor': f'FORNECEDOR {i % 7}', 'tipo_caixa': tipo, 'quantidade': aleatorio.randint(1, 900)}
+         for i, tipo in enumerate(db_manager.get_tipos_caixa() * 5)],
+        cod_inventario
+    )
+
+
+def totais_consultas_por_origem(servico, cod_inventario):
+    """Implementação original: uma consulta por origem e somas em laços Python"""
+    db_manager = servico.db_manager
+    tipos_caixa = db_manager.get_tipos_caixa()
+    resultado = servico._get_totais_vazios(tipos_caixa)
+
+    with db_manager.leitura() as conn:
+        cursor = conn.cursor()
+
+        def somar(origem, linhas):
+            for linha in linhas:
+                for coluna in COLUNAS_LOJA:
+                    tipo = coluna[6:] if coluna.startswith('caixa_') else coluna
+                    resultado[f'{origem}_{tipo}'] += linha[coluna] or 0
+
+        cursor.execute('''
+        SELECT * FROM contagem_lojas
+        WHERE cod_inventario = ? AND loja NOT LIKE 'CD %'
+        ''', (cod_inventario,))
+        somar('lojas', cursor.fetchall())
+
+        for cd in ('SP', 'ES'):
+            cursor.execute('''
+            SELECT * FROM contagem_lojas
+            WHERE cod_inventario = ? AND loja = ?
+            ''', (cod_inventario, f'CD {cd}'))
+            somar(f'cd_{cd.lower()}', cursor.fetchall())
+
+        cursor.execute('SELECT * FROM contagem_cd WHERE cod_inventario = ?', (cod_inventario,))
+        somar('cd_rj', cursor.fetchall())
+
+        cursor.execute('''
+        SELECT setor, tipo_caixa, SUM(quantidade) AS total
+        FROM dados_transito
+        WHERE cod_inventario = ?
+        GROUP BY setor, tipo_caixa
+        ''', (cod_inventario,))
+        for row in cursor.fetchall():
+            setor = row['setor'] or ''
+            tipo_caixa = db_manager.normalizar_tipo_caixa(row['tipo_caixa'])
+            quantidade = row['total'] or 0
+            for cd in ('SP', 'ES', 'RJ'):
+                if cd in setor:
+                    resultado[f'transito_{cd.lower()}_{tipo_caixa}'] += quantidade
+                    break
+            else:
+                for cd in ('sp', 'es', 'rj'):
+                    resultado[f'transito_{cd}_{tipo_caixa}'] += quantidade / 3
+
+        cursor.execute('''
+        SELECT tipo_caixa, SUM(quantidade) AS total
+        FROM dados_fornecedor
+        WHERE cod_inventario = ?
+        GROUP BY tipo_caixa
+        ''', (cod_inventario,))
+        for row in cursor.fetchall():
+            resultado[f"fornecedor_{db_manager.normalizar_tipo_caixa(row['tipo_caixa'])}"] += row['total'] or 0
+
+    return _totalizar(resultado, tipos_caixa)
+
+
+def totais_destino_python(servico, cod_inventario):
+    """Leitura de inventario_totais com a distribuição por origem feita em Python"""
+    tipos_caixa = servico.db_manager.get_tipos_caixa()
+    resultado = servico._get_totais_vazios(tipos_caixa)
+    for row in servico.db_manager.get_totais_inventario(cod_inventario):
+        destino, tipo_caixa, quantidade = row['destino'], row['tipo_caixa'], row['total'] or 0
+        if tipo_caixa not in tipos_caixa:
+            continue
+        if destino == 'transito_outros':
+            for cd in ('sp', 'es', 'rj'):
+                resultado[f'transito_{cd}_{tipo_caixa}'] += quantidade / 3
+        else:
+            resultado[f'{destino}_{tipo_caixa}'] += quantidade
+    return _totalizar(resultado, tipos_caixa)
+
+
+def totais_matriz_itens(servico, cod_inventario):
+    """Matriz resolvida no SQL, recalculada de contagem_item"""
+    tipos_caixa = servico.db_manager.get_tipos_caixa()
+    resultado = servico._get_totais_vazios(tipos_caixa)
+    for row in servico.db_manager.get_matriz_totais(cod_inventario, recalcular=True):
+        resultado[f"{row['origem']}_{row['tipo_caixa']}"] = row['total']
+    return _totalizar(resultado, tipos_caixa)
+
+
+def verificar_regras(servico, cod_inventario):
+    """Confere, com igualdade exata, as células de trânsito e de fornecedor contra as linhas brutas
+
+    Retorna a lista de chaves divergentes (vazia se as regras da implementação atual valem).
+    """
+    db_manager = servico.db_manager
+    tipos_caixa = db_manager.get_tipos_caixa()
+    diretos = {(cd, tipo): 0 for cd in ('sp', 'es', 'rj') for tipo in tipos_caixa}
+    outros = {tipo: 0 for tipo in tipos_caixa}
+    fornecedor = {tipo: 0 for tipo in tipos_caixa}
+
+    with db_manager.leitura() as conn:
+        cursor = conn.cursor()
+        cursor.execute('SELECT setor, tipo_caixa, quantidade FROM dados_transito WHERE cod_inventario = ?',
+                       (cod_inventario,))
+        for row in cursor.fetchall():
+            tipo = db_manager.normalizar_tipo_caixa(row['tipo_caixa'])
+            if tipo not in outros:
+                continue
+            setor = row['setor'] or ''
+            cd = next((cd for cd in ('SP', 'ES', 'RJ') if cd in setor), None)
+            if cd:
+                diretos[(cd.lower(), tipo)] += row['quantidade'] or 0
+            else:
+                outros[tipo] += row['quantidade'] or 0
+
+        cursor.execute('SELECT tipo_caixa, quantidade FROM dados_fornecedor WHERE cod_inventario = ?',
+                       (cod_inventario,))
+        for row in cursor.fetchall():
+            tipo = db_manager.normalizar_tipo_caixa(row['tipo_caixa'])
+            if tipo in fornecedor:
+                fornecedor[tipo] += row['quantidade'] or 0
+
+    esperado = {}
+    for tipo in tipos_caixa:
+        for cd in ('sp', 'es', 'rj'):
+            # Sem trânsito sem CD a célula continua inteira
+            parte = outros[tipo] / 3.0 if outros[tipo] else 0
+            esperado[f'transito_{cd}_{tipo}'] = diretos[(cd, tipo)] + parte
+        esperado[f'fornecedor_{tipo}'] = fornecedor[tipo]
+
+    atual = servico.get_totais_por_tipo(cod_inventario)
+    return [chave for chave, valor in esperado.items() if atual[chave] != valor]
+
+
+def _totalizar(resultado, tipos_caixa):
+    """Totais por tipo, por origem e geral (mesma ordem de soma do serviço)"""
+    for tipo in tipos_caixa:
+        resultado[f'total_{tipo}'] = sum(resultado[f'{origem}_{tipo}'] for origem in ORIGENS_TOTAIS)
+    for origem in ORIGENS_TOTAIS:
+        resultado[f'total_{origem}'] = sum(resultado[f'{origem}_{tipo}'] for tipo in tipos_caixa)
+    resultado['total_geral'] = sum(resultado[f'total_{origem}'] for origem in ORIGENS_TOTAIS)
+    return resultado
+
+
+def medir(funcao, repeticoes):
+    """Executa a função várias vezes e retorna (mediana em ms, último resultado)"""
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = funcao()
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    return statistics.median(tempos), resultado
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--lojas', type=int, default=10000)
+    parser.add_argument('--repeticoes', type=int, default=20)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        db_manager = DatabaseManager(os.path.join(diretorio, 'benchmark.db'))
+        servico = RelatorioService(db_manager)
+        cod_inventario = db_manager.iniciar_novo_inventario("Benchmark de totais")
+        popular_banco(db_manager, cod_inventario, args.lojas)
+
+        # Avisos de tipo desconhecido do trânsito seriam repetidos a cada execução
+        stdout = sys.stdout
+        sys.stdout = open(os.devnull, 'w')
+        try:
+            medicoes = {
+                'consultas_por_origem': medir(lambda: totais_consultas_por_origem(servico, cod_inventario), args.repeticoes),
+                'destino_python': medir(lambda: totais_destino_python(servico, cod_inventario), args.repeticoes),
+                'matriz_sql': medir(lambda: servico.get_totais_por_tipo(cod_inventario), args.repeticoes),
+                'matriz_sql_itens': medir(lambda: totais_matriz_itens(servico, cod_inventario), args.repeticoes),
+            }
+            divergencias = verificar_regras(servico, cod_inventario)
+        finally:
+            sys.stdout.close()
+            sys.stdout = stdout
+
+        atual = medicoes['matriz_sql'][1]
+        referencia = medicoes['consultas_por_origem'][0]
+        print(f"{args.lojas} lojas, mediana de {args.repeticoes} execuções:")
+        for nome, (tempo_ms, resultado) in medicoes.items():
+            if nome == 'consultas_por_origem':
+                igual = all(math.isclose(resultado[chave], atual[chave], rel_tol=1e-9) for chave in atual)
+                comparacao = 'igual (com tolerância)' if igual and resultado.keys() == atual.keys() else 'DIFERENTE'
+            else:
+                comparacao = 'idêntico' if resultado == atual else 'DIFERENTE'
+            print(f"  {nome:<22} {tempo_ms:9.2f} ms  {referencia / tempo_ms:8.1f}x  {comparacao}")
+        if divergencias:
+            print(f"  regras de trânsito/fornecedor VIOLADAS: {', '.join(divergencias)}")
+        else:
+            print("  regras de trânsito/fornecedor: ok (igualdade exata)")
+
+        # Fechar as conexões antes de apagar o diretório temporário
+        db_manager.pool.fechar_livres()
+        db_manager.pool_leitura.fechar_livres()
+        return 1 if divergencias else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,206 @@
+# business/async_service.py
+import asyncio
+import copy
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from database.database_manager import DatabaseManager
+from business.inventario_service import InventarioService
+from business.relatorio_service import RelatorioService
+
+
+class ExecutorBanco:
+    """Executor limitado de threads para as chamadas síncronas dos serviços
+
+    Cada thread do executor usa suas próprias conexões do pool do DatabaseManager.
+    Cancelar a tarefa que aguarda uma chamada em andamento interrompe a consulta
+    SQLite daquela chamada (sqlite3.Connection.interrupt), e a transação é desfeita.
+    """
+
+    def __init__(self, db_manager, max_workers=None):
+        self.db_manager = db_manager
+        # Sem mais threads do que conexões: evita que as chamadas esperem pelo pool
+        self.max_workers = max_workers or min(4, db_manager.pool.max_conexoes)
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='banco')
+
+    async def executar(self, funcao, *args, **kwargs):
+        """Executa a função em uma thread do executor e aguarda o resultado"""
+        loop = asyncio.get_running_loop()
+        # Identifica esta chamada: a interrupção nunca alcança outra chamada da mesma thread
+        token = object()
+
+        def tarefa():
+            with self.db_manager.chamada(token):
+                return funcao(*args, **kwargs)
+
+        futuro = loop.run_in_executor(self._executor, tarefa)
+        try:
+            return await futuro
+        except asyncio.CancelledError:
+            # Se ainda não começou, o cancelamento do futuro basta; se já está rodando,
+            # a consulta em andamento desta chamada é interrompida
+            self.db_manager.interromper_chamada(token)
+            raise
+
+    def encerrar(self, aguardar=True):
+        """Encerra as threads do executor"""
+        self._executor.shutdown(wait=aguardar)
+
+
+class _ChamadaCompartilhada:
+    """Resultado de uma chamada em andamento, compartilhado por quem a aguarda ao mesmo tempo"""
+
+    def __init__(self, tarefa):
+        self.tarefa = tarefa
+        self.aguardando = 0
+
+
+class _ServicoAsync:
+    """Base dos serviços assíncronos: executor próprio ou compartilhado e chamadas deduplicadas"""
+
+    def __init__(self, db_manager, executor=None, max_workers=None):
+        self._executor_proprio = executor is None
+        self.executor = executor or ExecutorBanco(db_manager, max_workers)
+        self._em_andamento = {}
+
+    async def _executar(self, funcao, *args, **kwargs):
+        """Executa uma chamada síncrona do serviço no executor"""
+        return await self.executor.executar(funcao, *args, **kwargs)
+
+    async def _executar_compartilhado(self, chave, funcao, *args):
+        """Executa a chamada uma única vez para todos que a aguardam simultaneamente
+
+        A chamada só é cancelada quando todos os que a aguardam forem cancelados. Cada um
+        recebe sua própria cópia do resultado, que pode ser alterada sem afetar os demais.
+        """
+        chamada = self._em_andamento.get(chave)
+        if chamada is None:
+            tarefa = asyncio.ensure_future(self._executar(funcao, *args))
+            chamada = _ChamadaCompartilhada(tarefa)
+            self._em_andamento[chave] = chamada
+            tarefa.add_done_callback(functools.partial(self._remover_chamada, chave, chamada))
+
+        chamada.aguardando += 1
+        try:
+            resultado = await asyncio.shield(chamada.tarefa)
+        except asyncio.CancelledError:
+            if chamada.aguardando == 1 and not chamada.tarefa.done():
+                chamada.tarefa.cancel()
+            raise
+        finally:
+            chamada.aguardando -= 1
+        return copy.deepcopy(resultado)
+
+    def _remover_chamada(self, chave, chamada, _tarefa):
+        """Remove a chamada concluída, para que a próxima seja calculada de novo"""
+        if self._em_andamento.get(chave) is chamada:
+            del self._em_andamento[chave]
+
+    def encerrar(self):
+        """Encerra o executor, se ele tiver sido criado por este serviço"""
+        if self._executor_proprio:
+            self.executor.encerrar()
+
+
+class AsyncInventarioService(_ServicoAsync):
+    """Versão assíncrona (awaitable) das operações do InventarioService"""
+
+    def __init__(self, inventario_service=None, executor=None, max_workers=None):
+        self.servico = inventario_service or InventarioService()
+        super().__init__(self.servico.db_manager, executor, max_workers)
+
+    @property
+    def inventario_atual(self):
+        """Código do inventário atual do serviço síncrono"""
+        return self.servico.inventario_atual
+
+    async def carregar_inventario_existente(self, cod_inventario):
+        """Carrega um inventário existente"""
+        return await self._executar(self.servico.carregar_inventario_existente, cod_inventario)
+
+    async def importar_dados_csv(self, usuario="sistema", carga_rapida=False):
+        """Importa todos os dados dos CSVs para o inventário atual"""
+        return await self._executar(self.servico.importar_dados_csv, usuario, carga_rapida)
+
+    async def importar_dados_csv_silencioso(self, usuario="sistema"):
+        """Importa os dados dos CSVs sem mensagens de erro para o usuário"""
+        return await self._executar(self.servico.importar_dados_csv_silencioso, usuario)
+
+    async def adicionar_contagem_loja_manual(self, loja, tipo_caixa, quantidade, finalizar=False):
+        """Adiciona manualmente a contagem de uma loja"""
+        return await self._executar(
+            self.servico.adicionar_contagem_loja_manual, loja, tipo_caixa, quantidade, finalizar
+        )
+
+    async def adicionar_dados_transito_manual(self, tipo_transito, tipo_caixa, quantidade):
+        """Adiciona manualmente dados de trânsito"""
+        return await self._executar(
+            self.servico.adicionar_dados_transito_manual, tipo_transito, tipo_caixa, quantidade
+        )
+
+    async def adicionar_dados_fornecedor(self, tipo_fornecedor, tipo_caixa, quantidade):
+        """Adiciona dados de fornecedor"""
+        return await self._executar(
+            self.servico.adicionar_dados_fornecedor, tipo_fornecedor, tipo_caixa, quantidade
+        )
+
+    async def get_resumo_inventario_atual(self):
+        """Retorna um resumo do inventário atual"""
+        return await self._executar_compartilhado(
+            ('resumo', self.servico.inventario_atual), self.servico.get_resumo_inventario_atual
+        )
+
+    async def get_lojas_pendentes(self):
+        """Retorna as lojas pendentes do inventário atual"""
+        return await self._executar_compartilhado(
+            ('lojas_pendentes', self.servico.inventario_atual), self.servico.get_lojas_pendentes
+        )
+
+
+class AsyncRelatorioService(_ServicoAsync):
+    """Versão assíncrona (awaitable) das consultas do RelatorioService
+
+    Consultas iguais aguardadas ao mesmo tempo (mesmo método e inventário) são
+    executadas uma única vez e cada um recebe uma cópia do resultado.
+    """
+
+    def __init__(self, relatorio_service=None, db_manager=None, executor=None, max_workers=None):
+        if relatorio_service is None:
+            relatorio_service = RelatorioService(db_manager or DatabaseManager())
+        self.servico = relatorio_service
+        super().__init__(self.servico.db_manager, executor, max_workers)
+
+    async def get_totais_por_tipo(self, cod_inventario):
+        """Retorna os totais de cada tipo de caixa no inventário"""
+        return await self._executar_compartilhado(
+            ('totais', cod_inventario), self.servico.get_totais_por_tipo, cod_inventario
+        )
+
+    async def get_resumo_status(self, cod_inventario):
+        """Retorna o resumo de status de lojas e setores"""
+        return await self._executar_compartilhado(
+            ('status', cod_inventario), self.servico.get_resumo_status, cod_inventario
+        )
+
+    async def get_dados_dashboard(self, cod_inventario):
+        """Retorna os dados consolidados do dashboard"""
+        return await self._executar_compartilhado(
+            ('dashboard', cod_inventario), self.servico.get_dados_dashboard, cod_inventario
+        )
+
+    async def get_historico_inventarios(self, limite=10):
+        """Retorna um histórico dos últimos inventários finalizados"""
+        return await self._executar_compartilhado(
+            ('historico', limite), self.servico.get_historico_inventarios, limite
+        )
+
+    async def get_tendencia_inventarios(self, limite=12):
+        """Retorna a série de totais dos últimos inventários finalizados"""
+        return await self._executar_compartilhado(
+            ('tendencia', limite), self.servico.get_tendencia_inventarios, limite
+        )
+
+    async def comparar_inventarios(self, cod_inventario_atual, cod_inventario_anterior):
+        """Compara dois inventários e retorna as diferenças"""
+        return await self._executar(
+            self.servico.comparar_inventarios, cod_inventario_atual, cod_inventario_anterior
+        )
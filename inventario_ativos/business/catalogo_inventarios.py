@@ -0,0 +1,78 @@
+# business/catalogo_inventarios.py
+import threading
+
+
+class CatalogoInventarios:
+    """Catálogo de inventários (inventario_meta) em memória
+
+    A tabela é pequena e muda pouco: é lida uma única vez e mantida em um dicionário
+    por código, com a lista já ordenada do mais recente para o mais antigo. O cache é
+    invalidado quando um inventário é criado ou finalizado (`invalidar()`); códigos que
+    não estão no cache são buscados pela chave primária, então inventários criados por
+    outro processo também são encontrados. As consultas devolvem cópias dos dicionários
+    do cache, que podem ser alteradas por quem as recebe.
+    """
+
+    def __init__(self, db_manager):
+        self.db_manager = db_manager
+        self._lock = threading.Lock()
+        self._por_codigo = None
+        self._ordenados = None
+
+    def _carregar(self):
+        """Carrega o catálogo, se ainda não estiver em memória, e retorna (por_codigo, ordenados)"""
+        with self._lock:
+            if self._por_codigo is None:
+                ordenados = [dict(row) for row in self.db_manager.get_todos_inventarios()]
+                self._ordenados = ordenados
+                self._por_codigo = {inv['cod_inventario']: inv for inv in ordenados}
+            return self._por_codigo, self._ordenados
+
+    def invalidar(self):
+        """Descarta o catálogo em memória; a próxima consulta relê o banco"""
+        with self._lock:
+            self._por_codigo = None
+            self._ordenados = None
+
+    def obter(self, cod_inventario):
+        """Retorna os dados de um inventário pelo código, ou None"""
+        if not cod_inventario:
+            return None
+
+        por_codigo, _ = self._carregar()
+        inventario = por_codigo.get(cod_inventario)
+        if inventario is not None:
+            return dict(inventario)
+
+        # Fora do cache: pode ter sido criado por outro processo
+        row = self.db_manager.get_inventario(cod_inventario)
+        if row is None:
+            return None
+        self.invalidar()
+        return dict(row)
+
+    def existe(self, cod_inventario):
+        """Verifica se o inventário existe"""
+        return self.obter(cod_inventario) is not None
+
+    def listar(self, status=None, pagina=1, tamanho_pagina=None):
+        """Lista os inventários do mais recente para o mais antigo
+
+        status: filtra por status ('em_andamento' ou 'finalizado')
+        pagina, tamanho_pagina: paginação (páginas a partir de 1; sem tamanho, tudo)
+        """
+        _, ordenados = self._carregar()
+        if status:
+            ordenados = [inv for inv in ordenados if inv['status'] == status]
+
+        if tamanho_pagina:
+            inicio = (max(pagina, 1) - 1) * tamanho_pagina
+            ordenados = ordenados[inicio:inicio + tamanho_pagina]
+        return [dict(inv) for inv in ordenados]
+
+    def contar(self, status=None):
+        """Retorna quantos inventários existem (opcionalmente só de um status)"""
+        _, ordenados = self._carregar()
+        if not status:
+            return len(ordenados)
+        return sum(1 for inv in ordenados if inv['status'] == status)
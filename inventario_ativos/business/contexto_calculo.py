@@ -0,0 +1,54 @@
+# business/contexto_calculo.py
+import copy
+import time
+from collections import Counter
+
+
+class ContextoCalculo:
+    """Memória dos sub-resultados calculados durante uma requisição (ex.: uma atualização do dashboard)
+
+    Cada sub-resultado é identificado por uma chave (ex.: ('totais_por_tipo', cod_inventario)) e
+    calculado uma única vez enquanto o contexto existir. Quem pede recebe uma cópia, para que
+    alterações feitas por um chamador não apareçam para os outros. O contexto também conta
+    cálculos e reaproveitamentos por tipo de sub-resultado.
+    """
+
+    def __init__(self, nome):
+        self.nome = nome
+        self.inicio = time.perf_counter()
+        self._valores = {}
+        self.calculos = Counter()
+        self.acertos = Counter()
+        self.tempo_calculo_ms = Counter()
+
+    def obter(self, chave, calcular):
+        """Retorna o sub-resultado da chave, calculando-o com calcular() na primeira vez"""
+        tipo = chave[0] if isinstance(chave, tuple) else chave
+        if chave in self._valores:
+            self.acertos[tipo] += 1
+        else:
+            inicio = time.perf_counter()
+            self._valores[chave] = calcular()
+            self.calculos[tipo] += 1
+            self.tempo_calculo_ms[tipo] += (time.perf_counter() - inicio) * 1000
+        return copy.deepcopy(self._valores[chave])
+
+    def resumo(self):
+        """Retorna as contagens de cálculos e reaproveitamentos da requisição"""
+        return {
+            'requisicao': self.nome,
+            'duracao_ms': round((time.perf_counter() - self.inicio) * 1000, 2),
+            'calculos': dict(self.calculos),
+            'acertos': dict(self.acertos),
+            'tempo_calculo_ms': {tipo: round(ms, 2) for tipo, ms in self.tempo_calculo_ms.items()}
+        }
+
+    def descrever(self):
+        """Resumo em uma linha, para o console"""
+        tipos = sorted(set(self.calculos) | set(self.acertos))
+        detalhes = ', '.join(
+            f"{tipo}: {self.calculos[tipo]} calculado(s), {self.acertos[tipo]} reaproveitado(s)"
+            for tipo in tipos
+        )
+        duracao_ms = (time.perf_counter() - self.inicio) * 1000
+        return f"Requisição {self.nome} em {duracao_ms:.1f} ms - {detalhes or 'nenhum sub-resultado'}"
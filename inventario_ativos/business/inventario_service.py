@@ -1,7 +1,11 @@
 # business/inventario_service.py
 import os
 import datetime
+import threading
 from database.database_manager import DatabaseManager
+from database.arquivo_inventarios import ArquivoInventarios
+from database.carga_rapida import CargaRapida, CargaRapidaError
+from business.catalogo_inventarios import CatalogoInventarios
 from import_export.csv_manager import CSVManager
 
 class InventarioService:
@@ -9,35 +13,57 @@ class InventarioService:
         """Inicializa o serviço de inventário"""
         self.db_manager = db_manager or DatabaseManager()
         self.csv_manager = csv_manager or CSVManager(self.db_manager)
+        self.catalogo = CatalogoInventarios(self.db_manager)
         self.inventario_atual = None
+        
+        # As importações alteram o estado do CSVManager (cache e datas de carga):
+        # só uma por vez, mesmo quando disparadas de threads diferentes
+        self._lock_importacao = threading.Lock()
     
     def iniciar_novo_inventario(self, descricao=""):
         """Inicia um novo inventário no sistema"""
         self.inventario_atual = self.db_manager.iniciar_novo_inventario(descricao)
+        self.catalogo.invalidar()
         return self.inventario_atual
     
     def carregar_inventario_existente(self, cod_inventario):
         """Carrega um inventário existente"""
-        # Verificar se o inventário existe
-        inventarios = self.db_manager.get_todos_inventarios()
-        for inv in inventarios:
-            if inv['cod_inventario'] == cod_inventario:
-                self.inventario_atual = cod_inventario
-                return True
-        return False
+        if not self.catalogo.existe(cod_inventario):
+            return False
+        self.inventario_atual = cod_inventario
+        return True
+    
+    def get_inventario(self, cod_inventario):
+        """Retorna os dados de um inventário pelo código, ou None"""
+        return self.catalogo.obter(cod_inventario)
     
-    def get_inventarios_disponiveis(self):
-        """Retorna a lista de inventários disponíveis"""
-        return self.db_manager.get_todos_inventarios()
+    def get_inventarios_disponiveis(self, pagina=1, tamanho_pagina=None):
+        """Retorna a lista de inventários disponíveis (paginada se tamanho_pagina for informado)"""
+        return self.catalogo.listar(pagina=pagina, tamanho_pagina=tamanho_pagina)
     
-    def get_inventarios_ativos(self):
-        """Retorna a lista de inventários ativos"""
-        return self.db_manager.get_inventarios_ativos()
+    def get_inventarios_ativos(self, pagina=1, tamanho_pagina=None):
+        """Retorna a lista de inventários ativos (paginada se tamanho_pagina for informado)"""
+        return self.catalogo.listar('em_andamento', pagina, tamanho_pagina)
+    
+    def contar_inventarios(self, status=None):
+        """Retorna quantos inventários existem (opcionalmente só de um status)"""
+        return self.catalogo.contar(status)
     
     def finalizar_inventario_atual(self):
         """Finaliza o inventário atual"""
         if self.inventario_atual:
             self.db_manager.finalizar_inventario(self.inventario_atual)
+            self.catalogo.invalidar()
+            
+            if self.db_manager.arquivar_ao_finalizar:
+                # Falhar no arquivamento não desfaz a finalização: o inventário fica na base
+                # principal e pode ser arquivado depois
+                try:
+                    resultado = ArquivoInventarios(self.db_manager).arquivar(self.inventario_atual)
+                    if resultado['status'] != 'success':
+                        print(f"Aviso: {resultado['message']}")
+                except Exception as e:
+                    print(f"Aviso: não foi possível arquivar o inventário {self.inventario_atual}: {e}")
             return True
         return False
     
@@ -62,19 +88,23 @@ class InventarioService:
         
         return self.db_manager.get_lojas_pendentes(self.inventario_atual)
     
-    def importar_dados_csv(self, usuario="sistema"):
-        """Importa todos os dados dos CSVs para o inventário atual"""
+    def importar_dados_csv(self, usuario="sistema", carga_rapida=False):
+        """Importa todos os dados dos CSVs para o inventário atual
+
+        carga_rapida: importa tudo em uma sessão de carga em massa (CargaRapida), indicada
+            para a carga inicial de um inventário; se qualquer arquivo falhar, nada é gravado
+        """
         if not self.inventario_atual:
             return {
                 'status': False, 
                 'message': 'Nenhum inventário ativo. Inicie um novo inventário ou carregue um existente.'
             }
         
-        resultados = {
-            'contagem_lojas': self.csv_manager.importar_contagem_lojas(self.inventario_atual, usuario),
-            'contagem_cd': self.csv_manager.importar_contagem_cd(self.inventario_atual, usuario),
-            'dados_transito': self.csv_manager.importar_dados_transito(self.inventario_atual, usuario)
-        }
+        if carga_rapida:
+            return self._importar_dados_csv_carga_rapida(usuario)
+        
+        with self._lock_importacao:
+            resultados = self._importar_todos_csv(usuario)
         
         # Verificar se ocorreu algum erro
         erros = [r['message'] for k, r in resultados.items() if not r['status']]
@@ -92,6 +122,46 @@ class InventarioService:
             'resultados': resultados
         }
     
+    def inventario_atual_vazio(self):
+        """Verifica se o inventário atual ainda não tem nenhuma contagem"""
+        return not self.db_manager.get_totais_inventario(self.inventario_atual)
+    
+    def _importar_todos_csv(self, usuario, force_reload=False):
+        """Importa os três CSVs de contagem para o inventário atual"""
+        return {
+            'contagem_lojas': self.csv_manager.importar_contagem_lojas(self.inventario_atual, usuario, force_reload),
+            'contagem_cd': self.csv_manager.importar_contagem_cd(self.inventario_atual, usuario, force_reload),
+            'dados_transito': self.csv_manager.importar_dados_transito(self.inventario_atual, usuario, force_reload)
+        }
+    
+    def _importar_dados_csv_carga_rapida(self, usuario):
+        """Importa os CSVs em uma única sessão de carga rápida, desfazendo tudo em caso de erro"""
+        carga = CargaRapida(self.db_manager, self.inventario_atual)
+        
+        with self._lock_importacao:
+            # As datas de carga dos CSVs só valem se a carga for confirmada
+            datas_carga = dict(self.csv_manager.last_load_time)
+            resultados = {}
+            try:
+                with carga.sessao():
+                    resultados = self._importar_todos_csv(usuario, force_reload=True)
+                    erros = [r['message'] for r in resultados.values() if not r['status']]
+                    if erros:
+                        raise CargaRapidaError(", ".join(erros))
+            except CargaRapidaError as e:
+                self.csv_manager.last_load_time = datas_carga
+                return {
+                    'status': False,
+                    'message': f'Importação desfeita, nenhum dado foi gravado: {str(e)}',
+                    'resultados': resultados
+                }
+        
+        return {
+            'status': True,
+            'message': f'Todos os dados foram importados com sucesso (carga rápida em {carga.duracao_ms} ms).',
+            'resultados': resultados
+        }
+    
     def adicionar_dados_fornecedor(self, tipo_fornecedor, tipo_caixa, quantidade):
         """Adiciona dados de fornecedor ao inventário atual"""
         if not self.inventario_atual:
@@ -146,154 +216,149 @@ class InventarioService:
             }
         
         try:
-            conn = self.db_manager.get_connection()
-            cursor = conn.cursor()
-            
-            # Verificar se é um CD
-            is_cd = "CD " in loja
-            
-            # Definir a tabela alvo com base no tipo de local
-            if is_cd:
-                # Se for um CD, usar a tabela contagem_cd
-                
-                # Extrair o nome do setor do CD (formato: "CD SP" -> "CD SP")
-                setor = loja
-                
-                # Verificar se o setor já existe no inventário atual
-                cursor.execute('''
-                SELECT * FROM contagem_cd 
-                WHERE setor = ? AND cod_inventario = ?
-                ''', (setor, self.inventario_atual))
+            with self.db_manager.conexao() as conn:
+                cursor = conn.cursor()
                 
-                registro_existente = cursor.fetchone()
+                # Verificar se é um CD
+                is_cd = "CD " in loja
                 
-                # Timestamp atual
-                timestamp = datetime.datetime.now().isoformat()
-                
-                if registro_existente:
-                    # O setor já existe, vamos atualizar apenas o valor do tipo de caixa
-                    tipo_coluna = f'caixa_{tipo_caixa}'
+                # Definir a tabela alvo com base no tipo de local
+                if is_cd:
+                    # Se for um CD, usar a tabela contagem_cd
                     
-                    # Se for finalizar, atualizamos o status
-                    status_update = ", status = 'finalizado'" if finalizar else ""
+                    # Extrair o nome do setor do CD (formato: "CD SP" -> "CD SP")
+                    setor = loja
                     
-                    cursor.execute(f'''
-                    UPDATE contagem_cd 
-                    SET {tipo_coluna} = {tipo_coluna} + ?, 
-                        updated_at = ?
-                        {status_update}
+                    # Verificar se o setor já existe no inventário atual
+                    cursor.execute('''
+                    SELECT * FROM contagem_cd 
                     WHERE setor = ? AND cod_inventario = ?
-                    ''', (quantidade, timestamp, setor, self.inventario_atual))
-                    
-                    conn.commit()
-                    
-                    status_msg = " e marcado como finalizado" if finalizar else ""
-                    return {
-                        'status': True,
-                        'message': f'Contagem adicionada com sucesso para o CD {setor}{status_msg}.'
-                    }
-                else:
-                    # O setor não existe, vamos criar um novo registro
-                    # Inicializar todos os tipos com 0
-                    dados_cd = {
-                        'setor': setor,
-                        'data': timestamp,
-                        'caixa_hb_623': 0,
-                        'caixa_hb_618': 0,
-                        'caixa_hnt_g': 0,
-                        'caixa_hnt_p': 0,
-                        'caixa_chocolate': 0,
-                        'caixa_bin': 0,
-                        'pallets_pbr': 0,
-                        'status': 'finalizado' if finalizar else 'pendente',
-                        'usuario': 'sistema'
-                    }
+                    ''', (setor, self.inventario_atual))
                     
-                    # Atualizar o valor do tipo específico
-                    dados_cd[f'caixa_{tipo_caixa}'] = quantidade
+                    registro_existente = cursor.fetchone()
                     
-                    # Inserir novo registro
-                    self.db_manager.inserir_contagem_cd(dados_cd, self.inventario_atual)
+                    # Timestamp atual
+                    timestamp = datetime.datetime.now().isoformat()
                     
-                    status_msg = " e marcado como finalizado" if finalizar else ""
-                    return {
-                        'status': True,
-                        'message': f'Nova contagem criada para o CD {setor}{status_msg}.'
-                    }
-            else:
-                # Caso seja uma loja normal, continuar com o comportamento original
-                
-                # Verificar se a loja já existe no inventário atual
-                cursor.execute('''
-                SELECT * FROM contagem_lojas 
-                WHERE loja = ? AND cod_inventario = ?
-                ''', (loja, self.inventario_atual))
-                
-                loja_existente = cursor.fetchone()
-                
-                # Obter informações da regional da loja
-                regional = ''
-                lojas_csv = self.csv_manager.ler_lojas_csv()
-                for l in lojas_csv:
-                    if l.get('loja') == loja:
-                        regional = l.get('regional', '')
-                        break
-                
-                # Timestamp atual
-                timestamp = datetime.datetime.now().isoformat()
-                
-                if loja_existente:
-                    # A loja já existe, vamos atualizar apenas o valor do tipo de caixa
-                    tipo_coluna = f'caixa_{tipo_caixa}'
-                    
-                    # Se for finalizar, atualizamos o status
-                    status_update = ", status = 'finalizado'" if finalizar else ""
+                    if registro_existente:
+                        # O setor já existe, vamos atualizar apenas o valor do tipo de caixa
+                        tipo_coluna = f'caixa_{tipo_caixa}'
+                        
+                        # Se for finalizar, atualizamos o status
+                        status_update = ", status = 'finalizado'" if finalizar else ""
+                        
+                        cursor.execute(f'''
+                        UPDATE contagem_cd 
+                        SET {tipo_coluna} = {tipo_coluna} + ?, 
+                            updated_at = ?
+                            {status_update}
+                        WHERE setor = ? AND cod_inventario = ?
+                        ''', (quantidade, timestamp, setor, self.inventario_atual))
+                        
+                        conn.commit()
+                        
+                        status_msg = " e marcado como finalizado" if finalizar else ""
+                        return {
+                            'status': True,
+                            'message': f'Contagem adicionada com sucesso para o CD {setor}{status_msg}.'
+                        }
+                    else:
+                        # O setor não existe, vamos criar um novo registro
+                        # Inicializar todos os tipos com 0
+                        dados_cd = {
+                            'setor': setor,
+                            'data': timestamp,
+                            'caixa_hb_623': 0,
+                            'caixa_hb_618': 0,
+                            'caixa_hnt_g': 0,
+                            'caixa_hnt_p': 0,
+                            'caixa_chocolate': 0,
+                            'caixa_bin': 0,
+                            'pallets_pbr': 0,
+                            'status': 'finalizado' if finalizar else 'pendente',
+                            'usuario': 'sistema'
+                        }
+                        
+                        # Atualizar o valor do tipo específico
+                        dados_cd[f'caixa_{tipo_caixa}'] = quantidade
+                        
+                        # Inserir novo registro
+                        self.db_manager.inserir_contagem_cd(dados_cd, self.inventario_atual)
+                        
+                        status_msg = " e marcado como finalizado" if finalizar else ""
+                        return {
+                            'status': True,
+                            'message': f'Nova contagem criada para o CD {setor}{status_msg}.'
+                        }
+                else:
+                    # Caso seja uma loja normal, continuar com o comportamento original
                     
-                    cursor.execute(f'''
-                    UPDATE contagem_lojas 
-                    SET {tipo_coluna} = {tipo_coluna} + ?, 
-                        updated_at = ?
-                        {status_update}
+                    # Verificar se a loja já existe no inventário atual
+                    cursor.execute('''
+                    SELECT * FROM contagem_lojas 
                     WHERE loja = ? AND cod_inventario = ?
-                    ''', (quantidade, timestamp, loja, self.inventario_atual))
+                    ''', (loja, self.inventario_atual))
                     
-                    conn.commit()
+                    loja_existente = cursor.fetchone()
                     
-                    status_msg = " e marcada como finalizada" if finalizar else ""
-                    return {
-                        'status': True,
-                        'message': f'Contagem adicionada com sucesso para a loja {loja}{status_msg}.'
-                    }
-                else:
-                    # A loja não existe, vamos criar um novo registro
-                    # Inicializar todos os tipos com 0
-                    dados_loja = {
-                        'loja': loja,
-                        'regional': regional,
-                        'setor': 'Geral',
-                        'data': timestamp,
-                        'caixa_hb_623': 0,
-                        'caixa_hb_618': 0,
-                        'caixa_hnt_g': 0,
-                        'caixa_hnt_p': 0,
-                        'caixa_chocolate': 0,
-                        'caixa_bin': 0,
-                        'pallets_pbr': 0,
-                        'status': 'finalizado' if finalizar else 'pendente',
-                        'usuario': 'sistema'
-                    }
-                    
-                    # Atualizar o valor do tipo específico
-                    dados_loja[f'caixa_{tipo_caixa}'] = quantidade
+                    # Obter informações da regional da loja (índice do cadastro por nome)
+                    regional = self.csv_manager.cadastro.regional_da_loja(loja)
                     
-                    # Inserir novo registro
-                    self.db_manager.inserir_contagem_loja(dados_loja, self.inventario_atual)
+                    # Timestamp atual
+                    timestamp = datetime.datetime.now().isoformat()
                     
-                    status_msg = " e marcada como finalizada" if finalizar else ""
-                    return {
-                        'status': True,
-                        'message': f'Nova contagem criada para a loja {loja}{status_msg}.'
-                    }
+                    if loja_existente:
+                        # A loja já existe, vamos atualizar apenas o valor do tipo de caixa
+                        tipo_coluna = f'caixa_{tipo_caixa}'
+                        
+                        # Se for finalizar, atualizamos o status
+                        status_update = ", status = 'finalizado'" if finalizar else ""
+                        
+                        cursor.execute(f'''
+                        UPDATE contagem_lojas 
+                        SET {tipo_coluna} = {tipo_coluna} + ?, 
+                            updated_at = ?
+                            {status_update}
+                        WHERE loja = ? AND cod_inventario = ?
+                        ''', (quantidade, timestamp, loja, self.inventario_atual))
+                        
+                        conn.commit()
+                        
+                        status_msg = " e marcada como finalizada" if finalizar else ""
+                        return {
+                            'status': True,
+                            'message': f'Contagem adicionada com sucesso para a loja {loja}{status_msg}.'
+                        }
+                    else:
+                        # A loja não existe, vamos criar um novo registro
+                        # Inicializar todos os tipos com 0
+                        dados_loja = {
+                            'loja': loja,
+                            'regional': regional,
+                            'setor': 'Geral',
+                            'data': timestamp,
+                            'caixa_hb_623': 0,
+                            'caixa_hb_618': 0,
+                            'caixa_hnt_g': 0,
+                            'caixa_hnt_p': 0,
+                            'caixa_chocolate': 0,
+                            'caixa_bin': 0,
+                            'pallets_pbr': 0,
+                            'status': 'finalizado' if finalizar else 'pendente',
+                            'usuario': 'sistema'
+                        }
+                        
+                        # Atualizar o valor do tipo específico
+                        dados_loja[f'caixa_{tipo_caixa}'] = quantidade
+                        
+                        # Inserir novo registro
+                        self.db_manager.inserir_contagem_loja(dados_loja, self.inventario_atual)
+                        
+                        status_msg = " e marcada como finalizada" if finalizar else ""
+                        return {
+                            'status': True,
+                            'message': f'Nova contagem criada para a loja {loja}{status_msg}.'
+                        }
         except Exception as e:
             return {
                 'status': False,
@@ -370,15 +435,7 @@ class InventarioService:
     
     def get_tipo_caixas(self):
         """Retorna os tipos de caixas disponíveis no sistema"""
-        return [
-            'hb_623',
-            'hb_618',
-            'hnt_g',
-            'hnt_p',
-            'chocolate',
-            'bin',
-            'pallets_pbr'
-        ]
+        return self.db_manager.get_tipos_caixa()
     
     def get_tipos_fornecedor(self):
         """Retorna os tipos de fornecedores disponíveis no sistema"""
@@ -424,11 +481,8 @@ class InventarioService:
                 'modified': False
             }
         
-        resultados = {
-            'contagem_lojas': self.csv_manager.importar_contagem_lojas(self.inventario_atual, usuario),
-            'contagem_cd': self.csv_manager.importar_contagem_cd(self.inventario_atual, usuario),
-            'dados_transito': self.csv_manager.importar_dados_transito(self.inventario_atual, usuario)
-        }
+        with self._lock_importacao:
+            resultados = self._importar_todos_csv(usuario)
         
         # Verificar se algum arquivo foi modificado
         arquivos_modificados = any(r.get('modified', False) for _, r in resultados.items() if r['status'])
@@ -472,52 +526,52 @@ def atualizar_totais_lojas_setores(self):
         }
     
     try:
-        conn = self.db_manager.get_connection()
-        cursor = conn.cursor()
-        
-        # Lê os CSVs de lojas e setores
-        lojas_csv = self.csv_manager.ler_lojas_csv(force_reload=True)
-        setores_csv = self.csv_manager.ler_setores_csv(force_reload=True)
-        
-        # Obtém todas as lojas do banco
-        cursor.execute('''
-        SELECT loja FROM contagem_lojas
-        WHERE cod_inventario = ?
-        ''', (self.inventario_atual,))
-        
-        lojas_banco = [row['loja'] for row in cursor.fetchall()]
-        
-        # Obtém todos os setores do banco
-        cursor.execute('''
-        SELECT setor FROM contagem_cd
-        WHERE cod_inventario = ?
-        ''', (self.inventario_atual,))
-        
-        setores_banco = [row['setor'] for row in cursor.fetchall()]
-        
-        # Conta quantas lojas faltam ser inseridas
-        lojas_ausentes = []
-        for loja in lojas_csv:
-            nome_loja = loja.get('loja', '').strip()
-            if nome_loja and nome_loja not in lojas_banco:
-                lojas_ausentes.append(nome_loja)
-        
-        # Conta quantos setores faltam ser inseridos
-        setores_ausentes = []
-        for setor in setores_csv:
-            nome_setor = setor.get('setor', '').strip()
-            if nome_setor and nome_setor not in setores_banco:
-                setores_ausentes.append(nome_setor)
-        
-        return {
-            'status': True,
-            'lojas_total': len(lojas_csv),
-            'lojas_preenchidas': len(lojas_banco),
-            'lojas_ausentes': len(lojas_ausentes),
-            'setores_total': len(setores_csv),
-            'setores_preenchidos': len(setores_banco),
-            'setores_ausentes': len(setores_ausentes)
-        }
+        with self.db_manager.conexao() as conn:
+            cursor = conn.cursor()
+            
+            # Lê os CSVs de lojas e setores
+            lojas_csv = self.csv_manager.ler_lojas_csv(force_reload=True)
+            setores_csv = self.csv_manager.ler_setores_csv(force_reload=True)
+            
+            # Obtém todas as lojas do banco
+            cursor.execute('''
+            SELECT loja FROM contagem_lojas
+            WHERE cod_inventario = ?
+            ''', (self.inventario_atual,))
+            
+            lojas_banco = [row['loja'] for row in cursor.fetchall()]
+            
+            # Obtém todos os setores do banco
+            cursor.execute('''
+            SELECT setor FROM contagem_cd
+            WHERE cod_inventario = ?
+            ''', (self.inventario_atual,))
+            
+            setores_banco = [row['setor'] for row in cursor.fetchall()]
+            
+            # Conta quantas lojas faltam ser inseridas
+            lojas_ausentes = []
+            for loja in lojas_csv:
+                nome_loja = loja.get('loja', '').strip()
+                if nome_loja and nome_loja not in lojas_banco:
+                    lojas_ausentes.append(nome_loja)
+            
+            # Conta quantos setores faltam ser inseridos
+            setores_ausentes = []
+            for setor in setores_csv:
+                nome_setor = setor.get('setor', '').strip()
+                if nome_setor and nome_setor not in setores_banco:
+                    setores_ausentes.append(nome_setor)
+            
+            return {
+                'status': True,
+                'lojas_total': len(lojas_csv),
+                'lojas_preenchidas': len(lojas_banco),
+                'lojas_ausentes': len(lojas_ausentes),
+                'setores_total': len(setores_csv),
+                'setores_preenchidos': len(setores_banco),
+                'setores_ausentes': len(setores_ausentes)
+            }
     
     except Exception as e:
         return {
@@ -538,79 +592,79 @@ def criar_lojas_setores_faltantes(self):
         }
     
     try:
-        conn = self.db_manager.get_connection()
-        cursor = conn.cursor()
-        
-        # Lê os CSVs de lojas e setores
-        lojas_csv = self.csv_manager.ler_lojas_csv(force_reload=True)
-        setores_csv = self.csv_manager.ler_setores_csv(force_reload=True)
-        
-        # Obtém todas as lojas do banco
-        cursor.execute('''
-        SELECT loja FROM contagem_lojas
-        WHERE cod_inventario = ?
-        ''', (self.inventario_atual,))
-        
-        lojas_banco = [row['loja'] for row in cursor.fetchall()]
-        
-        # Obtém todos os setores do banco
-        cursor.execute('''
-        SELECT setor FROM contagem_cd
-        WHERE cod_inventario = ?
-        ''', (self.inventario_atual,))
-        
-        setores_banco = [row['setor'] for row in cursor.fetchall()]
-        
-        # Timestamp atual
-        timestamp = datetime.datetime.now().isoformat()
-        
-        # Cria registros para lojas ausentes
-        lojas_criadas = 0
-        for loja in lojas_csv:
-            nome_loja = loja.get('loja', '').strip()
-            regional = loja.get('regional', '').strip()
+        with self.db_manager.conexao() as conn:
+            cursor = conn.cursor()
             
-            if nome_loja and nome_loja not in lojas_banco:
-                cursor.execute('''
-                INSERT INTO contagem_lojas (
-                    loja, regional, setor, data, status, 
-                    caixa_hb_623, caixa_hb_618, caixa_hnt_g, caixa_hnt_p, 
-                    caixa_chocolate, caixa_bin, pallets_pbr,
-                    usuario, created_at, updated_at, cod_inventario
-                ) VALUES (?, ?, ?, ?, ?, 0, 0, 0, 0, 0, 0, 0, ?, ?, ?, ?)
-                ''', (
-                    nome_loja, regional, 'Geral', timestamp, 'pendente', 
-                    'sistema', timestamp, timestamp, self.inventario_atual
-                ))
-                lojas_criadas += 1
-        
-        # Cria registros para setores ausentes
-        setores_criados = 0
-        for setor in setores_csv:
-            nome_setor = setor.get('setor', '').strip()
+            # Lê os CSVs de lojas e setores
+            lojas_csv = self.csv_manager.ler_lojas_csv(force_reload=True)
+            setores_csv = self.csv_manager.ler_setores_csv(force_reload=True)
             
-            if nome_setor and nome_setor not in setores_banco:
-                cursor.execute('''
-                INSERT INTO contagem_cd (
-                    setor, data, status, 
-                    caixa_hb_623, caixa_hb_618, caixa_hnt_g, caixa_hnt_p, 
-                    caixa_chocolate, caixa_bin, pallets_pbr,
-                    usuario, created_at, updated_at, cod_inventario
-                ) VALUES (?, ?, ?, 0, 0, 0, 0, 0, 0, 0, ?, ?, ?, ?)
-                ''', (
-                    nome_setor, timestamp, 'pendente', 
-                    'sistema', timestamp, timestamp, self.inventario_atual
-                ))
-                setores_criados += 1
-        
-        conn.commit()
-        
-        return {
-            'status': True,
-            'message': f'Criados {lojas_criadas} lojas e {setores_criados} setores ausentes',
-            'lojas_criadas': lojas_criadas,
-            'setores_criados': setores_criados
-        }
+            # Obtém todas as lojas do banco
+            cursor.execute('''
+            SELECT loja FROM contagem_lojas
+            WHERE cod_inventario = ?
+            ''', (self.inventario_atual,))
+            
+            lojas_banco = [row['loja'] for row in cursor.fetchall()]
+            
+            # Obtém todos os setores do banco
+            cursor.execute('''
+            SELECT setor FROM contagem_cd
+            WHERE cod_inventario = ?
+            ''', (self.inventario_atual,))
+            
+            setores_banco = [row['setor'] for row in cursor.fetchall()]
+            
+            # Timestamp atual
+            timestamp = datetime.datetime.now().isoformat()
+            
+            # Cria registros para lojas ausentes
+            lojas_criadas = 0
+            for loja in lojas_csv:
+                nome_loja = loja.get('loja', '').strip()
+                regional = loja.get('regional', '').strip()
+                
+                if nome_loja and nome_loja not in lojas_banco:
+                    cursor.execute('''
+                    INSERT INTO contagem_lojas (
+                        loja, regional, setor, data, status, 
+                        caixa_hb_623, caixa_hb_618, caixa_hnt_g, caixa_hnt_p, 
+                        caixa_chocolate, caixa_bin, pallets_pbr,
+                        usuario, created_at, updated_at, cod_inventario
+                    ) VALUES (?, ?, ?, ?, ?, 0, 0, 0, 0, 0, 0, 0, ?, ?, ?, ?)
+                    ''', (
+                        nome_loja, regional, 'Geral', timestamp, 'pendente', 
+                        'sistema', timestamp, timestamp, self.inventario_atual
+                    ))
+                    lojas_criadas += 1
+            
+            # Cria registros para setores ausentes
+            setores_criados = 0
+            for setor in setores_csv:
+                nome_setor = setor.get('setor', '').strip()
+                
+                if nome_setor and nome_setor not in setores_banco:
+                    cursor.execute('''
+                    INSERT INTO contagem_cd (
+                        setor, data, status, 
+                        caixa_hb_623, caixa_hb_618, caixa_hnt_g, caixa_hnt_p, 
+                        caixa_chocolate, caixa_bin, pallets_pbr,
+                        usuario, created_at, updated_at, cod_inventario
+                    ) VALUES (?, ?, ?, 0, 0, 0, 0, 0, 0, 0, ?, ?, ?, ?)
+                    ''', (
+                        nome_setor, timestamp, 'pendente', 
+                        'sistema', timestamp, timestamp, self.inventario_atual
+                    ))
+                    setores_criados += 1
+            
+            conn.commit()
+            
+            return {
+                'status': True,
+                'message': f'Criados {lojas_criadas} lojas e {setores_criados} setores ausentes',
+                'lojas_criadas': lojas_criadas,
+                'setores_criados': setores_criados
+            }
     
     except Exception as e:
         return {
@@ -1,295 +1,170 @@
 # business/relatorio_service.py
 import os
 import datetime
+import threading
 from collections import defaultdict
+from contextlib import contextmanager
+from business.contexto_calculo import ContextoCalculo
+from database.database_manager import ORIGENS_TOTAIS
+from import_export.cadastro_referencia import CadastroReferencia
+from utils.config import Config
 
 class RelatorioService:
     def __init__(self, db_manager):
         """Inicializa o serviço de relatórios"""
         self.db_manager = db_manager
+        # Lojas e setores de referência: instância compartilhada por todo o processo
+        caminhos = Config().get_csv_paths()
+        self.cadastro = CadastroReferencia.compartilhado(caminhos['lojas_path'], caminhos['setores_path'])
+        # Contexto da requisição em andamento em cada thread (o serviço é compartilhado)
+        self._local = threading.local()
+        # Resumo do último contexto encerrado (cálculos e reaproveitamentos)
+        self.ultimo_contexto = None
+    
+    @contextmanager
+    def contexto_requisicao(self, nome):
+        """Calcula cada sub-resultado (totais, status, histórico) uma única vez dentro do bloco
+        
+        Blocos aninhados na mesma thread usam o contexto mais externo.
+        """
+        contexto = getattr(self._local, 'contexto', None)
+        if contexto is not None:
+            yield contexto
+            return
+        
+        contexto = ContextoCalculo(nome)
+        self._local.contexto = contexto
+        try:
+            yield contexto
+        finally:
+            self._local.contexto = None
+            self.ultimo_contexto = contexto.resumo()
+            if self.db_manager.perfilador is not None:
+                print(contexto.descrever())
+    
+    def _memorizado(self, chave, calcular):
+        """Usa o contexto da requisição atual, se houver, para não repetir o cálculo"""
+        contexto = getattr(self._local, 'contexto', None)
+        if contexto is None:
+            return calcular()
+        return contexto.obter(chave, calcular)
     
     def get_totais_por_tipo(self, cod_inventario):
         """Retorna os totais de cada tipo de caixa no inventário com separação por origem correta"""
+        return self._memorizado(
+            ('totais_por_tipo', cod_inventario),
+            lambda: self._calcular_totais_por_tipo(cod_inventario)
+        )
+    
+    def _calcular_totais_por_tipo(self, cod_inventario):
+        """Calcula os totais por origem e tipo de caixa do inventário"""
         if not cod_inventario:
             print("Aviso: get_totais_por_tipo chamado com cod_inventario vazio")
             return self._get_totais_vazios()
             
         try:
-            dados = self.db_manager.get_dados_inventario_atual(cod_inventario)
-            if not dados:
-                print(f"Aviso: Não foi possível obter dados para o inventário {cod_inventario}")
-                return self._get_totais_vazios()
-            
-            tipos_caixa = [
-                'hb_623', 'hb_618', 'hnt_g', 'hnt_p', 
-                'chocolate', 'bin', 'pallets_pbr'
-            ]
-            
-            resultado = {}
-            
-            # Inicializar todos os totais com zero para evitar valores None
-            for prefixo in ['cd_sp_', 'cd_es_', 'cd_rj_', 'lojas_', 'transito_sp_', 'transito_es_', 'transito_rj_', 'fornecedor_', 'total_']:
-                for tipo in tipos_caixa:
-                    resultado[f'{prefixo}{tipo}'] = 0
-                    
-            # Obter conexão para consultas mais detalhadas
-            conn = self.db_manager.get_connection()
-            cursor = conn.cursor()
-            
-            # --- PROCESSAMENTO DAS LOJAS ---
-            # Obter todas as lojas (excluindo CDs)
-            cursor.execute('''
-            SELECT loja, caixa_hb_623, caixa_hb_618, caixa_hnt_g, caixa_hnt_p, 
-                caixa_chocolate, caixa_bin, pallets_pbr
-            FROM contagem_lojas
-            WHERE cod_inventario = ? AND loja NOT LIKE 'CD %'
-            ''', (cod_inventario,))
-            
-            lojas = cursor.fetchall()
-            
-            # Somar por tipo de caixa
-            for loja in lojas:
-                resultado['lojas_hb_623'] += loja['caixa_hb_623'] or 0
-                resultado['lojas_hb_618'] += loja['caixa_hb_618'] or 0
-                resultado['lojas_hnt_g'] += loja['caixa_hnt_g'] or 0
-                resultado['lojas_hnt_p'] += loja['caixa_hnt_p'] or 0
-                resultado['lojas_chocolate'] += loja['caixa_chocolate'] or 0
-                resultado['lojas_bin'] += loja['caixa_bin'] or 0
-                resultado['lojas_pallets_pbr'] += loja['pallets_pbr'] or 0
-            
-            # --- PROCESSAMENTO DOS CDs a partir da tabela contagem_lojas (para CDs específicos) ---
-            # CD SP
-            cursor.execute('''
-            SELECT loja, caixa_hb_623, caixa_hb_618, caixa_hnt_g, caixa_hnt_p, 
-                caixa_chocolate, caixa_bin, pallets_pbr
-            FROM contagem_lojas
-            WHERE cod_inventario = ? AND loja = 'CD SP'
-            ''', (cod_inventario,))
-            
-            cd_sp = cursor.fetchone()
-            if cd_sp:
-                resultado['cd_sp_hb_623'] += cd_sp['caixa_hb_623'] or 0
-                resultado['cd_sp_hb_618'] += cd_sp['caixa_hb_618'] or 0
-                resultado['cd_sp_hnt_g'] += cd_sp['caixa_hnt_g'] or 0
-                resultado['cd_sp_hnt_p'] += cd_sp['caixa_hnt_p'] or 0
-                resultado['cd_sp_chocolate'] += cd_sp['caixa_chocolate'] or 0
-                resultado['cd_sp_bin'] += cd_sp['caixa_bin'] or 0
-                resultado['cd_sp_pallets_pbr'] += cd_sp['pallets_pbr'] or 0
-            
-            # CD ES
-            cursor.execute('''
-            SELECT loja, caixa_hb_623, caixa_hb_618, caixa_hnt_g, caixa_hnt_p, 
-                caixa_chocolate, caixa_bin, pallets_pbr
-            FROM contagem_lojas
-            WHERE cod_inventario = ? AND loja = 'CD ES'
-            ''', (cod_inventario,))
-            
-            cd_es = cursor.fetchone()
-            if cd_es:
-                resultado['cd_es_hb_623'] += cd_es['caixa_hb_623'] or 0
-                resultado['cd_es_hb_618'] += cd_es['caixa_hb_618'] or 0
-                resultado['cd_es_hnt_g'] += cd_es['caixa_hnt_g'] or 0
-                resultado['cd_es_hnt_p'] += cd_es['caixa_hnt_p'] or 0
-                resultado['cd_es_chocolate'] += cd_es['caixa_chocolate'] or 0
-                resultado['cd_es_bin'] += cd_es['caixa_bin'] or 0
-                resultado['cd_es_pallets_pbr'] += cd_es['pallets_pbr'] or 0
-            
-            # --- PROCESSAMENTO DOS SETORES DO CD (tabela contagem_cd) ---
-            # Somamos todos os setores como CD RJ
-            cursor.execute('''
-            SELECT setor, caixa_hb_623, caixa_hb_618, caixa_hnt_g, caixa_hnt_p, 
-                caixa_chocolate, caixa_bin, pallets_pbr
-            FROM contagem_cd
-            WHERE cod_inventario = ?
-            ''', (cod_inventario,))
-            
-            setores = cursor.fetchall()
-            
-            # Somar por tipo de caixa
-            for setor in setores:
-                resultado['cd_rj_hb_623'] += setor['caixa_hb_623'] or 0
-                resultado['cd_rj_hb_618'] += setor['caixa_hb_618'] or 0
-                resultado['cd_rj_hnt_g'] += setor['caixa_hnt_g'] or 0
-                resultado['cd_rj_hnt_p'] += setor['caixa_hnt_p'] or 0
-                resultado['cd_rj_chocolate'] += setor['caixa_chocolate'] or 0
-                resultado['cd_rj_bin'] += setor['caixa_bin'] or 0
-                resultado['cd_rj_pallets_pbr'] += setor['pallets_pbr'] or 0
-            
-            # --- PROCESSAMENTO DOS DADOS EM TRÂNSITO ---
-            # Consultar dados de trânsito separados por CD
-            cursor.execute('''
-            SELECT setor, tipo_caixa, SUM(quantidade) as total
-            FROM dados_transito
-            WHERE cod_inventario = ?
-            GROUP BY setor, tipo_caixa
-            ''', (cod_inventario,))
-            
-            # Função auxiliar para normalizar os tipos de caixa
-            def normalizar_tipo_caixa(tipo):
-                # Remover prefixos como "CAIXA " ou "caixa_" e converter para minúsculas
-                tipo = tipo.lower()
-                if tipo.startswith('caixa_'):
-                    tipo = tipo[6:]
-                elif tipo.startswith('caixa '):
-                    tipo = tipo[6:]
-                
-                # Mapeamento de nomes alternativos para os padrões
-                mapeamento = {
-                    'hb623': 'hb_623',
-                    'hb618': 'hb_618',
-                    'hntg': 'hnt_g',
-                    'hntp': 'hnt_p',
-                    'bin': 'bin',
-                    'chocolate': 'chocolate',
-                    'pallets': 'pallets_pbr',
-                    'palletes': 'pallets_pbr',
-                    'palletspbr': 'pallets_pbr',
-                    'pallets_pbr': 'pallets_pbr',
-                    'pbr': 'pallets_pbr'
-                }
-                
-                # Remover underscores e espaços para correspondência mais flexível
-                tipo_limpo = tipo.replace('_', '').replace(' ', '')
-                
-                # Verificar no mapeamento
-                if tipo_limpo in mapeamento:
-                    return mapeamento[tipo_limpo]
-                
-                # Verificar se é um dos tipos padrão
-                for tipo_padrao in tipos_caixa:
-                    if tipo_limpo == tipo_padrao.replace('_', ''):
-                        return tipo_padrao
-                
-                # Se não encontrou correspondência, registrar e tratar como desconhecido
-                print(f"Aviso: Tipo de caixa desconhecido: '{tipo}', considerando como 'bin'")
-                return 'bin'  # Valor padrão para tipos desconhecidos
-            
-            # Processar resultados separando por origem
-            for row in cursor.fetchall():
-                setor = row['setor'] or ''
-                tipo_caixa_original = row['tipo_caixa']
-                quantidade = row['total'] or 0
-                
-                # Normalizar o tipo de caixa
-                tipo_caixa = normalizar_tipo_caixa(tipo_caixa_original)
-                
-                # Registrar caso seja diferente para depuração
-                if tipo_caixa != tipo_caixa_original:
-                    print(f"Normalizando tipo de caixa: '{tipo_caixa_original}' -> '{tipo_caixa}'")
-                
-                # Mapear para as chaves específicas no resultado
-                if 'SP' in setor:
-                    resultado[f'transito_sp_{tipo_caixa}'] += quantidade
-                elif 'ES' in setor:
-                    resultado[f'transito_es_{tipo_caixa}'] += quantidade
-                elif 'RJ' in setor:
-                    resultado[f'transito_rj_{tipo_caixa}'] += quantidade
-                else:
-                    # Se não encaixar em nenhum CD específico, dividir igualmente entre os três
-                    # Isso pode ser ajustado conforme a regra de negócio
-                    resultado[f'transito_sp_{tipo_caixa}'] += quantidade / 3
-                    resultado[f'transito_es_{tipo_caixa}'] += quantidade / 3
-                    resultado[f'transito_rj_{tipo_caixa}'] += quantidade / 3
-            
-            # --- PROCESSAMENTO DOS DADOS DE FORNECEDOR ---
-            # Obter totais dos fornecedores do banco
-            cursor.execute('''
-            SELECT tipo_caixa, SUM(quantidade) as total
-            FROM dados_fornecedor
-            WHERE cod_inventario = ?
-            GROUP BY tipo_caixa
-            ''', (cod_inventario,))
-            
-            for row in cursor.fetchall():
-                tipo_caixa_original = row['tipo_caixa']
-                # Usar a mesma função de normalização definida acima
-                tipo_caixa = normalizar_tipo_caixa(tipo_caixa_original)
-                
-                # Registrar caso seja diferente para depuração
-                if tipo_caixa != tipo_caixa_original:
-                    print(f"Normalizando tipo de caixa (fornecedor): '{tipo_caixa_original}' -> '{tipo_caixa}'")
-                
-                resultado[f'fornecedor_{tipo_caixa}'] = row['total'] or 0
-            
-            # --- CALCULAR TOTAIS GERAIS ---
-            # Calcular totais por tipo
-            for tipo in tipos_caixa:
-                total_tipo = (
-                    resultado[f'lojas_{tipo}'] + 
-                    resultado[f'cd_sp_{tipo}'] + 
-                    resultado[f'cd_es_{tipo}'] + 
-                    resultado[f'cd_rj_{tipo}'] + 
-                    resultado[f'transito_sp_{tipo}'] + 
-                    resultado[f'transito_es_{tipo}'] + 
-                    resultado[f'transito_rj_{tipo}'] + 
-                    resultado[f'fornecedor_{tipo}']
-                )
-                resultado[f'total_{tipo}'] = total_tipo
-            
-            # Calcular totais por origem
-            resultado['total_lojas'] = sum(resultado[f'lojas_{tipo}'] for tipo in tipos_caixa)
-            resultado['total_cd_sp'] = sum(resultado[f'cd_sp_{tipo}'] for tipo in tipos_caixa)
-            resultado['total_cd_es'] = sum(resultado[f'cd_es_{tipo}'] for tipo in tipos_caixa)
-            resultado['total_cd_rj'] = sum(resultado[f'cd_rj_{tipo}'] for tipo in tipos_caixa)
-            resultado['total_transito_sp'] = sum(resultado[f'transito_sp_{tipo}'] for tipo in tipos_caixa)
-            resultado['total_transito_es'] = sum(resultado[f'transito_es_{tipo}'] for tipo in tipos_caixa)
-            resultado['total_transito_rj'] = sum(resultado[f'transito_rj_{tipo}'] for tipo in tipos_caixa)
-            resultado['total_fornecedor'] = sum(resultado[f'fornecedor_{tipo}'] for tipo in tipos_caixa)
+            tipos_caixa = self.db_manager.get_tipos_caixa()
+            resultado = self._get_totais_vazios(tipos_caixa)
             
-            # Total geral
-            resultado['total_geral'] = (
-                resultado['total_lojas'] + 
-                resultado['total_cd_sp'] + 
-                resultado['total_cd_es'] + 
-                resultado['total_cd_rj'] + 
-                resultado['total_transito_sp'] + 
-                resultado['total_transito_es'] + 
-                resultado['total_transito_rj'] + 
-                resultado['total_fornecedor']
-            )
+            # Matriz origem × tipo completa em uma única consulta: a classificação por destino, a
+            # divisão do trânsito sem CD e o descarte de tipos inativos já são feitos no SQL
+            for row in self.db_manager.get_matriz_totais(cod_inventario):
+                resultado[f"{row['origem']}_{row['tipo_caixa']}"] = row['total']
             
-            return resultado
+            return self._totalizar(resultado, tipos_caixa)
             
         except Exception as e:
             import traceback
             print(f"Erro em get_totais_por_tipo: {e}")
             print(traceback.format_exc())
             return self._get_totais_vazios()
+    
+    def _totalizar(self, resultado, tipos_caixa):
+        """Preenche os totais por tipo, por origem e o total geral a partir das células da matriz"""
+        # Calcular totais por tipo
+        for tipo in tipos_caixa:
+            resultado[f'total_{tipo}'] = sum(resultado[f'{origem}_{tipo}'] for origem in ORIGENS_TOTAIS)
+        
+        # Calcular totais por origem
+        for origem in ORIGENS_TOTAIS:
+            resultado[f'total_{origem}'] = sum(resultado[f'{origem}_{tipo}'] for tipo in tipos_caixa)
+        
+        # Total geral
+        resultado['total_geral'] = sum(resultado[f'total_{origem}'] for origem in ORIGENS_TOTAIS)
         
+        return resultado
+    
+    def get_totais_snapshot(self, cod_inventario):
+        """Retorna os totais congelados na finalização do inventário, ou None se ele não tiver snapshot"""
+        return self._memorizado(
+            ('totais_snapshot', cod_inventario),
+            lambda: self._calcular_totais_snapshot(cod_inventario)
+        )
+    
+    def _calcular_totais_snapshot(self, cod_inventario):
+        """Monta a estrutura de get_totais_por_tipo a partir do snapshot do inventário"""
+        snapshot = self.db_manager.get_snapshot_inventario(cod_inventario)
+        if snapshot is None:
+            return None
+        
+        # Tipos do catálogo atual mais os que existiam na finalização (mesmo que hoje inativos)
+        tipos_caixa = self.db_manager.get_tipos_caixa()
+        tipos_caixa = tipos_caixa + [
+            tipo for tipo in dict.fromkeys(row['tipo_caixa'] for row in snapshot['totais'])
+            if tipo not in tipos_caixa
+        ]
+        resultado = self._get_totais_vazios(tipos_caixa)
+        for row in snapshot['totais']:
+            resultado[f"{row['origem']}_{row['tipo_caixa']}"] = row['total']
+        
+        return self._totalizar(resultado, tipos_caixa)
+    
+    def _get_totais_comparacao(self, cod_inventario):
+        """Totais usados nas comparações: o snapshot dos finalizados, o cálculo atual dos demais"""
+        totais = self.get_totais_snapshot(cod_inventario)
+        if totais is None:
+            totais = self.get_totais_por_tipo(cod_inventario)
+        return totais
+    
+    def _get_totais_vazios(self, tipos_caixa=None):
+        """Retorna a estrutura de totais com todos os valores zerados"""
+        if tipos_caixa is None:
+            try:
+                tipos_caixa = self.db_manager.get_tipos_caixa()
+            except Exception:
+                tipos_caixa = ['hb_623', 'hb_618', 'hnt_g', 'hnt_p', 'chocolate', 'bin', 'pallets_pbr']
+        
+        origens = ['cd_sp', 'cd_es', 'cd_rj', 'lojas', 'transito_sp', 'transito_es', 'transito_rj', 'fornecedor']
+        
+        # Inicializar todos os totais com zero para evitar valores None
+        resultado = {}
+        for prefixo in origens + ['total']:
+            for tipo in tipos_caixa:
+                resultado[f'{prefixo}_{tipo}'] = 0
+        
+        for origem in origens:
+            resultado[f'total_{origem}'] = 0
+        resultado['total_geral'] = 0
+        
+        return resultado
 
     def get_resumo_status(self, cod_inventario):
         """Retorna um resumo do status do inventário"""
+        return self._memorizado(
+            ('resumo_status', cod_inventario),
+            lambda: self._calcular_resumo_status(cod_inventario)
+        )
+    
+    def _calcular_resumo_status(self, cod_inventario):
+        """Calcula o resumo de status (com o cadastro de lojas e setores dos CSVs)"""
         # Obter dados do banco
         dados = self.db_manager.get_dados_inventario_atual(cod_inventario)
         
-        # Tentar obter referência ao CSV manager
-        csv_manager = None
-        try:
-            from import_export.csv_manager import CSVManager
-            csv_manager = CSVManager(self.db_manager)
-            print("CSV Manager criado com sucesso")
-        except Exception as e:
-            print(f"Aviso: Não foi possível criar CSVManager: {e}")
-        
-        # Dados de lojas e setores do CSV
-        total_lojas_csv = 0
-        total_setores_csv = 0
-        lojas_csv = []
-        setores_csv = []
-        
-        # Obter total de lojas do CSV
-        if csv_manager:
-            try:
-                lojas_csv = csv_manager.ler_lojas_csv(force_reload=True)
-                total_lojas_csv = len(lojas_csv)
-                
-                setores_csv = csv_manager.ler_setores_csv(force_reload=True)
-                total_setores_csv = len(setores_csv)
-                
-                print(f"Total de lojas no CSV: {total_lojas_csv}")
-                print(f"Total de setores no CSV: {total_setores_csv}")
-            except Exception as e:
-                print(f"Erro ao ler CSV: {e}")
+        # Cadastro de lojas e setores compartilhado: os CSVs só são relidos se tiverem mudado
+        lojas_csv = self.cadastro.lojas()
+        setores_csv = self.cadastro.setores()
+        total_lojas_csv = len(lojas_csv)
+        total_setores_csv = len(setores_csv)
         
         # Dados de lojas do banco
         lojas_cadastradas = dados['dados_lojas'].get('total_lojas', 0) or 0
@@ -321,30 +196,24 @@ class RelatorioService:
         resumo_regional = []
         
         # Se temos acesso ao CSV, criar um mapeamento mais preciso de lojas por regional
-        if csv_manager and total_lojas_csv > 0:
-            # Agrupar lojas por regional no CSV
+        if total_lojas_csv > 0:
+            # Lojas do CSV por regional (índice mantido pelo cadastro)
             regionais_csv = {}
             try:
-                for loja in lojas_csv:
-                    regional = loja.get('regional', 'Sem Regional')
-                    if not regional:
-                        regional = 'Sem Regional'
-                    
-                    if regional not in regionais_csv:
-                        regionais_csv[regional] = []
-                    
-                    regionais_csv[regional].append(loja.get('loja', ''))
+                for regional, lojas in self.cadastro.lojas_por_regional().items():
+                    regionais_csv.setdefault(regional or 'Sem Regional', []).extend(loja['loja'] for loja in lojas)
                 
                 # Mapa de lojas finalizadas para verificação rápida
                 lojas_finalizadas_map = {}
                 try:
-                    cursor = self.db_manager.get_connection().cursor()
-                    cursor.execute('''
-                    SELECT loja FROM contagem_lojas
-                    WHERE cod_inventario = ? AND status = 'finalizado'
-                    ''', (cod_inventario,))
-                    for row in cursor.fetchall():
-                        lojas_finalizadas_map[row['loja']] = True
+                    with self.db_manager.leitura_inventario(cod_inventario) as (conn, esquema):
+                        cursor = conn.cursor()
+                        cursor.execute(f'''
+                        SELECT loja FROM {esquema}.contagem_lojas
+                        WHERE cod_inventario = ? AND status = 'finalizado'
+                        ''', (cod_inventario,))
+                        for row in cursor.fetchall():
+                            lojas_finalizadas_map[row['loja']] = True
                 except Exception as e:
                     print(f"Erro ao obter lojas finalizadas: {e}")
                 
@@ -403,17 +272,18 @@ class RelatorioService:
         
         # Criar lista de setores pendentes comparando CSV com o banco
         setores_pendentes = []
-        if csv_manager and total_setores_csv > 0:
+        if total_setores_csv > 0:
             # Mapa de setores finalizados para verificação rápida
             setores_finalizados_map = {}
             try:
-                cursor = self.db_manager.get_connection().cursor()
-                cursor.execute('''
-                SELECT setor FROM contagem_cd
-                WHERE cod_inventario = ? AND status = 'finalizado'
-                ''', (cod_inventario,))
-                for row in cursor.fetchall():
-                    setores_finalizados_map[row['setor']] = True
+                with self.db_manager.leitura_inventario(cod_inventario) as (conn, esquema):
+                    cursor = conn.cursor()
+                    cursor.execute(f'''
+                    SELECT setor FROM {esquema}.contagem_cd
+                    WHERE cod_inventario = ? AND status = 'finalizado'
+                    ''', (cod_inventario,))
+                    for row in cursor.fetchall():
+                        setores_finalizados_map[row['setor']] = True
             except Exception as e:
                 print(f"Erro ao obter setores finalizados: {e}")
             
@@ -442,8 +312,8 @@ class RelatorioService:
     def comparar_inventarios(self, cod_inventario_atual, cod_inventario_anterior):
         """Compara dois inventários e retorna as diferenças"""
         # Obter dados dos dois inventários
-        dados_atual = self.get_totais_por_tipo(cod_inventario_atual)
-        dados_anterior = self.get_totais_por_tipo(cod_inventario_anterior)
+        dados_atual = self._get_totais_comparacao(cod_inventario_atual)
+        dados_anterior = self._get_totais_comparacao(cod_inventario_anterior)
         
         tipos_caixa = [
             'hb_623', 'hb_618', 'hnt_g', 'hnt_p', 
@@ -484,46 +354,93 @@ class RelatorioService:
     
     def get_historico_inventarios(self, limite=10):
         """Retorna um histórico dos últimos inventários finalizados"""
-        conn = self.db_manager.get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-        SELECT im.cod_inventario, im.data_inicio, im.data_fim,
-               COUNT(DISTINCT cl.loja) as total_lojas,
-               COUNT(DISTINCT cd.setor) as total_setores
-        FROM inventario_meta im
-        LEFT JOIN contagem_lojas cl ON im.cod_inventario = cl.cod_inventario
-        LEFT JOIN contagem_cd cd ON im.cod_inventario = cd.cod_inventario
-        WHERE im.status = 'finalizado'
-        GROUP BY im.cod_inventario
-        ORDER BY im.data_fim DESC
-        LIMIT ?
-        ''', (limite,))
-        
-        inventarios = cursor.fetchall()
-        
+        return self._memorizado(
+            ('historico_inventarios', limite),
+            lambda: self._calcular_historico_inventarios(limite)
+        )
+    
+    def _calcular_historico_inventarios(self, limite):
+        """Monta o histórico dos últimos inventários finalizados a partir dos snapshots"""
+        # Uma única consulta pelo índice de data_fim: os totais e as contagens de lojas e setores
+        # foram congelados na finalização (inclusive dos inventários já arquivados)
         resultados = []
-        for inv in inventarios:
-            cod_inventario = inv['cod_inventario']
-            totais = self.get_totais_por_tipo(cod_inventario)
-            
+        for snapshot in self.db_manager.get_snapshots_recentes(limite):
             # Formatar datas
-            data_inicio = datetime.datetime.fromisoformat(inv['data_inicio']).strftime('%d/%m/%Y')
-            data_fim = datetime.datetime.fromisoformat(inv['data_fim']).strftime('%d/%m/%Y')
+            data_inicio = datetime.datetime.fromisoformat(snapshot['data_inicio']).strftime('%d/%m/%Y')
+            data_fim = datetime.datetime.fromisoformat(snapshot['data_fim']).strftime('%d/%m/%Y')
             
             resultados.append({
-                'cod_inventario': cod_inventario,
+                'cod_inventario': snapshot['cod_inventario'],
                 'data_inicio': data_inicio,
                 'data_fim': data_fim,
-                'total_lojas': inv['total_lojas'],
-                'total_setores': inv['total_setores'],
-                'total_geral': totais['total_geral']
+                'duracao_segundos': snapshot['duracao_segundos'],
+                'total_lojas': snapshot['total_lojas'],
+                'total_setores': snapshot['total_setores'],
+                'total_geral': snapshot['total_geral']
             })
         
         return resultados
     
+    def get_tendencia_inventarios(self, limite=12):
+        """Retorna a série dos últimos inventários finalizados, do mais antigo para o mais recente"""
+        return self._memorizado(
+            ('tendencia_inventarios', limite),
+            lambda: self._calcular_tendencia_inventarios(limite)
+        )
+    
+    def _calcular_tendencia_inventarios(self, limite):
+        """Monta a série a partir dos snapshots (uma única consulta para todos os inventários)
+        
+        Cada ponto traz os totais completos (por tipo, por origem e geral), as lojas e setores
+        contados e, em 'variacao', a diferença de cada total para o ponto anterior (None no primeiro).
+        """
+        linhas = self.db_manager.get_serie_snapshots(limite)
+        
+        # Todos os pontos com as mesmas chaves: tipos do catálogo atual e os que só existem nos snapshots
+        tipos_caixa = self.db_manager.get_tipos_caixa()
+        tipos_caixa = tipos_caixa + [
+            tipo for tipo in dict.fromkeys(row['tipo_caixa'] for row in linhas if row['tipo_caixa'])
+            if tipo not in tipos_caixa
+        ]
+        
+        pontos = []
+        for row in linhas:
+            if not pontos or pontos[-1]['cod_inventario'] != row['cod_inventario']:
+                pontos.append({
+                    'cod_inventario': row['cod_inventario'],
+                    'data_inicio': row['data_inicio'],
+                    'data_fim': row['data_fim'],
+                    'duracao_segundos': row['duracao_segundos'],
+                    'total_lojas': row['total_lojas'],
+                    'total_setores': row['total_setores'],
+                    'totais': self._get_totais_vazios(tipos_caixa)
+                })
+            if row['origem'] is not None:
+                pontos[-1]['totais'][f"{row['origem']}_{row['tipo_caixa']}"] = row['total']
+        
+        anterior = None
+        for ponto in pontos:
+            self._totalizar(ponto['totais'], tipos_caixa)
+            valores = {chave: valor for chave, valor in ponto['totais'].items() if chave.startswith('total_')}
+            valores['lojas_contadas'] = ponto['total_lojas']
+            valores['setores_contados'] = ponto['total_setores']
+            
+            ponto['variacao'] = None
+            if anterior is not None:
+                ponto['variacao'] = {chave: valor - anterior[chave] for chave, valor in valores.items()}
+            anterior = valores
+        
+        return pontos
+    
     def get_dados_dashboard(self, cod_inventario):
         """Retorna os dados para o dashboard com informações detalhadas de cada origem"""
+        # Totais, status e histórico são pedidos mais de uma vez (inclusive pela comparação):
+        # dentro da requisição cada um é calculado uma única vez
+        with self.contexto_requisicao('get_dados_dashboard'):
+            return self._montar_dados_dashboard(cod_inventario)
+    
+    def _montar_dados_dashboard(self, cod_inventario):
+        """Monta os dados do dashboard (dentro do contexto da requisição)"""
         if not cod_inventario:
             print("Aviso: get_dados_dashboard chamado com cod_inventario vazio")
             return self._get_dados_dashboard_vazio()
@@ -544,95 +461,95 @@ class RelatorioService:
                 comparacao = self.comparar_inventarios(cod_inventario, inventarios_anteriores[0]['cod_inventario'])
             
             # Obter informações do inventário atual
-            conn = self.db_manager.get_connection()
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-            SELECT * FROM inventario_meta WHERE cod_inventario = ?
-            ''', (cod_inventario,))
-            
-            info_inventario = cursor.fetchone()
-            
-            # Extrair metadados do inventário
-            meta = {}
-            if info_inventario:
-                data_inicio = datetime.datetime.fromisoformat(info_inventario['data_inicio'])
-                data_inicio_str = data_inicio.strftime('%d/%m/%Y %H:%M')
+            with self.db_manager.leitura_inventario(cod_inventario) as (conn, esquema):
+                cursor = conn.cursor()
                 
-                meta = {
-                    'cod_inventario': info_inventario['cod_inventario'],
-                    'data_inicio': data_inicio_str,
-                    'status': info_inventario['status'],
-                    'descricao': info_inventario['descricao'],
-                    'duracao': None
-                }
+                cursor.execute('''
+                SELECT * FROM inventario_meta WHERE cod_inventario = ?
+                ''', (cod_inventario,))
+                
+                info_inventario = cursor.fetchone()
                 
-                # Calcular duração se o inventário estiver finalizado
-                if info_inventario['data_fim']:
-                    data_fim = datetime.datetime.fromisoformat(info_inventario['data_fim'])
-                    duracao = data_fim - data_inicio
-                    horas, resto = divmod(duracao.seconds, 3600)
-                    minutos, _ = divmod(resto, 60)
+                # Extrair metadados do inventário
+                meta = {}
+                if info_inventario:
+                    data_inicio = datetime.datetime.fromisoformat(info_inventario['data_inicio'])
+                    data_inicio_str = data_inicio.strftime('%d/%m/%Y %H:%M')
                     
-                    meta['duracao'] = f"{duracao.days} dias, {horas}h {minutos}m"
-                    meta['data_fim'] = data_fim.strftime('%d/%m/%Y %H:%M')
-            
-            # Obter detalhes de dados de lojas, CDs, e trânsito para a interface de finalização
-            
-            # 1. Detalhes das lojas
-            cursor.execute('''
-            SELECT loja, regional, status,
-                caixa_hb_623, caixa_hb_618, caixa_hnt_g, caixa_hnt_p, 
-                caixa_chocolate, caixa_bin, pallets_pbr
-            FROM contagem_lojas
-            WHERE cod_inventario = ?
-            ''', (cod_inventario,))
-            
-            lojas_detalhes = [dict(row) for row in cursor.fetchall()]
-            
-            # 2. Detalhes dos CDs (tabela contagem_cd)
-            cursor.execute('''
-            SELECT setor, status,
-                caixa_hb_623, caixa_hb_618, caixa_hnt_g, caixa_hnt_p, 
-                caixa_chocolate, caixa_bin, pallets_pbr
-            FROM contagem_cd
-            WHERE cod_inventario = ?
-            ''', (cod_inventario,))
-            
-            cds_detalhes = [dict(row) for row in cursor.fetchall()]
-            
-            # 3. Detalhes de trânsito
-            cursor.execute('''
-            SELECT setor, tipo_caixa, SUM(quantidade) as total
-            FROM dados_transito
-            WHERE cod_inventario = ?
-            GROUP BY setor, tipo_caixa
-            ''', (cod_inventario,))
-            
-            transito_detalhes = [dict(row) for row in cursor.fetchall()]
-            
-            # 4. Detalhes de fornecedor
-            cursor.execute('''
-            SELECT tipo_fornecedor, tipo_caixa, SUM(quantidade) as total
-            FROM dados_fornecedor
-            WHERE cod_inventario = ?
-            GROUP BY tipo_fornecedor, tipo_caixa
-            ''', (cod_inventario,))
-            
-            fornecedor_detalhes = [dict(row) for row in cursor.fetchall()]
-            
-            return {
-                'meta': meta,
-                'totais': totais,
-                'status': status,
-                'comparacao': comparacao,
-                'detalhes': {
-                    'lojas': lojas_detalhes,
-                    'cds': cds_detalhes,
-                    'transito': transito_detalhes,
-                    'fornecedor': fornecedor_detalhes
+                    meta = {
+                        'cod_inventario': info_inventario['cod_inventario'],
+                        'data_inicio': data_inicio_str,
+                        'status': info_inventario['status'],
+                        'descricao': info_inventario['descricao'],
+                        'duracao': None
+                    }
+                    
+                    # Calcular duração se o inventário estiver finalizado
+                    if info_inventario['data_fim']:
+                        data_fim = datetime.datetime.fromisoformat(info_inventario['data_fim'])
+                        duracao = data_fim - data_inicio
+                        horas, resto = divmod(duracao.seconds, 3600)
+                        minutos, _ = divmod(resto, 60)
+                        
+                        meta['duracao'] = f"{duracao.days} dias, {horas}h {minutos}m"
+                        meta['data_fim'] = data_fim.strftime('%d/%m/%Y %H:%M')
+                
+                # Obter detalhes de dados de lojas, CDs, e trânsito para a interface de finalização
+                
+                # 1. Detalhes das lojas
+                cursor.execute(f'''
+                SELECT loja, regional, status,
+                    caixa_hb_623, caixa_hb_618, caixa_hnt_g, caixa_hnt_p, 
+                    caixa_chocolate, caixa_bin, pallets_pbr
+                FROM {esquema}.contagem_lojas
+                WHERE cod_inventario = ?
+                ''', (cod_inventario,))
+                
+                lojas_detalhes = [dict(row) for row in cursor.fetchall()]
+                
+                # 2. Detalhes dos CDs (tabela contagem_cd)
+                cursor.execute(f'''
+                SELECT setor, status,
+                    caixa_hb_623, caixa_hb_618, caixa_hnt_g, caixa_hnt_p, 
+                    caixa_chocolate, caixa_bin, pallets_pbr
+                FROM {esquema}.contagem_cd
+                WHERE cod_inventario = ?
+                ''', (cod_inventario,))
+                
+                cds_detalhes = [dict(row) for row in cursor.fetchall()]
+                
+                # 3. Detalhes de trânsito
+                cursor.execute(f'''
+                SELECT setor, tipo_caixa, SUM(quantidade) as total
+                FROM {esquema}.dados_transito
+                WHERE cod_inventario = ?
+                GROUP BY setor, tipo_caixa
+                ''', (cod_inventario,))
+                
+                transito_detalhes = [dict(row) for row in cursor.fetchall()]
+                
+                # 4. Detalhes de fornecedor
+                cursor.execute(f'''
+                SELECT tipo_fornecedor, tipo_caixa, SUM(quantidade) as total
+                FROM {esquema}.dados_fornecedor
+                WHERE cod_inventario = ?
+                GROUP BY tipo_fornecedor, tipo_caixa
+                ''', (cod_inventario,))
+                
+                fornecedor_detalhes = [dict(row) for row in cursor.fetchall()]
+                
+                return {
+                    'meta': meta,
+                    'totais': totais,
+                    'status': status,
+                    'comparacao': comparacao,
+                    'detalhes': {
+                        'lojas': lojas_detalhes,
+                        'cds': cds_detalhes,
+                        'transito': transito_detalhes,
+                        'fornecedor': fornecedor_detalhes
+                    }
                 }
-            }
         except Exception as e:
             import traceback
             print(f"Erro em get_dados_dashboard: {e}")
@@ -0,0 +1,258 @@
+# cli.py
+"""Linha de comando do sistema de inventário, sem interface gráfica
+
+Uso (a partir da raiz do repositório ou de inventario_ativos/):
+
+    python -m inventario_ativos.cli criar --descricao "Inventário mensal"
+    python -m inventario_ativos.cli importar INV-20250509-175243 --carga-rapida
+    python -m inventario_ativos.cli totais INV-20250509-175243
+
+Toda saída em stdout é JSON; avisos e mensagens dos serviços vão para stderr.
+O código de saída é 0 em caso de sucesso e 1 em caso de erro.
+"""
+import os
+import sys
+import json
+import sqlite3
+import argparse
+import contextlib
+
+# Os módulos do sistema usam importações a partir de inventario_ativos/ (ex.: "from database...")
+DIRETORIO_APP = os.path.dirname(os.path.abspath(__file__))
+if DIRETORIO_APP not in sys.path:
+    sys.path.insert(0, DIRETORIO_APP)
+
+
+def _para_json(valor):
+    """Converte valores que o json não serializa sozinho"""
+    if isinstance(valor, sqlite3.Row):
+        return dict(valor)
+    if isinstance(valor, (set, tuple)):
+        return list(valor)
+    return str(valor)
+
+
+def _sucesso(resultado):
+    """Interpreta o campo status dos retornos dos serviços (True/False ou 'success'/'error')"""
+    if not isinstance(resultado, dict) or 'status' not in resultado:
+        return True
+    return resultado['status'] not in (False, 'error')
+
+
+def _servicos(args):
+    """Cria os serviços de inventário e relatórios (sem importar nada do Qt)"""
+    from database.database_manager import DatabaseManager
+    from business.inventario_service import InventarioService
+    from business.relatorio_service import RelatorioService
+
+    db_manager = DatabaseManager(args.banco)
+    return InventarioService(db_manager), RelatorioService(db_manager)
+
+
+def _carregar(inventario_service, cod_inventario):
+    """Seleciona o inventário informado como inventário atual do serviço"""
+    if not inventario_service.carregar_inventario_existente(cod_inventario):
+        return {'status': False, 'message': f'Inventário {cod_inventario} não encontrado'}
+    return None
+
+
+# --- COMANDOS ---
+
+def comando_criar(args):
+    """Cria um novo inventário"""
+    inventario_service, _ = _servicos(args)
+    cod_inventario = inventario_service.iniciar_novo_inventario(args.descricao)
+    return {
+        'status': True,
+        'message': f'Inventário {cod_inventario} criado',
+        'cod_inventario': cod_inventario
+    }
+
+
+def comando_listar(args):
+    """Lista os inventários"""
+    inventario_service, _ = _servicos(args)
+    status = {'ativos': 'em_andamento', 'finalizados': 'finalizado'}.get(args.status)
+    inventarios = inventario_service.catalogo.listar(status, args.pagina, args.tamanho_pagina)
+    return {
+        'status': True,
+        'total': inventario_service.contar_inventarios(status),
+        'pagina': args.pagina,
+        'inventarios': inventarios
+    }
+
+
+def comando_importar(args):
+    """Importa os CSVs de contagem para um inventário"""
+    inventario_service, _ = _servicos(args)
+    erro = _carregar(inventario_service, args.cod_inventario)
+    if erro:
+        return erro
+
+    carga_rapida = args.carga_rapida
+    if carga_rapida is None:
+        # Mesmo critério da tela de atualização: carga inicial em massa se o inventário está vazio
+        carga_rapida = inventario_service.inventario_atual_vazio()
+    return inventario_service.importar_dados_csv(args.usuario, carga_rapida=carga_rapida)
+
+
+def comando_status(args):
+    """Mostra o andamento (lojas e setores finalizados) de um inventário"""
+    inventario_service, relatorio_service = _servicos(args)
+    erro = _carregar(inventario_service, args.cod_inventario)
+    if erro:
+        return erro
+
+    return {
+        'status': True,
+        'inventario': inventario_service.get_inventario(args.cod_inventario),
+        'resumo': relatorio_service.get_resumo_status(args.cod_inventario)
+    }
+
+
+def comando_totais(args):
+    """Mostra os totais por tipo de caixa e origem de um inventário"""
+    inventario_service, relatorio_service = _servicos(args)
+    erro = _carregar(inventario_service, args.cod_inventario)
+    if erro:
+        return erro
+
+    return {
+        'status': True,
+        'cod_inventario': args.cod_inventario,
+        'totais': relatorio_service.get_totais_por_tipo(args.cod_inventario)
+    }
+
+
+def comando_comparar(args):
+    """Compara os totais de dois inventários"""
+    inventario_service, relatorio_service = _servicos(args)
+    for cod_inventario in (args.cod_inventario_atual, args.cod_inventario_anterior):
+        erro = _carregar(inventario_service, cod_inventario)
+        if erro:
+            return erro
+
+    resultado = relatorio_service.comparar_inventarios(args.cod_inventario_atual, args.cod_inventario_anterior)
+    return dict(resultado, status=True)
+
+
+def comando_tendencia(args):
+    """Mostra a série de totais dos últimos inventários finalizados"""
+    _, relatorio_service = _servicos(args)
+    return {
+        'status': True,
+        'inventarios': relatorio_service.get_tendencia_inventarios(args.limite)
+    }
+
+
+def comando_exportar(args):
+    """Exporta o relatório CSV de um inventário"""
+    inventario_service, _ = _servicos(args)
+    erro = _carregar(inventario_service, args.cod_inventario)
+    if erro:
+        return erro
+
+    return inventario_service.exportar_relatorio_atual(args.saida)
+
+
+def comando_finalizar(args):
+    """Finaliza um inventário em andamento"""
+    inventario_service, _ = _servicos(args)
+    erro = _carregar(inventario_service, args.cod_inventario)
+    if erro:
+        return erro
+
+    if inventario_service.get_inventario(args.cod_inventario)['status'] == 'finalizado':
+        return {'status': False, 'message': f'Inventário {args.cod_inventario} já está finalizado'}
+
+    inventario_service.finalizar_inventario_atual()
+    return {
+        'status': True,
+        'message': f'Inventário {args.cod_inventario} finalizado',
+        'inventario': inventario_service.get_inventario(args.cod_inventario)
+    }
+
+
+def criar_parser():
+    """Monta o parser de argumentos com os subcomandos"""
+    parser = argparse.ArgumentParser(
+        prog='python -m inventario_ativos.cli',
+        description='Sistema de Inventário Rotativo de Ativos - linha de comando (saída em JSON)'
+    )
+    parser.add_argument('--diretorio', help='diretório de trabalho com o config.ini (padrão: diretório atual)')
+    parser.add_argument('--banco', help='arquivo do banco de dados (padrão: [Database] file do config.ini)')
+    parser.add_argument('--indentar', type=int, default=None, help='indentação do JSON de saída')
+
+    subparsers = parser.add_subparsers(dest='comando', required=True)
+
+    sub = subparsers.add_parser('criar', aliases=['create'], help='cria um novo inventário')
+    sub.add_argument('--descricao', default='', help='descrição do inventário')
+    sub.set_defaults(funcao=comando_criar)
+
+    sub = subparsers.add_parser('listar', aliases=['list'], help='lista os inventários')
+    sub.add_argument('--status', choices=['todos', 'ativos', 'finalizados'], default='todos')
+    sub.add_argument('--pagina', type=int, default=1)
+    sub.add_argument('--tamanho-pagina', type=int, default=None)
+    sub.set_defaults(funcao=comando_listar)
+
+    sub = subparsers.add_parser('importar', aliases=['import'], help='importa os CSVs de contagem')
+    sub.add_argument('cod_inventario')
+    sub.add_argument('--usuario', default='cli', help='usuário gravado nas contagens importadas')
+    carga = sub.add_mutually_exclusive_group()
+    carga.add_argument('--carga-rapida', dest='carga_rapida', action='store_true', default=None,
+                       help='força a carga rápida (tudo ou nada)')
+    carga.add_argument('--sem-carga-rapida', dest='carga_rapida', action='store_false',
+                       help='importa no modo normal, em lotes')
+    sub.set_defaults(funcao=comando_importar)
+
+    sub = subparsers.add_parser('status', help='andamento de lojas e setores de um inventário')
+    sub.add_argument('cod_inventario')
+    sub.set_defaults(funcao=comando_status)
+
+    sub = subparsers.add_parser('totais', aliases=['totals'], help='totais por tipo de caixa e origem')
+    sub.add_argument('cod_inventario')
+    sub.set_defaults(funcao=comando_totais)
+
+    sub = subparsers.add_parser('comparar', aliases=['compare'], help='compara dois inventários')
+    sub.add_argument('cod_inventario_atual')
+    sub.add_argument('cod_inventario_anterior')
+    sub.set_defaults(funcao=comando_comparar)
+
+    sub = subparsers.add_parser('tendencia', aliases=['trend'], help='série dos últimos inventários finalizados')
+    sub.add_argument('--limite', type=int, default=12, help='quantidade de inventários (padrão: 12)')
+    sub.set_defaults(funcao=comando_tendencia)
+
+    sub = subparsers.add_parser('exportar', aliases=['export'], help='exporta o relatório CSV de um inventário')
+    sub.add_argument('cod_inventario')
+    sub.add_argument('--saida', help='arquivo CSV de saída (padrão: relatorios/relatorio_<cod>_<data>.csv)')
+    sub.set_defaults(funcao=comando_exportar)
+
+    sub = subparsers.add_parser('finalizar', aliases=['finalize'], help='finaliza um inventário')
+    sub.add_argument('cod_inventario')
+    sub.set_defaults(funcao=comando_finalizar)
+
+    return parser
+
+
+def main(argv=None):
+    """Executa o subcomando e imprime o resultado em JSON; retorna o código de saída"""
+    args = criar_parser().parse_args(argv)
+
+    if args.diretorio:
+        os.chdir(args.diretorio)
+
+    saida = sys.stdout
+    try:
+        # Os serviços usam print() para avisos: mantê-los fora do JSON
+        with contextlib.redirect_stdout(sys.stderr):
+            resultado = args.funcao(args)
+    except Exception as e:
+        resultado = {'status': False, 'message': f'{type(e).__name__}: {str(e)}'}
+
+    json.dump(resultado, saida, default=_para_json, ensure_ascii=False, indent=args.indentar)
+    saida.write('\n')
+    return 0 if _sucesso(resultado) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
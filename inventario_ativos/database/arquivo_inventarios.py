@@ -0,0 +1,188 @@
+# database/arquivo_inventarios.py
+import os
+import re
+import sqlite3
+import datetime
+from pathlib import Path
+from contextlib import contextmanager
+
+# Tabelas com as linhas brutas de cada inventário, na ordem de cópia, com a coluna
+# de contagem correspondente no catálogo inventario_arquivo
+TABELAS_ARQUIVADAS = [
+    ('contagem_lojas', 'linhas_lojas'),
+    ('contagem_cd', 'linhas_cd'),
+    ('dados_transito', 'linhas_transito'),
+    ('dados_fornecedor', 'linhas_fornecedor')
+]
+
+
+class ArquivoInventarios:
+    """Arquivamento de inventários finalizados em arquivos SQLite próprios
+
+    As linhas brutas do inventário saem da base principal e vão para
+    `<diretorio>/<cod_inventario>.db`; o inventário continua em inventario_meta,
+    os totais agregados (inventario_totais) são preservados e o catálogo
+    inventario_arquivo registra o arquivo. As leituras das linhas brutas usam
+    `anexar()`, que faz ATTACH do arquivo somente leitura quando necessário.
+    """
+
+    def __init__(self, db_manager, diretorio=None):
+        self.db_manager = db_manager
+        self.diretorio = diretorio or db_manager.diretorio_arquivo
+
+    def caminho_arquivo(self, cod_inventario):
+        """Retorna o caminho do arquivo de um inventário"""
+        nome = re.sub(r'[^\w.-]', '_', cod_inventario)
+        return os.path.join(self.diretorio, f'{nome}.db')
+
+    def esta_arquivado(self, cod_inventario):
+        """Verifica se o inventário já foi movido para um arquivo próprio"""
+        return self.db_manager.get_arquivo_inventario(cod_inventario) is not None
+
+    def listar(self):
+        """Lista os inventários arquivados"""
+        with self.db_manager.conexao() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+            SELECT * FROM inventario_arquivo
+            ORDER BY arquivado_em DESC
+            ''')
+            return [dict(row) for row in cursor.fetchall()]
+
+    def arquivar(self, cod_inventario):
+        """Move as linhas brutas de um inventário finalizado para seu arquivo"""
+        with self.db_manager.conexao() as conn:
+            cursor = conn.cursor()
+
+            cursor.execute('SELECT status FROM inventario_meta WHERE cod_inventario = ?', (cod_inventario,))
+            meta = cursor.fetchone()
+            if not meta:
+                return {'status': 'error', 'message': f'Inventário {cod_inventario} não encontrado'}
+            if meta['status'] != 'finalizado':
+                return {'status': 'error', 'message': f'Inventário {cod_inventario} ainda não foi finalizado'}
+            if self.esta_arquivado(cod_inventario):
+                return {'status': 'warning', 'message': f'Inventário {cod_inventario} já está arquivado'}
+
+            caminho = self.caminho_arquivo(cod_inventario)
+            os.makedirs(self.diretorio, exist_ok=True)
+
+            # Sobra de uma tentativa interrompida: o inventário ainda está na base principal
+            if os.path.exists(caminho):
+                os.remove(caminho)
+
+            # 1) Copiar para o arquivo e confirmar. Se algo falhar depois, a base principal
+            #    continua intacta e o arquivamento pode ser repetido.
+            conn.execute('ATTACH DATABASE ? AS arquivo_novo', (caminho,))
+            try:
+                linhas = {}
+                with self.db_manager.transacao():
+                    for tabela, coluna in TABELAS_ARQUIVADAS:
+                        cursor.execute(f'''
+                        CREATE TABLE arquivo_novo.{tabela} AS
+                        SELECT * FROM main.{tabela} WHERE cod_inventario = ?
+                        ''', (cod_inventario,))
+                        cursor.execute(f'SELECT COUNT(*) FROM arquivo_novo.{tabela}')
+                        linhas[coluna] = cursor.fetchone()[0]
+            finally:
+                conn.execute('DETACH DATABASE arquivo_novo')
+
+            # 2) Remover da base principal, preservando os totais agregados, e registrar no catálogo
+            with self.db_manager.transacao():
+                cursor.execute('''
+                SELECT destino, tipo_caixa, quantidade FROM inventario_totais
+                WHERE cod_inventario = ?
+                ''', (cod_inventario,))
+                totais = [tuple(row) for row in cursor.fetchall()]
+
+                for tabela, coluna in TABELAS_ARQUIVADAS:
+                    cursor.execute(f'DELETE FROM {tabela} WHERE cod_inventario = ?', (cod_inventario,))
+                    if cursor.rowcount != linhas[coluna]:
+                        raise sqlite3.DatabaseError(
+                            f'{tabela}: {linhas[coluna]} linhas copiadas, {cursor.rowcount} removidas'
+                        )
+
+                # Os gatilhos de contagem_item zeraram os totais ao remover as linhas
+                cursor.execute('DELETE FROM inventario_totais WHERE cod_inventario = ?', (cod_inventario,))
+                cursor.executemany('''
+                INSERT INTO inventario_totais (cod_inventario, destino, tipo_caixa, quantidade)
+                VALUES (?, ?, ?, ?)
+                ''', [(cod_inventario, *total) for total in totais])
+
+                cursor.execute('''
+                INSERT INTO inventario_arquivo (
+                    cod_inventario, caminho, arquivado_em,
+                    linhas_lojas, linhas_cd, linhas_transito, linhas_fornecedor
+                ) VALUES (?, ?, ?, ?, ?, ?, ?)
+                ''', (
+                    cod_inventario,
+                    caminho,
+                    datetime.datetime.now().isoformat(),
+                    linhas['linhas_lojas'],
+                    linhas['linhas_cd'],
+                    linhas['linhas_transito'],
+                    linhas['linhas_fornecedor']
+                ))
+
+        return {
+            'status': 'success',
+            'message': f'Inventário {cod_inventario} arquivado em {caminho}',
+            'caminho': caminho,
+            'linhas': sum(linhas.values())
+        }
+
+    def arquivar_finalizados(self):
+        """Arquiva todos os inventários finalizados que ainda estão na base principal"""
+        with self.db_manager.conexao() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+            SELECT cod_inventario FROM inventario_meta
+            WHERE status = 'finalizado'
+              AND cod_inventario NOT IN (SELECT cod_inventario FROM inventario_arquivo)
+            ORDER BY data_fim
+            ''')
+            codigos = [row['cod_inventario'] for row in cursor.fetchall()]
+
+        resultados = []
+        for cod_inventario in codigos:
+            try:
+                resultados.append(self.arquivar(cod_inventario))
+            except Exception as e:
+                print(f"Aviso: falha ao arquivar o inventário {cod_inventario}: {e}")
+                resultados.append({'status': 'error', 'message': str(e)})
+
+        arquivados = sum(1 for r in resultados if r['status'] == 'success')
+        return {
+            'status': 'success' if arquivados == len(resultados) else 'warning',
+            'message': f'{arquivados} de {len(resultados)} inventário(s) arquivado(s)',
+            'resultados': resultados
+        }
+
+    @contextmanager
+    def anexar(self, cod_inventario):
+        """Empresta a conexão da thread e o esquema onde estão as linhas do inventário
+
+        Para inventários ativos o esquema é 'main'; para arquivados, o arquivo é anexado
+        somente leitura durante o bloco. Uso:
+
+            with arquivo.anexar(cod) as (conn, esquema):
+                conn.execute(f'SELECT ... FROM {esquema}.contagem_lojas WHERE cod_inventario = ?', (cod,))
+        """
+        with self.db_manager.conexao() as conn:
+            entrada = self.db_manager.get_arquivo_inventario(cod_inventario)
+            if entrada is None:
+                yield conn, 'main'
+                return
+
+            esquema = 'arq_' + re.sub(r'\W', '_', cod_inventario)
+            anexados = {row[1] for row in conn.execute('PRAGMA database_list')}
+            if esquema in anexados:
+                # Bloco aninhado para o mesmo inventário: o bloco externo faz o DETACH
+                yield conn, esquema
+                return
+
+            uri = Path(os.path.abspath(entrada['caminho'])).as_uri() + '?mode=ro'
+            conn.execute('ATTACH DATABASE ? AS ' + esquema, (uri,))
+            try:
+                yield conn, esquema
+            finally:
+                conn.execute('DETACH DATABASE ' + esquema)
@@ -0,0 +1,126 @@
+# database/backup_banco.py
+import os
+import glob
+import gzip
+import shutil
+import sqlite3
+import datetime
+
+
+class BackupBanco:
+    """Backup online do banco usando a API de backup do SQLite
+
+    A cópia é feita em lotes de páginas a partir de uma conexão do pool, dentro de uma
+    transação de leitura, então a aplicação continua lendo e gravando durante o backup
+    (em WAL) e o arquivo gerado é sempre um retrato consistente do banco.
+    """
+
+    def __init__(self, db_manager, diretorio=None, geracoes=None, compactar=None, paginas_por_passo=None):
+        self.db_manager = db_manager
+        self.diretorio = diretorio or db_manager.diretorio_backup
+        self.geracoes = geracoes if geracoes is not None else db_manager.backup_geracoes
+        self.compactar = compactar if compactar is not None else db_manager.backup_compactar
+        self.paginas_por_passo = paginas_por_passo or 1000
+
+    def _prefixo(self):
+        """Prefixo dos arquivos de backup periódicos deste banco"""
+        nome_base = os.path.splitext(os.path.basename(self.db_manager.db_file))[0]
+        return f'{nome_base}-backup-'
+
+    def realizar_backup(self, destino=None, compactar=None, progresso=None):
+        """Gera um backup do banco
+
+        destino: caminho do arquivo; se omitido, gera um nome com data no diretório de
+            backups e aplica a rotação de gerações
+        compactar: grava o backup com gzip (.gz); usa a configuração se omitido
+        progresso: função(copiadas, total) chamada a cada lote de páginas
+        """
+        compactar = self.compactar if compactar is None else compactar
+        rotacionar = destino is None
+
+        if destino is None:
+            agora = datetime.datetime.now().strftime('%Y%m%d-%H%M%S')
+            destino = os.path.join(self.diretorio, f'{self._prefixo()}{agora}.db')
+            if compactar:
+                destino += '.gz'
+
+        pasta = os.path.dirname(destino)
+        if pasta:
+            os.makedirs(pasta, exist_ok=True)
+
+        # A cópia sempre é feita em um .db temporário; a compactação vem depois
+        temporario = (destino[:-3] if destino.endswith('.gz') else destino) + '.tmp'
+
+        try:
+            self._copiar(temporario, progresso)
+
+            if compactar:
+                with open(temporario, 'rb') as origem, gzip.open(destino, 'wb') as saida:
+                    shutil.copyfileobj(origem, saida)
+                os.remove(temporario)
+            else:
+                os.replace(temporario, destino)
+        except Exception as e:
+            if os.path.exists(temporario):
+                os.remove(temporario)
+            return {'status': 'error', 'message': f'Erro ao realizar backup: {str(e)}', 'caminho': None}
+
+        removidos = self.rotacionar() if rotacionar else []
+
+        return {
+            'status': 'success',
+            'message': f'Backup realizado com sucesso em {destino}',
+            'caminho': destino,
+            'tamanho': os.path.getsize(destino),
+            'removidos': removidos
+        }
+
+    def _copiar(self, caminho, progresso=None):
+        """Copia o banco para um arquivo SQLite em lotes de páginas e valida a cópia"""
+        def ao_progredir(status, restantes, total):
+            if progresso:
+                progresso(total - restantes, total)
+
+        destino = sqlite3.connect(caminho)
+        try:
+            with self.db_manager.conexao() as conn:
+                # Em WAL, uma transação de leitura aberta fixa o retrato do banco durante toda a
+                # cópia: as gravações das outras conexões continuam e a cópia não é reiniciada
+                transacao_leitura = not conn.in_transaction
+                if transacao_leitura:
+                    conn.execute('BEGIN')
+                    conn.execute('SELECT COUNT(*) FROM sqlite_master').fetchone()
+                try:
+                    conn.backup(destino, pages=self.paginas_por_passo, progress=ao_progredir, sleep=0.005)
+                finally:
+                    if transacao_leitura:
+                        conn.rollback()
+
+            # O backup herda o journal do banco de origem; o arquivo avulso não precisa de WAL
+            destino.execute('PRAGMA journal_mode = DELETE')
+
+            resultado = destino.execute('PRAGMA quick_check').fetchone()[0]
+            if resultado != 'ok':
+                raise sqlite3.DatabaseError(f'cópia inválida: {resultado}')
+        finally:
+            destino.close()
+
+    def listar_backups(self):
+        """Lista os backups periódicos do banco, do mais recente para o mais antigo"""
+        padrao = os.path.join(self.diretorio, f'{self._prefixo()}*.db*')
+        arquivos = [a for a in glob.glob(padrao) if not a.endswith('.tmp')]
+        return sorted(arquivos, key=os.path.getmtime, reverse=True)
+
+    def rotacionar(self):
+        """Remove os backups periódicos além do número de gerações configurado"""
+        if not self.geracoes or self.geracoes <= 0:
+            return []
+
+        removidos = []
+        for arquivo in self.listar_backups()[self.geracoes:]:
+            try:
+                os.remove(arquivo)
+                removidos.append(arquivo)
+            except OSError as e:
+                print(f"Aviso: não foi possível remover o backup antigo {arquivo}: {e}")
+        return removidos
@@ -0,0 +1,162 @@
+# database/carga_rapida.py
+import sqlite3
+import time
+from contextlib import contextmanager
+from database.migracoes import sql_copiar_contagem_item
+
+# Tabelas gravadas por uma importação e tabelas derivadas mantidas por gatilhos
+TABELAS_CARGA = ['contagem_lojas', 'contagem_cd', 'dados_transito', 'dados_fornecedor']
+TABELAS_DERIVADAS = ['contagem_item', 'inventario_totais']
+
+# Cache da conexão durante a carga (KiB, valor negativo como no PRAGMA cache_size)
+CACHE_CARGA_KIB = -262144
+
+
+class CargaRapidaError(sqlite3.DatabaseError):
+    """A carga rápida falhou e o banco voltou ao estado anterior à carga"""
+
+
+class CargaRapida:
+    """Sessão de carga inicial em massa de um inventário
+
+    Durante a sessão:
+    - a durabilidade é relaxada (synchronous = OFF) e o cache da conexão aumentado;
+    - os gatilhos de contagem_item/inventario_totais e os índices não únicos das tabelas
+      carregadas são removidos (os índices únicos ficam: o upsert depende deles). Os índices
+      de uma tabela que já tem linhas de outros inventários são mantidos: recriá-los
+      percorreria o histórico inteiro;
+    - tudo é gravado em uma única transação (ou SAVEPOINT, se já houver uma aberta).
+
+    Ao final, índices e gatilhos são recriados, contagem_item e inventario_totais do
+    inventário são recalculados de uma vez, a integridade das tabelas é verificada e os
+    pragmas voltam ao normal. Qualquer erro desfaz a carga inteira, inclusive as
+    mudanças de schema. Uso:
+
+        with CargaRapida(db_manager, cod_inventario).sessao() as carga:
+            db_manager.inserir_contagens_lojas_bulk(registros, cod_inventario)
+    """
+
+    def __init__(self, db_manager, cod_inventario, adiar_indices=True):
+        self.db_manager = db_manager
+        self.cod_inventario = cod_inventario
+        # Recriar um índice percorre a tabela inteira: só vale a pena em cargas iniciais grandes
+        # de tabelas ainda sem outros inventários (veja _suspender)
+        self.adiar_indices = adiar_indices
+        self.indices_adiados = []
+        self.gatilhos_adiados = []
+        self.duracao_ms = None
+
+    @contextmanager
+    def sessao(self):
+        """Executa o bloco como uma carga rápida do inventário"""
+        inicio = time.monotonic()
+
+        with self.db_manager.conexao() as conn:
+            # synchronous não pode ser alterado dentro de uma transação
+            pragmas = self._relaxar(conn) if not conn.in_transaction else {}
+            try:
+                with self.db_manager.transacao():
+                    cursor = conn.cursor()
+                    self._suspender(cursor)
+
+                    yield self
+
+                    self._restaurar_indices(cursor)
+                    self._recalcular_derivadas(cursor)
+                    self._restaurar_gatilhos(cursor)
+                    self._verificar_integridade(cursor)
+            except CargaRapidaError:
+                raise
+            except Exception as e:
+                raise CargaRapidaError(f'Carga rápida desfeita: {str(e)}') from e
+            finally:
+                self._restaurar_pragmas(conn, pragmas)
+                self.duracao_ms = int((time.monotonic() - inicio) * 1000)
+
+    def _relaxar(self, conn):
+        """Relaxa a durabilidade da conexão e retorna os valores originais"""
+        originais = {
+            'synchronous': conn.execute('PRAGMA synchronous').fetchone()[0],
+            'cache_size': conn.execute('PRAGMA cache_size').fetchone()[0]
+        }
+        conn.execute('PRAGMA synchronous = OFF')
+        conn.execute(f'PRAGMA cache_size = {CACHE_CARGA_KIB}')
+        return originais
+
+    def _restaurar_pragmas(self, conn, pragmas):
+        """Devolve os pragmas da conexão aos valores anteriores à carga"""
+        for pragma, valor in pragmas.items():
+            try:
+                conn.execute(f'PRAGMA {pragma} = {int(valor)}')
+            except sqlite3.Error as e:
+                print(f"Aviso: não foi possível restaurar PRAGMA {pragma}: {e}")
+
+    def _tabelas_com_outros_inventarios(self, cursor):
+        """Tabelas de carga que já têm linhas de outros inventários"""
+        tabelas = []
+        for tabela in TABELAS_CARGA:
+            cursor.execute(f'''
+            SELECT 1 FROM {tabela} WHERE cod_inventario != ? LIMIT 1
+            ''', (self.cod_inventario,))
+            if cursor.fetchone() is not None:
+                tabelas.append(tabela)
+        return tabelas
+
+    def _suspender(self, cursor):
+        """Remove gatilhos e índices adiáveis, guardando o SQL para recriá-los"""
+        tabelas = TABELAS_CARGA + TABELAS_DERIVADAS
+        marcadores = ', '.join('?' for _ in tabelas)
+
+        cursor.execute(f'''
+        SELECT name, sql FROM sqlite_master
+        WHERE type = 'trigger' AND tbl_name IN ({marcadores})
+        ''', tabelas)
+        self.gatilhos_adiados = [(row[0], row[1]) for row in cursor.fetchall()]
+
+        self.indices_adiados = []
+        if self.adiar_indices:
+            # contagem_item fica de fora: é reescrita de uma vez no final com INSERT ... SELECT
+            # e costuma ser muito maior que a carga, então recriar seu índice custaria mais.
+            # Pelo mesmo motivo, tabelas que já têm outros inventários mantêm seus índices
+            com_historico = self._tabelas_com_outros_inventarios(cursor)
+            for tabela in TABELAS_CARGA:
+                if tabela in com_historico:
+                    continue
+                # Só índices criados por CREATE INDEX (origin 'c') e não únicos
+                cursor.execute(f"PRAGMA index_list({tabela})")
+                nao_unicos = [row[1] for row in cursor.fetchall() if row[2] == 0 and row[3] == 'c']
+                for nome in nao_unicos:
+                    cursor.execute("SELECT sql FROM sqlite_master WHERE type = 'index' AND name = ?", (nome,))
+                    self.indices_adiados.append((nome, cursor.fetchone()[0]))
+
+        for nome, _ in self.gatilhos_adiados:
+            cursor.execute(f'DROP TRIGGER IF EXISTS {nome}')
+        for nome, _ in self.indices_adiados:
+            cursor.execute(f'DROP INDEX IF EXISTS {nome}')
+
+    def _restaurar_indices(self, cursor):
+        """Recria os índices removidos no início da carga"""
+        for _, sql in self.indices_adiados:
+            cursor.execute(sql)
+
+    def _restaurar_gatilhos(self, cursor):
+        """Recria os gatilhos removidos no início da carga"""
+        for _, sql in self.gatilhos_adiados:
+            cursor.execute(sql)
+
+    def _recalcular_derivadas(self, cursor):
+        """Recalcula contagem_item e inventario_totais do inventário carregado"""
+        # Sem os gatilhos durante a carga, contagem_item está desatualizada para o inventário
+        cursor.execute('DELETE FROM contagem_item WHERE cod_inventario = ?', (self.cod_inventario,))
+        for _, sql in sql_copiar_contagem_item(cursor, 'r.cod_inventario = ?'):
+            cursor.execute(sql, (self.cod_inventario,))
+        self.db_manager.reconstruir_totais(self.cod_inventario)
+
+    def _verificar_integridade(self, cursor):
+        """Verifica a integridade das tabelas carregadas antes de confirmar"""
+        # quick_check: estrutura das páginas e restrições, sem o cruzamento índice x tabela
+        # (os índices adiados acabaram de ser reconstruídos a partir das tabelas)
+        for tabela in TABELAS_CARGA + TABELAS_DERIVADAS:
+            resultado = cursor.execute(f'PRAGMA quick_check({tabela})').fetchone()[0]
+            if resultado != 'ok':
+                raise CargaRapidaError(f'Falha na verificação de integridade de {tabela}: {resultado}')
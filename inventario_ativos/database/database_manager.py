@@ -3,116 +3,351 @@ import sqlite3
 import os
 import datetime
 from pathlib import Path
+from contextlib import contextmanager
 from utils.config import Config
+from database.pool_conexoes import PoolConexoes
+from database.profiler import Perfilador
+from database.arquivo_inventarios import ArquivoInventarios
+from database.migracoes import MigradorBanco, TIPO_CAIXA_PADRAO, sql_destino_item
+
+# Upsert de contagem de loja: a chave única (cod_inventario, loja) resolve o conflito.
+# Em caso de atualização, regional e created_at do registro original são preservados.
+SQL_UPSERT_CONTAGEM_LOJA = '''
+INSERT INTO contagem_lojas (
+    loja,
+    regional,
+    setor,
+    data,
+    caixa_hb_623,
+    caixa_hb_618,
+    caixa_hnt_g,
+    caixa_hnt_p,
+    caixa_chocolate,
+    caixa_bin,
+    pallets_pbr,
+    status,
+    usuario,
+    created_at,
+    updated_at,
+    cod_inventario
+) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (cod_inventario, loja) DO UPDATE SET
+    setor = excluded.setor,
+    data = excluded.data,
+    caixa_hb_623 = excluded.caixa_hb_623,
+    caixa_hb_618 = excluded.caixa_hb_618,
+    caixa_hnt_g = excluded.caixa_hnt_g,
+    caixa_hnt_p = excluded.caixa_hnt_p,
+    caixa_chocolate = excluded.caixa_chocolate,
+    caixa_bin = excluded.caixa_bin,
+    pallets_pbr = excluded.pallets_pbr,
+    status = excluded.status,
+    usuario = excluded.usuario,
+    updated_at = excluded.updated_at
+'''
+
+# Upsert de contagem do CD: a chave única (cod_inventario, setor) resolve o conflito
+SQL_UPSERT_CONTAGEM_CD = '''
+INSERT INTO contagem_cd (
+    setor,
+    data,
+    caixa_hb_623,
+    caixa_hb_618,
+    caixa_hnt_g,
+    caixa_hnt_p,
+    caixa_chocolate,
+    caixa_bin,
+    pallets_pbr,
+    status,
+    usuario,
+    created_at,
+    updated_at,
+    cod_inventario
+) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (cod_inventario, setor) DO UPDATE SET
+    data = excluded.data,
+    caixa_hb_623 = excluded.caixa_hb_623,
+    caixa_hb_618 = excluded.caixa_hb_618,
+    caixa_hnt_g = excluded.caixa_hnt_g,
+    caixa_hnt_p = excluded.caixa_hnt_p,
+    caixa_chocolate = excluded.caixa_chocolate,
+    caixa_bin = excluded.caixa_bin,
+    pallets_pbr = excluded.pallets_pbr,
+    status = excluded.status,
+    usuario = excluded.usuario,
+    updated_at = excluded.updated_at
+'''
+
+SQL_INSERT_DADOS_TRANSITO = '''
+INSERT INTO dados_transito (
+    setor,
+    data,
+    tipo_caixa,
+    quantidade,
+    usuario,
+    created_at,
+    updated_at,
+    cod_inventario
+) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+SQL_INSERT_DADOS_FORNECEDOR = '''
+INSERT INTO dados_fornecedor (
+    tipo_fornecedor,
+    tipo_caixa,
+    quantidade,
+    created_at,
+    cod_inventario
+) VALUES (?, ?, ?, ?, ?)
+'''
+
+# Totais por destino do relatório × tipo de caixa em um único GROUP BY sobre contagem_item.
+# É a fonte usada para (re)construir inventario_totais.
+SQL_TOTAIS_CONTAGEM_ITEM = f'''
+SELECT cod_inventario, destino, tipo_caixa, SUM(quantidade) AS total
+FROM (
+    SELECT cod_inventario, {sql_destino_item('origem', 'local')} AS destino, tipo_caixa, quantidade
+    FROM contagem_item
+    WHERE cod_inventario = ?
+)
+WHERE destino IS NOT NULL
+GROUP BY cod_inventario, destino, tipo_caixa
+'''
+
+# Origens dos totais do relatório, na ordem em que são somadas
+ORIGENS_TOTAIS = ['lojas', 'cd_sp', 'cd_es', 'cd_rj', 'transito_sp', 'transito_es', 'transito_rj', 'fornecedor']
+
+# Trânsito sem CD identificado no setor: dividido igualmente entre estes destinos
+DESTINOS_TRANSITO_OUTROS = ['transito_sp', 'transito_es', 'transito_rj']
+
+
+def _sql_matriz_totais(celulas):
+    """Consulta da matriz origem × tipo de caixa completa a partir das células (destino, tipo, quantidade)
+
+    Tudo é resolvido no SQL, em uma única ida ao banco: a divisão do trânsito sem CD, o descarte
+    de tipos inativos e o preenchimento com zero das combinações sem contagem. As linhas saem
+    na ordem de ORIGENS_TOTAIS e do catálogo de tipos.
+    """
+    origens = ', '.join(f"('{origem}', {ordem})" for ordem, origem in enumerate(ORIGENS_TOTAIS))
+    destinos_outros = ', '.join(f"('{destino}')" for destino in DESTINOS_TRANSITO_OUTROS)
+    return f'''
+    WITH origens (origem, ordem) AS (VALUES {origens}),
+    destinos_outros (destino) AS (VALUES {destinos_outros}),
+    celulas (destino, tipo_caixa, quantidade) AS ({celulas}),
+    somas (origem, tipo_caixa, total) AS (
+        SELECT COALESCE(d.destino, c.destino), c.tipo_caixa,
+               SUM(CASE WHEN d.destino IS NULL THEN c.quantidade
+                        ELSE c.quantidade / {float(len(DESTINOS_TRANSITO_OUTROS))} END)
+        FROM celulas c
+        LEFT JOIN destinos_outros d ON c.destino = 'transito_outros'
+        GROUP BY 1, 2
+    )
+    SELECT o.origem, t.codigo AS tipo_caixa, COALESCE(s.total, 0) AS total
+    FROM origens o
+    CROSS JOIN tipo_caixa t
+    LEFT JOIN somas s ON s.origem = o.origem AND s.tipo_caixa = t.codigo
+    WHERE t.ativo = 1
+    ORDER BY o.ordem, t.ordem, t.codigo
+    '''
+
+
+# Matriz a partir de inventario_totais (mantida pelos gatilhos)
+SQL_MATRIZ_TOTAIS = _sql_matriz_totais('''
+        SELECT destino, tipo_caixa, quantidade
+        FROM inventario_totais
+        WHERE cod_inventario = ?
+    ''')
+
+# Mesma matriz recalculada direto de contagem_item (classificação de destino feita no SQL)
+SQL_MATRIZ_TOTAIS_ITENS = _sql_matriz_totais(f'''
+        SELECT destino, tipo_caixa, SUM(quantidade)
+        FROM (
+            SELECT {sql_destino_item('origem', 'local')} AS destino, tipo_caixa, quantidade
+            FROM contagem_item
+            WHERE cod_inventario = ?
+        )
+        WHERE destino IS NOT NULL
+        GROUP BY destino, tipo_caixa
+    ''')
 
 class DatabaseManager:
     def __init__(self, db_file=None):
         config = Config()
         self.db_file = db_file or config.get_database_file()
-        self.conn = None
+        self.tamanho_lote = config.get_tamanho_lote()
+        self.perfil, self.pragmas = config.get_perfil_banco()
+        self.diretorio_backup = config.get_diretorio_backup()
+        self.backup_geracoes = config.get_backup_geracoes()
+        self.backup_compactar = config.get_backup_compactar()
+        self.diretorio_arquivo = config.get_diretorio_arquivo()
+        self.arquivar_ao_finalizar = config.get_arquivar_ao_finalizar()
+        # Instrumentação das consultas (desligada por padrão: None)
+        self.perfilador = None
+        if config.get_perfilar():
+            self.perfilador = Perfilador(config.get_consulta_lenta_ms(), config.get_log_consultas_lentas())
+        self.pool = PoolConexoes(self._abrir_conexao, max_conexoes=config.get_max_conexoes())
+        self.pool_leitura = PoolConexoes(self._abrir_conexao_leitura, max_conexoes=config.get_max_conexoes())
+        self._tipos_caixa = None
+        self._aliases_tipo_caixa = None
         self.create_tables_if_not_exist()
     
+    def _abrir_conexao(self):
+        """Abre uma nova conexão SQLite já configurada com o perfil de desempenho"""
+        # O pool garante uso exclusivo por thread, mas a conexão pode mudar de thread ao ser reutilizada
+        # uri=True permite anexar arquivos como somente leitura (file:...?mode=ro)
+        banco_novo = not os.path.exists(self.db_file) or os.path.getsize(self.db_file) == 0
+        conn = sqlite3.connect(self.db_file, check_same_thread=False, uri=True, factory=self._fabrica_conexao())
+        conn.row_factory = sqlite3.Row
+        if banco_novo:
+            # auto_vacuum só vale se definido antes da primeira tabela (e do WAL); bancos
+            # existentes são convertidos pela manutenção (ManutencaoBanco.converter_auto_vacuum)
+            conn.execute('PRAGMA auto_vacuum = INCREMENTAL')
+        self._aplicar_perfil(conn)
+        return conn
+    
+    def _abrir_conexao_leitura(self):
+        """Abre uma conexão somente leitura (mode=ro) para as consultas de relatórios e telas"""
+        uri = Path(os.path.abspath(self.db_file)).as_uri() + '?mode=ro'
+        conn = sqlite3.connect(uri, check_same_thread=False, uri=True, factory=self._fabrica_conexao())
+        conn.row_factory = sqlite3.Row
+        self._aplicar_perfil(conn, somente_leitura=True)
+        conn.execute('PRAGMA query_only = 1')
+        return conn
+    
+    def _fabrica_conexao(self):
+        """Classe das novas conexões: instrumentada quando o perfilador está ativo"""
+        if self.perfilador is None:
+            return sqlite3.Connection
+        return self.perfilador.fabrica_conexao()
+    
     def get_connection(self):
-        """Estabelece conexão com o banco de dados SQLite"""
-        if self.conn is None:
-            self.conn = sqlite3.connect(self.db_file)
-            self.conn.row_factory = sqlite3.Row
-        return self.conn
+        """Retorna a conexão da thread atual, mantida reservada até close_connection()"""
+        return self.pool.conexao_da_thread()
     
     def close_connection(self):
-        """Fecha a conexão com o banco de dados"""
-        if self.conn:
-            self.conn.close()
-            self.conn = None
+        """Fecha a conexão da thread atual com o banco de dados"""
+        conn = self.pool.conexao_da_thread()
+        self._checkpoint_wal(conn)
+        self.pool.liberar_thread(fechar=True)
+        self.pool_leitura.fechar_livres()
     
-    def create_tables_if_not_exist(self):
-        """Cria as tabelas no banco de dados se elas não existirem"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
+    def conexao(self):
+        """Context manager que empresta a conexão da thread atual durante o bloco"""
+        return self.pool.conexao()
+    
+    def transacao(self):
+        """Context manager que executa o bloco em uma transação (commit ao sair, rollback em erro)"""
+        return self.pool.transacao()
+    
+    @contextmanager
+    def leitura(self):
+        """Context manager para consultas: conexão somente leitura com um retrato consistente do banco
         
-        # Criando tabela contagem_lojas
-        cursor.execute('''
-        CREATE TABLE IF NOT EXISTS contagem_lojas (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            loja TEXT NOT NULL,
-            regional TEXT,
-            setor TEXT,
-            data TEXT,
-            caixa_hb_623 INTEGER DEFAULT 0,
-            caixa_hb_618 INTEGER DEFAULT 0,
-            caixa_hnt_g INTEGER DEFAULT 0,
-            caixa_hnt_p INTEGER DEFAULT 0,
-            caixa_chocolate INTEGER DEFAULT 0,
-            caixa_bin INTEGER DEFAULT 0,
-            pallets_pbr INTEGER DEFAULT 0,
-            status TEXT DEFAULT 'pendente',
-            usuario TEXT,
-            created_at TEXT,
-            updated_at TEXT,
-            cod_inventario TEXT NOT NULL
-        )
-        ''')
+        As leituras não disputam a conexão de escrita, então importações longas não travam as
+        telas, e todas as consultas do bloco veem o mesmo estado (nada de dados pela metade).
+        Dentro de uma transação de escrita da mesma thread, usa a conexão de escrita para que
+        o bloco enxergue as próprias alterações ainda não confirmadas.
+        """
+        escrita = self.pool.conexao_atual()
+        if escrita is not None and escrita.in_transaction:
+            with self.pool.conexao() as conn:
+                yield conn
+            return
         
-        # Criando tabela contagem_cd
-        cursor.execute('''
-        CREATE TABLE IF NOT EXISTS contagem_cd (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            setor TEXT NOT NULL,
-            data TEXT,
-            caixa_hb_623 INTEGER DEFAULT 0,
-            caixa_hb_618 INTEGER DEFAULT 0,
-            caixa_hnt_g INTEGER DEFAULT 0,
-            caixa_hnt_p INTEGER DEFAULT 0,
-            caixa_chocolate INTEGER DEFAULT 0,
-            caixa_bin INTEGER DEFAULT 0,
-            pallets_pbr INTEGER DEFAULT 0,
-            status TEXT DEFAULT 'pendente',
-            usuario TEXT,
-            created_at TEXT,
-            updated_at TEXT,
-            cod_inventario TEXT NOT NULL
-        )
-        ''')
+        with self.pool_leitura.transacao_leitura() as conn:
+            yield conn
+    
+    @contextmanager
+    def leitura_inventario(self, cod_inventario):
+        """Como leitura(), para as linhas brutas de um inventário: retorna (conn, esquema)
         
-        # Criando tabela dados_transito
-        cursor.execute('''
-        CREATE TABLE IF NOT EXISTS dados_transito (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            setor TEXT,
-            data TEXT,
-            tipo_caixa TEXT NOT NULL,
-            quantidade INTEGER DEFAULT 0,
-            usuario TEXT,
-            created_at TEXT,
-            updated_at TEXT,
-            cod_inventario TEXT NOT NULL
-        )
-        ''')
+        Inventários arquivados têm contagem_lojas, contagem_cd, dados_transito e dados_fornecedor
+        no próprio arquivo, anexado por ArquivoInventarios.anexar() durante o bloco; os demais
+        são lidos da base principal ('main'). Uso:
+            
+            with db_manager.leitura_inventario(cod) as (conn, esquema):
+                conn.execute(f'SELECT ... FROM {esquema}.contagem_lojas WHERE cod_inventario = ?', (cod,))
+        """
+        if self.get_arquivo_inventario(cod_inventario) is None:
+            with self.leitura() as conn:
+                yield conn, 'main'
+            return
         
-        # Criando tabela dados_fornecedor
-        cursor.execute('''
-        CREATE TABLE IF NOT EXISTS dados_fornecedor (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            tipo_fornecedor TEXT NOT NULL,
-            tipo_caixa TEXT NOT NULL,
-            quantidade INTEGER DEFAULT 0,
-            created_at TEXT,
-            cod_inventario TEXT NOT NULL
-        )
-        ''')
+        with ArquivoInventarios(self).anexar(cod_inventario) as (conn, esquema):
+            yield conn, esquema
+    
+    @contextmanager
+    def chamada(self, token):
+        """Associa ao token as conexões (de escrita e de leitura) usadas pela thread durante o bloco"""
+        with self.pool.chamada(token), self.pool_leitura.chamada(token):
+            yield
+    
+    def interromper_chamada(self, token):
+        """Interrompe as consultas em andamento da chamada registrada com chamada(token)"""
+        escrita = self.pool.interromper_chamada(token)
+        leitura = self.pool_leitura.interromper_chamada(token)
+        return escrita or leitura
+    
+    def _aplicar_perfil(self, conn, somente_leitura=False):
+        """Aplica os pragmas do perfil de desempenho configurado a uma conexão recém-aberta"""
+        # busy_timeout primeiro, para que a troca de journal_mode espere por outros processos
+        ordem = ['busy_timeout', 'journal_mode', 'synchronous', 'cache_size',
+                 'mmap_size', 'temp_store', 'wal_autocheckpoint']
+        if somente_leitura:
+            # journal e checkpoint são definidos pela conexão de escrita
+            ordem = [p for p in ordem if p not in ('journal_mode', 'wal_autocheckpoint')]
         
-        # Criando tabela inventario_meta
-        cursor.execute('''
-        CREATE TABLE IF NOT EXISTS inventario_meta (
-            cod_inventario TEXT PRIMARY KEY,
-            data_inicio TEXT,
-            data_fim TEXT,
-            status TEXT DEFAULT 'em_andamento',
-            descricao TEXT
-        )
-        ''')
+        for pragma in ordem:
+            valor = self.pragmas.get(pragma)
+            if not valor:
+                continue
+            
+            # Os valores vêm do config.ini e são interpolados no PRAGMA: aceitar apenas tokens simples
+            if not valor.lstrip('-').replace('_', '').isalnum():
+                print(f"Aviso: valor inválido para PRAGMA {pragma}: '{valor}'")
+                continue
+            
+            try:
+                conn.execute(f'PRAGMA {pragma} = {valor}')
+            except sqlite3.Error as e:
+                print(f"Aviso: não foi possível aplicar PRAGMA {pragma} = {valor}: {e}")
+    
+    def _checkpoint_wal(self, conn):
+        """Transfere o conteúdo do WAL para o banco e trunca o arquivo -wal"""
+        try:
+            modo = conn.execute('PRAGMA journal_mode').fetchone()[0]
+            if modo.lower() == 'wal':
+                conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+        except sqlite3.Error as e:
+            print(f"Aviso: falha no checkpoint do WAL: {e}")
+    
+    def get_perfil_desempenho(self):
+        """Retorna o perfil de desempenho ativo: valores configurados e valores efetivos na conexão"""
+        with self.conexao() as conn:
+            efetivos = {}
+            for pragma in self.pragmas:
+                try:
+                    row = conn.execute(f'PRAGMA {pragma}').fetchone()
+                    efetivos[pragma] = row[0] if row else None
+                except sqlite3.Error:
+                    efetivos[pragma] = None
+            
+            return {
+                'perfil': self.perfil,
+                'configurados': dict(self.pragmas),
+                'efetivos': efetivos,
+                'sqlite_version': sqlite3.sqlite_version
+            }
+    
+    def create_tables_if_not_exist(self):
+        """Cria as tabelas no banco de dados e aplica as migrações de schema pendentes"""
+        migrador = MigradorBanco(self, diretorio_backup=self.diretorio_backup)
+        resultado = migrador.migrar()
+        self.versao_schema = resultado['versao_atual']
         
-        conn.commit()
+        if resultado['status'] == 'error':
+            raise sqlite3.DatabaseError(resultado['message'])
+        return resultado
     
     def gerar_codigo_inventario(self):
         """Gera um novo código de inventário com base na data"""
@@ -123,248 +358,284 @@ class DatabaseManager:
     def iniciar_novo_inventario(self, descricao=""):
         """Inicia um novo inventário no sistema"""
         cod_inventario = self.gerar_codigo_inventario()
-        conn = self.get_connection()
-        cursor = conn.cursor()
+        with self.transacao() as conn:
+            cursor = conn.cursor()
+            
+            data_inicio = datetime.datetime.now().isoformat()
+            
+            cursor.execute('''
+            INSERT INTO inventario_meta (cod_inventario, data_inicio, descricao, status)
+            VALUES (?, ?, ?, ?)
+            ''', (cod_inventario, data_inicio, descricao, 'em_andamento'))
+            return cod_inventario
+    
+    def get_inventario(self, cod_inventario):
+        """Retorna um inventário pelo código (busca pela chave primária), ou None"""
+        with self.leitura() as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute('''
+            SELECT * FROM inventario_meta WHERE cod_inventario = ?
+            ''', (cod_inventario,))
+            
+            return cursor.fetchone()
+    
+    def get_inventarios_ativos(self, limite=None, deslocamento=0):
+        """Retorna os inventários em andamento, do mais recente para o mais antigo (paginado)"""
+        with self.leitura() as conn:
+            cursor = conn.cursor()
+            
+            # LIMIT -1: sem limite
+            cursor.execute('''
+            SELECT * FROM inventario_meta WHERE status = 'em_andamento'
+            ORDER BY data_inicio DESC
+            LIMIT ? OFFSET ?
+            ''', (-1 if limite is None else limite, deslocamento))
+            
+            return cursor.fetchall()
+    
+    def get_todos_inventarios(self, limite=None, deslocamento=0):
+        """Retorna todos os inventários, do mais recente para o mais antigo (paginado)"""
+        with self.leitura() as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute('''
+            SELECT * FROM inventario_meta
+            ORDER BY data_inicio DESC
+            LIMIT ? OFFSET ?
+            ''', (-1 if limite is None else limite, deslocamento))
+            
+            return cursor.fetchall()
+    
+    def contar_inventarios(self, status=None):
+        """Retorna quantos inventários existem (opcionalmente só de um status)"""
+        with self.leitura() as conn:
+            cursor = conn.cursor()
+            
+            if status:
+                cursor.execute('SELECT COUNT(*) FROM inventario_meta WHERE status = ?', (status,))
+            else:
+                cursor.execute('SELECT COUNT(*) FROM inventario_meta')
+            
+            return cursor.fetchone()[0]
+    
+    def finalizar_inventario(self, cod_inventario):
+        """Marca um inventário como finalizado"""
+        with self.transacao() as conn:
+            cursor = conn.cursor()
+            
+            data_fim = datetime.datetime.now().isoformat()
+            
+            cursor.execute('''
+            UPDATE inventario_meta
+            SET status = 'finalizado', data_fim = ?
+            WHERE cod_inventario = ?
+            ''', (data_fim, cod_inventario))
+            
+            # O snapshot entra na mesma transação: todo inventário finalizado tem o seu
+            total_lojas, total_setores = self._contar_lojas_setores(conn, cod_inventario)
+            self._gravar_snapshot(cursor, cod_inventario, total_lojas, total_setores)
+    
+    def _contar_lojas_setores(self, conn, cod_inventario, esquema='main'):
+        """Retorna (lojas, setores) distintos contados no inventário"""
+        total_lojas = conn.execute(f'''
+        SELECT COUNT(DISTINCT loja) FROM {esquema}.contagem_lojas
+        WHERE cod_inventario = ?
+        ''', (cod_inventario,)).fetchone()[0]
         
-        data_inicio = datetime.datetime.now().isoformat()
+        total_setores = conn.execute(f'''
+        SELECT COUNT(DISTINCT setor) FROM {esquema}.contagem_cd
+        WHERE cod_inventario = ?
+        ''', (cod_inventario,)).fetchone()[0]
         
+        return total_lojas, total_setores
+    
+    def _gravar_snapshot(self, cursor, cod_inventario, total_lojas, total_setores):
+        """Congela a matriz origem × tipo e os totais do inventário (não sobrescreve um snapshot existente)"""
         cursor.execute('''
-        INSERT INTO inventario_meta (cod_inventario, data_inicio, descricao, status)
-        VALUES (?, ?, ?, ?)
-        ''', (cod_inventario, data_inicio, descricao, 'em_andamento'))
+        SELECT data_inicio, data_fim FROM inventario_meta WHERE cod_inventario = ?
+        ''', (cod_inventario,))
+        meta = cursor.fetchone()
+        if meta is None:
+            return False
         
-        conn.commit()
-        return cod_inventario
-    
-    def get_inventarios_ativos(self):
-        """Retorna todos os inventários em andamento"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
+        cursor.execute(SQL_MATRIZ_TOTAIS, (cod_inventario,))
+        matriz = [(row['origem'], row['tipo_caixa'], row['total']) for row in cursor.fetchall()]
         
-        cursor.execute('''
-        SELECT * FROM inventario_meta WHERE status = 'em_andamento'
-        ORDER BY data_inicio DESC
-        ''')
+        # Mesma ordem de soma do relatório: primeiro por origem, depois o total geral
+        totais_origem = {}
+        for origem, _, total in matriz:
+            totais_origem[origem] = totais_origem.get(origem, 0) + total
+        total_geral = sum(totais_origem.get(origem, 0) for origem in ORIGENS_TOTAIS)
         
-        return cursor.fetchall()
-    
-    def get_todos_inventarios(self):
-        """Retorna todos os inventários"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
+        duracao_segundos = None
+        if meta['data_inicio'] and meta['data_fim']:
+            duracao = (datetime.datetime.fromisoformat(meta['data_fim'])
+                       - datetime.datetime.fromisoformat(meta['data_inicio']))
+            duracao_segundos = int(duracao.total_seconds())
         
         cursor.execute('''
-        SELECT * FROM inventario_meta
-        ORDER BY data_inicio DESC
-        ''')
+        INSERT OR IGNORE INTO inventario_snapshot (
+            cod_inventario, data_inicio, data_fim, duracao_segundos,
+            total_lojas, total_setores, total_geral, criado_em
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (cod_inventario, meta['data_inicio'], meta['data_fim'], duracao_segundos,
+              total_lojas, total_setores, total_geral, datetime.datetime.now().isoformat()))
+        if cursor.rowcount == 0:
+            return False
         
-        return cursor.fetchall()
+        cursor.executemany('''
+        INSERT INTO inventario_snapshot_totais (cod_inventario, origem, tipo_caixa, quantidade)
+        VALUES (?, ?, ?, ?)
+        ''', [(cod_inventario, origem, tipo_caixa, total) for origem, tipo_caixa, total in matriz])
+        return True
     
-    def finalizar_inventario(self, cod_inventario):
-        """Marca um inventário como finalizado"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
+    def gravar_snapshot_inventario(self, cod_inventario):
+        """Grava o snapshot de um inventário já finalizado que ainda não tem um (ex.: bancos antigos)
         
-        data_fim = datetime.datetime.now().isoformat()
+        Retorna True se o snapshot foi gravado, False se já existia ou o inventário não existe.
+        """
+        # Inventários arquivados são contados no próprio arquivo (o ATTACH não pode ficar
+        # dentro da transação de escrita)
+        with ArquivoInventarios(self).anexar(cod_inventario) as (conn, esquema):
+            total_lojas, total_setores = self._contar_lojas_setores(conn, cod_inventario, esquema)
         
-        cursor.execute('''
-        UPDATE inventario_meta
-        SET status = 'finalizado', data_fim = ?
-        WHERE cod_inventario = ?
-        ''', (data_fim, cod_inventario))
+        with self.transacao() as conn:
+            return self._gravar_snapshot(conn.cursor(), cod_inventario, total_lojas, total_setores)
+    
+    def get_snapshot_inventario(self, cod_inventario):
+        """Retorna o snapshot do inventário, com a matriz em 'totais', ou None se não houver"""
+        with self.leitura() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+            SELECT * FROM inventario_snapshot WHERE cod_inventario = ?
+            ''', (cod_inventario,))
+            row = cursor.fetchone()
+            if row is None:
+                return None
+            
+            snapshot = dict(row)
+            cursor.execute('''
+            SELECT origem, tipo_caixa, quantidade AS total
+            FROM inventario_snapshot_totais
+            WHERE cod_inventario = ?
+            ''', (cod_inventario,))
+            snapshot['totais'] = [dict(linha) for linha in cursor.fetchall()]
+            return snapshot
+    
+    def get_snapshots_recentes(self, limite=10):
+        """Retorna os snapshots dos últimos inventários finalizados (pelo índice de data_fim)"""
+        with self.leitura() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+            SELECT cod_inventario, data_inicio, data_fim, duracao_segundos,
+                   total_lojas, total_setores, total_geral
+            FROM inventario_snapshot
+            ORDER BY data_fim DESC
+            LIMIT ?
+            ''', (limite,))
+            return [dict(row) for row in cursor.fetchall()]
+    
+    def get_serie_snapshots(self, limite=12):
+        """Retorna as células dos snapshots dos últimos inventários finalizados, em uma única consulta
         
-        conn.commit()
+        Uma linha por inventário × origem × tipo de caixa, do inventário mais antigo para o mais
+        recente, com os dados do snapshot repetidos em cada linha.
+        """
+        with self.leitura() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+            WITH ultimos AS (
+                SELECT cod_inventario, data_inicio, data_fim, duracao_segundos,
+                       total_lojas, total_setores, total_geral
+                FROM inventario_snapshot
+                ORDER BY data_fim DESC
+                LIMIT ?
+            )
+            SELECT u.*, t.origem, t.tipo_caixa, t.quantidade AS total
+            FROM ultimos u
+            LEFT JOIN inventario_snapshot_totais t ON t.cod_inventario = u.cod_inventario
+            ORDER BY u.data_fim, u.cod_inventario
+            ''', (limite,))
+            return [dict(row) for row in cursor.fetchall()]
     
     def inserir_contagem_loja(self, dados, cod_inventario):
         """Insere ou atualiza dados de contagem de loja"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        # Verificar se já existe um registro para esta loja neste inventário
-        cursor.execute('''
-        SELECT id FROM contagem_lojas 
-        WHERE loja = ? AND cod_inventario = ?
-        ''', (dados['loja'], cod_inventario))
-        
-        resultado = cursor.fetchone()
-        timestamp = datetime.datetime.now().isoformat()
-        
-        if resultado:
-            # Atualizar registro existente
-            id_loja = resultado['id']
-            cursor.execute('''
-            UPDATE contagem_lojas SET
-            setor = ?,
-            data = ?,
-            caixa_hb_623 = ?,
-            caixa_hb_618 = ?,
-            caixa_hnt_g = ?,
-            caixa_hnt_p = ?,
-            caixa_chocolate = ?,
-            caixa_bin = ?,
-            pallets_pbr = ?,
-            status = ?,
-            usuario = ?,
-            updated_at = ?
-            WHERE id = ?
-            ''', (
-                dados.get('setor', ''),
-                dados.get('data', ''),
-                dados.get('caixa_hb_623', 0),
-                dados.get('caixa_hb_618', 0),
-                dados.get('caixa_hnt_g', 0),
-                dados.get('caixa_hnt_p', 0),
-                dados.get('caixa_chocolate', 0),
-                dados.get('caixa_bin', 0),
-                dados.get('pallets_pbr', 0),
-                dados.get('status', 'pendente'),
-                dados.get('usuario', ''),
-                timestamp,
-                id_loja
-            ))
-        else:
-            # Inserir novo registro
-            cursor.execute('''
-            INSERT INTO contagem_lojas (
-                loja,
-                regional,
-                setor,
-                data,
-                caixa_hb_623,
-                caixa_hb_618,
-                caixa_hnt_g,
-                caixa_hnt_p,
-                caixa_chocolate,
-                caixa_bin,
-                pallets_pbr,
-                status,
-                usuario,
-                created_at,
-                updated_at,
-                cod_inventario
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                dados['loja'],
-                dados.get('regional', ''),
-                dados.get('setor', ''),
-                dados.get('data', ''),
-                dados.get('caixa_hb_623', 0),
-                dados.get('caixa_hb_618', 0),
-                dados.get('caixa_hnt_g', 0),
-                dados.get('caixa_hnt_p', 0),
-                dados.get('caixa_chocolate', 0),
-                dados.get('caixa_bin', 0),
-                dados.get('pallets_pbr', 0),
-                dados.get('status', 'pendente'),
-                dados.get('usuario', ''),
-                timestamp,
-                timestamp,
-                cod_inventario
-            ))
-        
-        conn.commit()
+        with self.transacao() as conn:
+            cursor = conn.cursor()
+            timestamp = datetime.datetime.now().isoformat()
+            
+            # Uma única escrita indexada: a chave (cod_inventario, loja) decide entre inserir e atualizar
+            cursor.execute(SQL_UPSERT_CONTAGEM_LOJA, self._parametros_contagem_loja(dados, cod_inventario, timestamp))
     
     def inserir_contagem_cd(self, dados, cod_inventario):
         """Insere ou atualiza dados de contagem do CD"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        # Verificar se já existe um registro para este setor neste inventário
-        cursor.execute('''
-        SELECT id FROM contagem_cd 
-        WHERE setor = ? AND cod_inventario = ?
-        ''', (dados['setor'], cod_inventario))
-        
-        resultado = cursor.fetchone()
-        timestamp = datetime.datetime.now().isoformat()
-        
-        if resultado:
-            # Atualizar registro existente
-            id_cd = resultado['id']
-            cursor.execute('''
-            UPDATE contagem_cd SET
-            data = ?,
-            caixa_hb_623 = ?,
-            caixa_hb_618 = ?,
-            caixa_hnt_g = ?,
-            caixa_hnt_p = ?,
-            caixa_chocolate = ?,
-            caixa_bin = ?,
-            pallets_pbr = ?,
-            status = ?,
-            usuario = ?,
-            updated_at = ?
-            WHERE id = ?
-            ''', (
-                dados.get('data', ''),
-                dados.get('caixa_hb_623', 0),
-                dados.get('caixa_hb_618', 0),
-                dados.get('caixa_hnt_g', 0),
-                dados.get('caixa_hnt_p', 0),
-                dados.get('caixa_chocolate', 0),
-                dados.get('caixa_bin', 0),
-                dados.get('pallets_pbr', 0),
-                dados.get('status', 'pendente'),
-                dados.get('usuario', ''),
-                timestamp,
-                id_cd
-            ))
-        else:
-            # Inserir novo registro
-            cursor.execute('''
-            INSERT INTO contagem_cd (
-                setor,
-                data,
-                caixa_hb_623,
-                caixa_hb_618,
-                caixa_hnt_g,
-                caixa_hnt_p,
-                caixa_chocolate,
-                caixa_bin,
-                pallets_pbr,
-                status,
-                usuario,
-                created_at,
-                updated_at,
-                cod_inventario
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                dados['setor'],
-                dados.get('data', ''),
-                dados.get('caixa_hb_623', 0),
-                dados.get('caixa_hb_618', 0),
-                dados.get('caixa_hnt_g', 0),
-                dados.get('caixa_hnt_p', 0),
-                dados.get('caixa_chocolate', 0),
-                dados.get('caixa_bin', 0),
-                dados.get('pallets_pbr', 0),
-                dados.get('status', 'pendente'),
-                dados.get('usuario', ''),
-                timestamp,
-                timestamp,
-                cod_inventario
-            ))
-        
-        conn.commit()
+        with self.transacao() as conn:
+            cursor = conn.cursor()
+            timestamp = datetime.datetime.now().isoformat()
+            
+            # Uma única escrita indexada: a chave (cod_inventario, setor) decide entre inserir e atualizar
+            cursor.execute(SQL_UPSERT_CONTAGEM_CD, self._parametros_contagem_cd(dados, cod_inventario, timestamp))
+    
+    def _parametros_contagem_loja(self, dados, cod_inventario, timestamp):
+        """Monta os parâmetros do upsert de contagem de loja"""
+        return (
+            dados['loja'],
+            dados.get('regional', ''),
+            dados.get('setor', ''),
+            dados.get('data', ''),
+            dados.get('caixa_hb_623', 0),
+            dados.get('caixa_hb_618', 0),
+            dados.get('caixa_hnt_g', 0),
+            dados.get('caixa_hnt_p', 0),
+            dados.get('caixa_chocolate', 0),
+            dados.get('caixa_bin', 0),
+            dados.get('pallets_pbr', 0),
+            dados.get('status', 'pendente'),
+            dados.get('usuario', ''),
+            timestamp,
+            timestamp,
+            cod_inventario
+        )
+    
+    def _parametros_contagem_cd(self, dados, cod_inventario, timestamp):
+        """Monta os parâmetros do upsert de contagem do CD"""
+        return (
+            dados['setor'],
+            dados.get('data', ''),
+            dados.get('caixa_hb_623', 0),
+            dados.get('caixa_hb_618', 0),
+            dados.get('caixa_hnt_g', 0),
+            dados.get('caixa_hnt_p', 0),
+            dados.get('caixa_chocolate', 0),
+            dados.get('caixa_bin', 0),
+            dados.get('pallets_pbr', 0),
+            dados.get('status', 'pendente'),
+            dados.get('usuario', ''),
+            timestamp,
+            timestamp,
+            cod_inventario
+        )
     
     def inserir_dados_transito(self, dados, cod_inventario):
         """Insere dados de trânsito no banco"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        timestamp = datetime.datetime.now().isoformat()
-        
-        cursor.execute('''
-        INSERT INTO dados_transito (
-            setor,
-            data,
-            tipo_caixa,
-            quantidade,
-            usuario,
-            created_at,
-            updated_at,
-            cod_inventario
-        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
+        with self.transacao() as conn:
+            cursor = conn.cursor()
+            timestamp = datetime.datetime.now().isoformat()
+            
+            cursor.execute(SQL_INSERT_DADOS_TRANSITO, self._parametros_dados_transito(dados, cod_inventario, timestamp))
+    
+    def inserir_dados_fornecedor(self, dados, cod_inventario):
+        """Insere dados de fornecedor no banco"""
+        with self.transacao() as conn:
+            cursor = conn.cursor()
+            timestamp = datetime.datetime.now().isoformat()
+            
+            cursor.execute(SQL_INSERT_DADOS_FORNECEDOR, self._parametros_dados_fornecedor(dados, cod_inventario, timestamp))
+    
+    def _parametros_dados_transito(self, dados, cod_inventario, timestamp):
+        """Monta os parâmetros da inserção de dados de trânsito"""
+        return (
             dados.get('setor', ''),
             dados.get('data', ''),
             dados['tipo_caixa'],
@@ -373,189 +644,436 @@ class DatabaseManager:
             timestamp,
             timestamp,
             cod_inventario
-        ))
-        
-        conn.commit()
+        )
     
-    def inserir_dados_fornecedor(self, dados, cod_inventario):
-        """Insere dados de fornecedor no banco"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        timestamp = datetime.datetime.now().isoformat()
-        
-        cursor.execute('''
-        INSERT INTO dados_fornecedor (
-            tipo_fornecedor,
-            tipo_caixa,
-            quantidade,
-            created_at,
-            cod_inventario
-        ) VALUES (?, ?, ?, ?, ?)
-        ''', (
+    def _parametros_dados_fornecedor(self, dados, cod_inventario, timestamp):
+        """Monta os parâmetros da inserção de dados de fornecedor"""
+        return (
             dados['tipo_fornecedor'],
             dados['tipo_caixa'],
             dados.get('quantidade', 0),
             timestamp,
             cod_inventario
-        ))
-        
-        conn.commit()
+        )
     
-    def get_dados_inventario_atual(self, cod_inventario):
-        """Retorna um resumo dos dados do inventário atual"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
+    # --- ESCRITA EM LOTE ---
+    # As variantes *_bulk recebem um iterável de dicionários (no mesmo formato dos
+    # métodos inserir_* individuais), enviam as linhas com executemany e fazem um
+    # único commit a cada `tamanho_lote` linhas em vez de um commit por linha.
+    
+    def inserir_contagens_lojas_bulk(self, registros, cod_inventario, tamanho_lote=None):
+        """Insere ou atualiza várias contagens de loja em lote"""
+        existentes = self._chaves_existentes('contagem_lojas', 'loja', cod_inventario)
+        contadores = {'inseridos': 0, 'atualizados': 0}
+        timestamp = datetime.datetime.now().isoformat()
         
-        # Dados de lojas
-        cursor.execute('''
-        SELECT COUNT(*) as total_lojas,
-               SUM(CASE WHEN status = 'finalizado' THEN 1 ELSE 0 END) as lojas_finalizadas,
-               SUM(caixa_hb_623) as total_hb_623,
-               SUM(caixa_hb_618) as total_hb_618,
-               SUM(caixa_hnt_g) as total_hnt_g,
-               SUM(caixa_hnt_p) as total_hnt_p,
-               SUM(caixa_chocolate) as total_chocolate,
-               SUM(caixa_bin) as total_bin,
-               SUM(pallets_pbr) as total_pallets
-        FROM contagem_lojas
-        WHERE cod_inventario = ?
-        ''', (cod_inventario,))
+        def parametros():
+            for dados in registros:
+                self._contar_upsert(dados['loja'], existentes, contadores)
+                yield self._parametros_contagem_loja(dados, cod_inventario, timestamp)
         
-        dados_lojas = cursor.fetchone()
+        self._executar_em_lotes(SQL_UPSERT_CONTAGEM_LOJA, parametros(), tamanho_lote)
+        return contadores
+    
+    def inserir_contagens_cd_bulk(self, registros, cod_inventario, tamanho_lote=None):
+        """Insere ou atualiza várias contagens de setores do CD em lote"""
+        existentes = self._chaves_existentes('contagem_cd', 'setor', cod_inventario)
+        contadores = {'inseridos': 0, 'atualizados': 0}
+        timestamp = datetime.datetime.now().isoformat()
         
-        # Dados de CD
-        cursor.execute('''
-        SELECT COUNT(*) as total_setores,
-               SUM(CASE WHEN status = 'finalizado' THEN 1 ELSE 0 END) as setores_finalizados,
-               SUM(caixa_hb_623) as total_hb_623,
-               SUM(caixa_hb_618) as total_hb_618,
-               SUM(caixa_hnt_g) as total_hnt_g,
-               SUM(caixa_hnt_p) as total_hnt_p,
-               SUM(caixa_chocolate) as total_chocolate,
-               SUM(caixa_bin) as total_bin,
-               SUM(pallets_pbr) as total_pallets
-        FROM contagem_cd
-        WHERE cod_inventario = ?
-        ''', (cod_inventario,))
+        def parametros():
+            for dados in registros:
+                self._contar_upsert(dados['setor'], existentes, contadores)
+                yield self._parametros_contagem_cd(dados, cod_inventario, timestamp)
         
-        dados_cd = cursor.fetchone()
+        self._executar_em_lotes(SQL_UPSERT_CONTAGEM_CD, parametros(), tamanho_lote)
+        return contadores
+    
+    def inserir_dados_transito_bulk(self, registros, cod_inventario, tamanho_lote=None):
+        """Insere vários registros de trânsito em lote"""
+        contadores = {'inseridos': 0, 'atualizados': 0}
+        timestamp = datetime.datetime.now().isoformat()
         
-        # Dados de trânsito
-        cursor.execute('''
-        SELECT tipo_caixa, SUM(quantidade) as total
-        FROM dados_transito
-        WHERE cod_inventario = ?
-        GROUP BY tipo_caixa
-        ''', (cod_inventario,))
+        def parametros():
+            for dados in registros:
+                contadores['inseridos'] += 1
+                yield self._parametros_dados_transito(dados, cod_inventario, timestamp)
         
-        dados_transito = cursor.fetchall()
+        self._executar_em_lotes(SQL_INSERT_DADOS_TRANSITO, parametros(), tamanho_lote)
+        return contadores
+    
+    def inserir_dados_fornecedor_bulk(self, registros, cod_inventario, tamanho_lote=None):
+        """Insere vários registros de fornecedor em lote"""
+        contadores = {'inseridos': 0, 'atualizados': 0}
+        timestamp = datetime.datetime.now().isoformat()
         
-        # Dados de fornecedor
-        cursor.execute('''
-        SELECT tipo_caixa, SUM(quantidade) as total
-        FROM dados_fornecedor
-        WHERE cod_inventario = ?
-        GROUP BY tipo_caixa
-        ''', (cod_inventario,))
+        def parametros():
+            for dados in registros:
+                contadores['inseridos'] += 1
+                yield self._parametros_dados_fornecedor(dados, cod_inventario, timestamp)
         
-        dados_fornecedor = cursor.fetchall()
+        self._executar_em_lotes(SQL_INSERT_DADOS_FORNECEDOR, parametros(), tamanho_lote)
+        return contadores
+    
+    def _chaves_existentes(self, tabela, coluna, cod_inventario):
+        """Retorna o conjunto de lojas/setores já cadastrados no inventário (leitura só do índice)"""
+        with self.conexao() as conn:
+            cursor = conn.execute(f'SELECT {coluna} FROM {tabela} WHERE cod_inventario = ?', (cod_inventario,))
+            return {row[0] for row in cursor.fetchall()}
+    
+    def _contar_upsert(self, chave, existentes, contadores):
+        """Classifica uma linha do upsert como inserção ou atualização"""
+        if chave in existentes:
+            contadores['atualizados'] += 1
+        else:
+            contadores['inseridos'] += 1
+            existentes.add(chave)
+    
+    def _executar_em_lotes(self, sql, parametros, tamanho_lote=None):
+        """Executa o SQL com executemany, fazendo um commit a cada lote de linhas"""
+        tamanho_lote = tamanho_lote or self.tamanho_lote
         
-        return {
-            'dados_lojas': dict(dados_lojas) if dados_lojas else {},
-            'dados_cd': dict(dados_cd) if dados_cd else {},
-            'dados_transito': [dict(row) for row in dados_transito],
-            'dados_fornecedor': [dict(row) for row in dados_fornecedor]
-        }
+        with self.conexao() as conn:
+            # Dentro de uma transação do chamador os lotes não são confirmados aqui:
+            # quem abriu a transação decide o commit
+            transacao_externa = conn.in_transaction
+            cursor = conn.cursor()
+            
+            try:
+                lote = []
+                for item in parametros:
+                    lote.append(item)
+                    if len(lote) >= tamanho_lote:
+                        cursor.executemany(sql, lote)
+                        if not transacao_externa:
+                            conn.commit()
+                        lote = []
+                
+                if lote:
+                    cursor.executemany(sql, lote)
+                if not transacao_externa:
+                    conn.commit()
+            except Exception:
+                # Desfaz apenas o lote em andamento; os lotes anteriores já foram confirmados
+                if not transacao_externa:
+                    conn.rollback()
+                raise
+    
+    def get_dados_inventario_atual(self, cod_inventario):
+        """Retorna um resumo dos dados do inventário atual"""
+        with self.leitura_inventario(cod_inventario) as (conn, esquema):
+            cursor = conn.cursor()
+            
+            # Dados de lojas
+            cursor.execute(f'''
+            SELECT COUNT(*) as total_lojas,
+                   SUM(CASE WHEN status = 'finalizado' THEN 1 ELSE 0 END) as lojas_finalizadas,
+                   SUM(caixa_hb_623) as total_hb_623,
+                   SUM(caixa_hb_618) as total_hb_618,
+                   SUM(caixa_hnt_g) as total_hnt_g,
+                   SUM(caixa_hnt_p) as total_hnt_p,
+                   SUM(caixa_chocolate) as total_chocolate,
+                   SUM(caixa_bin) as total_bin,
+                   SUM(pallets_pbr) as total_pallets
+            FROM {esquema}.contagem_lojas
+            WHERE cod_inventario = ?
+            ''', (cod_inventario,))
+            
+            dados_lojas = cursor.fetchone()
+            
+            # Dados de CD
+            cursor.execute(f'''
+            SELECT COUNT(*) as total_setores,
+                   SUM(CASE WHEN status = 'finalizado' THEN 1 ELSE 0 END) as setores_finalizados,
+                   SUM(caixa_hb_623) as total_hb_623,
+                   SUM(caixa_hb_618) as total_hb_618,
+                   SUM(caixa_hnt_g) as total_hnt_g,
+                   SUM(caixa_hnt_p) as total_hnt_p,
+                   SUM(caixa_chocolate) as total_chocolate,
+                   SUM(caixa_bin) as total_bin,
+                   SUM(pallets_pbr) as total_pallets
+            FROM {esquema}.contagem_cd
+            WHERE cod_inventario = ?
+            ''', (cod_inventario,))
+            
+            dados_cd = cursor.fetchone()
+            
+            # Dados de trânsito
+            cursor.execute(f'''
+            SELECT tipo_caixa, SUM(quantidade) as total
+            FROM {esquema}.dados_transito
+            WHERE cod_inventario = ?
+            GROUP BY tipo_caixa
+            ''', (cod_inventario,))
+            
+            dados_transito = cursor.fetchall()
+            
+            # Dados de fornecedor
+            cursor.execute(f'''
+            SELECT tipo_caixa, SUM(quantidade) as total
+            FROM {esquema}.dados_fornecedor
+            WHERE cod_inventario = ?
+            GROUP BY tipo_caixa
+            ''', (cod_inventario,))
+            
+            dados_fornecedor = cursor.fetchall()
+            
+            return {
+                'dados_lojas': dict(dados_lojas) if dados_lojas else {},
+                'dados_cd': dict(dados_cd) if dados_cd else {},
+                'dados_transito': [dict(row) for row in dados_transito],
+                'dados_fornecedor': [dict(row) for row in dados_fornecedor]
+            }
     
     def get_lojas_por_regional(self, cod_inventario):
         """Retorna contagem de lojas agrupadas por regional"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-        SELECT regional, 
-               COUNT(*) as total_lojas,
-               SUM(CASE WHEN status = 'finalizado' THEN 1 ELSE 0 END) as lojas_finalizadas
-        FROM contagem_lojas
-        WHERE cod_inventario = ?
-        GROUP BY regional
-        ''', (cod_inventario,))
-        
-        return [dict(row) for row in cursor.fetchall()]
+        with self.leitura_inventario(cod_inventario) as (conn, esquema):
+            cursor = conn.cursor()
+            
+            cursor.execute(f'''
+            SELECT regional, 
+                   COUNT(*) as total_lojas,
+                   SUM(CASE WHEN status = 'finalizado' THEN 1 ELSE 0 END) as lojas_finalizadas
+            FROM {esquema}.contagem_lojas
+            WHERE cod_inventario = ?
+            GROUP BY regional
+            ''', (cod_inventario,))
+            
+            return [dict(row) for row in cursor.fetchall()]
     
     def get_lojas_pendentes(self, cod_inventario):
         """Retorna lista de lojas pendentes agrupadas por regional"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-        SELECT regional, loja
-        FROM contagem_lojas
-        WHERE cod_inventario = ? AND status != 'finalizado'
-        ORDER BY regional, loja
-        ''', (cod_inventario,))
-        
-        resultados = cursor.fetchall()
-        
-        # Agrupando lojas por regional
-        lojas_por_regional = {}
-        for row in resultados:
-            regional = row['regional'] or 'Sem Regional'
-            if regional not in lojas_por_regional:
-                lojas_por_regional[regional] = []
-            lojas_por_regional[regional].append(row['loja'])
-        
-        return lojas_por_regional
+        with self.leitura_inventario(cod_inventario) as (conn, esquema):
+            cursor = conn.cursor()
+            
+            cursor.execute(f'''
+            SELECT regional, loja
+            FROM {esquema}.contagem_lojas
+            WHERE cod_inventario = ? AND status != 'finalizado'
+            ORDER BY regional, loja
+            ''', (cod_inventario,))
+            
+            resultados = cursor.fetchall()
+            
+            # Agrupando lojas por regional
+            lojas_por_regional = {}
+            for row in resultados:
+                regional = row['regional'] or 'Sem Regional'
+                if regional not in lojas_por_regional:
+                    lojas_por_regional[regional] = []
+                lojas_por_regional[regional].append(row['loja'])
+            
+            return lojas_por_regional
     
 
     def get_lojas_finalizadas(self, cod_inventario, regional=None):
         """Retorna uma lista de lojas finalizadas no inventário atual, opcionalmente filtradas por regional"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        try:
-            if regional and regional != 'Sem Regional':
-                cursor.execute('''
-                SELECT loja, regional
-                FROM contagem_lojas
-                WHERE cod_inventario = ? AND status = 'finalizado' AND regional = ?
-                ''', (cod_inventario, regional))
-            else:
-                # Se for 'Sem Regional', precisamos considerar NULL ou vazio
-                if regional == 'Sem Regional':
-                    cursor.execute('''
+        with self.leitura_inventario(cod_inventario) as (conn, esquema):
+            cursor = conn.cursor()
+            
+            try:
+                if regional and regional != 'Sem Regional':
+                    cursor.execute(f'''
                     SELECT loja, regional
-                    FROM contagem_lojas
-                    WHERE cod_inventario = ? AND status = 'finalizado' AND (regional IS NULL OR regional = '')
-                    ''', (cod_inventario,))
+                    FROM {esquema}.contagem_lojas
+                    WHERE cod_inventario = ? AND status = 'finalizado' AND regional = ?
+                    ''', (cod_inventario, regional))
                 else:
-                    # Se regional for None, retornar todas as lojas finalizadas
-                    cursor.execute('''
-                    SELECT loja, regional
-                    FROM contagem_lojas
-                    WHERE cod_inventario = ? AND status = 'finalizado'
-                    ''', (cod_inventario,))
+                    # Se for 'Sem Regional', precisamos considerar NULL ou vazio
+                    if regional == 'Sem Regional':
+                        cursor.execute(f'''
+                        SELECT loja, regional
+                        FROM {esquema}.contagem_lojas
+                        WHERE cod_inventario = ? AND status = 'finalizado' AND (regional IS NULL OR regional = '')
+                        ''', (cod_inventario,))
+                    else:
+                        # Se regional for None, retornar todas as lojas finalizadas
+                        cursor.execute(f'''
+                        SELECT loja, regional
+                        FROM {esquema}.contagem_lojas
+                        WHERE cod_inventario = ? AND status = 'finalizado'
+                        ''', (cod_inventario,))
+                
+                resultados = cursor.fetchall()
+                return [dict(row) for row in resultados]
+            except Exception as e:
+                print(f"Erro ao buscar lojas finalizadas: {e}")
+                return []
+    
+    def get_setores_finalizados(self, cod_inventario):
+        """Retorna uma lista de setores finalizados no inventário atual"""
+        with self.leitura_inventario(cod_inventario) as (conn, esquema):
+            cursor = conn.cursor()
             
-            resultados = cursor.fetchall()
-            return [dict(row) for row in resultados]
-        except Exception as e:
-            print(f"Erro ao buscar lojas finalizadas: {e}")
-            return []
+            try:
+                cursor.execute(f'''
+                SELECT setor
+                FROM {esquema}.contagem_cd
+                WHERE cod_inventario = ? AND status = 'finalizado'
+                ''', (cod_inventario,))
+                
+                resultados = cursor.fetchall()
+                return [dict(row) for row in resultados]
+            except Exception as e:
+                print(f"Erro ao buscar setores finalizados: {e}")
+                return []
+    
+    def get_tipos_caixa(self):
+        """Retorna os códigos dos tipos de caixa ativos do catálogo, na ordem de exibição"""
+        if self._tipos_caixa is None:
+            with self.leitura() as conn:
+                cursor = conn.cursor()
+                cursor.execute('''
+                SELECT codigo FROM tipo_caixa
+                WHERE ativo = 1
+                ORDER BY ordem, codigo
+                ''')
+                self._tipos_caixa = [row['codigo'] for row in cursor.fetchall()]
+        return list(self._tipos_caixa)
+    
+    def normalizar_tipo_caixa(self, tipo):
+        """Converte o texto de um tipo de caixa para o código do catálogo ('bin' se desconhecido)"""
+        if self._aliases_tipo_caixa is None:
+            with self.leitura() as conn:
+                cursor = conn.cursor()
+                cursor.execute('SELECT alias, codigo FROM tipo_caixa_alias')
+                self._aliases_tipo_caixa = {row['alias']: row['codigo'] for row in cursor.fetchall()}
+        
+        # Mesmas regras da expressão SQL usada pelos gatilhos de contagem_item
+        tipo = (tipo or '').lower()
+        if tipo.startswith('caixa_') or tipo.startswith('caixa '):
+            tipo = tipo[6:]
+        tipo_limpo = tipo.replace('_', '').replace(' ', '')
+        
+        if tipo_limpo in self._aliases_tipo_caixa:
+            return self._aliases_tipo_caixa[tipo_limpo]
+        
+        print(f"Aviso: Tipo de caixa desconhecido: '{tipo}', considerando como '{TIPO_CAIXA_PADRAO}'")
+        return TIPO_CAIXA_PADRAO
+    
+    def cadastrar_tipo_caixa(self, codigo, descricao="", aliases=()):
+        """Cadastra um novo tipo de caixa no catálogo, com seus nomes alternativos"""
+        codigo = codigo.strip().lower()
+        if not codigo:
+            return {'status': 'error', 'message': 'Código do tipo de caixa não informado'}
+        
+        with self.transacao() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+            INSERT OR IGNORE INTO tipo_caixa (codigo, descricao, ordem)
+            VALUES (?, ?, (SELECT COALESCE(MAX(ordem), 0) + 1 FROM tipo_caixa))
+            ''', (codigo, descricao))
+            
+            novos_aliases = {codigo.replace('_', '').replace(' ', '')}
+            novos_aliases.update(a.lower().replace('_', '').replace(' ', '') for a in aliases)
+            cursor.executemany('''
+            INSERT OR REPLACE INTO tipo_caixa_alias (alias, codigo) VALUES (?, ?)
+            ''', [(alias, codigo) for alias in novos_aliases if alias])
+        
+        self._tipos_caixa = None
+        self._aliases_tipo_caixa = None
+        return {'status': 'success', 'message': f'Tipo de caixa {codigo} cadastrado'}
+    
+    def get_totais_contagem_item(self, cod_inventario):
+        """Retorna as somas de contagem_item por destino do relatório e tipo de caixa"""
+        with self.leitura() as conn:
+            cursor = conn.cursor()
+            cursor.execute(SQL_TOTAIS_CONTAGEM_ITEM, (cod_inventario,))
+            return [dict(row) for row in cursor.fetchall()]
+    
+    def get_totais_inventario(self, cod_inventario):
+        """Retorna os totais por destino e tipo de caixa mantidos em inventario_totais"""
+        with self.leitura() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+            SELECT destino, tipo_caixa, quantidade AS total
+            FROM inventario_totais
+            WHERE cod_inventario = ?
+            ''', (cod_inventario,))
+            return [dict(row) for row in cursor.fetchall()]
+    
+    def get_matriz_totais(self, cod_inventario, recalcular=False):
+        """Retorna a matriz completa origem × tipo de caixa (com zeros) em uma única consulta
+        
+        Por padrão lê inventario_totais; com recalcular=True soma direto de contagem_item.
+        """
+        with self.leitura() as conn:
+            cursor = conn.cursor()
+            cursor.execute(SQL_MATRIZ_TOTAIS_ITENS if recalcular else SQL_MATRIZ_TOTAIS, (cod_inventario,))
+            return [dict(row) for row in cursor.fetchall()]
+    
+    def reconstruir_totais(self, cod_inventario=None):
+        """Recalcula inventario_totais a partir de contagem_item (um inventário ou todos)
 
-def get_setores_finalizados(self, cod_inventario):
-    """Retorna uma lista de setores finalizados no inventário atual"""
-    conn = self.get_connection()
-    cursor = conn.cursor()
+        Inventários arquivados não têm mais linhas em contagem_item: seus totais foram
+        congelados no arquivamento e não são recalculados.
+        """
+        with self.transacao() as conn:
+            cursor = conn.cursor()
+            
+            if cod_inventario:
+                codigos = [cod_inventario]
+            else:
+                cursor.execute('''
+                SELECT cod_inventario FROM contagem_item
+                UNION
+                SELECT cod_inventario FROM inventario_totais
+                ''')
+                codigos = [row['cod_inventario'] for row in cursor.fetchall()]
+            
+            cursor.execute('SELECT cod_inventario FROM inventario_arquivo')
+            arquivados = {row['cod_inventario'] for row in cursor.fetchall()}
+            codigos = [codigo for codigo in codigos if codigo not in arquivados]
+            
+            linhas = 0
+            for codigo in codigos:
+                cursor.execute('DELETE FROM inventario_totais WHERE cod_inventario = ?', (codigo,))
+                cursor.execute(f'''
+                INSERT INTO inventario_totais (cod_inventario, destino, tipo_caixa, quantidade)
+                SELECT cod_inventario, destino, tipo_caixa, total FROM ({SQL_TOTAIS_CONTAGEM_ITEM})
+                ''', (codigo,))
+                linhas += cursor.rowcount
+        
+        return {
+            'status': 'success',
+            'message': f'Totais reconstruídos para {len(codigos)} inventário(s)',
+            'inventarios': len(codigos),
+            'linhas': linhas
+        }
     
-    try:
-        cursor.execute('''
-        SELECT setor
-        FROM contagem_cd
-        WHERE cod_inventario = ? AND status = 'finalizado'
-        ''', (cod_inventario,))
+    def verificar_totais(self, cod_inventario):
+        """Compara inventario_totais com o cálculo direto em contagem_item e retorna as divergências"""
+        if self.get_arquivo_inventario(cod_inventario):
+            # Totais congelados no arquivamento: não há itens na base principal para comparar
+            return []
         
-        resultados = cursor.fetchall()
-        return [dict(row) for row in resultados]
-    except Exception as e:
-        print(f"Erro ao buscar setores finalizados: {e}")
-        return []
\ No newline at end of file
+        esperados = {
+            (row['destino'], row['tipo_caixa']): row['total'] or 0
+            for row in self.get_totais_contagem_item(cod_inventario)
+        }
+        atuais = {
+            (row['destino'], row['tipo_caixa']): row['total'] or 0
+            for row in self.get_totais_inventario(cod_inventario)
+        }
+        
+        divergencias = []
+        for chave in set(esperados) | set(atuais):
+            if esperados.get(chave, 0) != atuais.get(chave, 0):
+                divergencias.append({
+                    'destino': chave[0],
+                    'tipo_caixa': chave[1],
+                    'esperado': esperados.get(chave, 0),
+                    'atual': atuais.get(chave, 0)
+                })
+        return divergencias
+    
+    def get_arquivo_inventario(self, cod_inventario):
+        """Retorna a entrada do catálogo de arquivamento do inventário, ou None se não arquivado"""
+        with self.leitura() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+            SELECT * FROM inventario_arquivo
+            WHERE cod_inventario = ?
+            ''', (cod_inventario,))
+            row = cursor.fetchone()
+            return dict(row) if row else None
@@ -0,0 +1,285 @@
+# database/manutencao_banco.py
+import os
+import sqlite3
+import datetime
+import threading
+import time
+from utils.config import Config
+
+# Valores de PRAGMA auto_vacuum
+AUTO_VACUUM_NENHUM = 0
+AUTO_VACUUM_INCREMENTAL = 2
+
+
+class ManutencaoBanco:
+    """Manutenção periódica do banco: PRAGMA optimize, ANALYZE e vacuum incremental
+
+    Cada passo roda fora de transação longa (as telas e importações continuam) e só
+    começa se ainda houver tempo no orçamento. Tamanho do arquivo e páginas livres antes
+    e depois ficam registrados na tabela manutencao_log.
+    """
+
+    def __init__(self, db_manager, orcamento_segundos=None, paginas_por_passo=None):
+        self.db_manager = db_manager
+        if orcamento_segundos is None:
+            orcamento_segundos = Config().get_manutencao_orcamento_segundos()
+        self.orcamento_segundos = orcamento_segundos
+        self.paginas_por_passo = paginas_por_passo or 1000
+
+    def estatisticas_arquivo(self):
+        """Retorna tamanho em disco (banco + WAL), páginas, páginas livres e fragmentação"""
+        with self.db_manager.conexao() as conn:
+            tamanho_pagina = conn.execute('PRAGMA page_size').fetchone()[0]
+            paginas = conn.execute('PRAGMA page_count').fetchone()[0]
+            livres = conn.execute('PRAGMA freelist_count').fetchone()[0]
+            auto_vacuum = conn.execute('PRAGMA auto_vacuum').fetchone()[0]
+
+        tamanho = 0
+        for caminho in (self.db_manager.db_file, self.db_manager.db_file + '-wal'):
+            if os.path.exists(caminho):
+                tamanho += os.path.getsize(caminho)
+
+        return {
+            'tamanho': tamanho,
+            'tamanho_pagina': tamanho_pagina,
+            'paginas': paginas,
+            'paginas_livres': livres,
+            'fragmentacao': livres / paginas if paginas else 0.0,
+            'auto_vacuum': auto_vacuum
+        }
+
+    def executar(self, origem='manual', orcamento_segundos=None, analisar=True):
+        """Executa a manutenção dentro do orçamento de tempo (orcamento <= 0: sem limite)"""
+        orcamento = self.orcamento_segundos if orcamento_segundos is None else orcamento_segundos
+        inicio = time.monotonic()
+        limite = inicio + orcamento if orcamento and orcamento > 0 else None
+        iniciada_em = datetime.datetime.now().isoformat()
+
+        def restante():
+            return None if limite is None else limite - time.monotonic()
+
+        antes = self.estatisticas_arquivo()
+        operacoes = []
+        status = 'success'
+        mensagem = 'Manutenção concluída'
+
+        try:
+            with self.db_manager.conexao() as conn:
+                # 1) Estatísticas que o próprio SQLite julga necessárias (rápido)
+                conn.execute('PRAGMA optimize')
+                operacoes.append('optimize')
+
+                # 2) ANALYZE completo, com amostragem limitada e interrompido se estourar o orçamento
+                if analisar and (restante() is None or restante() > 0):
+                    if self._analisar(conn, restante()):
+                        operacoes.append('analyze')
+                    else:
+                        operacoes.append('analyze interrompido')
+                        status = 'warning'
+                        mensagem = 'ANALYZE interrompido pelo limite de tempo'
+
+                # 3) Devolver ao sistema de arquivos as páginas livres, em lotes
+                if antes['auto_vacuum'] == AUTO_VACUUM_INCREMENTAL:
+                    liberadas = self._vacuum_incremental(conn, restante)
+                    operacoes.append(f'incremental_vacuum ({liberadas} páginas)')
+                elif antes['paginas_livres']:
+                    operacoes.append('incremental_vacuum indisponível (auto_vacuum desativado)')
+
+                # 4) Transferir o WAL para o banco e truncar o arquivo -wal
+                self.db_manager._checkpoint_wal(conn)
+                operacoes.append('checkpoint')
+        except sqlite3.Error as e:
+            status = 'error'
+            mensagem = f'Erro na manutenção do banco: {str(e)}'
+            print(f"Aviso: {mensagem}")
+
+        depois = self.estatisticas_arquivo()
+        duracao_ms = int((time.monotonic() - inicio) * 1000)
+        self._registrar(iniciada_em, origem, operacoes, duracao_ms, antes, depois, status, mensagem)
+
+        return {
+            'status': status,
+            'message': mensagem,
+            'operacoes': operacoes,
+            'duracao_ms': duracao_ms,
+            'antes': antes,
+            'depois': depois
+        }
+
+    def _analisar(self, conn, restante):
+        """Executa ANALYZE; retorna False se foi interrompido por falta de tempo"""
+        # Amostragem por índice: mantém o ANALYZE rápido mesmo em tabelas grandes
+        conn.execute('PRAGMA analysis_limit = 1000')
+
+        vigia = None
+        if restante is not None:
+            vigia = threading.Timer(max(restante, 0), conn.interrupt)
+            vigia.start()
+        try:
+            conn.execute('ANALYZE')
+            return True
+        except sqlite3.OperationalError as e:
+            if 'interrupt' not in str(e):
+                raise
+            return False
+        finally:
+            if vigia is not None:
+                vigia.cancel()
+
+    def _vacuum_incremental(self, conn, restante):
+        """Libera páginas livres em lotes até acabar o orçamento; retorna quantas foram liberadas"""
+        liberadas = 0
+        while restante() is None or restante() > 0:
+            livres = conn.execute('PRAGMA freelist_count').fetchone()[0]
+            if not livres:
+                break
+
+            lote = min(livres, self.paginas_por_passo)
+            # Cada lote é uma transação curta: não segura a escrita por muito tempo
+            conn.execute(f'PRAGMA incremental_vacuum({int(lote)})').fetchall()
+            liberadas += livres - conn.execute('PRAGMA freelist_count').fetchone()[0]
+        return liberadas
+
+    def converter_auto_vacuum(self):
+        """Ativa o auto_vacuum incremental em um banco existente (exige um VACUUM completo)"""
+        antes = self.estatisticas_arquivo()
+        if antes['auto_vacuum'] == AUTO_VACUUM_INCREMENTAL:
+            return {'status': 'success', 'message': 'Vacuum incremental já está ativo', 'antes': antes, 'depois': antes}
+
+        inicio = time.monotonic()
+        iniciada_em = datetime.datetime.now().isoformat()
+        try:
+            with self.db_manager.conexao() as conn:
+                conn.execute('PRAGMA auto_vacuum = INCREMENTAL')
+                conn.execute('VACUUM')
+        except sqlite3.Error as e:
+            return {'status': 'error', 'message': f'Erro ao converter o banco: {str(e)}', 'antes': antes, 'depois': antes}
+
+        depois = self.estatisticas_arquivo()
+        duracao_ms = int((time.monotonic() - inicio) * 1000)
+        mensagem = 'Banco reconstruído com VACUUM e vacuum incremental ativado'
+        self._registrar(iniciada_em, 'manual', ['vacuum'], duracao_ms, antes, depois, 'success', mensagem)
+
+        return {'status': 'success', 'message': mensagem, 'antes': antes, 'depois': depois}
+
+    def _registrar(self, iniciada_em, origem, operacoes, duracao_ms, antes, depois, status, mensagem):
+        """Grava a manutenção em manutencao_log"""
+        try:
+            with self.db_manager.transacao() as conn:
+                conn.execute('''
+                INSERT INTO manutencao_log (
+                    iniciada_em, origem, operacoes, duracao_ms,
+                    tamanho_antes, tamanho_depois, paginas_antes, paginas_depois,
+                    paginas_livres_antes, paginas_livres_depois, status, mensagem
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ''', (
+                    iniciada_em, origem, ', '.join(operacoes), duracao_ms,
+                    antes['tamanho'], depois['tamanho'], antes['paginas'], depois['paginas'],
+                    antes['paginas_livres'], depois['paginas_livres'], status, mensagem
+                ))
+        except sqlite3.Error as e:
+            print(f"Aviso: não foi possível registrar a manutenção do banco: {e}")
+
+    def ultima_manutencao(self):
+        """Retorna a última manutenção concluída (sem erro), ou None"""
+        with self.db_manager.leitura() as conn:
+            row = conn.execute('''
+            SELECT * FROM manutencao_log
+            WHERE status != 'error'
+            ORDER BY id DESC LIMIT 1
+            ''').fetchone()
+            return dict(row) if row else None
+
+    def historico(self, limite=20):
+        """Retorna as últimas manutenções registradas"""
+        with self.db_manager.leitura() as conn:
+            rows = conn.execute('SELECT * FROM manutencao_log ORDER BY id DESC LIMIT ?', (limite,)).fetchall()
+            return [dict(row) for row in rows]
+
+
+class AgendadorManutencao:
+    """Decide quando a manutenção automática roda e a executa em uma thread de fundo
+
+    A manutenção roda ao iniciar o sistema (se a última tiver sido há mais de
+    `intervalo_horas`) ou quando o banco ficar sem uso por `ociosidade_segundos`.
+    `verificar()` deve ser chamado periodicamente (ex.: por um QTimer da janela principal).
+    """
+
+    def __init__(self, db_manager, intervalo_horas=None, ociosidade_segundos=None,
+                 orcamento_segundos=None, ao_iniciar=None):
+        config = Config()
+        self.db_manager = db_manager
+        self.intervalo_horas = (config.get_manutencao_intervalo_horas()
+                                if intervalo_horas is None else intervalo_horas)
+        self.ociosidade_segundos = (config.get_manutencao_ociosidade_segundos()
+                                    if ociosidade_segundos is None else ociosidade_segundos)
+        self.ao_iniciar = config.get_manutencao_ao_iniciar() if ao_iniciar is None else ao_iniciar
+        self.manutencao = ManutencaoBanco(db_manager, orcamento_segundos)
+        self.ultimo_resultado = None
+        # Início da última manutenção, lido do banco uma vez: as verificações periódicas não
+        # devem usar conexões, senão o banco nunca pareceria ocioso
+        self._ultima_em = None
+        self._thread = None
+        self._lock = threading.Lock()
+
+    @property
+    def em_andamento(self):
+        """Indica se há uma manutenção rodando"""
+        return self._thread is not None and self._thread.is_alive()
+
+    def pendente(self):
+        """Verifica se já passou o intervalo desde a última manutenção"""
+        if self._ultima_em is None:
+            ultima = self.manutencao.ultima_manutencao()
+            if ultima is None:
+                return True
+            self._ultima_em = datetime.datetime.fromisoformat(ultima['iniciada_em'])
+
+        decorrido = datetime.datetime.now() - self._ultima_em
+        return decorrido >= datetime.timedelta(hours=self.intervalo_horas)
+
+    def banco_ocioso(self):
+        """Verifica se nenhuma conexão do banco foi usada durante o tempo de ociosidade"""
+        ocioso_ha = min(
+            self.db_manager.pool.estatisticas()['ocioso_ha'],
+            self.db_manager.pool_leitura.estatisticas()['ocioso_ha']
+        )
+        return ocioso_ha >= self.ociosidade_segundos
+
+    def verificar_inicializacao(self):
+        """Inicia a manutenção pendente na abertura do sistema, se configurado"""
+        if self.ao_iniciar and not self.em_andamento and self.pendente():
+            return self.iniciar('inicializacao')
+        return False
+
+    def verificar(self):
+        """Inicia a manutenção pendente se o banco estiver ocioso"""
+        if self.em_andamento or not self.banco_ocioso() or not self.pendente():
+            return False
+        return self.iniciar('ocioso')
+
+    def iniciar(self, origem='manual'):
+        """Inicia a manutenção em segundo plano; retorna False se já houver uma em andamento"""
+        with self._lock:
+            if self.em_andamento:
+                return False
+            self._thread = threading.Thread(
+                target=self._executar, args=(origem,), name='manutencao-banco', daemon=True
+            )
+            self._thread.start()
+            return True
+
+    def aguardar(self, timeout=None):
+        """Aguarda o fim da manutenção em andamento"""
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+
+    def _executar(self, origem):
+        """Corpo da thread de manutenção"""
+        try:
+            self._ultima_em = datetime.datetime.now()
+            self.ultimo_resultado = self.manutencao.executar(origem)
+        except Exception as e:
+            print(f"Aviso: falha na manutenção automática do banco: {e}")
+            self.ultimo_resultado = {'status': 'error', 'message': str(e)}
@@ -0,0 +1,852 @@
+# database/migracoes.py
+import os
+import sqlite3
+import datetime
+from database.backup_banco import BackupBanco
+
+
+class Migracao:
+    """Passo de migração do schema
+
+    versao: número gravado em PRAGMA user_version após o passo ser concluído
+    descricao: texto curto exibido no log da migração
+    aplicar: função(cursor) com as alterações de schema, executada em uma única transação
+    backfill: função(migrador) opcional, executada depois de `aplicar` em lotes com commits próprios
+
+    Os passos com backfill precisam ser idempotentes: se o processo for interrompido
+    no meio do backfill, a versão não é gravada e o passo é executado novamente.
+    """
+
+    def __init__(self, versao, descricao, aplicar, backfill=None):
+        self.versao = versao
+        self.descricao = descricao
+        self.aplicar = aplicar
+        self.backfill = backfill
+
+
+# --- UTILITÁRIOS PARA OS PASSOS ---
+
+def colunas_tabela(cursor, tabela):
+    """Retorna o conjunto de colunas de uma tabela"""
+    cursor.execute(f'PRAGMA table_info({tabela})')
+    return {row[1] for row in cursor.fetchall()}
+
+
+def adicionar_coluna(cursor, tabela, coluna, definicao):
+    """Adiciona uma coluna à tabela se ela ainda não existir (ALTER TABLE não tem IF NOT EXISTS)"""
+    if coluna not in colunas_tabela(cursor, tabela):
+        cursor.execute(f'ALTER TABLE {tabela} ADD COLUMN {coluna} {definicao}')
+
+
+def indice_existe(cursor, nome):
+    """Verifica se um índice existe no banco"""
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = ?", (nome,))
+    return cursor.fetchone() is not None
+
+
+# --- PASSOS DE MIGRAÇÃO ---
+
+def _migracao_001_tabelas_base(cursor):
+    """Tabelas originais do sistema"""
+    # Criando tabela contagem_lojas
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS contagem_lojas (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        loja TEXT NOT NULL,
+        regional TEXT,
+        setor TEXT,
+        data TEXT,
+        caixa_hb_623 INTEGER DEFAULT 0,
+        caixa_hb_618 INTEGER DEFAULT 0,
+        caixa_hnt_g INTEGER DEFAULT 0,
+        caixa_hnt_p INTEGER DEFAULT 0,
+        caixa_chocolate INTEGER DEFAULT 0,
+        caixa_bin INTEGER DEFAULT 0,
+        pallets_pbr INTEGER DEFAULT 0,
+        status TEXT DEFAULT 'pendente',
+        usuario TEXT,
+        created_at TEXT,
+        updated_at TEXT,
+        cod_inventario TEXT NOT NULL
+    )
+    ''')
+
+    # Criando tabela contagem_cd
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS contagem_cd (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        setor TEXT NOT NULL,
+        data TEXT,
+        caixa_hb_623 INTEGER DEFAULT 0,
+        caixa_hb_618 INTEGER DEFAULT 0,
+        caixa_hnt_g INTEGER DEFAULT 0,
+        caixa_hnt_p INTEGER DEFAULT 0,
+        caixa_chocolate INTEGER DEFAULT 0,
+        caixa_bin INTEGER DEFAULT 0,
+        pallets_pbr INTEGER DEFAULT 0,
+        status TEXT DEFAULT 'pendente',
+        usuario TEXT,
+        created_at TEXT,
+        updated_at TEXT,
+        cod_inventario TEXT NOT NULL
+    )
+    ''')
+
+    # Criando tabela dados_transito
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS dados_transito (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        setor TEXT,
+        data TEXT,
+        tipo_caixa TEXT NOT NULL,
+        quantidade INTEGER DEFAULT 0,
+        usuario TEXT,
+        created_at TEXT,
+        updated_at TEXT,
+        cod_inventario TEXT NOT NULL
+    )
+    ''')
+
+    # Criando tabela dados_fornecedor
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS dados_fornecedor (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        tipo_fornecedor TEXT NOT NULL,
+        tipo_caixa TEXT NOT NULL,
+        quantidade INTEGER DEFAULT 0,
+        created_at TEXT,
+        cod_inventario TEXT NOT NULL
+    )
+    ''')
+
+    # Criando tabela inventario_meta
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS inventario_meta (
+        cod_inventario TEXT PRIMARY KEY,
+        data_inicio TEXT,
+        data_fim TEXT,
+        status TEXT DEFAULT 'em_andamento',
+        descricao TEXT
+    )
+    ''')
+
+
+def _migracao_002_chaves_e_indices(cursor):
+    """Chaves únicas de loja/setor por inventário e índices de cobertura"""
+    # Bancos criados antes das chaves únicas podem ter mais de um registro por loja/setor.
+    # Mantemos apenas o atualizado mais recentemente de cada um antes de criar a chave.
+    if not indice_existe(cursor, 'ux_contagem_lojas_inventario_loja'):
+        cursor.execute('''
+        DELETE FROM contagem_lojas
+        WHERE id NOT IN (
+            SELECT id FROM (
+                SELECT id, ROW_NUMBER() OVER (
+                    PARTITION BY cod_inventario, loja
+                    ORDER BY updated_at DESC, id DESC
+                ) AS ordem
+                FROM contagem_lojas
+            )
+            WHERE ordem = 1
+        )
+        ''')
+        if cursor.rowcount > 0:
+            print(f"Aviso: {cursor.rowcount} contagens de loja duplicadas removidas")
+
+        cursor.execute('''
+        CREATE UNIQUE INDEX ux_contagem_lojas_inventario_loja
+        ON contagem_lojas (cod_inventario, loja)
+        ''')
+
+    if not indice_existe(cursor, 'ux_contagem_cd_inventario_setor'):
+        cursor.execute('''
+        DELETE FROM contagem_cd
+        WHERE id NOT IN (
+            SELECT id FROM (
+                SELECT id, ROW_NUMBER() OVER (
+                    PARTITION BY cod_inventario, setor
+                    ORDER BY updated_at DESC, id DESC
+                ) AS ordem
+                FROM contagem_cd
+            )
+            WHERE ordem = 1
+        )
+        ''')
+        if cursor.rowcount > 0:
+            print(f"Aviso: {cursor.rowcount} contagens de setor duplicadas removidas")
+
+        cursor.execute('''
+        CREATE UNIQUE INDEX ux_contagem_cd_inventario_setor
+        ON contagem_cd (cod_inventario, setor)
+        ''')
+
+    # Índices de cobertura para as consultas de status por inventário
+    cursor.execute('''
+    CREATE INDEX IF NOT EXISTS ix_contagem_lojas_inventario_status
+    ON contagem_lojas (cod_inventario, status, regional, loja)
+    ''')
+
+    cursor.execute('''
+    CREATE INDEX IF NOT EXISTS ix_contagem_cd_inventario_status
+    ON contagem_cd (cod_inventario, status, setor)
+    ''')
+
+    # Índices de cobertura para os agrupamentos de trânsito e fornecedor
+    cursor.execute('''
+    CREATE INDEX IF NOT EXISTS ix_dados_transito_inventario
+    ON dados_transito (cod_inventario, setor, tipo_caixa, quantidade)
+    ''')
+
+    cursor.execute('''
+    CREATE INDEX IF NOT EXISTS ix_dados_fornecedor_inventario
+    ON dados_fornecedor (cod_inventario, tipo_fornecedor, tipo_caixa, quantidade)
+    ''')
+
+
+# Catálogo inicial de tipos de caixa: (codigo, descricao, coluna nas tabelas largas, ordem)
+TIPOS_CAIXA_PADRAO = [
+    ('hb_623', 'Caixa HB 623', 'caixa_hb_623', 1),
+    ('hb_618', 'Caixa HB 618', 'caixa_hb_618', 2),
+    ('hnt_g', 'Caixa HNT G', 'caixa_hnt_g', 3),
+    ('hnt_p', 'Caixa HNT P', 'caixa_hnt_p', 4),
+    ('chocolate', 'Caixa Chocolate', 'caixa_chocolate', 5),
+    ('bin', 'Caixa BIN', 'caixa_bin', 6),
+    ('pallets_pbr', 'Pallets PBR', 'pallets_pbr', 7)
+]
+
+# Nomes alternativos já normalizados (minúsculas, sem prefixo "caixa", sem "_" e espaços)
+ALIASES_TIPO_CAIXA = {
+    'hb623': 'hb_623',
+    'hb618': 'hb_618',
+    'hntg': 'hnt_g',
+    'hntp': 'hnt_p',
+    'bin': 'bin',
+    'chocolate': 'chocolate',
+    'pallets': 'pallets_pbr',
+    'palletes': 'pallets_pbr',
+    'palletspbr': 'pallets_pbr',
+    'pbr': 'pallets_pbr'
+}
+
+# Tipo usado quando o texto não corresponde a nenhum alias do catálogo
+TIPO_CAIXA_PADRAO = 'bin'
+
+
+def sql_tipo_normalizado(expressao):
+    """Expressão SQL equivalente a DatabaseManager.normalizar_tipo_caixa"""
+    base = f"lower(COALESCE({expressao}, ''))"
+    sem_prefixo = f"CASE WHEN substr({base}, 1, 6) IN ('caixa_', 'caixa ') THEN substr({base}, 7) ELSE {base} END"
+    limpo = f"replace(replace({sem_prefixo}, '_', ''), ' ', '')"
+    return f"COALESCE((SELECT codigo FROM tipo_caixa_alias WHERE alias = {limpo}), '{TIPO_CAIXA_PADRAO}')"
+
+
+def _colunas_catalogo(cursor):
+    """Retorna (codigo, coluna) dos tipos que possuem coluna nas tabelas largas"""
+    cursor.execute('''
+    SELECT codigo, coluna FROM tipo_caixa
+    WHERE coluna IS NOT NULL
+    ORDER BY ordem
+    ''')
+    return [(row[0], row[1]) for row in cursor.fetchall()]
+
+
+def _sql_itens_larga(colunas, origem, coluna_local):
+    """SELECT que desdobra a linha NEW de uma tabela larga em uma linha por tipo de caixa"""
+    valores = ' UNION ALL '.join(
+        f"SELECT '{codigo}' AS tipo_caixa, NEW.{coluna} AS quantidade" for codigo, coluna in colunas
+    )
+    return f'''
+    SELECT NEW.cod_inventario, '{origem}', NEW.{coluna_local}, NEW.id, tipos.tipo_caixa, tipos.quantidade
+    FROM ({valores}) AS tipos
+    WHERE COALESCE(tipos.quantidade, 0) <> 0
+    '''
+
+
+def recriar_gatilhos_contagem_item(cursor):
+    """(Re)cria os gatilhos e a view larga de contagem_item a partir do catálogo de tipos"""
+    colunas = _colunas_catalogo(cursor)
+    nomes_colunas = ', '.join(coluna for _, coluna in colunas)
+    insert_item = '''
+    INSERT INTO contagem_item (cod_inventario, origem, local, origem_id, tipo_caixa, quantidade)
+    '''
+
+    # Tabelas largas: cada linha vira até uma linha por tipo de caixa (quantidades zero são omitidas)
+    for tabela, origem, coluna_local in [('contagem_lojas', 'loja', 'loja'), ('contagem_cd', 'cd', 'setor')]:
+        itens = insert_item + _sql_itens_larga(colunas, origem, coluna_local)
+        remover = f"DELETE FROM contagem_item WHERE origem = '{origem}' AND origem_id = OLD.id"
+
+        cursor.execute(f'DROP TRIGGER IF EXISTS tg_{tabela}_item_ins')
+        cursor.execute(f'DROP TRIGGER IF EXISTS tg_{tabela}_item_upd')
+        cursor.execute(f'DROP TRIGGER IF EXISTS tg_{tabela}_item_del')
+
+        cursor.execute(f'''
+        CREATE TRIGGER tg_{tabela}_item_ins AFTER INSERT ON {tabela}
+        BEGIN
+            {itens};
+        END
+        ''')
+
+        # Mudanças só de status/usuário não mexem nos itens
+        cursor.execute(f'''
+        CREATE TRIGGER tg_{tabela}_item_upd
+        AFTER UPDATE OF cod_inventario, {coluna_local}, {nomes_colunas} ON {tabela}
+        BEGIN
+            {remover};
+            {itens};
+        END
+        ''')
+
+        cursor.execute(f'''
+        CREATE TRIGGER tg_{tabela}_item_del AFTER DELETE ON {tabela}
+        BEGIN
+            {remover};
+        END
+        ''')
+
+    # Tabelas longas: uma linha por registro, com o tipo normalizado pelo catálogo
+    for tabela, origem, expressao_local, colunas_local in [
+        ('dados_transito', 'transito', "COALESCE(NEW.setor, '')", 'setor'),
+        ('dados_fornecedor', 'fornecedor', 'NEW.tipo_fornecedor', 'tipo_fornecedor')
+    ]:
+        itens = insert_item + f'''
+        SELECT NEW.cod_inventario, '{origem}', {expressao_local}, NEW.id,
+               {sql_tipo_normalizado('NEW.tipo_caixa')}, NEW.quantidade
+        WHERE COALESCE(NEW.quantidade, 0) <> 0
+        '''
+        remover = f"DELETE FROM contagem_item WHERE origem = '{origem}' AND origem_id = OLD.id"
+
+        cursor.execute(f'DROP TRIGGER IF EXISTS tg_{tabela}_item_ins')
+        cursor.execute(f'DROP TRIGGER IF EXISTS tg_{tabela}_item_upd')
+        cursor.execute(f'DROP TRIGGER IF EXISTS tg_{tabela}_item_del')
+
+        cursor.execute(f'''
+        CREATE TRIGGER tg_{tabela}_item_ins AFTER INSERT ON {tabela}
+        BEGIN
+            {itens};
+        END
+        ''')
+
+        cursor.execute(f'''
+        CREATE TRIGGER tg_{tabela}_item_upd
+        AFTER UPDATE OF cod_inventario, {colunas_local}, tipo_caixa, quantidade ON {tabela}
+        BEGIN
+            {remover};
+            {itens};
+        END
+        ''')
+
+        cursor.execute(f'''
+        CREATE TRIGGER tg_{tabela}_item_del AFTER DELETE ON {tabela}
+        BEGIN
+            {remover};
+        END
+        ''')
+
+    # View de compatibilidade: contagem_item de volta no formato largo, por origem e local
+    somas = ',\n        '.join(
+        f"SUM(CASE WHEN tipo_caixa = '{codigo}' THEN quantidade ELSE 0 END) AS {coluna}"
+        for codigo, coluna in colunas
+    )
+    cursor.execute('DROP VIEW IF EXISTS vw_contagem_item_larga')
+    cursor.execute(f'''
+    CREATE VIEW vw_contagem_item_larga AS
+    SELECT cod_inventario, origem, local,
+        {somas}
+    FROM contagem_item
+    GROUP BY cod_inventario, origem, local
+    ''')
+
+
+def _migracao_003_contagem_item(cursor):
+    """Catálogo de tipos de caixa e tabela fato contagem_item mantida por gatilhos"""
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS tipo_caixa (
+        codigo TEXT PRIMARY KEY,
+        descricao TEXT,
+        coluna TEXT,
+        ordem INTEGER DEFAULT 0,
+        ativo INTEGER DEFAULT 1
+    )
+    ''')
+
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS tipo_caixa_alias (
+        alias TEXT PRIMARY KEY,
+        codigo TEXT NOT NULL REFERENCES tipo_caixa (codigo)
+    )
+    ''')
+
+    cursor.executemany('''
+    INSERT OR IGNORE INTO tipo_caixa (codigo, descricao, coluna, ordem)
+    VALUES (?, ?, ?, ?)
+    ''', TIPOS_CAIXA_PADRAO)
+
+    # Cada código também é alias de si mesmo (sem "_"), como na normalização original
+    aliases = dict(ALIASES_TIPO_CAIXA)
+    for codigo, _, _, _ in TIPOS_CAIXA_PADRAO:
+        aliases.setdefault(codigo.replace('_', ''), codigo)
+    cursor.executemany('''
+    INSERT OR IGNORE INTO tipo_caixa_alias (alias, codigo) VALUES (?, ?)
+    ''', list(aliases.items()))
+
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS contagem_item (
+        id INTEGER PRIMARY KEY,
+        cod_inventario TEXT NOT NULL,
+        origem TEXT NOT NULL,
+        local TEXT,
+        origem_id INTEGER NOT NULL,
+        tipo_caixa TEXT NOT NULL,
+        quantidade INTEGER DEFAULT 0
+    )
+    ''')
+
+    # Chave para os gatilhos localizarem os itens de uma linha de origem
+    cursor.execute('''
+    CREATE UNIQUE INDEX IF NOT EXISTS ux_contagem_item_origem
+    ON contagem_item (origem, origem_id, tipo_caixa)
+    ''')
+
+    # Índice de cobertura para os totais por inventário × origem × tipo
+    cursor.execute('''
+    CREATE INDEX IF NOT EXISTS ix_contagem_item_inventario
+    ON contagem_item (cod_inventario, origem, local, tipo_caixa, quantidade)
+    ''')
+
+    recriar_gatilhos_contagem_item(cursor)
+
+
+def sql_copiar_contagem_item(cursor, condicao):
+    """Retorna (tabela, sql) que copiam as linhas das tabelas de origem para contagem_item
+
+    condicao: filtro SQL sobre a linha de origem (alias r), ex.: 'r.cod_inventario = ?'
+    """
+    colunas = _colunas_catalogo(cursor)
+    insert_item = '''
+    INSERT OR IGNORE INTO contagem_item (cod_inventario, origem, local, origem_id, tipo_caixa, quantidade)
+    '''
+
+    comandos = []
+    for tabela, origem, coluna_local in [('contagem_lojas', 'loja', 'loja'), ('contagem_cd', 'cd', 'setor')]:
+        casos = ' '.join(f"WHEN '{codigo}' THEN r.{coluna}" for codigo, coluna in colunas)
+        comandos.append((tabela, insert_item + f'''
+        SELECT * FROM (
+            SELECT r.cod_inventario, '{origem}', r.{coluna_local}, r.id, t.codigo,
+                   CASE t.codigo {casos} END AS quantidade
+            FROM {tabela} AS r
+            CROSS JOIN tipo_caixa AS t
+            WHERE t.coluna IS NOT NULL AND {condicao}
+        )
+        WHERE COALESCE(quantidade, 0) <> 0
+        '''))
+
+    for tabela, origem, expressao_local in [
+        ('dados_transito', 'transito', "COALESCE(r.setor, '')"),
+        ('dados_fornecedor', 'fornecedor', 'r.tipo_fornecedor')
+    ]:
+        comandos.append((tabela, insert_item + f'''
+        SELECT r.cod_inventario, '{origem}', {expressao_local}, r.id,
+               {sql_tipo_normalizado('r.tipo_caixa')}, r.quantidade
+        FROM {tabela} AS r
+        WHERE COALESCE(r.quantidade, 0) <> 0 AND {condicao}
+        '''))
+
+    return comandos
+
+
+def _backfill_003_contagem_item(migrador):
+    """Copia as contagens já existentes para contagem_item, em lotes"""
+    with migrador.db_manager.conexao() as conn:
+        comandos = sql_copiar_contagem_item(conn.cursor(), 'r.rowid > ? AND r.rowid <= ?')
+
+    for tabela, sql in comandos:
+        migrador.executar_em_faixas(tabela, sql)
+
+
+def sql_destino_item(origem, local):
+    """Expressão SQL que classifica um item no destino usado pelos totais do relatório
+
+    Lojas "CD SP"/"CD ES" contam como os respectivos CDs e as demais "CD ..." são ignoradas
+    (NULL); os setores do CD contam como CD RJ; trânsito sem SP/ES/RJ no setor vai para
+    transito_outros, que é dividido entre os três CDs na leitura.
+    """
+    return f'''CASE
+        WHEN {origem} = 'loja' AND {local} = 'CD SP' THEN 'cd_sp'
+        WHEN {origem} = 'loja' AND {local} = 'CD ES' THEN 'cd_es'
+        WHEN {origem} = 'loja' AND {local} LIKE 'CD %' THEN NULL
+        WHEN {origem} = 'loja' THEN 'lojas'
+        WHEN {origem} = 'cd' THEN 'cd_rj'
+        WHEN {origem} = 'transito' AND instr({local}, 'SP') > 0 THEN 'transito_sp'
+        WHEN {origem} = 'transito' AND instr({local}, 'ES') > 0 THEN 'transito_es'
+        WHEN {origem} = 'transito' AND instr({local}, 'RJ') > 0 THEN 'transito_rj'
+        WHEN {origem} = 'transito' THEN 'transito_outros'
+        WHEN {origem} = 'fornecedor' THEN 'fornecedor'
+    END'''
+
+
+def _migracao_004_inventario_totais(cursor):
+    """Tabela agregada inventario_totais mantida por gatilhos em contagem_item"""
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS inventario_totais (
+        cod_inventario TEXT NOT NULL,
+        destino TEXT NOT NULL,
+        tipo_caixa TEXT NOT NULL,
+        quantidade INTEGER DEFAULT 0,
+        PRIMARY KEY (cod_inventario, destino, tipo_caixa)
+    ) WITHOUT ROWID
+    ''')
+
+    somar = f'''
+    INSERT INTO inventario_totais (cod_inventario, destino, tipo_caixa, quantidade)
+    SELECT * FROM (
+        SELECT NEW.cod_inventario, {sql_destino_item('NEW.origem', 'NEW.local')} AS destino,
+               NEW.tipo_caixa, COALESCE(NEW.quantidade, 0)
+    )
+    WHERE destino IS NOT NULL
+    ON CONFLICT (cod_inventario, destino, tipo_caixa) DO UPDATE SET
+        quantidade = quantidade + excluded.quantidade
+    '''
+
+    subtrair = f'''
+    UPDATE inventario_totais SET quantidade = quantidade - COALESCE(OLD.quantidade, 0)
+    WHERE cod_inventario = OLD.cod_inventario
+      AND destino = {sql_destino_item('OLD.origem', 'OLD.local')}
+      AND tipo_caixa = OLD.tipo_caixa
+    '''
+
+    cursor.execute('DROP TRIGGER IF EXISTS tg_contagem_item_totais_ins')
+    cursor.execute('DROP TRIGGER IF EXISTS tg_contagem_item_totais_upd')
+    cursor.execute('DROP TRIGGER IF EXISTS tg_contagem_item_totais_del')
+
+    cursor.execute(f'''
+    CREATE TRIGGER tg_contagem_item_totais_ins AFTER INSERT ON contagem_item
+    BEGIN
+        {somar};
+    END
+    ''')
+
+    cursor.execute(f'''
+    CREATE TRIGGER tg_contagem_item_totais_upd AFTER UPDATE ON contagem_item
+    BEGIN
+        {subtrair};
+        {somar};
+    END
+    ''')
+
+    cursor.execute(f'''
+    CREATE TRIGGER tg_contagem_item_totais_del AFTER DELETE ON contagem_item
+    BEGIN
+        {subtrair};
+    END
+    ''')
+
+
+def _backfill_004_inventario_totais(migrador):
+    """Calcula os totais de todos os inventários a partir de contagem_item"""
+    with migrador.db_manager.transacao() as conn:
+        conn.execute('DELETE FROM inventario_totais')
+        conn.execute(f'''
+        INSERT INTO inventario_totais (cod_inventario, destino, tipo_caixa, quantidade)
+        SELECT cod_inventario, destino, tipo_caixa, SUM(quantidade) FROM (
+            SELECT cod_inventario, {sql_destino_item('origem', 'local')} AS destino, tipo_caixa, quantidade
+            FROM contagem_item
+        )
+        WHERE destino IS NOT NULL
+        GROUP BY cod_inventario, destino, tipo_caixa
+        ''')
+
+
+def _migracao_005_arquivo_inventarios(cursor):
+    """Catálogo dos inventários finalizados movidos para arquivos próprios"""
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS inventario_arquivo (
+        cod_inventario TEXT PRIMARY KEY,
+        caminho TEXT NOT NULL,
+        arquivado_em TEXT,
+        linhas_lojas INTEGER DEFAULT 0,
+        linhas_cd INTEGER DEFAULT 0,
+        linhas_transito INTEGER DEFAULT 0,
+        linhas_fornecedor INTEGER DEFAULT 0
+    )
+    ''')
+
+
+def _migracao_006_manutencao_log(cursor):
+    """Histórico das manutenções do banco (optimize, ANALYZE e vacuum incremental)"""
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS manutencao_log (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        iniciada_em TEXT NOT NULL,
+        origem TEXT NOT NULL,
+        operacoes TEXT,
+        duracao_ms INTEGER,
+        tamanho_antes INTEGER,
+        tamanho_depois INTEGER,
+        paginas_antes INTEGER,
+        paginas_depois INTEGER,
+        paginas_livres_antes INTEGER,
+        paginas_livres_depois INTEGER,
+        status TEXT,
+        mensagem TEXT
+    )
+    ''')
+
+
+def _migracao_007_indices_inventario_meta(cursor):
+    """Índices para listar inventários por status e data sem ordenar a tabela inteira"""
+    cursor.execute('''
+    CREATE INDEX IF NOT EXISTS ix_inventario_meta_data_inicio
+    ON inventario_meta (data_inicio)
+    ''')
+    cursor.execute('''
+    CREATE INDEX IF NOT EXISTS ix_inventario_meta_status_inicio
+    ON inventario_meta (status, data_inicio)
+    ''')
+    cursor.execute('''
+    CREATE INDEX IF NOT EXISTS ix_inventario_meta_status_fim
+    ON inventario_meta (status, data_fim)
+    ''')
+
+
+
+def _migracao_008_inventario_snapshot(cursor):
+    """Retrato congelado dos totais de cada inventário, gravado na finalização"""
+    # Quantidades INTEGER: valores inteiros voltam como int; só a divisão do trânsito
+    # sem CD, quando não é exata, fica armazenada como REAL (afinidade do SQLite)
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS inventario_snapshot (
+        cod_inventario TEXT PRIMARY KEY,
+        data_inicio TEXT,
+        data_fim TEXT,
+        duracao_segundos INTEGER,
+        total_lojas INTEGER DEFAULT 0,
+        total_setores INTEGER DEFAULT 0,
+        total_geral INTEGER DEFAULT 0,
+        criado_em TEXT
+    )
+    ''')
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS inventario_snapshot_totais (
+        cod_inventario TEXT NOT NULL,
+        origem TEXT NOT NULL,
+        tipo_caixa TEXT NOT NULL,
+        quantidade INTEGER DEFAULT 0,
+        PRIMARY KEY (cod_inventario, origem, tipo_caixa)
+    ) WITHOUT ROWID
+    ''')
+    cursor.execute('''
+    CREATE INDEX IF NOT EXISTS ix_inventario_snapshot_data_fim
+    ON inventario_snapshot (data_fim)
+    ''')
+
+    # Snapshots são só de inserção: alterar ou apagar um deles é sempre um erro
+    for tabela in ('inventario_snapshot', 'inventario_snapshot_totais'):
+        for operacao in ('UPDATE', 'DELETE'):
+            gatilho = f'tg_{tabela}_{operacao.lower()}'
+            cursor.execute(f'DROP TRIGGER IF EXISTS {gatilho}')
+            cursor.execute(f'''
+            CREATE TRIGGER {gatilho} BEFORE {operacao} ON {tabela}
+            BEGIN
+                SELECT RAISE(ABORT, 'snapshot de inventário finalizado não pode ser alterado');
+            END
+            ''')
+
+
+def _backfill_008_inventario_snapshot(migrador):
+    """Grava o snapshot dos inventários que já estavam finalizados"""
+    with migrador.db_manager.conexao() as conn:
+        codigos = [row['cod_inventario'] for row in conn.execute('''
+        SELECT m.cod_inventario FROM inventario_meta m
+        WHERE m.status = 'finalizado'
+          AND NOT EXISTS (SELECT 1 FROM inventario_snapshot s WHERE s.cod_inventario = m.cod_inventario)
+        ''')]
+
+    # Um commit por inventário: interrompido, o backfill continua dos que faltam
+    for cod_inventario in codigos:
+        migrador.db_manager.gravar_snapshot_inventario(cod_inventario)
+
+
+# Lista ordenada de migrações. Novos passos entram sempre no final, com a próxima versão;
+# um passo já publicado nunca deve ser alterado.
+MIGRACOES = [
+    Migracao(1, 'tabelas base', _migracao_001_tabelas_base),
+    Migracao(2, 'chaves únicas e índices de cobertura', _migracao_002_chaves_e_indices),
+    Migracao(3, 'catálogo de tipos de caixa e contagem_item', _migracao_003_contagem_item,
+             _backfill_003_contagem_item),
+    Migracao(4, 'totais agregados por inventário', _migracao_004_inventario_totais,
+             _backfill_004_inventario_totais),
+    Migracao(5, 'catálogo de inventários arquivados', _migracao_005_arquivo_inventarios),
+    Migracao(6, 'histórico de manutenção do banco', _migracao_006_manutencao_log),
+    Migracao(7, 'índices de status e data em inventario_meta', _migracao_007_indices_inventario_meta),
+    Migracao(8, 'snapshot dos totais na finalização', _migracao_008_inventario_snapshot,
+             _backfill_008_inventario_snapshot),
+]
+
+
+class MigradorBanco:
+    """Aplica as migrações pendentes do schema, controlando a versão por PRAGMA user_version"""
+
+    def __init__(self, db_manager, migracoes=None, diretorio_backup=None):
+        self.db_manager = db_manager
+        self.migracoes = sorted(migracoes or MIGRACOES, key=lambda m: m.versao)
+        self.diretorio_backup = diretorio_backup or 'backups'
+        self.tamanho_lote = db_manager.tamanho_lote
+
+    def versao_atual(self):
+        """Retorna a versão do schema gravada no banco"""
+        with self.db_manager.conexao() as conn:
+            return conn.execute('PRAGMA user_version').fetchone()[0]
+
+    def versao_mais_recente(self):
+        """Retorna a versão do último passo de migração conhecido"""
+        return self.migracoes[-1].versao if self.migracoes else 0
+
+    def pendentes(self):
+        """Retorna os passos ainda não aplicados ao banco"""
+        versao = self.versao_atual()
+        return [m for m in self.migracoes if m.versao > versao]
+
+    def migrar(self):
+        """Aplica todas as migrações pendentes, fazendo backup do banco antes da primeira"""
+        versao_anterior = self.versao_atual()
+
+        if versao_anterior > self.versao_mais_recente():
+            print(f"Aviso: banco na versão {versao_anterior}, mais nova que a suportada "
+                  f"({self.versao_mais_recente()}); nenhuma migração aplicada")
+            return {
+                'status': 'warning',
+                'message': f'Banco na versão {versao_anterior}, mais nova que a suportada',
+                'versao_anterior': versao_anterior,
+                'versao_atual': versao_anterior,
+                'backup': None
+            }
+
+        pendentes = self.pendentes()
+        if not pendentes:
+            return {
+                'status': 'success',
+                'message': f'Schema atualizado (versão {versao_anterior})',
+                'versao_anterior': versao_anterior,
+                'versao_atual': versao_anterior,
+                'backup': None
+            }
+
+        backup = self._backup_pre_migracao(versao_anterior)
+
+        for migracao in pendentes:
+            try:
+                self._aplicar(migracao)
+            except Exception as e:
+                versao = self.versao_atual()
+                mensagem = f'Falha na migração {migracao.versao} ({migracao.descricao}): {str(e)}'
+                if backup:
+                    mensagem += f'. Backup anterior à migração: {backup}'
+                print(f"Erro: {mensagem}")
+                return {
+                    'status': 'error',
+                    'message': mensagem,
+                    'versao_anterior': versao_anterior,
+                    'versao_atual': versao,
+                    'backup': backup
+                }
+
+        versao = self.versao_atual()
+        return {
+            'status': 'success',
+            'message': f'Schema migrado da versão {versao_anterior} para {versao}',
+            'versao_anterior': versao_anterior,
+            'versao_atual': versao,
+            'backup': backup
+        }
+
+    def _aplicar(self, migracao):
+        """Aplica um passo de migração e grava sua versão"""
+        print(f"Aplicando migração {migracao.versao}: {migracao.descricao}")
+
+        with self.db_manager.transacao() as conn:
+            cursor = conn.cursor()
+            migracao.aplicar(cursor)
+            if migracao.backfill is None:
+                # Schema e versão confirmados juntos: ou o passo inteiro entra, ou nada entra
+                self._gravar_versao(cursor, migracao.versao)
+
+        if migracao.backfill is not None:
+            migracao.backfill(self)
+            with self.db_manager.transacao() as conn:
+                self._gravar_versao(conn.cursor(), migracao.versao)
+
+    def _gravar_versao(self, cursor, versao):
+        """Grava a versão do schema no cabeçalho do banco"""
+        # PRAGMA não aceita parâmetros; a versão vem sempre da lista MIGRACOES
+        cursor.execute(f'PRAGMA user_version = {int(versao)}')
+
+    def _banco_tem_dados(self):
+        """Verifica se o banco já possui tabelas (bancos novos não precisam de backup)"""
+        with self.db_manager.conexao() as conn:
+            row = conn.execute(
+                "SELECT COUNT(*) FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%'"
+            ).fetchone()
+            return row[0] > 0
+
+    def _backup_pre_migracao(self, versao):
+        """Copia o banco para o diretório de backups antes de aplicar as migrações"""
+        if self.db_manager.db_file == ':memory:' or not self._banco_tem_dados():
+            return None
+
+        nome_base = os.path.splitext(os.path.basename(self.db_manager.db_file))[0]
+        agora = datetime.datetime.now().strftime('%Y%m%d-%H%M%S')
+        caminho = os.path.join(self.diretorio_backup, f'{nome_base}-v{versao}-{agora}.db')
+
+        # Caminho explícito: o backup pré-migração não entra na rotação dos backups periódicos
+        resultado = BackupBanco(self.db_manager, diretorio=self.diretorio_backup).realizar_backup(
+            destino=caminho, compactar=False
+        )
+        if resultado['status'] != 'success':
+            raise sqlite3.DatabaseError(resultado['message'])
+
+        print(f"Backup do banco antes da migração salvo em {caminho}")
+        return caminho
+
+    def preencher_em_lotes(self, tabela, atribuicoes, condicao='1', parametros=(), tamanho_lote=None):
+        """Executa um UPDATE em faixas de rowid, com um commit por lote
+
+        Usado pelos backfills para não manter o lock de escrita durante toda a atualização
+        de tabelas grandes. `parametros` preenchem os ? de `atribuicoes` e `condicao`, nessa
+        ordem. Retorna o número total de linhas atualizadas.
+        """
+        sql = f'''
+        UPDATE {tabela} SET {atribuicoes}
+        WHERE ({condicao}) AND rowid > ? AND rowid <= ?
+        '''
+        return self.executar_em_faixas(tabela, sql, parametros, tamanho_lote)
+
+    def executar_em_faixas(self, tabela, sql, parametros=(), tamanho_lote=None):
+        """Executa o SQL uma vez por faixa de rowid da tabela, com um commit por faixa
+
+        O SQL deve terminar com dois ? para o início (exclusivo) e o fim (inclusivo) da
+        faixa, depois de `parametros`. Retorna o total de linhas afetadas.
+        """
+        tamanho_lote = tamanho_lote or self.tamanho_lote
+        total = 0
+        ultimo_rowid = 0
+
+        while True:
+            with self.db_manager.transacao() as conn:
+                row = conn.execute(f'''
+                SELECT MAX(rowid) FROM (
+                    SELECT rowid FROM {tabela}
+                    WHERE rowid > ?
+                    ORDER BY rowid
+                    LIMIT ?
+                )
+                ''', (ultimo_rowid, tamanho_lote)).fetchone()
+
+                fim = row[0]
+                if fim is None:
+                    break
+
+                cursor = conn.execute(sql, (*parametros, ultimo_rowid, fim))
+                total += max(cursor.rowcount, 0)
+
+            ultimo_rowid = fim
+
+        return total
@@ -0,0 +1,300 @@
+# database/pool_conexoes.py
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+
+class PoolEsgotadoError(sqlite3.OperationalError):
+    """Nenhuma conexão ficou livre dentro do tempo de espera do pool"""
+
+
+class PoolConexoes:
+    """Pool de conexões SQLite com uma conexão por thread
+
+    Cada thread recebe sua própria conexão enquanto estiver dentro de
+    `conexao()`/`transacao()`; chamadas aninhadas na mesma thread reutilizam a
+    mesma conexão. Ao sair do bloco mais externo a conexão volta para o pool e
+    pode ser emprestada a outra thread, por isso as conexões são abertas com
+    check_same_thread=False: o pool garante que nunca duas threads usem a
+    mesma conexão ao mesmo tempo.
+
+    `conexao_da_thread()` fixa uma conexão à thread atual até
+    `liberar_thread()`, mantendo o comportamento do antigo
+    DatabaseManager.get_connection para a thread da interface.
+
+    `chamada(token)` associa as conexões que a thread usar durante o bloco a um
+    token; `interromper_chamada(token)` só interrompe a consulta se a conexão
+    ainda estiver com aquela chamada.
+    """
+
+    def __init__(self, fabrica, max_conexoes=8, timeout=30.0):
+        """Inicializa o pool
+
+        fabrica: função sem argumentos que abre e configura uma nova conexão
+        max_conexoes: limite de conexões abertas ao mesmo tempo
+        timeout: segundos de espera por uma conexão livre antes de PoolEsgotadoError
+        """
+        self._fabrica = fabrica
+        self.max_conexoes = max(1, int(max_conexoes))
+        self.timeout = timeout
+
+        self._condicao = threading.Condition()
+        self._livres = []
+        self._abertas = set()
+        # Conexão em uso por cada chamada registrada com chamada(token)
+        self._por_chamada = {}
+        self._local = threading.local()
+        # Instante (time.monotonic) do último uso de uma conexão, para detectar ociosidade
+        self.ultimo_uso = time.monotonic()
+
+    # --- CONTROLE INTERNO ---
+
+    def _estado_thread(self):
+        """Retorna o estado da thread atual (conexão, profundidade de uso e fixação)"""
+        local = self._local
+        if not hasattr(local, 'conn'):
+            local.conn = None
+            local.profundidade = 0
+            local.fixada = False
+            local.savepoints = 0
+            local.chamada = None
+        return local
+
+    def _adquirir(self):
+        """Obtém uma conexão livre, abrindo uma nova se o limite permitir"""
+        limite = time.monotonic() + self.timeout
+
+        with self._condicao:
+            while True:
+                if self._livres:
+                    return self._livres.pop()
+
+                if len(self._abertas) < self.max_conexoes:
+                    # Reservar a vaga antes de abrir a conexão fora do lock
+                    reserva = object()
+                    self._abertas.add(reserva)
+                    break
+
+                restante = limite - time.monotonic()
+                if restante <= 0 or not self._condicao.wait(restante):
+                    raise PoolEsgotadoError(
+                        f'Nenhuma conexão livre após {self.timeout:.0f}s '
+                        f'({self.max_conexoes} conexões em uso)'
+                    )
+
+        try:
+            conn = self._fabrica()
+        except Exception:
+            with self._condicao:
+                self._abertas.discard(reserva)
+                self._condicao.notify()
+            raise
+
+        with self._condicao:
+            self._abertas.discard(reserva)
+            self._abertas.add(conn)
+        return conn
+
+    def _registrar_emprestimo(self, conn):
+        """Associa a conexão à chamada da thread atual, para permitir interromper suas consultas"""
+        chamada = self._estado_thread().chamada
+        if chamada is None:
+            return
+        with self._condicao:
+            self._por_chamada[chamada] = conn
+
+    def _desassociar(self, conn):
+        """Desfaz a associação da conexão com a chamada da thread atual"""
+        chamada = self._estado_thread().chamada
+        if chamada is None:
+            return
+        with self._condicao:
+            if self._por_chamada.get(chamada) is conn:
+                del self._por_chamada[chamada]
+
+    def _devolver(self, conn):
+        """Devolve uma conexão ao pool, desfazendo qualquer transação esquecida"""
+        self._desassociar(conn)
+
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            self._descartar(conn)
+            return
+
+        with self._condicao:
+            self._livres.append(conn)
+            self._condicao.notify()
+
+    def _descartar(self, conn):
+        """Fecha uma conexão e libera sua vaga no pool"""
+        self._desassociar(conn)
+
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+
+        with self._condicao:
+            self._abertas.discard(conn)
+            if conn in self._livres:
+                self._livres.remove(conn)
+            self._condicao.notify()
+
+    # --- API PÚBLICA ---
+
+    @contextmanager
+    def conexao(self):
+        """Empresta a conexão da thread atual durante o bloco (reentrante)"""
+        local = self._estado_thread()
+
+        if local.conn is None:
+            local.conn = self._adquirir()
+            self._registrar_emprestimo(local.conn)
+        local.profundidade += 1
+        self.ultimo_uso = time.monotonic()
+
+        try:
+            yield local.conn
+        finally:
+            self.ultimo_uso = time.monotonic()
+            local.profundidade -= 1
+            if local.profundidade == 0 and not local.fixada and local.conn is not None:
+                conn, local.conn = local.conn, None
+                self._devolver(conn)
+
+    @contextmanager
+    def transacao(self):
+        """Executa o bloco em uma transação; blocos aninhados viram SAVEPOINTs"""
+        with self.conexao() as conn:
+            local = self._estado_thread()
+
+            if conn.in_transaction:
+                local.savepoints += 1
+                nome = f'sp_pool_{local.savepoints}'
+                conn.execute(f'SAVEPOINT {nome}')
+                try:
+                    yield conn
+                except BaseException:
+                    conn.execute(f'ROLLBACK TO {nome}')
+                    conn.execute(f'RELEASE {nome}')
+                    raise
+                else:
+                    conn.execute(f'RELEASE {nome}')
+                finally:
+                    local.savepoints -= 1
+            else:
+                # IMMEDIATE reserva a escrita já no início e evita SQLITE_BUSY na promoção da transação
+                conn.execute('BEGIN IMMEDIATE')
+                try:
+                    yield conn
+                except BaseException:
+                    conn.rollback()
+                    raise
+                else:
+                    conn.commit()
+
+    @contextmanager
+    def transacao_leitura(self):
+        """Executa o bloco em uma transação de leitura: todas as consultas veem o mesmo retrato do banco
+
+        Blocos aninhados na mesma thread reutilizam a transação já aberta.
+        """
+        with self.conexao() as conn:
+            if conn.in_transaction:
+                yield conn
+                return
+
+            # BEGIN é adiado; a primeira leitura fixa o retrato (em WAL, sem bloquear os escritores)
+            conn.execute('BEGIN')
+            try:
+                conn.execute('SELECT 1 FROM sqlite_master LIMIT 1').fetchall()
+                yield conn
+            finally:
+                conn.rollback()
+
+    def conexao_atual(self):
+        """Retorna a conexão emprestada à thread atual, ou None se ela não tiver nenhuma"""
+        return self._estado_thread().conn
+
+    def conexao_da_thread(self):
+        """Retorna a conexão da thread atual, mantendo-a reservada até liberar_thread()"""
+        local = self._estado_thread()
+        if local.conn is None:
+            local.conn = self._adquirir()
+            self._registrar_emprestimo(local.conn)
+        local.fixada = True
+        self.ultimo_uso = time.monotonic()
+        return local.conn
+
+    def liberar_thread(self, fechar=False):
+        """Libera a conexão fixada na thread atual, devolvendo-a ao pool ou fechando-a"""
+        local = self._estado_thread()
+        local.fixada = False
+
+        if local.conn is None or local.profundidade > 0:
+            # Ainda em uso por um bloco conexao(): será devolvida quando o bloco terminar
+            return
+
+        conn, local.conn = local.conn, None
+        if fechar:
+            self._descartar(conn)
+        else:
+            self._devolver(conn)
+
+    @contextmanager
+    def chamada(self, token):
+        """Associa ao token as conexões usadas pela thread atual durante o bloco
+
+        Fora do bloco, interromper_chamada(token) não alcança mais a conexão, mesmo que
+        a thread continue com ela (fixada) ou a devolva e passe a outra chamada.
+        """
+        local = self._estado_thread()
+        with self._condicao:
+            local.chamada = token
+            if local.conn is not None:
+                self._por_chamada[token] = local.conn
+        try:
+            yield
+        finally:
+            with self._condicao:
+                local.chamada = None
+                self._por_chamada.pop(token, None)
+
+    def interromper_chamada(self, token):
+        """Interrompe a consulta em andamento da chamada registrada com o token
+
+        A consulta interrompida falha com sqlite3.OperationalError ('interrupted') e a
+        transação do bloco em execução é desfeita normalmente. A busca e o interrupt() são feitos sob o mesmo lock dos empréstimos: a conexão
+        não pode ser devolvida nem passar a outra chamada entre um e outro.
+        """
+        with self._condicao:
+            conn = self._por_chamada.get(token)
+            if conn is None:
+                return False
+            conn.interrupt()
+            return True
+
+    def fechar_livres(self):
+        """Fecha todas as conexões ociosas do pool"""
+        with self._condicao:
+            livres, self._livres = self._livres, []
+
+        for conn in livres:
+            self._descartar(conn)
+
+    def estatisticas(self):
+        """Retorna a ocupação atual do pool"""
+        with self._condicao:
+            abertas = len(self._abertas)
+            livres = len(self._livres)
+
+        return {
+            'max_conexoes': self.max_conexoes,
+            'abertas': abertas,
+            'livres': livres,
+            'em_uso': abertas - livres,
+            'ocioso_ha': time.monotonic() - self.ultimo_uso
+        }
@@ -0,0 +1,244 @@
+# database/profiler.py
+import os
+import sys
+import json
+import time
+import sqlite3
+import datetime
+import threading
+
+# Comandos que podem ter o plano de execução consultado com EXPLAIN QUERY PLAN
+COMANDOS_COM_PLANO = ('SELECT', 'WITH', 'INSERT', 'UPDATE', 'DELETE', 'REPLACE')
+
+# Módulos ignorados ao procurar a função que fez a consulta
+_ARQUIVO_PROFILER = os.path.normcase(os.path.abspath(__file__))
+
+
+def normalizar_sql(sql):
+    """Colapsa espaços e quebras de linha para agrupar execuções do mesmo comando"""
+    return ' '.join(sql.split())
+
+
+def _chamador():
+    """Retorna 'arquivo:função:linha' do primeiro frame fora do profiler e da camada de conexão"""
+    frame = sys._getframe(2)
+    while frame is not None:
+        arquivo = os.path.normcase(os.path.abspath(frame.f_code.co_filename))
+        if arquivo != _ARQUIVO_PROFILER and not arquivo.endswith(('contextlib.py', 'pool_conexoes.py')):
+            return f'{os.path.basename(frame.f_code.co_filename)}:{frame.f_code.co_name}:{frame.f_lineno}'
+        frame = frame.f_back
+    return '?'
+
+
+class Perfilador:
+    """Instrumentação opcional das conexões SQLite
+
+    Registra, por comando SQL, número de execuções, tempo total e máximo, linhas
+    afetadas/lidas e as funções que o chamaram. Comandos acima do limite configurado
+    vão para o log de consultas lentas junto com o EXPLAIN QUERY PLAN.
+
+    Uso: sqlite3.connect(..., factory=perfilador.fabrica_conexao())
+    """
+
+    def __init__(self, limite_lento_ms=100, arquivo_log=None):
+        self.limite_lento_ms = limite_lento_ms
+        self.arquivo_log = arquivo_log
+        self._lock = threading.Lock()
+        self._estatisticas = {}
+        self._classe_conexao = None
+
+        if arquivo_log and os.path.dirname(arquivo_log):
+            os.makedirs(os.path.dirname(arquivo_log), exist_ok=True)
+
+    # --- FÁBRICAS PARA O sqlite3 ---
+
+    def fabrica_conexao(self):
+        """Retorna a classe de conexão instrumentada para o parâmetro factory de sqlite3.connect"""
+        if self._classe_conexao is not None:
+            return self._classe_conexao
+        perfilador = self
+
+        class CursorPerfilado(sqlite3.Cursor):
+            """Cursor que mede execuções e leituras"""
+
+            def execute(self, sql, parametros=()):
+                chamador = _chamador()
+                inicio = time.perf_counter()
+                try:
+                    return super().execute(sql, parametros)
+                finally:
+                    tempo = time.perf_counter() - inicio
+                    self._sql_perfilado = sql
+                    perfilador.registrar(self.connection, sql, parametros, tempo, self.rowcount, chamador)
+
+            def executemany(self, sql, sequencia):
+                chamador = _chamador()
+                inicio = time.perf_counter()
+                try:
+                    return super().executemany(sql, sequencia)
+                finally:
+                    tempo = time.perf_counter() - inicio
+                    self._sql_perfilado = sql
+                    perfilador.registrar(self.connection, sql, None, tempo, self.rowcount, chamador)
+
+            def _ler(self, leitura, *args):
+                inicio = time.perf_counter()
+                resultado = leitura(*args)
+                sql = getattr(self, '_sql_perfilado', None)
+                if sql is not None:
+                    if isinstance(resultado, list):
+                        linhas = len(resultado)
+                    else:
+                        linhas = 0 if resultado is None else 1
+                    perfilador.registrar_leitura(sql, time.perf_counter() - inicio, linhas)
+                return resultado
+
+            def fetchone(self):
+                return self._ler(super().fetchone)
+
+            def fetchmany(self, size=None):
+                if size is None:
+                    return self._ler(super().fetchmany)
+                return self._ler(super().fetchmany, size)
+
+            def fetchall(self):
+                return self._ler(super().fetchall)
+
+            def __iter__(self):
+                return self
+
+            def __next__(self):
+                linha = self.fetchone()
+                if linha is None:
+                    raise StopIteration
+                return linha
+
+        class ConexaoPerfilada(sqlite3.Connection):
+            """Conexão cujos cursores (inclusive os de execute direto) são instrumentados"""
+
+            def cursor(self, factory=CursorPerfilado):
+                return super().cursor(factory)
+
+            def execute(self, sql, parametros=()):
+                return self.cursor().execute(sql, parametros)
+
+            def executemany(self, sql, sequencia):
+                return self.cursor().executemany(sql, sequencia)
+
+        self._classe_conexao = ConexaoPerfilada
+        return ConexaoPerfilada
+
+    # --- REGISTRO ---
+
+    def registrar(self, conn, sql, parametros, tempo, linhas, chamador):
+        """Registra uma execução e grava no log de lentas se passar do limite"""
+        chave = normalizar_sql(sql)
+        tempo_ms = tempo * 1000
+
+        with self._lock:
+            estat = self._estatisticas.get(chave)
+            if estat is None:
+                estat = {
+                    'sql': chave,
+                    'execucoes': 0,
+                    'tempo_total_ms': 0.0,
+                    'tempo_max_ms': 0.0,
+                    'linhas': 0,
+                    'lentas': 0,
+                    'chamadores': {}
+                }
+                self._estatisticas[chave] = estat
+
+            estat['execucoes'] += 1
+            estat['tempo_total_ms'] += tempo_ms
+            estat['tempo_max_ms'] = max(estat['tempo_max_ms'], tempo_ms)
+            if linhas and linhas > 0:
+                estat['linhas'] += linhas
+            estat['chamadores'][chamador] = estat['chamadores'].get(chamador, 0) + 1
+
+            lenta = self.limite_lento_ms is not None and tempo_ms >= self.limite_lento_ms
+            if lenta:
+                estat['lentas'] += 1
+
+        if lenta:
+            self._registrar_lenta(conn, sql, parametros, tempo_ms, linhas, chamador)
+
+    def registrar_leitura(self, sql, tempo, linhas):
+        """Soma o tempo e as linhas lidas (fetch) ao comando que as produziu"""
+        chave = normalizar_sql(sql)
+        with self._lock:
+            estat = self._estatisticas.get(chave)
+            if estat is not None:
+                estat['tempo_total_ms'] += tempo * 1000
+                estat['linhas'] += linhas
+
+    def _registrar_lenta(self, conn, sql, parametros, tempo_ms, linhas, chamador):
+        """Grava a consulta lenta e seu plano no log"""
+        plano = self.plano_execucao(conn, sql, parametros)
+        linhas_log = [
+            f"[{datetime.datetime.now().isoformat(timespec='seconds')}] {tempo_ms:.1f} ms"
+            f" | linhas: {linhas if linhas is not None and linhas >= 0 else '-'} | {chamador}",
+            f"  SQL: {normalizar_sql(sql)}"
+        ]
+        if parametros:
+            linhas_log.append(f"  Parâmetros: {str(parametros)[:200]}")
+        for linha in plano:
+            linhas_log.append(f"  PLANO: {linha}")
+
+        texto = '\n'.join(linhas_log) + '\n'
+        if self.arquivo_log:
+            try:
+                with self._lock, open(self.arquivo_log, 'a', encoding='utf-8') as arquivo:
+                    arquivo.write(texto)
+            except OSError as e:
+                print(f"Aviso: não foi possível gravar o log de consultas lentas: {e}")
+        else:
+            print(f"Consulta lenta:\n{texto}")
+
+    def plano_execucao(self, conn, sql, parametros=None):
+        """Retorna as linhas do EXPLAIN QUERY PLAN do comando (vazio se não se aplicar)"""
+        comando = sql.lstrip().split(None, 1)[0].upper() if sql.strip() else ''
+        if comando not in COMANDOS_COM_PLANO or parametros is None and '?' in sql:
+            return []
+
+        try:
+            # Cursor base do sqlite3: o EXPLAIN não é registrado pelo próprio perfilador
+            cursor = sqlite3.Cursor(conn)
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', parametros or ())
+            return [row[-1] for row in cursor.fetchall()]
+        except sqlite3.Error as e:
+            return [f'(plano indisponível: {e})']
+
+    # --- RELATÓRIOS ---
+
+    def resumo(self, top=20):
+        """Retorna os comandos com maior tempo total"""
+        with self._lock:
+            estatisticas = [dict(e, chamadores=dict(e['chamadores'])) for e in self._estatisticas.values()]
+
+        estatisticas.sort(key=lambda e: e['tempo_total_ms'], reverse=True)
+        for estat in estatisticas:
+            estat['tempo_medio_ms'] = estat['tempo_total_ms'] / estat['execucoes'] if estat['execucoes'] else 0
+            estat['tempo_total_ms'] = round(estat['tempo_total_ms'], 3)
+            estat['tempo_max_ms'] = round(estat['tempo_max_ms'], 3)
+            estat['tempo_medio_ms'] = round(estat['tempo_medio_ms'], 3)
+        return estatisticas[:top] if top else estatisticas
+
+    def salvar_resumo_json(self, caminho, top=20):
+        """Grava o resumo dos comandos mais custosos em JSON"""
+        if os.path.dirname(caminho):
+            os.makedirs(os.path.dirname(caminho), exist_ok=True)
+
+        dados = {
+            'gerado_em': datetime.datetime.now().isoformat(timespec='seconds'),
+            'limite_lento_ms': self.limite_lento_ms,
+            'comandos': self.resumo(top)
+        }
+        with open(caminho, 'w', encoding='utf-8') as arquivo:
+            json.dump(dados, arquivo, ensure_ascii=False, indent=2)
+        return caminho
+
+    def limpar(self):
+        """Descarta as estatísticas acumuladas"""
+        with self._lock:
+            self._estatisticas = {}
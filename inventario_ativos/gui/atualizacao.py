@@ -6,10 +6,11 @@ from PyQt5.QtWidgets import (
     QPushButton, QGroupBox, QFormLayout, QLineEdit,
     QFileDialog, QTextEdit, QMessageBox, QCheckBox, QSpinBox
 )
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import Qt, pyqtSignal
 from PyQt5.QtGui import QFont
 from PyQt5.QtCore import QTimer
 import time
+from gui.tarefas import gerenciador_tarefas
 
 class CaminhosArquivosWidget(QWidget):
     """Widget para configurar caminhos de arquivos"""
@@ -140,6 +141,9 @@ class CaminhosArquivosWidget(QWidget):
 
 class AtualizacaoWidget(QWidget):
     """Widget principal para a aba de Atualização"""
+    # Contagens importadas (manualmente ou pela atualização automática)
+    dados_modificados = pyqtSignal()
+    
     def __init__(self, inventario_service, parent=None):
         super().__init__(parent)
         self.inventario_service = inventario_service
@@ -153,6 +157,7 @@ class AtualizacaoWidget(QWidget):
         
         # Coluna direita: Importação de dados
         self.importacao_widget = ImportacaoDadosWidget(inventario_service)
+        self.importacao_widget.dados_modificados.connect(self.dados_modificados)
         layout.addWidget(self.importacao_widget)
         
         # Configurar atualização automática
@@ -188,23 +193,29 @@ class AtualizacaoWidget(QWidget):
             # Se não houver inventário ativo, não fazer nada
             return
         
-        try:
-            # Forçar verificação de modificações nos arquivos
-            resultado = self.inventario_service.importar_dados_csv_silencioso()
-            
-            # Se algum arquivo foi modificado, atualizar a interface
-            if resultado.get('modified', False):
-                # Emitir sinal de dados atualizados
-                if hasattr(self.parent(), 'atualizar_dados'):
-                    self.parent().atualizar_dados()
-                
-                # Atualizar o log
-                self.importacao_widget.adicionar_log(
-                    f"✅ Atualização automática: {resultado.get('message', 'Arquivos atualizados')}"
-                )
-        except Exception as e:
+        # Forçar verificação de modificações nos arquivos, em segundo plano; se a verificação
+        # anterior ainda estiver rodando, esta apenas aguarda o resultado dela
+        gerenciador_tarefas().executar(
+            self.inventario_service.importar_dados_csv_silencioso,
+            chave=('importacao_silenciosa', self.inventario_service.inventario_atual),
+            grupo='inventario',
+            ao_concluir=self._verificacao_concluida,
             # Em caso de erro, apenas registrar no log, sem mostrar mensagens de erro
-            self.importacao_widget.adicionar_log(f"❌ Erro na atualização automática: {str(e)}")
+            ao_falhar=lambda erro: self.importacao_widget.adicionar_log(
+                f"❌ Erro na atualização automática: {str(erro)}"
+            )
+        )
+    
+    def _verificacao_concluida(self, resultado):
+        """Atualiza a interface se algum arquivo foi modificado"""
+        if resultado.get('modified', False):
+            # Emitir sinal de dados atualizados (as abas são marcadas como desatualizadas)
+            self.dados_modificados.emit()
+            
+            # Atualizar o log
+            self.importacao_widget.adicionar_log(
+                f"✅ Atualização automática: {resultado.get('message', 'Arquivos atualizados')}"
+            )
     
     def atualizar_dados(self):
         """Atualiza os widgets com as configurações atuais"""
@@ -219,6 +230,8 @@ class AtualizacaoWidget(QWidget):
 # Modificar a classe ImportacaoDadosWidget para incluir opções de atualização automática:
 class ImportacaoDadosWidget(QWidget):
     """Widget para importação de dados CSV"""
+    dados_modificados = pyqtSignal()
+    
     def __init__(self, inventario_service, parent=None):
         super().__init__(parent)
         self.inventario_service = inventario_service
@@ -329,9 +342,19 @@ class ImportacaoDadosWidget(QWidget):
         if resp != QMessageBox.Yes:
             return
         
-        # Importar dados
-        resultado = self.inventario_service.importar_dados_csv()
-        
+        # Importar dados em segundo plano (inventário ainda vazio: carga inicial em massa, tudo ou nada)
+        carga_rapida = self.inventario_service.inventario_atual_vazio()
+        self.adicionar_log("Importação iniciada...")
+        gerenciador_tarefas().executar(
+            self.inventario_service.importar_dados_csv, kwargs={'carga_rapida': carga_rapida},
+            chave=('importacao', self.inventario_service.inventario_atual),
+            ao_concluir=self._importacao_concluida,
+            ao_falhar=lambda erro: self._importacao_concluida({'status': False, 'message': str(erro)}),
+            indicador=self.btn_atualizar
+        )
+    
+    def _importacao_concluida(self, resultado):
+        """Mostra o resultado da importação"""
         # Atualizar log
         self.atualizar_log(resultado)
         
@@ -344,8 +367,7 @@ class ImportacaoDadosWidget(QWidget):
             )
             
             # Emitir sinal de dados atualizados
-            if hasattr(self.parent().parent(), 'atualizar_dados'):
-                self.parent().parent().atualizar_dados()
+            self.dados_modificados.emit()
         else:
             QMessageBox.warning(
                 self,
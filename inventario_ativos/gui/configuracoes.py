@@ -6,10 +6,12 @@ from PyQt5.QtWidgets import (
     QPushButton, QTabWidget, QGroupBox, QFormLayout,
     QLineEdit, QTextEdit, QTableWidget, QTableWidgetItem,
     QHeaderView, QMessageBox, QFileDialog, QDialog,
-    QDialogButtonBox, QComboBox, QSpinBox
+    QDialogButtonBox, QComboBox, QSpinBox, QProgressDialog,
+    QApplication
 )
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import Qt, pyqtSignal
 from PyQt5.QtGui import QFont
+from gui.tarefas import gerenciador_tarefas
 
 class BancoDadosWidget(QWidget):
     """Widget para configurações e manutenção do banco de dados"""
@@ -45,7 +47,7 @@ class BancoDadosWidget(QWidget):
         
         # Aviso sobre backup
         lbl_aviso = QLabel(
-            "O backup irá criar uma cópia do arquivo de banco de dados.\n"
+            "O backup cria uma cópia consistente do banco sem interromper o uso do sistema.\n"
             "Recomenda-se fazer backups regularmente."
         )
         lbl_aviso.setWordWrap(True)
@@ -62,38 +64,57 @@ class BancoDadosWidget(QWidget):
         self.lbl_caminho.setText(self.inventario_service.db_manager.db_file)
         
         # Contar inventários
-        inventarios = self.inventario_service.get_inventarios_disponiveis()
-        self.lbl_total_inventarios.setText(str(len(inventarios)))
+        self.lbl_total_inventarios.setText(str(self.inventario_service.contar_inventarios()))
     
     def realizar_backup(self):
         """Realiza backup do banco de dados"""
+        from database.backup_banco import BackupBanco
+        
         try:
+            backup = BackupBanco(self.inventario_service.db_manager)
+            
             # Obter caminho para o backup
+            nome_sugerido = f"{os.path.splitext(self.inventario_service.db_manager.db_file)[0]}_backup.db"
+            if backup.compactar:
+                nome_sugerido += ".gz"
+            
             caminho, _ = QFileDialog.getSaveFileName(
                 self,
                 "Salvar Backup",
-                f"{os.path.splitext(self.inventario_service.db_manager.db_file)[0]}_backup.db",
-                "Arquivos SQLite (*.db);;Todos os Arquivos (*)"
+                nome_sugerido,
+                "Backup compactado (*.db.gz);;Arquivos SQLite (*.db);;Todos os Arquivos (*)"
             )
             
             if not caminho:
                 return
             
-            # Fechar conexão com o banco para permitir cópia
-            self.inventario_service.db_manager.close_connection()
+            # A cópia é feita com o banco em uso; o diálogo só acompanha o progresso
+            dialogo = QProgressDialog("Copiando banco de dados...", "", 0, 100, self)
+            dialogo.setCancelButton(None)
+            dialogo.setWindowTitle("Backup")
+            dialogo.setWindowModality(Qt.WindowModal)
+            dialogo.setMinimumDuration(500)
             
-            # Copiar arquivo
-            import shutil
-            shutil.copy2(
-                self.inventario_service.db_manager.db_file,
-                caminho
-            )
+            def progresso(copiadas, total):
+                if total:
+                    dialogo.setValue(int(copiadas * 100 / total))
+                QApplication.processEvents()
             
-            QMessageBox.information(
-                self,
-                "Backup Realizado",
-                f"Backup realizado com sucesso!\nCaminho: {caminho}"
+            resultado = backup.realizar_backup(
+                destino=caminho,
+                compactar=caminho.endswith('.gz'),
+                progresso=progresso
             )
+            dialogo.setValue(100)
+            
+            if resultado['status'] == 'success':
+                QMessageBox.information(
+                    self,
+                    "Backup Realizado",
+                    f"Backup realizado com sucesso!\nCaminho: {caminho}"
+                )
+            else:
+                QMessageBox.warning(self, "Erro", resultado['message'])
             
         except Exception as e:
             QMessageBox.warning(
@@ -101,9 +122,6 @@ class BancoDadosWidget(QWidget):
                 "Erro",
                 f"Erro ao realizar backup: {str(e)}"
             )
-        finally:
-            # Reabrir conexão
-            self.inventario_service.db_manager.get_connection()
 
 
 class InventariosTableWidget(QWidget):
@@ -202,14 +220,21 @@ class InventariosTableWidget(QWidget):
         
         # Se o inventário selecionado é o atual, usar o método do inventário atual
         if cod_inventario == self.inventario_service.inventario_atual:
-            resultado = self.inventario_service.exportar_relatorio_atual(caminho)
+            funcao, args = self.inventario_service.exportar_relatorio_atual, (caminho,)
         else:
             # Caso contrário, criar um serviço temporário
-            resultado = self.inventario_service.csv_manager.exportar_relatorio_inventario(
-                cod_inventario,
-                caminho
-            )
-        
+            funcao, args = self.inventario_service.csv_manager.exportar_relatorio_inventario, (cod_inventario, caminho)
+        
+        # Exportar em segundo plano
+        gerenciador_tarefas().executar(
+            funcao, args,
+            ao_concluir=lambda resultado: self._exportacao_concluida(resultado, caminho),
+            ao_falhar=lambda erro: self._exportacao_concluida({'status': False, 'message': str(erro)}, caminho),
+            indicador=self.btn_exportar
+        )
+    
+    def _exportacao_concluida(self, resultado, caminho):
+        """Informa o resultado da exportação"""
         if resultado['status']:
             QMessageBox.information(
                 self,
@@ -258,9 +283,12 @@ class ConfiguracoesWidget(QWidget):
 
 class ManutencaoWidget(QWidget):
     """Widget para integrar as funções de manutenção do sistema"""
+    log_solicitado = pyqtSignal(str)
+    
     def __init__(self, inventario_service, parent=None):
         super().__init__(parent)
         self.inventario_service = inventario_service
+        self.log_solicitado.connect(self._escrever_log)
         
         # Layout principal
         layout = QVBoxLayout(self)
@@ -284,14 +312,17 @@ class ManutencaoWidget(QWidget):
             "Listar lojas e setores dos CSVs",
             "Criar lojas e setores pendentes (do CSV)",
             "Atualizar status de todos registros para 'finalizado'",
-            "Corrigir cálculo de totais"
+            "Corrigir cálculo de totais",
+            "Reconstruir tabela de totais agregados",
+            "Arquivar inventários finalizados",
+            "Otimizar banco de dados (optimize, ANALYZE e vacuum)"
         ])
         operacoes_layout.addWidget(self.cb_operacao)
         
         # Botão para executar
-        btn_executar = QPushButton("Executar Operação")
-        btn_executar.clicked.connect(self.executar_operacao)
-        operacoes_layout.addWidget(btn_executar)
+        self.btn_executar = QPushButton("Executar Operação")
+        self.btn_executar.clicked.connect(self.executar_operacao)
+        operacoes_layout.addWidget(self.btn_executar)
         
         layout.addWidget(grupo_manutencao)
         
@@ -330,26 +361,32 @@ class ManutencaoWidget(QWidget):
         
         # Importar módulos necessários diretamente em vez do script
         try:
-            from database.database_manager import DatabaseManager
             from import_export.csv_manager import CSVManager
-            import datetime
-            import shutil
-            import os
-            import re
             
-            # Obter instâncias dos gerenciadores
-            db_manager = DatabaseManager()
+            # Mesmo banco do restante do sistema (pool de conexões compartilhado)
+            db_manager = self.inventario_service.db_manager
             csv_manager = CSVManager(db_manager)
             
             # Executar a operação correspondente
             operacao_indice = self.cb_operacao.currentIndex()
             
-            if operacao_indice == 0:
-                # Mostrar informações do banco de dados
-                self.mostrar_info_banco(db_manager)
-            elif operacao_indice == 1:
-                # Listar lojas e setores dos CSVs
-                self.listar_csv(csv_manager)
+            # Operações sem diálogos rodam em segundo plano; o log é atualizado pelo sinal log_solicitado
+            em_segundo_plano = {
+                0: (self.mostrar_info_banco, (db_manager,)),
+                1: (self.listar_csv, (csv_manager,)),
+                5: (self.reconstruir_totais, (db_manager,)),
+                6: (self.arquivar_finalizados, (db_manager,)),
+                7: (self.otimizar_banco, (db_manager,))
+            }
+            
+            if operacao_indice in em_segundo_plano:
+                funcao, args = em_segundo_plano[operacao_indice]
+                gerenciador_tarefas().executar(
+                    funcao, args,
+                    chave=('manutencao', operacao_indice),
+                    ao_falhar=self._erro_operacao,
+                    indicador=self.btn_executar
+                )
             elif operacao_indice == 2:
                 # Criar lojas e setores pendentes (do CSV)
                 self.criar_lojas_setores(db_manager, csv_manager)
@@ -361,9 +398,13 @@ class ManutencaoWidget(QWidget):
                 self.corrigir_totais()
                 
         except Exception as e:
-            self.adicionar_log(f"Erro ao executar operação: {str(e)}")
-            import traceback
-            self.adicionar_log(traceback.format_exc())
+            self._erro_operacao(e)
+    
+    def _erro_operacao(self, erro):
+        """Registra no log o erro de uma operação"""
+        self.adicionar_log(f"Erro ao executar operação: {str(erro)}")
+        import traceback
+        self.adicionar_log(''.join(traceback.format_exception(type(erro), erro, erro.__traceback__)))
     
     def mostrar_info_banco(self, db_manager):
         """Mostra informações do banco de dados"""
@@ -383,31 +424,33 @@ class ManutencaoWidget(QWidget):
             self.adicionar_log(f"  Status: {inv['status']}")
             self.adicionar_log(f"  Data de início: {inv['data_inicio'][:19]}")
             
-            # Contar registros
-            conn = db_manager.get_connection()
-            cursor = conn.cursor()
-            
-            # Contar lojas
-            cursor.execute('''
-            SELECT COUNT(*) as total_lojas,
-                   SUM(CASE WHEN status = 'finalizado' THEN 1 ELSE 0 END) as lojas_finalizadas
-            FROM contagem_lojas
-            WHERE cod_inventario = ?
-            ''', (inv['cod_inventario'],))
+            # Contar registros (no arquivo, se o inventário foi arquivado)
+            with db_manager.leitura_inventario(inv['cod_inventario']) as (conn, esquema):
+                cursor = conn.cursor()
+                
+                # Contar lojas
+                cursor.execute(f'''
+                SELECT COUNT(*) as total_lojas,
+                       SUM(CASE WHEN status = 'finalizado' THEN 1 ELSE 0 END) as lojas_finalizadas
+                FROM {esquema}.contagem_lojas
+                WHERE cod_inventario = ?
+                ''', (inv['cod_inventario'],))
+                
+                lojas = cursor.fetchone()
+                
+                # Contar setores
+                cursor.execute(f'''
+                SELECT COUNT(*) as total_setores,
+                       SUM(CASE WHEN status = 'finalizado' THEN 1 ELSE 0 END) as setores_finalizados
+                FROM {esquema}.contagem_cd
+                WHERE cod_inventario = ?
+                ''', (inv['cod_inventario'],))
+                
+                setores = cursor.fetchone()
             
-            lojas = cursor.fetchone()
             total_lojas = lojas['total_lojas'] if lojas and 'total_lojas' in lojas else 0
             lojas_finalizadas = lojas['lojas_finalizadas'] if lojas and 'lojas_finalizadas' in lojas else 0
             
-            # Contar setores
-            cursor.execute('''
-            SELECT COUNT(*) as total_setores,
-                   SUM(CASE WHEN status = 'finalizado' THEN 1 ELSE 0 END) as setores_finalizados
-            FROM contagem_cd
-            WHERE cod_inventario = ?
-            ''', (inv['cod_inventario'],))
-            
-            setores = cursor.fetchone()
             total_setores = setores['total_setores'] if setores and 'total_setores' in setores else 0
             setores_finalizados = setores['setores_finalizados'] if setores and 'setores_finalizados' in setores else 0
             
@@ -480,6 +523,11 @@ class ManutencaoWidget(QWidget):
         
         self.adicionar_log(f"\nProcessando inventário: {cod_inventario}")
         
+        # As linhas de um inventário arquivado estão no arquivo dele, somente leitura
+        if db_manager.get_arquivo_inventario(cod_inventario):
+            self.adicionar_log("\n❌ Inventário arquivado: seus registros não podem ser alterados.")
+            return
+        
         # Ler CSVs
         lojas_csv = csv_manager.ler_lojas_csv(force_reload=True)
         setores_csv = csv_manager.ler_setores_csv(force_reload=True)
@@ -618,6 +666,11 @@ class ManutencaoWidget(QWidget):
         
         self.adicionar_log(f"\nProcessando inventário: {cod_inventario}")
         
+        # As linhas de um inventário arquivado estão no arquivo dele, somente leitura
+        if db_manager.get_arquivo_inventario(cod_inventario):
+            self.adicionar_log("\n❌ Inventário arquivado: seus registros não podem ser alterados.")
+            return
+        
         # Obter contagens atuais
         conn = db_manager.get_connection()
         cursor = conn.cursor()
@@ -948,8 +1001,65 @@ class ManutencaoWidget(QWidget):
             import traceback
             self.adicionar_log(traceback.format_exc())
 
+    def reconstruir_totais(self, db_manager):
+        """Recalcula a tabela inventario_totais, corrigindo divergências com as contagens"""
+        self.adicionar_log("RECONSTRUIR TOTAIS AGREGADOS\n" + "="*50)
+        
+        cod_inventario = self.inventario_service.inventario_atual
+        if cod_inventario:
+            divergencias = db_manager.verificar_totais(cod_inventario)
+            self.adicionar_log(f"Divergências encontradas no inventário {cod_inventario}: {len(divergencias)}")
+            for d in divergencias:
+                self.adicionar_log(f"  {d['destino']} / {d['tipo_caixa']}: {d['atual']} -> {d['esperado']}")
+        
+        resultado = db_manager.reconstruir_totais()
+        self.adicionar_log(f"✅ {resultado['message']} ({resultado['linhas']} linhas)")
+    
+    def arquivar_finalizados(self, db_manager):
+        """Move os inventários finalizados da base principal para arquivos próprios"""
+        from database.arquivo_inventarios import ArquivoInventarios
+        
+        self.adicionar_log("ARQUIVAR INVENTÁRIOS FINALIZADOS\n" + "="*50)
+        
+        resultado = ArquivoInventarios(db_manager).arquivar_finalizados()
+        for item in resultado['resultados']:
+            self.adicionar_log(f"  {item['message']}")
+        self.adicionar_log(f"✅ {resultado['message']}")
+    
+    def otimizar_banco(self, db_manager):
+        """Executa a manutenção do banco sem limite de tempo e mostra o antes e depois"""
+        from database.manutencao_banco import ManutencaoBanco, AUTO_VACUUM_INCREMENTAL
+        
+        self.adicionar_log("OTIMIZAR BANCO DE DADOS\n" + "="*50)
+        
+        manutencao = ManutencaoBanco(db_manager)
+        if manutencao.estatisticas_arquivo()['auto_vacuum'] != AUTO_VACUUM_INCREMENTAL:
+            # Bancos criados antes do vacuum incremental precisam de um VACUUM completo, uma única vez
+            self.adicionar_log("Ativando vacuum incremental (VACUUM completo, pode demorar)...")
+            conversao = manutencao.converter_auto_vacuum()
+            self.adicionar_log(f"  {conversao['message']}")
+        
+        resultado = manutencao.executar(origem='manual', orcamento_segundos=0)
+        antes, depois = resultado['antes'], resultado['depois']
+        self.adicionar_log(f"Operações: {', '.join(resultado['operacoes'])}")
+        self.adicionar_log(
+            f"Tamanho: {antes['tamanho'] / 1024:.0f} KB -> {depois['tamanho'] / 1024:.0f} KB"
+        )
+        self.adicionar_log(
+            f"Páginas livres: {antes['paginas_livres']} de {antes['paginas']} "
+            f"({antes['fragmentacao']:.1%}) -> {depois['paginas_livres']} de {depois['paginas']} "
+            f"({depois['fragmentacao']:.1%})"
+        )
+        icone = "✅" if resultado['status'] == 'success' else "⚠️"
+        self.adicionar_log(f"{icone} {resultado['message']} em {resultado['duracao_ms']} ms")
+    
     def adicionar_log(self, texto):
-        """Adiciona texto ao log"""
+        """Adiciona texto ao log (pode ser chamado pelas operações em segundo plano)"""
+        # Fora da thread da interface, o sinal entrega o texto na thread do widget
+        self.log_solicitado.emit(texto)
+    
+    def _escrever_log(self, texto):
+        """Escreve o texto no log"""
         # Obter texto atual
         texto_atual = self.txt_log.toPlainText()
         
@@ -0,0 +1,90 @@
+# gui/coordenador_atualizacao.py
+from PyQt5.QtCore import QObject
+
+
+class CoordenadorAtualizacao(QObject):
+    """Decide quando cada aba da janela principal é atualizada
+
+    Mudanças nos dados (inventário carregado, importação, cadastro) apenas marcam as abas
+    como desatualizadas. Só a aba visível é atualizada na hora; as outras, quando o usuário
+    passar para elas. Se chegarem mudanças enquanto a aba visível ainda está se atualizando,
+    elas viram uma única nova atualização ao final da que está em andamento.
+    """
+
+    def __init__(self, tab_widget, abas, construir_aba, inventario_atual, tarefas, parent=None):
+        """
+        abas: lista de (recebe_inventario, atualizavel), na ordem das abas
+        construir_aba: função(indice) que cria (se preciso) e retorna o widget da aba
+        inventario_atual: função que retorna o código do inventário atual (ou None)
+        tarefas: GerenciadorTarefas usado pelos widgets
+        """
+        super().__init__(parent)
+        self.tab_widget = tab_widget
+        self.abas = abas
+        self.construir_aba = construir_aba
+        self.inventario_atual = inventario_atual
+        self.tarefas = tarefas
+
+        # Índices das abas desatualizadas
+        self.sujas = set()
+        # Abas que receberam mudanças durante uma atualização ainda em andamento
+        self.reagendadas = set()
+        self.aba_exibida = None
+
+        self.tab_widget.currentChanged.connect(self.aba_ativada)
+        self.tarefas.tarefa_finalizada.connect(self._tarefa_finalizada)
+
+    def marcar_sujas(self, indices=None):
+        """Marca abas como desatualizadas (todas, sem argumento) e atualiza a visível, se for o caso"""
+        if indices is None:
+            indices = [indice for indice, (_, atualizavel) in enumerate(self.abas) if atualizavel]
+        self.sujas.update(indices)
+        self.atualizar_visivel()
+
+    def limpar(self):
+        """Esquece as marcações (ex.: nenhum inventário selecionado)"""
+        self.sujas.clear()
+        self.reagendadas.clear()
+
+    def aba_ativada(self, indice):
+        """Troca de aba: descarta o que a anterior aguardava e atualiza a nova, se estiver suja"""
+        anterior, self.aba_exibida = self.aba_exibida, indice
+        if anterior is not None and anterior != indice:
+            self.reagendadas.discard(anterior)
+            # Antes da primeira exibição a aba tem só o widget provisório, sem tarefas
+            if self.tarefas.cancelar(self.tab_widget.widget(anterior)):
+                # Atualização interrompida: refazer quando a aba voltar a ser exibida
+                self.sujas.add(anterior)
+
+        self.atualizar_visivel()
+
+    def atualizar_visivel(self):
+        """Constrói a aba visível e a atualiza se estiver desatualizada"""
+        indice = self.tab_widget.currentIndex()
+        if indice < 0 or not self.inventario_atual():
+            return
+
+        widget = self.construir_aba(indice)
+        if indice not in self.sujas:
+            return
+
+        if self.tarefas.ocupado_com(widget):
+            # Junta as mudanças em uma única atualização depois da que está rodando
+            self.reagendadas.add(indice)
+            return
+
+        self.sujas.discard(indice)
+        recebe_inventario, _ = self.abas[indice]
+        if recebe_inventario:
+            widget.atualizar_dados(self.inventario_atual())
+        else:
+            widget.atualizar_dados()
+
+    def _tarefa_finalizada(self):
+        """Dispara a atualização reagendada assim que a anterior termina"""
+        for indice in list(self.reagendadas):
+            if self.tarefas.ocupado_com(self.tab_widget.widget(indice)):
+                continue
+            self.reagendadas.discard(indice)
+            if indice == self.tab_widget.currentIndex():
+                self.atualizar_visivel()
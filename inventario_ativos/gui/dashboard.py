@@ -6,12 +6,13 @@ from PyQt5.QtChart import QChart, QChartView, QBarSeries, QBarSet, QBarCategoryA
 from PyQt5.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel, 
     QFrame, QGridLayout, QSizePolicy, QScrollArea,
-    QGroupBox, QTableWidget, QTableWidgetItem, QHeaderView,
-    QProgressBar, QSpacerItem, QSizePolicy
+    QGroupBox, QTableView, QHeaderView, QSpacerItem
 )
-from PyQt5.QtCore import Qt, QSize
-from PyQt5.QtGui import QFont, QColor, QPalette, QPainter
-from PyQt5.QtChart import QChart, QChartView, QBarSeries, QBarSet, QBarCategoryAxis, QValueAxis, QPieSeries
+from gui.tarefas import gerenciador_tarefas
+from gui.modelos import ModeloTabela, EstiloLinha, DelegateProgresso
+
+# Azul usado para destacar os CDs
+COR_CD = (41, 128, 185)
 
 class InfoCard(QFrame):
     """Widget tipo cartão para exibir informações importantes"""
@@ -68,9 +69,17 @@ class RegionalProgressWidget(QWidget):
         title.setMaximumHeight(30)  # Limitar altura do título
         layout.addWidget(title)
         
-        # Tabela de progresso
-        self.table = QTableWidget(0, 4)
-        self.table.setHorizontalHeaderLabels(["Regional", "Concluídas", "Total", "Progresso"])
+        # Tabela de progresso (a coluna de progresso é desenhada pelo delegate, sem widgets por linha)
+        self.modelo = ModeloTabela(
+            ["Regional", "Concluídas", "Total", "Progresso"],
+            estilos={
+                'regional': EstiloLinha(negrito=True),
+                'cd': EstiloLinha(cor=COR_CD, negrito=True, cor_valores=COR_CD)
+            }
+        )
+        self.table = QTableView()
+        self.table.setModel(self.modelo)
+        self.table.setItemDelegateForColumn(3, DelegateProgresso(self._cor_progresso, self.table))
         self.table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
         
         # Ajustes na tabela para otimizar espaço
@@ -81,16 +90,15 @@ class RegionalProgressWidget(QWidget):
         self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)  # Apenas o nome da regional estica
         self.table.horizontalHeader().setSectionResizeMode(1, QHeaderView.Fixed)  # Fixar largura
         self.table.horizontalHeader().setSectionResizeMode(2, QHeaderView.Fixed)  # Fixar largura
-        self.table.setStyleSheet("QTableWidget { gridline-color: lightgray; }")
+        self.table.setStyleSheet("QTableView { gridline-color: lightgray; }")
         
         layout.addWidget(self.table)
     
     def atualizar_dados(self, dados_regionais):
         """Atualiza a tabela com os dados de progresso por regional"""
-        self.table.setRowCount(0)
-        
         # Verificar se temos dados_regionais válidos
         if not dados_regionais:
+            self.modelo.limpar()
             print("Aviso: dados_regionais está vazio")
             return
             
@@ -119,91 +127,47 @@ class RegionalProgressWidget(QWidget):
             else:
                 regionais_normais.append(regional)
         
-        # Adicionar CDs primeiro
-        row_index = 0
-        for regional in regionais_cd:
-            self._adicionar_linha_regional(regional, row_index, True)
-            row_index += 1
-        
-        # Adicionar regionais normais
-        for regional in regionais_normais:
-            self._adicionar_linha_regional(regional, row_index, False)
-            row_index += 1
+        # CDs primeiro, depois as regionais normais
+        linhas = [self._linha_regional(regional, True) for regional in regionais_cd]
+        linhas.extend(self._linha_regional(regional, False) for regional in regionais_normais)
+        self.modelo.carregar(linhas)
 
-    def _adicionar_linha_regional(self, regional, row_index, is_cd):
-        """Adiciona uma linha na tabela para a regional ou CD"""
-        try:
-            self.table.insertRow(row_index)
-            
-            # Regional - Nome mais visível com estilo específico
-            regional_name = regional.get('regional', '')
-            item_regional = QTableWidgetItem(
-                f"🏢 {regional_name}" if is_cd else regional_name
-            )
-            
-            font = item_regional.font()
-            font.setBold(True)
-            item_regional.setFont(font)
-            
-            # Destacar CDs com cor diferente
-            if is_cd:
-                item_regional.setForeground(QColor(41, 128, 185))  # Azul mais brilhante para CDs
-            
-            self.table.setItem(row_index, 0, item_regional)
-            
-            # Lojas concluídas
-            lojas_finalizadas = regional.get('lojas_finalizadas', 0)
-            item_concluidas = QTableWidgetItem(str(lojas_finalizadas))
-            if is_cd:
-                item_concluidas.setForeground(QColor(41, 128, 185))
-            self.table.setItem(row_index, 1, item_concluidas)
-            
-            # Total de lojas
-            total_lojas = regional.get('total_lojas', 0)
-            item_total = QTableWidgetItem(str(total_lojas))
-            if is_cd:
-                item_total.setForeground(QColor(41, 128, 185))
-            self.table.setItem(row_index, 2, item_total)
-            
-            # Calcular porcentagem
-            porcentagem = 0
-            if 'porcentagem' in regional:
-                porcentagem = regional['porcentagem']
-            elif total_lojas > 0:
-                porcentagem = (lojas_finalizadas / total_lojas) * 100
-            
-            # Barra de progresso com texto mais visível
-            progress_bar = QProgressBar()
-            progress_bar.setMinimum(0)
-            progress_bar.setMaximum(100)
-            progress_bar.setValue(int(porcentagem))
-            progress_bar.setFormat("%v%")  # Mostrar valor com percentual
-            progress_bar.setAlignment(Qt.AlignCenter)
-            
-            # Alterar cor da barra de progresso baseado no percentual e tipo
-            stylesheet = ""
-            if is_cd:
-                # Paleta especial para CDs
-                if porcentagem < 30:
-                    stylesheet = "QProgressBar::chunk { background-color: #3498db; }"  # Azul claro
-                elif porcentagem < 70:
-                    stylesheet = "QProgressBar::chunk { background-color: #2980b9; }"  # Azul médio
-                else:
-                    stylesheet = "QProgressBar::chunk { background-color: #1c6ea4; }"  # Azul escuro
-            else:
-                # Paleta normal para lojas
-                if porcentagem < 30:
-                    stylesheet = "QProgressBar::chunk { background-color: #FF6666; }"  # Vermelho claro
-                elif porcentagem < 70:
-                    stylesheet = "QProgressBar::chunk { background-color: #FFCC66; }"  # Amarelo
-                else:
-                    stylesheet = "QProgressBar::chunk { background-color: #66CC66; }"  # Verde claro
-            
-            progress_bar.setStyleSheet(stylesheet)
-            self.table.setCellWidget(row_index, 3, progress_bar)
-            
-        except Exception as e:
-            print(f"Erro ao adicionar linha regional: {e}")
+    def _linha_regional(self, regional, is_cd):
+        """Monta a linha (rótulo, valores, estilo) da regional ou CD"""
+        regional_name = regional.get('regional', '')
+        lojas_finalizadas = regional.get('lojas_finalizadas', 0)
+        total_lojas = regional.get('total_lojas', 0)
+        
+        # Calcular porcentagem
+        porcentagem = 0
+        if 'porcentagem' in regional:
+            porcentagem = regional['porcentagem']
+        elif total_lojas > 0:
+            porcentagem = (lojas_finalizadas / total_lojas) * 100
+        
+        return (
+            f"🏢 {regional_name}" if is_cd else regional_name,
+            [lojas_finalizadas, total_lojas, int(porcentagem)],
+            'cd' if is_cd else 'regional'
+        )
+    
+    def _cor_progresso(self, index):
+        """Cor da barra de progresso baseada no percentual e tipo (CD ou loja)"""
+        porcentagem = self.modelo.valor(index.row(), 3)
+        if self.modelo.estilo(index.row()) == 'cd':
+            # Paleta especial para CDs
+            if porcentagem < 30:
+                return QColor("#3498db")  # Azul claro
+            elif porcentagem < 70:
+                return QColor("#2980b9")  # Azul médio
+            return QColor("#1c6ea4")  # Azul escuro
+        
+        # Paleta normal para lojas
+        if porcentagem < 30:
+            return QColor("#FF6666")  # Vermelho claro
+        elif porcentagem < 70:
+            return QColor("#FFCC66")  # Amarelo
+        return QColor("#66CC66")  # Verde claro
 
 class LojasPendentesWidget(QWidget):
     """Widget para exibir lojas pendentes por regional"""
@@ -663,79 +627,94 @@ class DashboardWidget(QWidget):
         if not cod_inventario:
             print("Aviso: atualizar_dados chamado com cod_inventario vazio")
             return
-            
-        try:
-            # Obter dados do dashboard
-            dados = self.relatorio_service.get_dados_dashboard(cod_inventario)
-            
-            # Verificar se os dados são válidos
-            if not dados:
-                print("Aviso: get_dados_dashboard retornou None")
-                return
-                
-            # Processar os dados de trânsito para separar por origem
-            # Adicionar totais separados para cada origem de trânsito
-            totais = dados.get('totais', {})
-            
-            # Verificar se os totais são válidos
+        
+        # Consultas em segundo plano; a tela é preenchida quando os dados chegarem
+        gerenciador_tarefas().executar(
+            self.obter_dados, (cod_inventario,),
+            chave=('dashboard', cod_inventario), dono=self, grupo='inventario', interromper=True,
+            ao_concluir=self.exibir_dados, ao_falhar=self._erro_atualizacao
+        )
+    
+    def obter_dados(self, cod_inventario):
+        """Consulta e prepara os dados do dashboard (roda fora da thread da interface)"""
+        # Obter dados do dashboard
+        dados = self.relatorio_service.get_dados_dashboard(cod_inventario)
+        
+        # Verificar se os dados são válidos
+        if not dados:
+            print("Aviso: get_dados_dashboard retornou None")
+            return None
+        
+        # Processar os dados de trânsito para separar por origem
+        # Adicionar totais separados para cada origem de trânsito
+        totais = dados.get('totais', {})
+        
+        # Verificar se os totais são válidos
+        if not totais:
+            print("Aviso: Dicionário de totais vazio")
+            # Tente obter os totais diretamente
+            totais = self.relatorio_service.get_totais_por_tipo(cod_inventario)
             if not totais:
-                print("Aviso: Dicionário de totais vazio")
-                # Tente obter os totais diretamente
-                totais = self.relatorio_service.get_totais_por_tipo(cod_inventario)
-                if not totais:
-                    print("Aviso: Não foi possível obter totais")
-                    return
-                dados['totais'] = totais
-            
-            # Inicializar valores mínimos necessários no dicionário de totais para evitar KeyError
-            for chave in ['total_lojas', 'total_geral', 'total_fornecedor',
-                        'total_transito_sp', 'total_transito_es', 'total_transito_rj',
-                        'total_cd_sp', 'total_cd_es', 'total_cd_rj']:
-                if chave not in totais:
-                    totais[chave] = 0
-            
-            # Obter detalhes de trânsito por tipo (se disponíveis)
-            # Calcular totais de trânsito por origem específica se necessário
-            if 'detalhes' in dados and 'transito' in dados['detalhes']:
-                for item in dados['detalhes']['transito']:
-                    setor = item.get('setor', '').upper()
-                    tipo = item.get('tipo_caixa', '')
-                    quantidade = item.get('total', 0)
-                    
-                    # Normalizar o tipo
-                    if tipo and tipo in ['hb_623', 'hb_618', 'hnt_g', 'hnt_p', 'chocolate', 'bin', 'pallets_pbr']:
-                        if 'SP' in setor:
-                            totais[f'transito_sp_{tipo}'] = quantidade
-                        elif 'ES' in setor:
-                            totais[f'transito_es_{tipo}'] = quantidade
-                        elif 'RJ' in setor:
-                            totais[f'transito_rj_{tipo}'] = quantidade
-            
-            # Atualizar cards
-            self.atualizar_cards(dados)
-            
-            # Atualizar progresso por regional
-            self.regional_progress.atualizar_dados(dados['status'].get('resumo_regional', []))
-            
-            # Atualizar lojas pendentes
-            lojas_pendentes = {}
-            for regional in dados['status'].get('resumo_regional', []):
-                if regional.get('lojas_pendentes'):
-                    # Agrupar CDs em uma categoria especial
-                    if regional.get('regional') == 'CENTRO_DISTRIBUICAO':
-                        lojas_pendentes['CENTRO_DISTRIBUICAO'] = regional['lojas_pendentes']
-                    else:
-                        lojas_pendentes[regional.get('regional', '')] = regional['lojas_pendentes']
-            
-            self.lojas_pendentes.atualizar_dados(lojas_pendentes)
-            
-            # Atualizar gráfico de comparação
-            self.comparacao_widget.atualizar_dados(dados.get('comparacao'))
-            
-            # Atualizar gráfico de distribuição com os dados processados
-            self.distribuicao_widget.atualizar_dados(totais)
-            
-        except Exception as e:
-            import traceback
-            print(f"Erro ao atualizar dados do dashboard: {e}")
-            print(traceback.format_exc())
\ No newline at end of file
+                print("Aviso: Não foi possível obter totais")
+                return None
+            dados['totais'] = totais
+        
+        # Inicializar valores mínimos necessários no dicionário de totais para evitar KeyError
+        for chave in ['total_lojas', 'total_geral', 'total_fornecedor',
+                    'total_transito_sp', 'total_transito_es', 'total_transito_rj',
+                    'total_cd_sp', 'total_cd_es', 'total_cd_rj']:
+            if chave not in totais:
+                totais[chave] = 0
+        
+        # Obter detalhes de trânsito por tipo (se disponíveis)
+        # Calcular totais de trânsito por origem específica se necessário
+        if 'detalhes' in dados and 'transito' in dados['detalhes']:
+            for item in dados['detalhes']['transito']:
+                setor = item.get('setor', '').upper()
+                tipo = item.get('tipo_caixa', '')
+                quantidade = item.get('total', 0)
+                
+                # Normalizar o tipo
+                if tipo and tipo in ['hb_623', 'hb_618', 'hnt_g', 'hnt_p', 'chocolate', 'bin', 'pallets_pbr']:
+                    if 'SP' in setor:
+                        totais[f'transito_sp_{tipo}'] = quantidade
+                    elif 'ES' in setor:
+                        totais[f'transito_es_{tipo}'] = quantidade
+                    elif 'RJ' in setor:
+                        totais[f'transito_rj_{tipo}'] = quantidade
+        
+        return dados
+    
+    def exibir_dados(self, dados):
+        """Preenche os componentes do dashboard com os dados obtidos"""
+        if not dados:
+            return
+        
+        totais = dados['totais']
+        
+        # Atualizar cards
+        self.atualizar_cards(dados)
+        
+        # Atualizar progresso por regional
+        self.regional_progress.atualizar_dados(dados['status'].get('resumo_regional', []))
+        
+        # Atualizar lojas pendentes
+        lojas_pendentes = {}
+        for regional in dados['status'].get('resumo_regional', []):
+            if regional.get('lojas_pendentes'):
+                # Agrupar CDs em uma categoria especial
+                if regional.get('regional') == 'CENTRO_DISTRIBUICAO':
+                    lojas_pendentes['CENTRO_DISTRIBUICAO'] = regional['lojas_pendentes']
+                else:
+                    lojas_pendentes[regional.get('regional', '')] = regional['lojas_pendentes']
+        
+        self.lojas_pendentes.atualizar_dados(lojas_pendentes)
+        
+        # Atualizar gráfico de comparação
+        self.comparacao_widget.atualizar_dados(dados.get('comparacao'))
+        
+        # Atualizar gráfico de distribuição com os dados processados
+        self.distribuicao_widget.atualizar_dados(totais)
+    
+    def _erro_atualizacao(self, erro):
+        print(f"Erro ao atualizar dados do dashboard: {erro}")
@@ -648,20 +648,18 @@ class FinalizarInventarioDialog(QDialog):
         # Limpar a tabela
         self.tabela_lojas.setRowCount(0)
         
-        # Obter conexão para consulta
-        conn = self.inventario_service.db_manager.get_connection()
-        cursor = conn.cursor()
-        
-        # Consultar os dados de todas as lojas no inventário atual
-        cursor.execute('''
-        SELECT loja, caixa_hb_623, caixa_hb_618, caixa_hnt_g, caixa_hnt_p, 
-               caixa_chocolate, caixa_bin, pallets_pbr, status
-        FROM contagem_lojas
-        WHERE cod_inventario = ?
-        ORDER BY loja
-        ''', (self.cod_inventario,))
-        
-        lojas = cursor.fetchall()
+        # Consultar os dados de todas as lojas do inventário (no arquivo, se ele foi arquivado)
+        with self.inventario_service.db_manager.leitura_inventario(self.cod_inventario) as (conn, esquema):
+            cursor = conn.cursor()
+            cursor.execute(f'''
+            SELECT loja, caixa_hb_623, caixa_hb_618, caixa_hnt_g, caixa_hnt_p, 
+                   caixa_chocolate, caixa_bin, pallets_pbr, status
+            FROM {esquema}.contagem_lojas
+            WHERE cod_inventario = ?
+            ORDER BY loja
+            ''', (self.cod_inventario,))
+            
+            lojas = cursor.fetchall()
         
         # Adicionar cada loja à tabela
         for loja in lojas:
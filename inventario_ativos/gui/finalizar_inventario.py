@@ -3,7 +3,7 @@ import sys
 import os
 from PyQt5.QtWidgets import (
     QDialog, QVBoxLayout, QHBoxLayout, QLabel, QGroupBox, QFormLayout,
-    QLineEdit, QTableWidget, QTableWidgetItem, QHeaderView, QMessageBox,
+    QLineEdit, QTableWidget, QTableWidgetItem, QTableView, QHeaderView, QMessageBox,
     QFileDialog, QComboBox, QPushButton, QTabWidget, QSplitter, QFrame,
     QListWidget, QListWidgetItem, QSpinBox, QProgressBar, QScrollArea,
     QWidgetItem, QSizePolicy,QWidget
@@ -11,6 +11,8 @@ from PyQt5.QtWidgets import (
 from PyQt5.QtCore import Qt, QMargins, QSize
 from PyQt5.QtGui import QFont, QColor, QPalette, QPainter, QIcon
 from PyQt5.QtChart import QChart, QChartView, QBarSeries, QBarSet, QBarCategoryAxis, QValueAxis, QPieSeries, QLegend
+from gui.tarefas import gerenciador_tarefas, CopiaTabela
+from gui.modelos import ModeloTabela, EstiloLinha, ProxyTabela
 
 
 class FinalizarInventarioDialog(QDialog):
@@ -210,12 +212,21 @@ class FinalizarInventarioDialog(QDialog):
         
         layout.addLayout(search_layout)
         
-        # Tabela para mostrar lojas e ativos
-        self.tabela_lojas = QTableWidget(0, 9)
-        self.tabela_lojas.setHorizontalHeaderLabels([
-            "Loja", "HB 623", "HB 618", "HNT G", "HNT P", 
-            "Chocolate", "BIN", "Pallets PBR", "Total"
-        ])
+        # Tabela para mostrar lojas e ativos (modelo compacto; ordenação e busca pelo proxy)
+        self.modelo_lojas = ModeloTabela(
+            ["Loja", "HB 623", "HB 618", "HNT G", "HNT P",
+             "Chocolate", "BIN", "Pallets PBR", "Total"],
+            estilos={
+                'finalizado': EstiloLinha(cor=(0, 128, 0), negrito=True),  # Verde para finalizado
+                'pendente': EstiloLinha(cor=(255, 0, 0)),  # Vermelho para pendente
+                'total': EstiloLinha(negrito=True, negrito_valores=True),
+                'erro': EstiloLinha(cor=(255, 0, 0))
+            },
+            parent=self
+        )
+        self.proxy_lojas = ProxyTabela(self.modelo_lojas, self)
+        self.tabela_lojas = QTableView()
+        self.tabela_lojas.setModel(self.proxy_lojas)
         self.tabela_lojas.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
         self.tabela_lojas.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeToContents)
         self.tabela_lojas.setSortingEnabled(True)
@@ -631,147 +642,51 @@ class FinalizarInventarioDialog(QDialog):
 
     def _carregar_detalhes_lojas(self, dados):
         """Carrega os detalhes das lojas na tabela"""
-        # Limpar a tabela
-        self.tabela_lojas.setRowCount(0)
+        # Desfazer a mesclagem da linha de erro de uma carga anterior
+        self.tabela_lojas.clearSpans()
         
         try:
-            # Obter conexão para consulta direta ao banco de dados
-            conn = self.inventario_service.db_manager.get_connection()
-            cursor = conn.cursor()
-            
-            # Consultar os dados de todas as lojas no inventário atual (excluindo CDs)
-            cursor.execute('''
-            SELECT loja, caixa_hb_623, caixa_hb_618, caixa_hnt_g, caixa_hnt_p, 
-                caixa_chocolate, caixa_bin, pallets_pbr, status
-            FROM contagem_lojas
-            WHERE cod_inventario = ? AND loja NOT LIKE 'CD %'
-            ORDER BY loja
-            ''', (self.cod_inventario,))
-            
-            lojas = cursor.fetchall()
+            # Consultar os dados de todas as lojas do inventário (excluindo CDs), no arquivo se ele foi arquivado
+            with self.inventario_service.db_manager.leitura_inventario(self.cod_inventario) as (conn, esquema):
+                cursor = conn.cursor()
+                cursor.execute(f'''
+                SELECT loja, caixa_hb_623, caixa_hb_618, caixa_hnt_g, caixa_hnt_p, 
+                    caixa_chocolate, caixa_bin, pallets_pbr, status
+                FROM {esquema}.contagem_lojas
+                WHERE cod_inventario = ? AND loja NOT LIKE 'CD %'
+                ORDER BY loja
+                ''', (self.cod_inventario,))
+                
+                lojas = cursor.fetchall()
             print(f"Encontradas {len(lojas)} lojas no banco para o inventário {self.cod_inventario}")
             
-            # Mapeamento de totais por tipo
-            totais_tipo = {
-                'caixa_hb_623': 0,
-                'caixa_hb_618': 0,
-                'caixa_hnt_g': 0,
-                'caixa_hnt_p': 0,
-                'caixa_chocolate': 0,
-                'caixa_bin': 0,
-                'pallets_pbr': 0
-            }
+            # Valores por tipo
+            tipos = ['caixa_hb_623', 'caixa_hb_618', 'caixa_hnt_g', 'caixa_hnt_p', 
+                    'caixa_chocolate', 'caixa_bin', 'pallets_pbr']
             
-            # Adicionar cada loja à tabela
+            # Totais por tipo (e o total geral na última posição)
+            totais = [0] * (len(tipos) + 1)
+            
+            linhas = []
             for loja in lojas:
-                row = self.tabela_lojas.rowCount()
-                self.tabela_lojas.insertRow(row)
-                
-                # Nome da loja (e status)
-                try:
-                    nome_loja = loja['loja']
-                    status = loja['status']
-                except:
-                    # Fallback para acesso de dicionário ou outro tipo
-                    try:
-                        nome_loja = loja.get('loja', "Sem nome")
-                        status = loja.get('status', "pendente")
-                    except:
-                        # Último fallback para acesso por índice ou atributo
-                        try:
-                            nome_loja = getattr(loja, 'loja', "Sem nome")
-                            status = getattr(loja, 'status', "pendente")
-                        except:
-                            nome_loja = "Erro ao ler nome"
-                            status = "pendente"
-                
-                item_nome = QTableWidgetItem(nome_loja)
-                if status == 'finalizado':
-                    item_nome.setForeground(QColor(0, 128, 0))  # Verde para finalizado
-                    fonte = item_nome.font()
-                    fonte.setBold(True)
-                    item_nome.setFont(fonte)
-                else:
-                    item_nome.setForeground(QColor(255, 0, 0))  # Vermelho para pendente
-                
-                self.tabela_lojas.setItem(row, 0, item_nome)
-                
-                # Valores por tipo
-                tipos = ['caixa_hb_623', 'caixa_hb_618', 'caixa_hnt_g', 'caixa_hnt_p', 
-                        'caixa_chocolate', 'caixa_bin', 'pallets_pbr']
-                
-                total_loja = 0
-                for j, tipo in enumerate(tipos):
-                    # Tentar obter o valor de várias maneiras
-                    try:
-                        # Primeiro tenta acesso por índice de dicionário
-                        valor = loja[tipo]
-                    except:
-                        try:
-                            # Tenta acesso por método get
-                            valor = loja.get(tipo, 0)
-                        except:
-                            try:
-                                # Tenta acesso por atributo
-                                valor = getattr(loja, tipo, 0)
-                            except:
-                                # Finalmente, simplesmente usar zero
-                                valor = 0
-                    
+                valores = []
+                for tipo in tipos:
                     # Converter para inteiro independente do tipo
                     try:
-                        valor_int = int(valor or 0)
+                        valores.append(int(loja[tipo] or 0))
                     except (ValueError, TypeError):
-                        valor_int = 0
-                    
-                    # Adicionar ao total da loja
-                    total_loja += valor_int
-                    
-                    # Adicionar ao total por tipo
-                    totais_tipo[tipo] += valor_int
-                    
-                    # Criar item para a tabela
-                    valor_item = QTableWidgetItem(str(valor_int))
-                    valor_item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
-                    self.tabela_lojas.setItem(row, j + 1, valor_item)
+                        valores.append(0)
+                valores.append(sum(valores))
                 
-                # Total da loja
-                total_item = QTableWidgetItem(str(total_loja))
-                total_item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
-                self.tabela_lojas.setItem(row, 8, total_item)
-            
-            # Adicionar linha de totais no final
-            row = self.tabela_lojas.rowCount()
-            if row > 0:  # Só adiciona se tiver pelo menos uma loja
-                self.tabela_lojas.insertRow(row)
-                
-                # Célula do título "TOTAL"
-                total_label = QTableWidgetItem("TOTAL")
-                fonte = total_label.font()
-                fonte.setBold(True)
-                total_label.setFont(fonte)
-                self.tabela_lojas.setItem(row, 0, total_label)
+                for j, valor in enumerate(valores):
+                    totais[j] += valor
                 
-                # Células de totais por tipo
-                grand_total = 0
-                for j, tipo in enumerate(tipos):
-                    valor_tipo = totais_tipo[tipo]
-                    grand_total += valor_tipo
-                    
-                    total_tipo_item = QTableWidgetItem(str(valor_tipo))
-                    total_tipo_item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
-                    fonte = total_tipo_item.font()
-                    fonte.setBold(True)
-                    total_tipo_item.setFont(fonte)
-                    self.tabela_lojas.setItem(row, j + 1, total_tipo_item)
-                
-                # Total geral
-                grand_total_item = QTableWidgetItem(str(grand_total))
-                grand_total_item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
-                fonte = grand_total_item.font()
-                fonte.setBold(True)
-                grand_total_item.setFont(fonte)
-                self.tabela_lojas.setItem(row, 8, grand_total_item)
+                status = 'finalizado' if loja['status'] == 'finalizado' else 'pendente'
+                linhas.append((loja['loja'] or "Sem nome", valores, status))
+            
+            # Linha de totais no final (só se tiver pelo menos uma loja)
+            rodape = [("TOTAL", totais, 'total')] if linhas else []
+            self.modelo_lojas.carregar(linhas, rodape)
                 
         except Exception as e:
             # Em caso de erro, mostrar a mensagem de erro e adicionar uma linha de aviso
@@ -780,21 +695,12 @@ class FinalizarInventarioDialog(QDialog):
             print(traceback.format_exc())
             
             # Adicionar linha de aviso na tabela
-            self.tabela_lojas.setRowCount(1)
-            erro_item = QTableWidgetItem(f"Erro ao carregar lojas: {str(e)}")
-            erro_item.setForeground(QColor(255, 0, 0))  # Vermelho
-            self.tabela_lojas.setItem(0, 0, erro_item)
+            self.modelo_lojas.carregar([(f"Erro ao carregar lojas: {str(e)}", [], 'erro')])
             self.tabela_lojas.setSpan(0, 0, 1, 9)  # Ocupar toda a linha
     
     def filtrar_lojas(self):
         """Filtra a tabela de lojas pelo texto digitado"""
-        texto = self.txt_search.text().lower()
-        
-        for row in range(self.tabela_lojas.rowCount()):
-            item = self.tabela_lojas.item(row, 0)
-            if item:
-                mostrar = texto in item.text().lower()
-                self.tabela_lojas.setRowHidden(row, not mostrar)
+        self.proxy_lojas.filtrar(self.txt_search.text())
     
     def _carregar_comparativo(self, dados):
         """Carrega o comparativo com o último inventário finalizado"""
@@ -1021,463 +927,456 @@ class FinalizarInventarioDialog(QDialog):
         if not caminho:
             return
         
-        try:
-            # Verificar se temos o módulo xlsxwriter
-            import xlsxwriter
-            
-            # Criar workbook
-            workbook = xlsxwriter.Workbook(caminho)
-            
-            # Formatos
-            titulo_format = workbook.add_format({
-                'bold': True,
-                'font_size': 14,
-                'align': 'center',
-                'valign': 'vcenter'
-            })
-            
-            cabecalho_format = workbook.add_format({
-                'bold': True,
-                'bg_color': '#DDDDDD',
-                'border': 1
-            })
-            
-            negrito_format = workbook.add_format({
-                'bold': True,
-                'border': 1
-            })
-            
-            normal_format = workbook.add_format({
-                'border': 1
-            })
-            
-            numero_format = workbook.add_format({
-                'border': 1,
-                'num_format': '#,##0'
-            })
-            
-            verde_format = workbook.add_format({
-                'bold': True,
-                'border': 1,
-                'font_color': 'green'
-            })
-            
-            vermelho_format = workbook.add_format({
-                'bold': True,
-                'border': 1,
-                'font_color': 'red'
-            })
-            
-            percentual_format = workbook.add_format({
-                'border': 1,
-                'num_format': '0.0%'
-            })
-            
-            # Primeira planilha: Resumo Geral
-            ws_resumo = workbook.add_worksheet("Resumo Geral")
-            
-            # Título
-            ws_resumo.merge_range('A1:I1', f"Resumo do Inventário {self.cod_inventario}", titulo_format)
-            ws_resumo.set_row(0, 30)  # Altura da linha de título
-            
-            # Cabeçalhos
-            headers = ["Origem", "HB 623", "HB 618", "HNT G", "HNT P", 
-                       "Chocolate", "BIN", "Pallets PBR", "Total"]
-            
-            for col, header in enumerate(headers):
-                ws_resumo.write(2, col, header, cabecalho_format)
-            
-            # Dados do resumo por origem
-            # Dados do resumo por origem
-            for row in range(self.tabela_resumo_origem.rowCount()):
-                is_total = self.tabela_resumo_origem.item(row, 0).text() == "TOTAL"
-                formato = negrito_format if is_total else normal_format
-                
-                for col in range(9):
-                    item = self.tabela_resumo_origem.item(row, col)
-                    if item:
-                        if col == 0:  # Nome da origem
+        # Os dados saem das tabelas do diálogo: copiá-las aqui, na thread da interface,
+        # e gravar a planilha em segundo plano
+        tabelas = {
+            nome: CopiaTabela(getattr(self, nome))
+            for nome in ('tabela_resumo_origem', 'tabela_cd_sp', 'tabela_cd_es', 'tabela_cd_rj',
+                         'tabela_lojas', 'tabela_comparativo')
+        }
+        
+        gerenciador_tarefas().executar(
+            self._gerar_excel, (caminho, tabelas),
+            ao_concluir=lambda _: QMessageBox.information(
+                self,
+                "Exportação Concluída",
+                f"Relatório exportado com sucesso para:\n{caminho}"
+            ),
+            ao_falhar=lambda erro: QMessageBox.warning(
+                self,
+                "Erro na Exportação",
+                f"Ocorreu um erro ao exportar o relatório: {str(erro)}"
+            ),
+            dono=self, indicador=self.btn_exportar
+        )
+    
+    def _gerar_excel(self, caminho, tabelas):
+        """Grava a planilha de finalização a partir das cópias das tabelas (fora da thread da interface)"""
+        # Verificar se temos o módulo xlsxwriter
+        import xlsxwriter
+        
+        # Criar workbook
+        workbook = xlsxwriter.Workbook(caminho)
+        
+        # Formatos
+        titulo_format = workbook.add_format({
+            'bold': True,
+            'font_size': 14,
+            'align': 'center',
+            'valign': 'vcenter'
+        })
+        
+        cabecalho_format = workbook.add_format({
+            'bold': True,
+            'bg_color': '#DDDDDD',
+            'border': 1
+        })
+        
+        negrito_format = workbook.add_format({
+            'bold': True,
+            'border': 1
+        })
+        
+        normal_format = workbook.add_format({
+            'border': 1
+        })
+        
+        numero_format = workbook.add_format({
+            'border': 1,
+            'num_format': '#,##0'
+        })
+        
+        verde_format = workbook.add_format({
+            'bold': True,
+            'border': 1,
+            'font_color': 'green'
+        })
+        
+        vermelho_format = workbook.add_format({
+            'bold': True,
+            'border': 1,
+            'font_color': 'red'
+        })
+        
+        percentual_format = workbook.add_format({
+            'border': 1,
+            'num_format': '0.0%'
+        })
+        
+        # Primeira planilha: Resumo Geral
+        ws_resumo = workbook.add_worksheet("Resumo Geral")
+        
+        # Título
+        ws_resumo.merge_range('A1:I1', f"Resumo do Inventário {self.cod_inventario}", titulo_format)
+        ws_resumo.set_row(0, 30)  # Altura da linha de título
+        
+        # Cabeçalhos
+        headers = ["Origem", "HB 623", "HB 618", "HNT G", "HNT P", 
+                   "Chocolate", "BIN", "Pallets PBR", "Total"]
+        
+        for col, header in enumerate(headers):
+            ws_resumo.write(2, col, header, cabecalho_format)
+        
+        # Dados do resumo por origem
+        # Dados do resumo por origem
+        for row in range(tabelas['tabela_resumo_origem'].rowCount()):
+            is_total = tabelas['tabela_resumo_origem'].item(row, 0).text() == "TOTAL"
+            formato = negrito_format if is_total else normal_format
+            
+            for col in range(9):
+                item = tabelas['tabela_resumo_origem'].item(row, col)
+                if item:
+                    if col == 0:  # Nome da origem
+                        ws_resumo.write(row + 3, col, item.text(), formato)
+                    else:  # Valores numéricos
+                        try:
+                            valor = int(item.text())
+                            ws_resumo.write(row + 3, col, valor, formato)
+                        except:
                             ws_resumo.write(row + 3, col, item.text(), formato)
-                        else:  # Valores numéricos
-                            try:
-                                valor = int(item.text())
-                                ws_resumo.write(row + 3, col, valor, formato)
-                            except:
-                                ws_resumo.write(row + 3, col, item.text(), formato)
-            
-            # Ajustar largura das colunas
-            ws_resumo.set_column(0, 0, 15)  # Origem
-            ws_resumo.set_column(1, 8, 12)  # Valores
-            
-            # Segunda planilha: Detalhes CDs
-            ws_cds = workbook.add_worksheet("Detalhes CDs")
-            
-            # Título
-            ws_cds.merge_range('A1:I1', "Detalhes por Centro de Distribuição", titulo_format)
-            ws_cds.set_row(0, 30)  # Altura da linha de título
-            
-            # CD SP
-            ws_cds.merge_range('A3:I3', "CD SP", cabecalho_format)
-            
-            # Cabeçalhos
-            for col, header in enumerate(headers):
-                ws_cds.write(4, col, header, cabecalho_format)
-            
-            # Dados do CD SP
-            linha_excel = 5
-            for row in range(self.tabela_cd_sp.rowCount()):
-                is_total = self.tabela_cd_sp.item(row, 0).text() == "TOTAL"
-                formato = negrito_format if is_total else normal_format
-                
-                for col in range(9):
-                    item = self.tabela_cd_sp.item(row, col)
-                    if item:
-                        if col == 0:  # Nome da origem
+        
+        # Ajustar largura das colunas
+        ws_resumo.set_column(0, 0, 15)  # Origem
+        ws_resumo.set_column(1, 8, 12)  # Valores
+        
+        # Segunda planilha: Detalhes CDs
+        ws_cds = workbook.add_worksheet("Detalhes CDs")
+        
+        # Título
+        ws_cds.merge_range('A1:I1', "Detalhes por Centro de Distribuição", titulo_format)
+        ws_cds.set_row(0, 30)  # Altura da linha de título
+        
+        # CD SP
+        ws_cds.merge_range('A3:I3', "CD SP", cabecalho_format)
+        
+        # Cabeçalhos
+        for col, header in enumerate(headers):
+            ws_cds.write(4, col, header, cabecalho_format)
+        
+        # Dados do CD SP
+        linha_excel = 5
+        for row in range(tabelas['tabela_cd_sp'].rowCount()):
+            is_total = tabelas['tabela_cd_sp'].item(row, 0).text() == "TOTAL"
+            formato = negrito_format if is_total else normal_format
+            
+            for col in range(9):
+                item = tabelas['tabela_cd_sp'].item(row, col)
+                if item:
+                    if col == 0:  # Nome da origem
+                        ws_cds.write(linha_excel, col, item.text(), formato)
+                    else:  # Valores numéricos
+                        try:
+                            valor = int(item.text())
+                            ws_cds.write(linha_excel, col, valor, formato)
+                        except:
                             ws_cds.write(linha_excel, col, item.text(), formato)
-                        else:  # Valores numéricos
-                            try:
-                                valor = int(item.text())
-                                ws_cds.write(linha_excel, col, valor, formato)
-                            except:
-                                ws_cds.write(linha_excel, col, item.text(), formato)
-                
-                linha_excel += 1
             
-            # CD ES
-            linha_excel += 2
-            ws_cds.merge_range(f'A{linha_excel}:I{linha_excel}', "CD ES", cabecalho_format)
             linha_excel += 1
+        
+        # CD ES
+        linha_excel += 2
+        ws_cds.merge_range(f'A{linha_excel}:I{linha_excel}', "CD ES", cabecalho_format)
+        linha_excel += 1
+        
+        # Cabeçalhos
+        for col, header in enumerate(headers):
+            ws_cds.write(linha_excel, col, header, cabecalho_format)
+        linha_excel += 1
+        
+        # Dados do CD ES
+        for row in range(tabelas['tabela_cd_es'].rowCount()):
+            is_total = tabelas['tabela_cd_es'].item(row, 0).text() == "TOTAL"
+            formato = negrito_format if is_total else normal_format
+            
+            for col in range(9):
+                item = tabelas['tabela_cd_es'].item(row, col)
+                if item:
+                    if col == 0:  # Nome da origem
+                        ws_cds.write(linha_excel, col, item.text(), formato)
+                    else:  # Valores numéricos
+                        try:
+                            valor = int(item.text())
+                            ws_cds.write(linha_excel, col, valor, formato)
+                        except:
+                            ws_cds.write(linha_excel, col, item.text(), formato)
             
-            # Cabeçalhos
-            for col, header in enumerate(headers):
-                ws_cds.write(linha_excel, col, header, cabecalho_format)
             linha_excel += 1
-            
-            # Dados do CD ES
-            for row in range(self.tabela_cd_es.rowCount()):
-                is_total = self.tabela_cd_es.item(row, 0).text() == "TOTAL"
-                formato = negrito_format if is_total else normal_format
-                
-                for col in range(9):
-                    item = self.tabela_cd_es.item(row, col)
-                    if item:
-                        if col == 0:  # Nome da origem
+        
+        # CD RJ
+        linha_excel += 2
+        ws_cds.merge_range(f'A{linha_excel}:I{linha_excel}', "CD RJ", cabecalho_format)
+        linha_excel += 1
+        
+        # Cabeçalhos
+        for col, header in enumerate(headers):
+            ws_cds.write(linha_excel, col, header, cabecalho_format)
+        linha_excel += 1
+        
+        # Dados do CD RJ
+        for row in range(tabelas['tabela_cd_rj'].rowCount()):
+            is_total = tabelas['tabela_cd_rj'].item(row, 0).text() == "TOTAL"
+            formato = negrito_format if is_total else normal_format
+            
+            for col in range(9):
+                item = tabelas['tabela_cd_rj'].item(row, col)
+                if item:
+                    if col == 0:  # Nome da origem
+                        ws_cds.write(linha_excel, col, item.text(), formato)
+                    else:  # Valores numéricos
+                        try:
+                            valor = int(item.text())
+                            ws_cds.write(linha_excel, col, valor, formato)
+                        except:
                             ws_cds.write(linha_excel, col, item.text(), formato)
-                        else:  # Valores numéricos
-                            try:
-                                valor = int(item.text())
-                                ws_cds.write(linha_excel, col, valor, formato)
-                            except:
-                                ws_cds.write(linha_excel, col, item.text(), formato)
-                
-                linha_excel += 1
             
-            # CD RJ
-            linha_excel += 2
-            ws_cds.merge_range(f'A{linha_excel}:I{linha_excel}', "CD RJ", cabecalho_format)
             linha_excel += 1
+        
+        # Ajustar largura das colunas
+        ws_cds.set_column(0, 0, 15)  # Origem
+        ws_cds.set_column(1, 8, 12)  # Valores
+        
+        # Terceira planilha: Detalhes Lojas
+        ws_lojas = workbook.add_worksheet("Detalhes Lojas")
+        
+        # Título
+        ws_lojas.merge_range('A1:I1', "Detalhes por Loja", titulo_format)
+        ws_lojas.set_row(0, 30)  # Altura da linha de título
+        
+        # Cabeçalhos
+        headers = ["Loja", "HB 623", "HB 618", "HNT G", "HNT P", 
+                   "Chocolate", "BIN", "Pallets PBR", "Total"]
+        
+        for col, header in enumerate(headers):
+            ws_lojas.write(2, col, header, cabecalho_format)
+        
+        # Dados das lojas
+        for row in range(tabelas['tabela_lojas'].rowCount()):
+            if tabelas['tabela_lojas'].isRowHidden(row):
+                continue  # Pular linhas filtradas
+            
+            for col in range(9):
+                item = tabelas['tabela_lojas'].item(row, col)
+                if item:
+                    if col == 0:  # Nome da loja
+                        # Verificar status pela cor
+                        is_finalizado = item.foreground().color().green() > 0
+                        formato = verde_format if is_finalizado else normal_format
+                        ws_lojas.write(row + 3, col, item.text(), formato)
+                    else:  # Valores numéricos
+                        try:
+                            valor = int(item.text())
+                            ws_lojas.write(row + 3, col, valor, normal_format)
+                        except (ValueError, TypeError):
+                            ws_lojas.write(row + 3, col, item.text(), normal_format)
+        
+        # Ajustar largura das colunas
+        ws_lojas.set_column(0, 0, 25)  # Loja
+        ws_lojas.set_column(1, 8, 12)  # Valores
+        
+        # Quarta planilha: Resumo por tipo
+        ws_tipo = workbook.add_worksheet("Resumo por Tipo")
+        
+        # Título
+        ws_tipo.merge_range('A1:C1', "Resumo por Tipo de Ativo", titulo_format)
+        ws_tipo.set_row(0, 30)  # Altura da linha de título
+        
+        # HB
+        linha_excel = 3
+        ws_tipo.merge_range(f'A{linha_excel}:C{linha_excel}', "HB (623 e 618)", cabecalho_format)
+        linha_excel += 1
+        
+        ws_tipo.write(linha_excel, 0, "Origem", cabecalho_format)
+        ws_tipo.write(linha_excel, 1, "Quantidade", cabecalho_format)
+        ws_tipo.write(linha_excel, 2, "Porcentagem", cabecalho_format)
+        linha_excel += 1
+        
+        # As tabelas por tipo não existem no diálogo: as seções saem só com o cabeçalho
+        tabelas['tabela_outros'] = CopiaTabela()
+        tabelas['tabela_hnt'] = CopiaTabela()
+        tabelas['tabela_hb'] = CopiaTabela()
+        
+        # Dados HB
+        for row in range(tabelas['tabela_hb'].rowCount()):
+            is_total = tabelas['tabela_hb'].item(row, 0).text() == "TOTAL"
+            formato = negrito_format if is_total else normal_format
+            
+            # Nome da origem
+            ws_tipo.write(linha_excel, 0, tabelas['tabela_hb'].item(row, 0).text(), formato)
+            
+            # Quantidade
+            try:
+                valor = int(tabelas['tabela_hb'].item(row, 1).text())
+                ws_tipo.write(linha_excel, 1, valor, formato)
+            except:
+                ws_tipo.write(linha_excel, 1, tabelas['tabela_hb'].item(row, 1).text(), formato)
+            
+            # Porcentagem
+            try:
+                # Converter "xx.x%" para float
+                perc_text = tabelas['tabela_hb'].item(row, 2).text().replace('%', '')
+                perc = float(perc_text) / 100.0
+                ws_tipo.write(linha_excel, 2, perc, percentual_format)
+            except:
+                ws_tipo.write(linha_excel, 2, tabelas['tabela_hb'].item(row, 2).text(), formato)
             
-            # Cabeçalhos
-            for col, header in enumerate(headers):
-                ws_cds.write(linha_excel, col, header, cabecalho_format)
             linha_excel += 1
+        
+        # HNT
+        linha_excel += 2
+        ws_tipo.merge_range(f'A{linha_excel}:C{linha_excel}', "HNT (G e P)", cabecalho_format)
+        linha_excel += 1
+        
+        ws_tipo.write(linha_excel, 0, "Origem", cabecalho_format)
+        ws_tipo.write(linha_excel, 1, "Quantidade", cabecalho_format)
+        ws_tipo.write(linha_excel, 2, "Porcentagem", cabecalho_format)
+        linha_excel += 1
+        
+        # Dados HNT
+        for row in range(tabelas['tabela_hnt'].rowCount()):
+            is_total = tabelas['tabela_hnt'].item(row, 0).text() == "TOTAL"
+            formato = negrito_format if is_total else normal_format
             
-            # Dados do CD RJ
-            for row in range(self.tabela_cd_rj.rowCount()):
-                is_total = self.tabela_cd_rj.item(row, 0).text() == "TOTAL"
-                formato = negrito_format if is_total else normal_format
-                
-                for col in range(9):
-                    item = self.tabela_cd_rj.item(row, col)
-                    if item:
-                        if col == 0:  # Nome da origem
-                            ws_cds.write(linha_excel, col, item.text(), formato)
-                        else:  # Valores numéricos
-                            try:
-                                valor = int(item.text())
-                                ws_cds.write(linha_excel, col, valor, formato)
-                            except:
-                                ws_cds.write(linha_excel, col, item.text(), formato)
-                
-                linha_excel += 1
+            # Nome da origem
+            ws_tipo.write(linha_excel, 0, tabelas['tabela_hnt'].item(row, 0).text(), formato)
+            
+            # Quantidade
+            try:
+                valor = int(tabelas['tabela_hnt'].item(row, 1).text())
+                ws_tipo.write(linha_excel, 1, valor, formato)
+            except:
+                ws_tipo.write(linha_excel, 1, tabelas['tabela_hnt'].item(row, 1).text(), formato)
+            
+            # Porcentagem
+            try:
+                # Converter "xx.x%" para float
+                perc_text = tabelas['tabela_hnt'].item(row, 2).text().replace('%', '')
+                perc = float(perc_text) / 100.0
+                ws_tipo.write(linha_excel, 2, perc, percentual_format)
+            except:
+                ws_tipo.write(linha_excel, 2, tabelas['tabela_hnt'].item(row, 2).text(), formato)
             
-            # Ajustar largura das colunas
-            ws_cds.set_column(0, 0, 15)  # Origem
-            ws_cds.set_column(1, 8, 12)  # Valores
+            linha_excel += 1
+        
+        # Outros
+        linha_excel += 2
+        ws_tipo.merge_range(f'A{linha_excel}:C{linha_excel}', "Outros Ativos", cabecalho_format)
+        linha_excel += 1
+        
+        ws_tipo.write(linha_excel, 0, "Tipo", cabecalho_format)
+        ws_tipo.write(linha_excel, 1, "Quantidade", cabecalho_format)
+        ws_tipo.write(linha_excel, 2, "Porcentagem", cabecalho_format)
+        linha_excel += 1
+        
+        # Dados Outros
+        for row in range(tabelas['tabela_outros'].rowCount()):
+            is_total = tabelas['tabela_outros'].item(row, 0).text() == "TOTAL"
+            formato = negrito_format if is_total else normal_format
+            
+            # Nome do tipo
+            ws_tipo.write(linha_excel, 0, tabelas['tabela_outros'].item(row, 0).text(), formato)
+            
+            # Quantidade
+            try:
+                valor = int(tabelas['tabela_outros'].item(row, 1).text())
+                ws_tipo.write(linha_excel, 1, valor, formato)
+            except:
+                ws_tipo.write(linha_excel, 1, tabelas['tabela_outros'].item(row, 1).text(), formato)
+            
+            # Porcentagem
+            try:
+                # Converter "xx.x%" para float
+                perc_text = tabelas['tabela_outros'].item(row, 2).text().replace('%', '')
+                perc = float(perc_text) / 100.0
+                ws_tipo.write(linha_excel, 2, perc, percentual_format)
+            except:
+                ws_tipo.write(linha_excel, 2, tabelas['tabela_outros'].item(row, 2).text(), formato)
             
-            # Terceira planilha: Detalhes Lojas
-            ws_lojas = workbook.add_worksheet("Detalhes Lojas")
+            linha_excel += 1
+        
+        # Ajustar largura das colunas
+        ws_tipo.set_column(0, 0, 15)  # Origem/Tipo
+        ws_tipo.set_column(1, 1, 12)  # Quantidade
+        ws_tipo.set_column(2, 2, 12)  # Porcentagem
+        
+        # Quinta planilha: Comparativo
+        if tabelas['tabela_comparativo'].rowCount() > 1:  # Se houver dados de comparação
+            ws_comp = workbook.add_worksheet("Comparativo")
             
             # Título
-            ws_lojas.merge_range('A1:I1', "Detalhes por Loja", titulo_format)
-            ws_lojas.set_row(0, 30)  # Altura da linha de título
+            ws_comp.merge_range('A1:J1', "Comparativo com Inventário Anterior", titulo_format)
+            ws_comp.set_row(0, 30)  # Altura da linha de título
             
             # Cabeçalhos
-            headers = ["Loja", "HB 623", "HB 618", "HNT G", "HNT P", 
-                       "Chocolate", "BIN", "Pallets PBR", "Total"]
+            headers = ["Inventário", "HB 623", "HB 618", "HNT G", "HNT P", 
+                    "Chocolate", "BIN", "Pallets PBR", "Total", "Diferença"]
             
             for col, header in enumerate(headers):
-                ws_lojas.write(2, col, header, cabecalho_format)
+                ws_comp.write(2, col, header, cabecalho_format)
             
-            # Dados das lojas
-            for row in range(self.tabela_lojas.rowCount()):
-                if self.tabela_lojas.isRowHidden(row):
-                    continue  # Pular linhas filtradas
+            # Dados do comparativo
+            for row in range(tabelas['tabela_comparativo'].rowCount()):
+                is_diff = row == 2  # A terceira linha é a diferença
+                formato = negrito_format if is_diff else normal_format
                 
-                for col in range(9):
-                    item = self.tabela_lojas.item(row, col)
+                for col in range(10):
+                    item = tabelas['tabela_comparativo'].item(row, col)
                     if item:
-                        if col == 0:  # Nome da loja
-                            # Verificar status pela cor
-                            is_finalizado = item.foreground().color().green() > 0
-                            formato = verde_format if is_finalizado else normal_format
-                            ws_lojas.write(row + 3, col, item.text(), formato)
+                        if col == 0:  # Nome do inventário
+                            ws_comp.write(row + 3, col, item.text(), formato)
                         else:  # Valores numéricos
-                            try:
-                                valor = int(item.text())
-                                ws_lojas.write(row + 3, col, valor, normal_format)
-                            except (ValueError, TypeError):
-                                ws_lojas.write(row + 3, col, item.text(), normal_format)
-            
-            # Ajustar largura das colunas
-            ws_lojas.set_column(0, 0, 25)  # Loja
-            ws_lojas.set_column(1, 8, 12)  # Valores
-            
-            # Quarta planilha: Resumo por tipo
-            ws_tipo = workbook.add_worksheet("Resumo por Tipo")
-            
-            # Título
-            ws_tipo.merge_range('A1:C1', "Resumo por Tipo de Ativo", titulo_format)
-            ws_tipo.set_row(0, 30)  # Altura da linha de título
-            
-            # HB
-            linha_excel = 3
-            ws_tipo.merge_range(f'A{linha_excel}:C{linha_excel}', "HB (623 e 618)", cabecalho_format)
-            linha_excel += 1
-            
-            ws_tipo.write(linha_excel, 0, "Origem", cabecalho_format)
-            ws_tipo.write(linha_excel, 1, "Quantidade", cabecalho_format)
-            ws_tipo.write(linha_excel, 2, "Porcentagem", cabecalho_format)
-            linha_excel += 1
-            
-            group_outros = QGroupBox("Outros Ativos")
-            outros_layout = QVBoxLayout(group_outros)
-            
-            self.tabela_outros = QTableWidget(0, 3)
-            self.tabela_outros.setHorizontalHeaderLabels(["Tipo", "Quantidade", "Porcentagem"])
-            self.tabela_outros.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
-            self.tabela_outros.verticalHeader().setVisible(False)
-            outros_layout.addWidget(self.tabela_outros)
-            
-            group_hnt = QGroupBox("HNT (G e P)")
-            hnt_layout = QVBoxLayout(group_hnt)
-            
-            self.tabela_hnt = QTableWidget(0, 3)
-            self.tabela_hnt.setHorizontalHeaderLabels(["Origem", "Quantidade", "Porcentagem"])
-            self.tabela_hnt.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
-            self.tabela_hnt.verticalHeader().setVisible(False)
-            hnt_layout.addWidget(self.tabela_hnt)
-
-
-            group_hb = QGroupBox("HB (623 e 618)")
-            hb_layout = QVBoxLayout(group_hb)
-
-            self.tabela_hb = QTableWidget(0, 3)
-            self.tabela_hb.setHorizontalHeaderLabels(["Origem", "Quantidade", "Porcentagem"])
-            self.tabela_hb.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
-            self.tabela_hb.verticalHeader().setVisible(False)
-            hb_layout.addWidget(self.tabela_hb)
-            
-            # Dados HB
-            for row in range(self.tabela_hb.rowCount()):
-                is_total = self.tabela_hb.item(row, 0).text() == "TOTAL"
-                formato = negrito_format if is_total else normal_format
-                
-                # Nome da origem
-                ws_tipo.write(linha_excel, 0, self.tabela_hb.item(row, 0).text(), formato)
-                
-                # Quantidade
-                try:
-                    valor = int(self.tabela_hb.item(row, 1).text())
-                    ws_tipo.write(linha_excel, 1, valor, formato)
-                except:
-                    ws_tipo.write(linha_excel, 1, self.tabela_hb.item(row, 1).text(), formato)
-                
-                # Porcentagem
-                try:
-                    # Converter "xx.x%" para float
-                    perc_text = self.tabela_hb.item(row, 2).text().replace('%', '')
-                    perc = float(perc_text) / 100.0
-                    ws_tipo.write(linha_excel, 2, perc, percentual_format)
-                except:
-                    ws_tipo.write(linha_excel, 2, self.tabela_hb.item(row, 2).text(), formato)
-                
-                linha_excel += 1
-            
-            # HNT
-            linha_excel += 2
-            ws_tipo.merge_range(f'A{linha_excel}:C{linha_excel}', "HNT (G e P)", cabecalho_format)
-            linha_excel += 1
-            
-            ws_tipo.write(linha_excel, 0, "Origem", cabecalho_format)
-            ws_tipo.write(linha_excel, 1, "Quantidade", cabecalho_format)
-            ws_tipo.write(linha_excel, 2, "Porcentagem", cabecalho_format)
-            linha_excel += 1
-            
-            # Dados HNT
-            for row in range(self.tabela_hnt.rowCount()):
-                is_total = self.tabela_hnt.item(row, 0).text() == "TOTAL"
-                formato = negrito_format if is_total else normal_format
-                
-                # Nome da origem
-                ws_tipo.write(linha_excel, 0, self.tabela_hnt.item(row, 0).text(), formato)
-                
-                # Quantidade
-                try:
-                    valor = int(self.tabela_hnt.item(row, 1).text())
-                    ws_tipo.write(linha_excel, 1, valor, formato)
-                except:
-                    ws_tipo.write(linha_excel, 1, self.tabela_hnt.item(row, 1).text(), formato)
-                
-                # Porcentagem
-                try:
-                    # Converter "xx.x%" para float
-                    perc_text = self.tabela_hnt.item(row, 2).text().replace('%', '')
-                    perc = float(perc_text) / 100.0
-                    ws_tipo.write(linha_excel, 2, perc, percentual_format)
-                except:
-                    ws_tipo.write(linha_excel, 2, self.tabela_hnt.item(row, 2).text(), formato)
-                
-                linha_excel += 1
-            
-            # Outros
-            linha_excel += 2
-            ws_tipo.merge_range(f'A{linha_excel}:C{linha_excel}', "Outros Ativos", cabecalho_format)
-            linha_excel += 1
-            
-            ws_tipo.write(linha_excel, 0, "Tipo", cabecalho_format)
-            ws_tipo.write(linha_excel, 1, "Quantidade", cabecalho_format)
-            ws_tipo.write(linha_excel, 2, "Porcentagem", cabecalho_format)
-            linha_excel += 1
-            
-            # Dados Outros
-            for row in range(self.tabela_outros.rowCount()):
-                is_total = self.tabela_outros.item(row, 0).text() == "TOTAL"
-                formato = negrito_format if is_total else normal_format
-                
-                # Nome do tipo
-                ws_tipo.write(linha_excel, 0, self.tabela_outros.item(row, 0).text(), formato)
-                
-                # Quantidade
-                try:
-                    valor = int(self.tabela_outros.item(row, 1).text())
-                    ws_tipo.write(linha_excel, 1, valor, formato)
-                except:
-                    ws_tipo.write(linha_excel, 1, self.tabela_outros.item(row, 1).text(), formato)
-                
-                # Porcentagem
-                try:
-                    # Converter "xx.x%" para float
-                    perc_text = self.tabela_outros.item(row, 2).text().replace('%', '')
-                    perc = float(perc_text) / 100.0
-                    ws_tipo.write(linha_excel, 2, perc, percentual_format)
-                except:
-                    ws_tipo.write(linha_excel, 2, self.tabela_outros.item(row, 2).text(), formato)
-                
-                linha_excel += 1
-            
-            # Ajustar largura das colunas
-            ws_tipo.set_column(0, 0, 15)  # Origem/Tipo
-            ws_tipo.set_column(1, 1, 12)  # Quantidade
-            ws_tipo.set_column(2, 2, 12)  # Porcentagem
-            
-            # Quinta planilha: Comparativo
-            if self.tabela_comparativo.rowCount() > 1:  # Se houver dados de comparação
-                ws_comp = workbook.add_worksheet("Comparativo")
-                
-                # Título
-                ws_comp.merge_range('A1:J1', "Comparativo com Inventário Anterior", titulo_format)
-                ws_comp.set_row(0, 30)  # Altura da linha de título
-                
-                # Cabeçalhos
-                headers = ["Inventário", "HB 623", "HB 618", "HNT G", "HNT P", 
-                        "Chocolate", "BIN", "Pallets PBR", "Total", "Diferença"]
-                
-                for col, header in enumerate(headers):
-                    ws_comp.write(2, col, header, cabecalho_format)
-                
-                # Dados do comparativo
-                for row in range(self.tabela_comparativo.rowCount()):
-                    is_diff = row == 2  # A terceira linha é a diferença
-                    formato = negrito_format if is_diff else normal_format
-                    
-                    for col in range(10):
-                        item = self.tabela_comparativo.item(row, col)
-                        if item:
-                            if col == 0:  # Nome do inventário
-                                ws_comp.write(row + 3, col, item.text(), formato)
-                            else:  # Valores numéricos
-                                if col == 9 and is_diff:  # Porcentagem na diferença
-                                    try:
-                                        # Converter "xx.x%" para float
-                                        perc_text = item.text().replace('%', '')
-                                        perc = float(perc_text) / 100.0
-                                        
-                                        # Verde para positivo, vermelho para negativo
-                                        if perc > 0:
-                                            ws_comp.write(row + 3, col, perc, workbook.add_format({
-                                                'bold': True,
-                                                'border': 1,
-                                                'font_color': 'green',
-                                                'num_format': '0.0%'
-                                            }))
-                                        elif perc < 0:
-                                            ws_comp.write(row + 3, col, perc, workbook.add_format({
-                                                'bold': True,
-                                                'border': 1,
-                                                'font_color': 'red',
-                                                'num_format': '0.0%'
-                                            }))
-                                        else:
-                                            ws_comp.write(row + 3, col, perc, percentual_format)
-                                    except:
-                                        ws_comp.write(row + 3, col, item.text(), formato)
-                                else:  # Outros valores numéricos
-                                    try:
-                                        valor = int(item.text())
-                                        
-                                        # Verde para positivo, vermelho para negativo na linha de diferença
-                                        if is_diff:
-                                            if valor > 0:
-                                                ws_comp.write(row + 3, col, valor, verde_format)
-                                            elif valor < 0:
-                                                ws_comp.write(row + 3, col, valor, vermelho_format)
-                                            else:
-                                                ws_comp.write(row + 3, col, valor, formato)
+                            if col == 9 and is_diff:  # Porcentagem na diferença
+                                try:
+                                    # Converter "xx.x%" para float
+                                    perc_text = item.text().replace('%', '')
+                                    perc = float(perc_text) / 100.0
+                                    
+                                    # Verde para positivo, vermelho para negativo
+                                    if perc > 0:
+                                        ws_comp.write(row + 3, col, perc, workbook.add_format({
+                                            'bold': True,
+                                            'border': 1,
+                                            'font_color': 'green',
+                                            'num_format': '0.0%'
+                                        }))
+                                    elif perc < 0:
+                                        ws_comp.write(row + 3, col, perc, workbook.add_format({
+                                            'bold': True,
+                                            'border': 1,
+                                            'font_color': 'red',
+                                            'num_format': '0.0%'
+                                        }))
+                                    else:
+                                        ws_comp.write(row + 3, col, perc, percentual_format)
+                                except:
+                                    ws_comp.write(row + 3, col, item.text(), formato)
+                            else:  # Outros valores numéricos
+                                try:
+                                    valor = int(item.text())
+                                    
+                                    # Verde para positivo, vermelho para negativo na linha de diferença
+                                    if is_diff:
+                                        if valor > 0:
+                                            ws_comp.write(row + 3, col, valor, verde_format)
+                                        elif valor < 0:
+                                            ws_comp.write(row + 3, col, valor, vermelho_format)
                                         else:
                                             ws_comp.write(row + 3, col, valor, formato)
-                                    except:
-                                        ws_comp.write(row + 3, col, item.text(), formato)
-                
-                # Ajustar largura das colunas
-                ws_comp.set_column(0, 0, 15)  # Inventário
-                ws_comp.set_column(1, 9, 12)  # Valores
-            
-            # Fechar o workbook
-            workbook.close()
-            
-            QMessageBox.information(
-                self,
-                "Exportação Concluída",
-                f"Relatório exportado com sucesso para:\n{caminho}"
-            )
+                                    else:
+                                        ws_comp.write(row + 3, col, valor, formato)
+                                except:
+                                    ws_comp.write(row + 3, col, item.text(), formato)
             
-        except Exception as e:
-            QMessageBox.warning(
-                self,
-                "Erro na Exportação",
-                f"Ocorreu um erro ao exportar o relatório: {str(e)}"
-            )
+            # Ajustar largura das colunas
+            ws_comp.set_column(0, 0, 15)  # Inventário
+            ws_comp.set_column(1, 9, 12)  # Valores
+        
+        # Fechar o workbook
+        workbook.close()
+    
+    def done(self, resultado):
+        """Ao fechar o diálogo, descarta os avisos de exportações ainda em andamento"""
+        gerenciador_tarefas().cancelar(self)
+        super().done(resultado)
     
     def finalizar(self):
         """Finaliza o inventário após revisão dos dados"""
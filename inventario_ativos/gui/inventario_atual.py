@@ -2,11 +2,13 @@
 import sys
 from PyQt5.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel, QFormLayout, 
-    QTableWidget, QTableWidgetItem, QHeaderView, QGroupBox,
+    QTableView, QHeaderView, QGroupBox,
     QPushButton, QLineEdit, QComboBox, QMessageBox, QSpinBox,QTabBar, QTabWidget,QCheckBox
 )
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import Qt, pyqtSignal
 from PyQt5.QtGui import QFont
+from gui.tarefas import gerenciador_tarefas
+from gui.modelos import ModeloTabela, EstiloLinha
 
 class TabelaResumoWidget(QWidget):
     """Widget para exibir a tabela de resumo do inventário"""
@@ -26,19 +28,19 @@ class TabelaResumoWidget(QWidget):
         layout.addWidget(titulo)
         
         # Tabela de resumo
-        self.tabela = QTableWidget(0, 9)
-        self.tabela.setHorizontalHeaderLabels([
-            "Origem", "HB 623", "HB 618", "HNT G", "HNT P", 
-            "Chocolate", "BIN", "Pallets PBR", "Total"
-        ])
+        self.modelo = ModeloTabela(
+            ["Origem", "HB 623", "HB 618", "HNT G", "HNT P",
+             "Chocolate", "BIN", "Pallets PBR", "Total"],
+            estilos={'total': EstiloLinha(negrito=True, negrito_valores=True)}
+        )
+        self.tabela = QTableView()
+        self.tabela.setModel(self.modelo)
         self.tabela.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
         self.tabela.verticalHeader().setVisible(False)
         layout.addWidget(self.tabela)
     
     def atualizar_dados(self, dados):
         """Atualiza a tabela com os dados de resumo"""
-        self.tabela.setRowCount(0)
-        
         # Lista de origens e seus respectivos dados
         origens = [
             {"nome": "Lojas", "prefixo": "lojas_"},
@@ -54,50 +56,22 @@ class TabelaResumoWidget(QWidget):
             "chocolate", "bin", "pallets_pbr"
         ]
         
-        # Preencher tabela
-        for i, origem in enumerate(origens):
-            self.tabela.insertRow(i)
-            
-            # Nome da origem
-            nome_item = QTableWidgetItem(origem["nome"])
-            if origem["nome"] == "TOTAL":
-                fonte = nome_item.font()
-                fonte.setBold(True)
-                nome_item.setFont(fonte)
-            self.tabela.setItem(i, 0, nome_item)
-            
-            # Valores por tipo de caixa
-            total_linha = 0
-            for j, tipo in enumerate(tipos_caixa):
-                chave = f"{origem['prefixo']}{tipo}"
-                valor = dados.get(chave, 0) or 0
-                total_linha += valor
-                
-                valor_item = QTableWidgetItem(str(valor))
-                valor_item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
-                
-                if origem["nome"] == "TOTAL":
-                    fonte = valor_item.font()
-                    fonte.setBold(True)
-                    valor_item.setFont(fonte)
-                
-                self.tabela.setItem(i, j + 1, valor_item)
-            
-            # Total da linha
-            total_item = QTableWidgetItem(str(total_linha))
-            total_item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
-            
-            if origem["nome"] == "TOTAL":
-                fonte = total_item.font()
-                fonte.setBold(True)
-                total_item.setFont(fonte)
-            
-            self.tabela.setItem(i, 8, total_item)
+        # Preencher tabela: valores por tipo de caixa e o total da linha
+        linhas = []
+        for origem in origens:
+            valores = [dados.get(f"{origem['prefixo']}{tipo}", 0) or 0 for tipo in tipos_caixa]
+            valores.append(sum(valores))
+            estilo = 'total' if origem["nome"] == "TOTAL" else None
+            linhas.append((origem["nome"], valores, estilo))
+        self.modelo.carregar(linhas)
 
 
 
 class InventarioAtualWidget(QWidget):
     """Widget principal para a aba de Dados do Inventário Atual"""
+    # Dados do inventário alterados pelo formulário
+    dados_modificados = pyqtSignal()
+    
     def __init__(self, inventario_service, parent=None):
         super().__init__(parent)
         self.inventario_service = inventario_service
@@ -118,8 +92,22 @@ class InventarioAtualWidget(QWidget):
         if not self.inventario_service.inventario_atual:
             return
         
-        # Obter resumo do inventário atual
-        resumo = self.inventario_service.get_resumo_inventario_atual()
+        # Totais calculados em segundo plano
+        cod_inventario = self.inventario_service.inventario_atual
+        gerenciador_tarefas().executar(
+            self.obter_totais, (cod_inventario,),
+            chave=('inventario_atual', cod_inventario), dono=self, grupo='inventario', interromper=True,
+            ao_concluir=self.tabela_resumo.atualizar_dados
+        )
+        
+        # Atualizar lista de lojas no formulário (se necessário recarregar)
+        if hasattr(self.formulario_widget, 'atualizar_lista_lojas'):
+            self.formulario_widget.atualizar_lista_lojas()
+    
+    def obter_totais(self, cod_inventario):
+        """Calcula os totais por origem e tipo do inventário (roda fora da thread da interface)"""
+        # Obter resumo do inventário
+        resumo = self.inventario_service.db_manager.get_dados_inventario_atual(cod_inventario)
         
         # Obter totais por tipo
         totais = {}
@@ -151,12 +139,7 @@ class InventarioAtualWidget(QWidget):
                 totais[f'fornecedor_{tipo}']
             )
         
-        # Atualizar tabela de resumo
-        self.tabela_resumo.atualizar_dados(totais)
-        
-        # Atualizar lista de lojas no formulário (se necessário recarregar)
-        if hasattr(self.formulario_widget, 'atualizar_lista_lojas'):
-            self.formulario_widget.atualizar_lista_lojas()
+        return totais
 
 
 class FormularioFornecedorWidget(QWidget):
@@ -317,8 +300,8 @@ class FormularioFornecedorWidget(QWidget):
         self.cb_loja.clear()
         
         try:
-            # Obter lista de lojas do CSV
-            lojas = self.inventario_service.csv_manager.ler_lojas_csv(force_reload=True)
+            # Obter lista de lojas do CSV (relida só se o arquivo mudou)
+            lojas = self.inventario_service.csv_manager.ler_lojas_csv()
             
             # Listas separadas para CDs e lojas normais
             cds = []
@@ -383,8 +366,8 @@ class FormularioFornecedorWidget(QWidget):
             self.sp_quantidade_fornecedor.setValue(0)
             
             # Emitir sinal de dados atualizados
-            if hasattr(self.parent(), 'atualizar_dados'):
-                self.parent().atualizar_dados()
+            if hasattr(self.parent(), 'dados_modificados'):
+                self.parent().dados_modificados.emit()
         else:
             QMessageBox.warning(
                 self, 
@@ -436,8 +419,8 @@ class FormularioFornecedorWidget(QWidget):
             self.chk_finalizar_loja.setChecked(False)
             
             # Emitir sinal de dados atualizados
-            if hasattr(self.parent(), 'atualizar_dados'):
-                self.parent().atualizar_dados()
+            if hasattr(self.parent(), 'dados_modificados'):
+                self.parent().dados_modificados.emit()
         else:
             QMessageBox.warning(
                 self, 
@@ -478,8 +461,8 @@ class FormularioFornecedorWidget(QWidget):
             self.sp_quantidade_transito.setValue(0)
             
             # Emitir sinal de dados atualizados
-            if hasattr(self.parent(), 'atualizar_dados'):
-                self.parent().atualizar_dados()
+            if hasattr(self.parent(), 'dados_modificados'):
+                self.parent().dados_modificados.emit()
         else:
             QMessageBox.warning(
                 self, 
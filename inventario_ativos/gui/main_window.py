@@ -1,25 +1,42 @@
 # gui/main_window.py
 import sys
 import os
+import time
+import importlib
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QTabWidget, QWidget, QVBoxLayout, 
     QHBoxLayout, QLabel, QPushButton, QMessageBox, QDialog, 
     QLineEdit, QFormLayout, QListWidget, QDialogButtonBox, QComboBox,
-    QFileDialog
+    QFileDialog, QProgressBar
 )
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import Qt, QTimer, pyqtSignal
 from PyQt5.QtGui import QIcon, QFont
 
 from database.database_manager import DatabaseManager
+from database.manutencao_banco import AgendadorManutencao
 from business.inventario_service import InventarioService
 from business.relatorio_service import RelatorioService
+from gui.tarefas import gerenciador_tarefas
+from gui.coordenador_atualizacao import CoordenadorAtualizacao
 
-from gui.dashboard import DashboardWidget
-from gui.inventario_atual import InventarioAtualWidget
-from gui.status_atual import StatusAtualWidget
-from gui.atualizacao import AtualizacaoWidget
-from gui.configuracoes import ConfiguracoesWidget
-from gui.relatorios import RelatoriosWidget
+
+# Abas da janela principal, construídas na primeira ativação (os módulos das abas, com
+# os gráficos do QtChart, só são importados nesse momento):
+# (atributo, título, módulo, classe, serviços do construtor, recebe o inventário, atualizar com os dados)
+ABAS = [
+    ('dashboard_widget', "Dashboard", 'gui.dashboard', 'DashboardWidget',
+     ('relatorio_service',), True, True),
+    ('inventario_atual_widget', "Dados do Inventário", 'gui.inventario_atual', 'InventarioAtualWidget',
+     ('inventario_service',), False, True),
+    ('status_atual_widget', "Status Atual", 'gui.status_atual', 'StatusAtualWidget',
+     ('relatorio_service',), True, True),
+    ('atualizacao_widget', "Atualização", 'gui.atualizacao', 'AtualizacaoWidget',
+     ('inventario_service',), False, True),
+    ('configuracoes_widget', "Configurações", 'gui.configuracoes', 'ConfiguracoesWidget',
+     ('inventario_service',), False, True),
+    ('relatorios_widget', "Relatórios", 'gui.relatorios', 'RelatoriosWidget',
+     ('relatorio_service', 'inventario_service'), False, True),
+]
 
 class NovoInventarioDialog(QDialog):
     def __init__(self, parent=None):
@@ -80,21 +97,47 @@ class SelecionarInventarioDialog(QDialog):
 
 
 class MainWindow(QMainWindow):
-    def __init__(self):
+    # Cadastro de lojas ou setores alterado (tipo); emitido de qualquer thread
+    cadastro_modificado = pyqtSignal(str)
+    
+    def __init__(self, medidor=None):
         super().__init__()
         self.setWindowTitle("Sistema de Inventário Rotativo de Ativos")
         self.setMinimumSize(1024, 768)
         
+        # Marcos de tempo da inicialização (opcional)
+        self.medidor = medidor
+        
         # Inicializa os serviços
         self.db_manager = DatabaseManager()
         self.inventario_service = InventarioService(self.db_manager)
         self.relatorio_service = RelatorioService(self.db_manager)
         
+        # Chamadas de serviço disparadas pela interface rodam em segundo plano
+        self.tarefas = gerenciador_tarefas(self.db_manager)
+        
         # Configurar interface
         self.setup_ui()
         
-        # Verificar se há um inventário em andamento
-        self.verificar_inventario_em_andamento()
+        # Verificar se há um inventário em andamento (depois que a janela for exibida)
+        QTimer.singleShot(0, self.verificar_inventario_em_andamento)
+        
+        # Manutenção automática do banco: ao iniciar (se pendente) e quando o sistema ficar ocioso
+        self.agendador_manutencao = AgendadorManutencao(self.db_manager)
+        QTimer.singleShot(5000, self.agendador_manutencao.verificar_inicializacao)
+        self.timer_manutencao = QTimer(self)
+        self.timer_manutencao.timeout.connect(self.agendador_manutencao.verificar)
+        self.timer_manutencao.start(60000)
+        
+        # Mudanças nos CSVs de lojas e setores deixam as abas desatualizadas. O cadastro é
+        # revalidado (os.stat) periodicamente e a cada leitura dos serviços, em qualquer thread:
+        # o sinal leva o aviso para a thread da interface
+        self.cadastro = self.relatorio_service.cadastro
+        self.cadastro_modificado.connect(self.cadastro_alterado)
+        self.cadastro.inscrever(self._avisar_cadastro)
+        self.timer_cadastro = QTimer(self)
+        self.timer_cadastro.timeout.connect(self.cadastro.verificar)
+        self.timer_cadastro.start(5000)
     
     def setup_ui(self):
         # Widget central
@@ -130,21 +173,20 @@ class MainWindow(QMainWindow):
         # Criar abas
         self.tab_widget = QTabWidget()
         
-        # Inicializar widgets das abas
-        self.dashboard_widget = DashboardWidget(self.relatorio_service)
-        self.inventario_atual_widget = InventarioAtualWidget(self.inventario_service)
-        self.status_atual_widget = StatusAtualWidget(self.relatorio_service)
-        self.atualizacao_widget = AtualizacaoWidget(self.inventario_service)
-        self.configuracoes_widget = ConfiguracoesWidget(self.inventario_service)
-        self.relatorios_widget = RelatoriosWidget(self.relatorio_service, self.inventario_service)
-        
-        # Adicionar abas ao widget de abas
-        self.tab_widget.addTab(self.dashboard_widget, "Dashboard")
-        self.tab_widget.addTab(self.inventario_atual_widget, "Dados do Inventário")
-        self.tab_widget.addTab(self.status_atual_widget, "Status Atual")
-        self.tab_widget.addTab(self.atualizacao_widget, "Atualização")
-        self.tab_widget.addTab(self.configuracoes_widget, "Configurações")
-        self.tab_widget.addTab(self.relatorios_widget, "Relatórios")
+        # Abas começam vazias; o widget real é criado na primeira ativação
+        for atributo, titulo, *_ in ABAS:
+            setattr(self, atributo, None)
+            self.tab_widget.addTab(QWidget(), titulo)
+        
+        # Só a aba visível é atualizada; as outras ficam marcadas até serem exibidas
+        self.coordenador = CoordenadorAtualizacao(
+            self.tab_widget,
+            [(recebe_inventario, atualizavel) for *_, recebe_inventario, atualizavel in ABAS],
+            self.construir_aba,
+            lambda: self.inventario_service.inventario_atual,
+            self.tarefas,
+            self
+        )
         
         main_layout.addWidget(self.tab_widget)
         
@@ -153,6 +195,16 @@ class MainWindow(QMainWindow):
         self.lbl_status = QLabel("Pronto")
         footer_layout.addWidget(self.lbl_status)
         
+        footer_layout.addStretch()
+        
+        # Indicador de tarefas em segundo plano
+        self.barra_ocupado = QProgressBar()
+        self.barra_ocupado.setRange(0, 0)
+        self.barra_ocupado.setMaximumWidth(150)
+        self.barra_ocupado.setVisible(False)
+        footer_layout.addWidget(self.barra_ocupado)
+        self.tarefas.ocupado.connect(self.barra_ocupado.setVisible)
+        
         main_layout.addLayout(footer_layout)
         
         # Desabilitar todas as abas no início
@@ -163,9 +215,45 @@ class MainWindow(QMainWindow):
         for i in range(self.tab_widget.count()):
             self.tab_widget.setTabEnabled(i, enabled)
     
+    def construir_aba(self, indice):
+        """Cria o widget da aba (importando o módulo dela) e o coloca no lugar do provisório"""
+        atributo, titulo, modulo, classe, servicos, _, _ = ABAS[indice]
+        widget = getattr(self, atributo)
+        if widget is not None:
+            return widget
+        
+        inicio = time.perf_counter()
+        classe_widget = getattr(importlib.import_module(modulo), classe)
+        widget = classe_widget(*(getattr(self, servico) for servico in servicos))
+        setattr(self, atributo, widget)
+        
+        # Abas que alteram dados avisam para marcar as demais como desatualizadas
+        if hasattr(widget, 'dados_modificados'):
+            widget.dados_modificados.connect(self.coordenador.marcar_sujas)
+        
+        # Trocar o widget provisório sem disparar currentChanged
+        provisorio = self.tab_widget.widget(indice)
+        habilitada = self.tab_widget.isTabEnabled(indice)
+        atual = self.tab_widget.currentIndex()
+        self.tab_widget.blockSignals(True)
+        self.tab_widget.removeTab(indice)
+        self.tab_widget.insertTab(indice, widget, titulo)
+        self.tab_widget.setTabEnabled(indice, habilitada)
+        self.tab_widget.setCurrentIndex(atual)
+        self.tab_widget.blockSignals(False)
+        provisorio.deleteLater()
+        
+        print(f"Aba '{titulo}' construída em {(time.perf_counter() - inicio) * 1000:.0f} ms")
+        return widget
+    
     def atualizar_interface(self):
         """Atualiza a interface após a seleção de um inventário"""
+        # Resultados ainda pendentes se referem ao inventário anterior
+        self.tarefas.cancelar_grupo('inventario')
+        
         if self.inventario_service.inventario_atual:
+            inicio = time.perf_counter()
+            
             # Atualizar label de inventário atual
             self.lbl_inventario_atual.setText(f"Inventário Atual: {self.inventario_service.inventario_atual}")
             self.btn_finalizar_inventario.setEnabled(True)
@@ -173,12 +261,14 @@ class MainWindow(QMainWindow):
             # Habilitar abas
             self.toggle_tabs_enabled(True)
             
-            # Atualizar todas as abas
-            self.dashboard_widget.atualizar_dados(self.inventario_service.inventario_atual)
-            self.inventario_atual_widget.atualizar_dados()
-            self.status_atual_widget.atualizar_dados(self.inventario_service.inventario_atual)
-            self.atualizacao_widget.atualizar_dados()
-            self.relatorios_widget.atualizar_dados()
+            # Só a aba visível é atualizada agora; as demais, quando forem abertas
+            self.coordenador.marcar_sujas()
+            
+            duracao_ms = (time.perf_counter() - inicio) * 1000
+            if self.medidor is not None and self.medidor.tempo('interativo') is None:
+                self.medidor.marcar('interativo')
+                print(self.medidor.relatorio())
+            print(f"Inventário {self.inventario_service.inventario_atual} carregado na interface em {duracao_ms:.0f} ms")
             
             # Exibir mensagem de status
             self.lbl_status.setText(f"Inventário {self.inventario_service.inventario_atual} carregado com sucesso")
@@ -187,8 +277,28 @@ class MainWindow(QMainWindow):
             self.lbl_inventario_atual.setText("Nenhum inventário selecionado")
             self.btn_finalizar_inventario.setEnabled(False)
             self.toggle_tabs_enabled(False)
+            self.coordenador.limpar()
             self.lbl_status.setText("Pronto")
     
+    def _avisar_cadastro(self, tipo):
+        """Assinante do cadastro de referência (pode ser chamado fora da thread da interface)"""
+        self.cadastro_modificado.emit(tipo)
+    
+    def cadastro_alterado(self, tipo):
+        """Cadastro de lojas ou setores mudou: as abas precisam ser atualizadas"""
+        self.coordenador.marcar_sujas()
+        self.lbl_status.setText(f"Cadastro de {tipo} atualizado")
+    
+    def closeEvent(self, event):
+        """Aguarda as tarefas em segundo plano (ex.: importações) antes de fechar"""
+        self.timer_cadastro.stop()
+        self.cadastro.cancelar_inscricao(self._avisar_cadastro)
+        self.tarefas.cancelar_grupo('inventario')
+        if self.tarefas.em_andamento:
+            self.lbl_status.setText("Aguardando tarefas em andamento...")
+            self.tarefas.aguardar()
+        super().closeEvent(event)
+    
     def verificar_inventario_em_andamento(self):
         """Verifica se há um inventário em andamento e pergunta se deseja carregá-lo"""
         inventarios = self.inventario_service.get_inventarios_ativos()
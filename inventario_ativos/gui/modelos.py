@@ -0,0 +1,191 @@
+# gui/modelos.py
+from array import array
+from collections import namedtuple
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex, QSortFilterProxyModel
+from PyQt5.QtGui import QColor, QFont, QPalette
+from PyQt5.QtWidgets import QApplication, QStyle, QStyledItemDelegate, QStyleOptionProgressBar
+
+# Papel usado para ordenar: o número (e não o texto) nas colunas de valores
+PAPEL_ORDENACAO = Qt.UserRole
+
+# Aparência de uma linha: cor/negrito do rótulo (coluna 0) e das colunas de valores
+EstiloLinha = namedtuple(
+    'EstiloLinha', ['cor', 'negrito', 'cor_valores', 'negrito_valores'],
+    defaults=(None, False, None, False)
+)
+
+
+class ModeloTabela(QAbstractTableModel):
+    """Tabela "rótulo + valores inteiros" guardada em arrays compactos
+
+    Em vez de um QTableWidgetItem por célula, cada linha ocupa um texto (o rótulo), um byte
+    com o estilo e os seus valores em um único array('q') compartilhado. As linhas de rodapé
+    (ex.: TOTAL) ficam sempre no fim, mesmo ordenando ou filtrando pelo ProxyTabela.
+    """
+
+    def __init__(self, cabecalhos, estilos=None, parent=None):
+        """estilos: dicionário nome -> EstiloLinha, usado em carregar()"""
+        super().__init__(parent)
+        self.cabecalhos = list(cabecalhos)
+        self.colunas_valores = len(self.cabecalhos) - 1
+
+        # O código 0 é a linha sem estilo
+        self._estilos_por_codigo = [None]
+        self._nomes_estilos = {None: 0}
+        self._estilos = [self._preparar_estilo(EstiloLinha())]
+        for nome, estilo in (estilos or {}).items():
+            self._nomes_estilos[nome] = len(self._estilos)
+            self._estilos_por_codigo.append(nome)
+            self._estilos.append(self._preparar_estilo(estilo))
+
+        self._rotulos = []
+        self._codigos = array('B')
+        self._valores = array('q')
+        self._inicio_rodape = 0
+
+    def _preparar_estilo(self, estilo):
+        """Converte o estilo em (cor, fonte) do rótulo e dos valores, criados uma única vez"""
+        def fonte(negrito):
+            if not negrito:
+                return None
+            f = QFont()
+            f.setBold(True)
+            return f
+
+        def cor(valor):
+            return QColor(*valor) if isinstance(valor, tuple) else valor
+
+        return (cor(estilo.cor), fonte(estilo.negrito),
+                cor(estilo.cor_valores), fonte(estilo.negrito_valores))
+
+    def carregar(self, linhas, rodape=()):
+        """Substitui o conteúdo: linhas e rodapé são iteráveis de (rótulo, valores, estilo)"""
+        self.beginResetModel()
+        self._rotulos = []
+        self._codigos = array('B')
+        self._valores = array('q')
+
+        for rotulo, valores, estilo in linhas:
+            self._anexar(rotulo, valores, estilo)
+        self._inicio_rodape = len(self._rotulos)
+        for rotulo, valores, estilo in rodape:
+            self._anexar(rotulo, valores, estilo)
+        self.endResetModel()
+
+    def limpar(self):
+        """Remove todas as linhas"""
+        self.carregar(())
+
+    def _anexar(self, rotulo, valores, estilo):
+        valores = list(valores)
+        # Linhas sem valores (ex.: mensagem de erro) ficam zeradas
+        valores.extend([0] * (self.colunas_valores - len(valores)))
+        self._rotulos.append(rotulo)
+        self._codigos.append(self._nomes_estilos[estilo])
+        self._valores.extend(int(valor or 0) for valor in valores[:self.colunas_valores])
+
+    def rotulo(self, row):
+        return self._rotulos[row]
+
+    def valor(self, row, col):
+        """Valor da coluna col (1 em diante) da linha row"""
+        return self._valores[row * self.colunas_valores + col - 1]
+
+    def estilo(self, row):
+        """Nome do estilo da linha (None se não tiver)"""
+        return self._estilos_por_codigo[self._codigos[row]]
+
+    def eh_rodape(self, row):
+        return row >= self._inicio_rodape
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rotulos)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.cabecalhos)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.cabecalhos[section]
+        return super().headerData(section, orientation, role)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+
+        row, col = index.row(), index.column()
+        if role == Qt.DisplayRole:
+            return self._rotulos[row] if col == 0 else str(self.valor(row, col))
+        if role == PAPEL_ORDENACAO:
+            return self._rotulos[row].lower() if col == 0 else self.valor(row, col)
+        if role == Qt.TextAlignmentRole:
+            return None if col == 0 else int(Qt.AlignRight | Qt.AlignVCenter)
+        if role == Qt.ForegroundRole:
+            cor, _, cor_valores, _ = self._estilos[self._codigos[row]]
+            return cor if col == 0 else cor_valores
+        if role == Qt.FontRole:
+            _, fonte, _, fonte_valores = self._estilos[self._codigos[row]]
+            return fonte if col == 0 else fonte_valores
+        return None
+
+
+class ProxyTabela(QSortFilterProxyModel):
+    """Ordenação numérica e filtro pelo rótulo, mantendo as linhas de rodapé do ModeloTabela no fim"""
+
+    def __init__(self, modelo, parent=None):
+        super().__init__(parent)
+        self.setSourceModel(modelo)
+        self.setSortRole(PAPEL_ORDENACAO)
+        self.setFilterKeyColumn(0)
+        self.setFilterCaseSensitivity(Qt.CaseInsensitive)
+
+    def filtrar(self, texto):
+        """Mostra só as linhas cujo rótulo contém o texto (o rodapé sempre aparece)"""
+        self.setFilterFixedString(texto)
+
+    def filterAcceptsRow(self, source_row, source_parent):
+        if self.sourceModel().eh_rodape(source_row):
+            return True
+        return super().filterAcceptsRow(source_row, source_parent)
+
+    def lessThan(self, left, right):
+        modelo = self.sourceModel()
+        rodape_esq, rodape_dir = modelo.eh_rodape(left.row()), modelo.eh_rodape(right.row())
+        if rodape_esq or rodape_dir:
+            # Na ordem decrescente o Qt inverte a comparação: compensar para o rodapé ficar no fim
+            crescente = self.sortOrder() == Qt.AscendingOrder
+            if rodape_esq and rodape_dir:
+                return (left.row() < right.row()) == crescente
+            return rodape_dir if crescente else rodape_esq
+        return super().lessThan(left, right)
+
+
+class DelegateProgresso(QStyledItemDelegate):
+    """Desenha o valor (0 a 100) da célula como barra de progresso, sem criar um widget por linha"""
+
+    def __init__(self, cor_barra=None, parent=None):
+        """cor_barra: função(index) que retorna a QColor da barra (ou None para a cor padrão)"""
+        super().__init__(parent)
+        self.cor_barra = cor_barra
+
+    def paint(self, painter, option, index):
+        valor = int(index.data(PAPEL_ORDENACAO) or 0)
+
+        barra = QStyleOptionProgressBar()
+        barra.rect = option.rect.adjusted(2, 2, -2, -2)
+        barra.state = option.state | QStyle.State_Horizontal
+        barra.minimum = 0
+        barra.maximum = 100
+        barra.progress = max(0, min(valor, 100))
+        barra.text = f"{valor}%"
+        barra.textVisible = True
+        barra.textAlignment = Qt.AlignCenter
+        paleta = QPalette(option.palette)
+        if self.cor_barra is not None:
+            cor = self.cor_barra(index)
+            if cor is not None:
+                paleta.setColor(QPalette.Highlight, cor)
+        barra.palette = paleta
+
+        estilo = option.widget.style() if option.widget is not None else QApplication.style()
+        estilo.drawControl(QStyle.CE_ProgressBar, barra, painter, option.widget)
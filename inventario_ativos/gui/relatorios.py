@@ -12,6 +12,7 @@ from PyQt5.QtWidgets import (
 from PyQt5.QtCore import Qt
 from PyQt5.QtGui import QFont, QColor, QPainter
 from PyQt5.QtChart import QChart, QChartView, QBarSeries, QBarSet, QBarCategoryAxis, QValueAxis, QPieSeries
+from gui.tarefas import gerenciador_tarefas
 
 class HistoricoInventariosWidget(QWidget):
     """Widget para exibir histórico de inventários"""
@@ -65,12 +66,18 @@ class HistoricoInventariosWidget(QWidget):
     
     def atualizar_dados(self):
         """Atualiza a tabela com o histórico de inventários"""
+        # Obter histórico de inventários em segundo plano
+        gerenciador_tarefas().executar(
+            self.relatorio_service.get_historico_inventarios,
+            chave='historico_inventarios', dono=self, interromper=True,
+            ao_concluir=self.exibir_historico, indicador=self.btn_atualizar
+        )
+    
+    def exibir_historico(self, historico):
+        """Preenche a tabela com o histórico obtido"""
         # Limpar tabela
         self.tabela.setRowCount(0)
         
-        # Obter histórico de inventários
-        historico = self.relatorio_service.get_historico_inventarios()
-        
         # Preencher tabela
         for i, inv in enumerate(historico):
             self.tabela.insertRow(i)
@@ -136,12 +143,17 @@ class HistoricoInventariosWidget(QWidget):
         if not caminho:
             return
         
-        # Exportar relatório
-        resultado = self.relatorio_service.db_manager.csv_manager.exportar_relatorio_inventario(
-            cod_inventario,
-            caminho
+        # Exportar relatório em segundo plano
+        gerenciador_tarefas().executar(
+            self.relatorio_service.db_manager.csv_manager.exportar_relatorio_inventario,
+            (cod_inventario, caminho),
+            ao_concluir=lambda resultado: self._exportacao_concluida(resultado, caminho),
+            ao_falhar=lambda erro: self._exportacao_concluida({'status': False, 'message': str(erro)}, caminho),
+            indicador=self.btn_exportar
         )
-        
+    
+    def _exportacao_concluida(self, resultado, caminho):
+        """Informa o resultado da exportação"""
         if resultado['status']:
             QMessageBox.information(
                 self,
@@ -269,9 +281,15 @@ class ComparacaoInventariosWidget(QWidget):
             )
             return
         
-        # Realizar comparação
-        resultado = self.relatorio_service.comparar_inventarios(inv1, inv2)
-        
+        # Realizar comparação em segundo plano
+        gerenciador_tarefas().executar(
+            self.relatorio_service.comparar_inventarios, (inv1, inv2),
+            chave=('comparacao', inv1, inv2), dono=self, interromper=True,
+            ao_concluir=self.exibir_comparacao, indicador=self.btn_comparar
+        )
+    
+    def exibir_comparacao(self, resultado):
+        """Mostra o resultado da comparação na tabela e no gráfico"""
         # Atualizar tabela
         self.atualizar_tabela(resultado)
         
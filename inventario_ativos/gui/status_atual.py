@@ -8,6 +8,7 @@ from PyQt5.QtWidgets import (
 )
 from PyQt5.QtCore import Qt, QSize
 from PyQt5.QtGui import QFont, QColor
+from gui.tarefas import gerenciador_tarefas
 
 class StatusProgressWidget(QWidget):
     """Widget para exibir progresso geral do inventário"""
@@ -178,9 +179,15 @@ class StatusAtualWidget(QWidget):
     
     def atualizar_dados(self, cod_inventario):
         """Atualiza todos os componentes com os dados atuais"""
-        # Obter dados de status
-        dados_status = self.relatorio_service.get_resumo_status(cod_inventario)
-        
+        # Obter dados de status em segundo plano
+        gerenciador_tarefas().executar(
+            self.relatorio_service.get_resumo_status, (cod_inventario,),
+            chave=('status_atual', cod_inventario), dono=self, grupo='inventario', interromper=True,
+            ao_concluir=self.exibir_dados
+        )
+    
+    def exibir_dados(self, dados_status):
+        """Preenche os componentes com o resumo de status obtido"""
         # Atualizar widgets de progresso
         self.progress_widget.atualizar_dados(dados_status)
         
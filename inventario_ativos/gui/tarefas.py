@@ -0,0 +1,320 @@
+# gui/tarefas.py
+import itertools
+import traceback
+from contextlib import nullcontext
+from PyQt5.QtCore import Qt, QObject, QRunnable, QThreadPool, pyqtSignal, pyqtSlot
+from PyQt5.QtGui import QBrush
+from PyQt5.QtWidgets import QTableWidget, QWidget
+
+
+class SinaisTarefa(QObject):
+    """Sinais emitidos pelas tarefas (nas threads do pool) e entregues na thread da interface"""
+    concluida = pyqtSignal(int, object)
+    falhou = pyqtSignal(int, object, str)
+    finalizada = pyqtSignal(int)
+
+
+class Tarefa(QRunnable):
+    """Chamada de serviço executada em uma thread do QThreadPool"""
+
+    def __init__(self, id_tarefa, funcao, args, kwargs, sinais, db_manager=None,
+                 chave=None, grupo=None, interromper=False):
+        super().__init__()
+        self.id = id_tarefa
+        self.funcao = funcao
+        self.args = args
+        self.kwargs = kwargs
+        self.sinais = sinais
+        self.db_manager = db_manager
+        self.chave = chave
+        self.grupo = grupo
+        # Se True, cancelar a tarefa em andamento interrompe a consulta SQLite desta tarefa
+        self.interromper = interromper
+        self.cancelada = False
+        # Quem aguarda o resultado: [(dono, ao_concluir, ao_falhar, indicador)]
+        self.inscricoes = []
+
+    def run(self):
+        # As conexões usadas pela tarefa ficam associadas a ela (e não à thread do pool):
+        # cancelar só interrompe consultas desta tarefa
+        chamada = self.db_manager.chamada(self) if self.db_manager is not None else nullcontext()
+        try:
+            if self.cancelada:
+                return
+            with chamada:
+                resultado = self.funcao(*self.args, **self.kwargs)
+        except Exception as e:
+            self.sinais.falhou.emit(self.id, e, traceback.format_exc())
+        else:
+            self.sinais.concluida.emit(self.id, resultado)
+        finally:
+            if self.db_manager is not None:
+                # Código legado usa get_connection(), que fixa a conexão na thread do pool
+                self.db_manager.pool.liberar_thread()
+            self.sinais.finalizada.emit(self.id)
+
+
+class GerenciadorTarefas(QObject):
+    """Executa chamadas de serviço e do banco fora da thread da interface
+
+    - o resultado (ou o erro) volta para a thread da interface pelos callbacks
+      `ao_concluir(resultado)` e `ao_falhar(erro)`;
+    - enquanto a tarefa roda, o `indicador` (ex.: o botão que a disparou) fica desabilitado
+      e o sinal `ocupado` avisa a janela para mostrar que há trabalho em andamento;
+    - tarefas com a mesma `chave` ainda em andamento não são repetidas: quem pedir de novo
+      passa a aguardar o resultado da que já está rodando;
+    - `cancelar(dono)` / `cancelar_grupo(grupo)` descartam o resultado das tarefas (as que
+      ainda não começaram nem chegam a rodar; com `interromper=True`, a consulta SQLite em
+      andamento é interrompida e a transação desfeita).
+    """
+
+    ocupado = pyqtSignal(bool)
+    tarefa_finalizada = pyqtSignal()
+
+    def __init__(self, db_manager=None, max_threads=None, parent=None):
+        super().__init__(parent)
+        self.db_manager = db_manager
+        self.pool = QThreadPool(self)
+        if max_threads is None and db_manager is not None:
+            # Sem mais threads do que conexões: evita que as tarefas esperem pelo pool do banco
+            max_threads = min(4, db_manager.pool.max_conexoes)
+        if max_threads:
+            self.pool.setMaxThreadCount(max_threads)
+
+        self._ids = itertools.count(1)
+        self._tarefas = {}
+        self._por_chave = {}
+
+        self._sinais = SinaisTarefa()
+        self._sinais.concluida.connect(self._ao_concluir)
+        self._sinais.falhou.connect(self._ao_falhar)
+        self._sinais.finalizada.connect(self._ao_finalizar)
+
+    @property
+    def em_andamento(self):
+        """Quantidade de tarefas ainda não finalizadas"""
+        return len(self._tarefas)
+
+    def executar(self, funcao, args=(), kwargs=None, chave=None, dono=None, grupo=None,
+                 ao_concluir=None, ao_falhar=None, indicador=None, interromper=False):
+        """Agenda funcao(*args, **kwargs) no pool de threads e retorna a tarefa"""
+        tarefa = self._tarefas.get(self._por_chave.get(chave)) if chave is not None else None
+        if tarefa is None or tarefa.cancelada:
+            tarefa = Tarefa(
+                next(self._ids), funcao, tuple(args), dict(kwargs or {}), self._sinais,
+                self.db_manager, chave, grupo, interromper
+            )
+            tarefa.setAutoDelete(False)
+            self._tarefas[tarefa.id] = tarefa
+            if chave is not None:
+                self._por_chave[chave] = tarefa.id
+            novo = True
+        else:
+            novo = False
+
+        tarefa.inscricoes.append((dono, ao_concluir, ao_falhar, indicador))
+        if indicador is not None:
+            indicador.setEnabled(False)
+
+        if novo:
+            if len(self._tarefas) == 1:
+                self.ocupado.emit(True)
+            self.pool.start(tarefa)
+        return tarefa
+
+    def ocupado_com(self, dono):
+        """Verifica se há tarefa em andamento aguardada pelo dono ou por widgets dentro dele"""
+        return any(
+            _pertence(inscricao[0], dono)
+            for tarefa in self._tarefas.values() if not tarefa.cancelada
+            for inscricao in tarefa.inscricoes
+        )
+
+    def cancelar(self, dono):
+        """Descarta os resultados aguardados por um dono ou por widgets dentro dele (ex.: aba escondida)
+
+        Retorna quantas inscrições foram descartadas.
+        """
+        descartadas = 0
+        for tarefa in list(self._tarefas.values()):
+            restantes = [inscricao for inscricao in tarefa.inscricoes if not _pertence(inscricao[0], dono)]
+            if len(restantes) == len(tarefa.inscricoes):
+                continue
+
+            descartadas += len(tarefa.inscricoes) - len(restantes)
+            self._liberar_indicadores(tarefa, manter=restantes)
+            tarefa.inscricoes = restantes
+            if not restantes:
+                self._cancelar_tarefa(tarefa)
+        return descartadas
+
+    def cancelar_grupo(self, grupo):
+        """Cancela todas as tarefas de um grupo (ex.: as do inventário que deixou de ser o atual)"""
+        for tarefa in list(self._tarefas.values()):
+            if tarefa.grupo == grupo:
+                self._liberar_indicadores(tarefa)
+                tarefa.inscricoes = []
+                self._cancelar_tarefa(tarefa)
+
+    def aguardar(self, timeout_ms=-1):
+        """Aguarda o fim das tarefas em andamento (ex.: ao fechar a janela)"""
+        return self.pool.waitForDone(timeout_ms)
+
+    def _cancelar_tarefa(self, tarefa):
+        """Marca a tarefa como cancelada e a retira da fila, se ainda não começou"""
+        tarefa.cancelada = True
+        if self._por_chave.get(tarefa.chave) == tarefa.id:
+            del self._por_chave[tarefa.chave]
+
+        if self.pool.tryTake(tarefa):
+            # Não vai rodar: finaliza aqui mesmo
+            self._ao_finalizar(tarefa.id)
+        elif tarefa.interromper and self.db_manager is not None:
+            # Só alcança a conexão enquanto ela estiver com esta tarefa
+            self.db_manager.interromper_chamada(tarefa)
+
+    def _liberar_indicadores(self, tarefa, manter=()):
+        """Reabilita os indicadores que não pertencem às inscrições mantidas"""
+        mantidos = [inscricao[3] for inscricao in manter]
+        for _, _, _, indicador in tarefa.inscricoes:
+            if indicador is not None and not any(indicador is outro for outro in mantidos):
+                indicador.setEnabled(True)
+
+    @pyqtSlot(int, object)
+    def _ao_concluir(self, id_tarefa, resultado):
+        tarefa = self._tarefas.get(id_tarefa)
+        if tarefa is None or tarefa.cancelada:
+            return
+
+        for _, ao_concluir, _, _ in list(tarefa.inscricoes):
+            if ao_concluir is not None:
+                try:
+                    ao_concluir(resultado)
+                except Exception as e:
+                    print(f"Aviso: erro ao exibir o resultado da tarefa: {e}")
+                    print(traceback.format_exc())
+
+    @pyqtSlot(int, object, str)
+    def _ao_falhar(self, id_tarefa, erro, detalhes):
+        tarefa = self._tarefas.get(id_tarefa)
+        if tarefa is None or tarefa.cancelada:
+            return
+
+        tratado = False
+        for _, _, ao_falhar, _ in list(tarefa.inscricoes):
+            if ao_falhar is not None:
+                tratado = True
+                try:
+                    ao_falhar(erro)
+                except Exception as e:
+                    print(f"Aviso: erro ao exibir a falha da tarefa: {e}")
+                    print(traceback.format_exc())
+        if not tratado:
+            print(f"Aviso: tarefa em segundo plano falhou: {erro}")
+            print(detalhes)
+
+    @pyqtSlot(int)
+    def _ao_finalizar(self, id_tarefa):
+        tarefa = self._tarefas.pop(id_tarefa, None)
+        if tarefa is None:
+            return
+
+        if self._por_chave.get(tarefa.chave) == id_tarefa:
+            del self._por_chave[tarefa.chave]
+        self._liberar_indicadores(tarefa)
+        tarefa.inscricoes = []
+
+        if not self._tarefas:
+            self.ocupado.emit(False)
+        self.tarefa_finalizada.emit()
+
+
+def _pertence(objeto, dono):
+    """Verifica se o objeto é o dono ou um widget contido nele"""
+    if objeto is None:
+        return False
+    if objeto is dono:
+        return True
+    return isinstance(objeto, QWidget) and isinstance(dono, QWidget) and dono.isAncestorOf(objeto)
+
+
+_gerenciador = None
+
+
+def gerenciador_tarefas(db_manager=None):
+    """Retorna o gerenciador de tarefas compartilhado pela interface (criado na primeira chamada)"""
+    global _gerenciador
+    if _gerenciador is None:
+        _gerenciador = GerenciadorTarefas(db_manager)
+    elif db_manager is not None and _gerenciador.db_manager is None:
+        _gerenciador.db_manager = db_manager
+    return _gerenciador
+
+
+class CopiaItem:
+    """Cópia do texto e da cor de uma célula, para leitura fora da thread da interface"""
+
+    def __init__(self, texto, cor):
+        self._texto = texto
+        self._cor = QBrush(cor) if cor is not None else QBrush()
+
+    @classmethod
+    def do_item(cls, item):
+        """Copia um QTableWidgetItem"""
+        return cls(item.text(), item.foreground())
+
+    @classmethod
+    def do_indice(cls, indice):
+        """Copia a célula de um modelo (QTableView)"""
+        return cls(str(indice.data(Qt.DisplayRole) or ""), indice.data(Qt.ForegroundRole))
+
+    def text(self):
+        return self._texto
+
+    def foreground(self):
+        return self._cor
+
+
+class CopiaTabela:
+    """Cópia somente leitura de um QTableWidget (mesmos métodos de leitura da tabela)
+
+    Também aceita um QTableView: copia as linhas visíveis do modelo, na ordem exibida.
+    """
+
+    def __init__(self, tabela=None):
+        self._linhas = []
+        self._ocultas = set()
+        self._colunas = 0
+        if tabela is None:
+            return
+
+        if not isinstance(tabela, QTableWidget):
+            modelo = tabela.model()
+            self._colunas = modelo.columnCount()
+            for row in range(modelo.rowCount()):
+                self._linhas.append([
+                    CopiaItem.do_indice(modelo.index(row, col)) for col in range(self._colunas)
+                ])
+            return
+
+        self._colunas = tabela.columnCount()
+        for row in range(tabela.rowCount()):
+            itens = []
+            for col in range(self._colunas):
+                item = tabela.item(row, col)
+                itens.append(CopiaItem.do_item(item) if item is not None else None)
+            self._linhas.append(itens)
+            if tabela.isRowHidden(row):
+                self._ocultas.add(row)
+
+    def rowCount(self):
+        return len(self._linhas)
+
+    def columnCount(self):
+        return self._colunas
+
+    def item(self, row, col):
+        return self._linhas[row][col]
+
+    def isRowHidden(self, row):
+        return row in self._ocultas
@@ -0,0 +1,197 @@
+# import_export/cadastro_referencia.py
+import csv
+import os
+import threading
+
+
+class CadastroReferencia:
+    """Cadastro de lojas e setores lido dos CSVs de referência, compartilhado pelo processo
+
+    Cada arquivo é lido uma única vez e mantido em memória, com índices por nome e por
+    regional. A cada consulta o arquivo é revalidado pelo mtime e pelo tamanho (um os.stat):
+    só é lido de novo se tiver mudado. Quando o conteúdo muda, os assinantes registrados
+    com `inscrever()` são chamados com o tipo alterado ('lojas' ou 'setores'), na thread que
+    percebeu a mudança.
+
+    Use `CadastroReferencia.compartilhado(lojas_path, setores_path)` para obter a instância
+    do processo para aqueles arquivos. As listas e dicionários retornados são compartilhados:
+    não devem ser alterados por quem os recebe.
+    """
+
+    _instancias = {}
+    _lock_instancias = threading.Lock()
+
+    def __init__(self, lojas_path, setores_path):
+        self.lojas_path = lojas_path
+        self.setores_path = setores_path
+        self._lock = threading.RLock()
+        self._assinantes = []
+
+        # Assinatura (mtime_ns, tamanho) do arquivo carregado; None: ainda não carregado
+        self._assinatura = {'lojas': None, 'setores': None}
+        self._lojas = []
+        self._lojas_por_nome = {}
+        self._lojas_por_regional = {}
+        self._setores = []
+        self._setores_por_nome = {}
+
+    @classmethod
+    def compartilhado(cls, lojas_path, setores_path):
+        """Retorna a instância do processo para o par de arquivos (criada na primeira chamada)"""
+        chave = (os.path.abspath(lojas_path), os.path.abspath(setores_path))
+        with cls._lock_instancias:
+            instancia = cls._instancias.get(chave)
+            if instancia is None:
+                instancia = cls(lojas_path, setores_path)
+                cls._instancias[chave] = instancia
+            return instancia
+
+    # --- ASSINANTES ---
+
+    def inscrever(self, funcao):
+        """Registra funcao(tipo), chamada quando o cadastro de lojas ou de setores mudar"""
+        with self._lock:
+            if funcao not in self._assinantes:
+                self._assinantes.append(funcao)
+
+    def cancelar_inscricao(self, funcao):
+        """Remove um assinante registrado com inscrever()"""
+        with self._lock:
+            if funcao in self._assinantes:
+                self._assinantes.remove(funcao)
+
+    def _notificar(self, tipos):
+        """Chama os assinantes (fora do lock) para cada tipo alterado"""
+        with self._lock:
+            assinantes = list(self._assinantes)
+        for tipo in tipos:
+            for funcao in assinantes:
+                try:
+                    funcao(tipo)
+                except Exception as e:
+                    print(f"Aviso: assinante do cadastro de {tipo} falhou: {e}")
+
+    # --- CARGA E REVALIDAÇÃO ---
+
+    def _assinatura_arquivo(self, caminho):
+        """(mtime_ns, tamanho) do arquivo, ou () se ele não existir"""
+        try:
+            estado = os.stat(caminho)
+        except OSError:
+            return ()
+        return (estado.st_mtime_ns, estado.st_size)
+
+    def _ler_lojas(self):
+        lojas = []
+        with open(self.lojas_path, mode='r', encoding='utf-8-sig') as file:
+            for row in csv.DictReader(file):
+                # Garantir que loja exista e não seja vazia
+                loja = (row.get('loja') or '').strip()
+                if loja:
+                    lojas.append({'loja': loja, 'regional': (row.get('regional') or '').strip()})
+        return lojas
+
+    def _ler_setores(self):
+        setores = []
+        with open(self.setores_path, mode='r', encoding='utf-8') as file:
+            for row in csv.DictReader(file):
+                # Garantir que setor exista e não seja vazio
+                setor = (row.get('setor') or '').strip()
+                if setor:
+                    setores.append({'setor': setor, 'descricao': (row.get('descricao') or '').strip()})
+        return setores
+
+    def _atualizar(self, tipo, recarregar=False):
+        """Relê o arquivo do tipo se ele mudou (ou se recarregar=True)
+
+        Retorna True se um conteúdo já carregado antes mudou.
+        """
+        caminho = self.lojas_path if tipo == 'lojas' else self.setores_path
+        assinatura = self._assinatura_arquivo(caminho)
+        if not recarregar and assinatura == self._assinatura[tipo]:
+            return False
+
+        if not assinatura:
+            dados = []
+        else:
+            try:
+                dados = self._ler_lojas() if tipo == 'lojas' else self._ler_setores()
+            except Exception as e:
+                # Mantém o último conteúdo válido; a assinatura não é gravada para tentar de novo
+                print(f"Erro ao ler arquivo CSV de {tipo}: {e}")
+                return False
+
+        # A primeira carga não é uma mudança para os assinantes
+        ja_carregado = self._assinatura[tipo] is not None
+        self._assinatura[tipo] = assinatura
+        if tipo == 'lojas':
+            if dados == self._lojas:
+                return False
+            por_regional = {}
+            for loja in dados:
+                por_regional.setdefault(loja['regional'], []).append(loja)
+            self._lojas = dados
+            self._lojas_por_nome = {loja['loja']: loja for loja in dados}
+            self._lojas_por_regional = por_regional
+        else:
+            if dados == self._setores:
+                return False
+            self._setores = dados
+            self._setores_por_nome = {setor['setor']: setor for setor in dados}
+        return ja_carregado
+
+    def verificar(self, recarregar=False):
+        """Revalida os dois arquivos e notifica os assinantes; retorna os tipos que mudaram"""
+        with self._lock:
+            alterados = [tipo for tipo in ('lojas', 'setores') if self._atualizar(tipo, recarregar)]
+        if alterados:
+            self._notificar(alterados)
+        return alterados
+
+    def _validar(self, tipo, recarregar=False):
+        with self._lock:
+            alterado = self._atualizar(tipo, recarregar)
+        if alterado:
+            self._notificar([tipo])
+
+    # --- CONSULTAS ---
+
+    def lojas(self, recarregar=False):
+        """Lista de lojas ({'loja', 'regional'}) na ordem do CSV"""
+        self._validar('lojas', recarregar)
+        return self._lojas
+
+    def setores(self, recarregar=False):
+        """Lista de setores ({'setor', 'descricao'}) na ordem do CSV"""
+        self._validar('setores', recarregar)
+        return self._setores
+
+    def loja(self, nome):
+        """Dados da loja pelo nome, ou None se ela não estiver no cadastro"""
+        self._validar('lojas')
+        return self._lojas_por_nome.get(nome)
+
+    def regional_da_loja(self, nome):
+        """Regional da loja no cadastro ('' se a loja não estiver cadastrada)"""
+        loja = self.loja(nome)
+        return loja['regional'] if loja else ''
+
+    def lojas_por_nome(self):
+        """Dicionário nome -> dados da loja"""
+        self._validar('lojas')
+        return self._lojas_por_nome
+
+    def lojas_por_regional(self):
+        """Dicionário regional -> lista de lojas, na ordem do CSV"""
+        self._validar('lojas')
+        return self._lojas_por_regional
+
+    def setor(self, nome):
+        """Dados do setor pelo nome, ou None se ele não estiver no cadastro"""
+        self._validar('setores')
+        return self._setores_por_nome.get(nome)
+
+    def setores_por_nome(self):
+        """Dicionário nome -> dados do setor"""
+        self._validar('setores')
+        return self._setores_por_nome
@@ -3,6 +3,7 @@ import csv
 import os
 import datetime
 from utils.config import Config
+from import_export.cadastro_referencia import CadastroReferencia
 
 class CSVManager:
     def __init__(self, db_manager):
@@ -18,12 +19,11 @@ class CSVManager:
         self.csv_contagem_cd_path = csv_paths['contagem_cd_path']
         self.csv_dados_transito_path = csv_paths['dados_transito_path']
         
-        # Manter cache dos dados carregados
-        self.cached_lojas = None
-        self.cached_setores = None
+        # Lojas e setores vêm do cadastro compartilhado pelo processo (lido uma vez, revalidado pelo mtime)
+        self.cadastro = CadastroReferencia.compartilhado(self.csv_lojas_path, self.csv_setores_path)
+        
+        # Datas de carga dos CSVs de contagem já importados
         self.last_load_time = {
-            'lojas': 0,
-            'setores': 0,
             'contagem_lojas': 0,
             'contagem_cd': 0,
             'dados_transito': 0
@@ -35,10 +35,10 @@ class CSVManager:
         """Define os caminhos para os arquivos CSV"""
         if lojas_path:
             self.csv_lojas_path = lojas_path
-            self.cached_lojas = None  # Resetar cache
         if setores_path:
             self.csv_setores_path = setores_path
-            self.cached_setores = None  # Resetar cache
+        if lojas_path or setores_path:
+            self.cadastro = CadastroReferencia.compartilhado(self.csv_lojas_path, self.csv_setores_path)
         if contagem_lojas_path:
             self.csv_contagem_lojas_path = contagem_lojas_path
         if contagem_cd_path:
@@ -69,72 +69,12 @@ class CSVManager:
         return mtime > self.last_load_time[tipo]
     
     def ler_lojas_csv(self, force_reload=False):
-        """Lê o arquivo CSV de lojas e retorna uma lista de dicionários"""
-        # Usar cache se disponível e não forçar recarga
-        if self.cached_lojas and not force_reload and not self._arquivo_modificado(self.csv_lojas_path, 'lojas'):
-            return self.cached_lojas
-        
-        if not os.path.exists(self.csv_lojas_path):
-            self.cached_lojas = []
-            return []
-        
-        lojas = []
-        try:
-            with open(self.csv_lojas_path, mode='r', encoding='utf-8-sig') as file:  # Changed to utf-8-sig
-                reader = csv.DictReader(file)
-                for row in reader:
-                    # Garantir que loja e regional existam e não sejam vazios
-                    loja = row.get('loja', '').strip()
-                    if not loja:
-                        continue
-                    
-                    # Adicionar loja ao resultado
-                    lojas.append({
-                        'loja': loja,
-                        'regional': row.get('regional', '').strip()
-                    })
-            
-            # Atualizar cache e tempo de carregamento
-            self.cached_lojas = lojas
-            self.last_load_time['lojas'] = os.path.getmtime(self.csv_lojas_path)
-            return lojas
-        except Exception as e:
-            print(f"Erro ao ler arquivo CSV de lojas: {e}")
-            return []
+        """Retorna a lista de lojas do cadastro compartilhado (relida só se o arquivo mudou)"""
+        return self.cadastro.lojas(recarregar=force_reload)
     
     def ler_setores_csv(self, force_reload=False):
-        """Lê o arquivo CSV de setores e retorna uma lista de dicionários"""
-        # Usar cache se disponível e não forçar recarga
-        if self.cached_setores and not force_reload and not self._arquivo_modificado(self.csv_setores_path, 'setores'):
-            return self.cached_setores
-        
-        if not os.path.exists(self.csv_setores_path):
-            self.cached_setores = []
-            return []
-        
-        setores = []
-        try:
-            with open(self.csv_setores_path, mode='r', encoding='utf-8') as file:
-                reader = csv.DictReader(file)
-                for row in reader:
-                    # Garantir que setor exista e não seja vazio
-                    setor = row.get('setor', '').strip()
-                    if not setor:
-                        continue
-                    
-                    # Adicionar setor ao resultado
-                    setores.append({
-                        'setor': setor,
-                        'descricao': row.get('descricao', '').strip()
-                    })
-            
-            # Atualizar cache e tempo de carregamento
-            self.cached_setores = setores
-            self.last_load_time['setores'] = os.path.getmtime(self.csv_setores_path)
-            return setores
-        except Exception as e:
-            print(f"Erro ao ler arquivo CSV de setores: {e}")
-            return []
+        """Retorna a lista de setores do cadastro compartilhado (relida só se o arquivo mudou)"""
+        return self.cadastro.setores(recarregar=force_reload)
     
     # CORREÇÃO PARA IMPORTAR_CONTAGEM_LOJAS no CSV_MANAGER
 
@@ -148,19 +88,10 @@ class CSVManager:
             return {'status': True, 'message': 'Arquivo não modificado desde a última importação. Nenhuma atualização necessária.', 'modified': False}
         
         try:
-            imported_count = 0
-            
-            # Obter mapeamento de lojas para regionais do CSV de lojas
-            lojas_regionais = {}
-            lojas_csv = self.ler_lojas_csv(force_reload=True)
-            for loja in lojas_csv:
-                nome_loja = loja.get('loja', '').strip()
-                regional = loja.get('regional', '').strip()
-                if nome_loja:
-                    lojas_regionais[nome_loja] = regional
+            # Índice do cadastro de lojas por nome, para obter a regional
+            lojas_cadastro = self.cadastro.lojas_por_nome()
             
-            with open(self.csv_contagem_lojas_path, mode='r', encoding='utf-8') as file:
-                reader = csv.DictReader(file)
+            def registros(reader):
                 for row in reader:
                     # AJUSTE: Verificar onde está o nome da loja
                     # Estratégia 1: Usar a coluna "loja" se preenchida
@@ -176,8 +107,8 @@ class CSVManager:
                     
                     # Obter regional do CSV de referência de lojas
                     regional = row.get('regional', '').strip()
-                    if not regional and loja in lojas_regionais:
-                        regional = lojas_regionais[loja]
+                    if not regional and loja in lojas_cadastro:
+                        regional = lojas_cadastro[loja]['regional']
                     
                     # Montar dados da loja
                     dados_loja = {
@@ -200,19 +131,17 @@ class CSVManager:
                     if not dados_loja['loja']:
                         continue
                     
-                    # Inserir no banco de dados
-                    self.db_manager.inserir_contagem_loja(dados_loja, cod_inventario)
-                    imported_count += 1
+                    yield dados_loja
+            
+            # Inserir no banco de dados em lote (um commit por lote, não por linha)
+            with open(self.csv_contagem_lojas_path, mode='r', encoding='utf-8') as file:
+                reader = csv.DictReader(file)
+                contadores = self.db_manager.inserir_contagens_lojas_bulk(registros(reader), cod_inventario)
             
             # Atualizar tempo de carregamento
             self.last_load_time['contagem_lojas'] = os.path.getmtime(self.csv_contagem_lojas_path)
             
-            return {
-                'status': True, 
-                'message': f'Importação concluída com sucesso. {imported_count} registros importados.',
-                'modified': True,
-                'count': imported_count
-            }
+            return self._resultado_importacao(contadores)
             
         except Exception as e:
             return {'status': False, 'message': f'Erro ao importar dados: {str(e)}'}
@@ -227,13 +156,10 @@ class CSVManager:
             return {'status': True, 'message': 'Arquivo não modificado desde a última importação. Nenhuma atualização necessária.', 'modified': False}
         
         try:
-            imported_count = 0
-            
             # Obter lista de setores do CSV de setores (para validação)
-            setores_ref = {setor['setor']: setor['descricao'] for setor in self.ler_setores_csv(force_reload=True)}
+            setores_ref = self.cadastro.setores_por_nome()
             
-            with open(self.csv_contagem_cd_path, mode='r', encoding='utf-8') as file:
-                reader = csv.DictReader(file)
+            def registros(reader):
                 for row in reader:
                     # Processando os dados do CSV
                     setor = row.get('setor', '').strip()
@@ -263,19 +189,17 @@ class CSVManager:
                     if not dados_cd['setor']:
                         continue
                     
-                    # Inserir no banco de dados
-                    self.db_manager.inserir_contagem_cd(dados_cd, cod_inventario)
-                    imported_count += 1
+                    yield dados_cd
+            
+            # Inserir no banco de dados em lote (um commit por lote, não por linha)
+            with open(self.csv_contagem_cd_path, mode='r', encoding='utf-8') as file:
+                reader = csv.DictReader(file)
+                contadores = self.db_manager.inserir_contagens_cd_bulk(registros(reader), cod_inventario)
             
             # Atualizar tempo de carregamento
             self.last_load_time['contagem_cd'] = os.path.getmtime(self.csv_contagem_cd_path)
             
-            return {
-                'status': True, 
-                'message': f'Importação concluída com sucesso. {imported_count} registros importados.',
-                'modified': True,
-                'count': imported_count
-            }
+            return self._resultado_importacao(contadores)
             
         except Exception as e:
             return {'status': False, 'message': f'Erro ao importar dados: {str(e)}'}
@@ -290,9 +214,7 @@ class CSVManager:
             return {'status': True, 'message': 'Arquivo não modificado desde a última importação. Nenhuma atualização necessária.', 'modified': False}
         
         try:
-            imported_count = 0
-            with open(self.csv_dados_transito_path, mode='r', encoding='utf-8') as file:
-                reader = csv.DictReader(file)
+            def registros(reader):
                 for row in reader:
                     # Processando os dados do CSV
                     dados_transito = {
@@ -307,23 +229,36 @@ class CSVManager:
                     if not dados_transito['tipo_caixa']:
                         continue
                     
-                    # Inserir no banco de dados
-                    self.db_manager.inserir_dados_transito(dados_transito, cod_inventario)
-                    imported_count += 1
+                    yield dados_transito
+            
+            # Inserir no banco de dados em lote (um commit por lote, não por linha)
+            with open(self.csv_dados_transito_path, mode='r', encoding='utf-8') as file:
+                reader = csv.DictReader(file)
+                contadores = self.db_manager.inserir_dados_transito_bulk(registros(reader), cod_inventario)
             
             # Atualizar tempo de carregamento
             self.last_load_time['dados_transito'] = os.path.getmtime(self.csv_dados_transito_path)
             
-            return {
-                'status': True, 
-                'message': f'Importação concluída com sucesso. {imported_count} registros importados.',
-                'modified': True,
-                'count': imported_count
-            }
+            return self._resultado_importacao(contadores)
             
         except Exception as e:
             return {'status': False, 'message': f'Erro ao importar dados: {str(e)}'}
     
+    def _resultado_importacao(self, contadores):
+        """Monta o dicionário de retorno de uma importação a partir dos contadores do lote"""
+        imported_count = contadores['inseridos'] + contadores['atualizados']
+        return {
+            'status': True, 
+            'message': (
+                f'Importação concluída com sucesso. {imported_count} registros importados '
+                f'({contadores["inseridos"]} novos, {contadores["atualizados"]} atualizados).'
+            ),
+            'modified': True,
+            'count': imported_count,
+            'inseridos': contadores['inseridos'],
+            'atualizados': contadores['atualizados']
+        }
+    
     def exportar_relatorio_inventario(self, cod_inventario, output_path):
         """Exporta dados do inventário para um CSV de relatório"""
         self._garantir_diretorios()
@@ -1,13 +1,20 @@
 # main.py
+import time
+INICIO_PROCESSO = time.perf_counter()
+
 import sys
 import os
 from PyQt5.QtWidgets import QApplication
 from PyQt5.QtGui import QIcon
+from PyQt5.QtCore import QTimer
 from gui.main_window import MainWindow
 from utils.config import Config
+from utils.medidor_inicializacao import MedidorInicializacao
 
 def main():
     """Função principal do sistema"""
+    medidor = MedidorInicializacao(INICIO_PROCESSO)
+    medidor.marcar('importações')
 
     os.makedirs('data', exist_ok=True)
     os.makedirs('relatorios', exist_ok=True)
@@ -16,11 +23,19 @@ def main():
     
     app = QApplication(sys.argv)
     app.setApplicationName("Sistema de Inventário Rotativo de Ativos")
+    medidor.marcar('QApplication')
     
-    window = MainWindow()
+    window = MainWindow(medidor)
+    medidor.marcar('janela principal construída')
     window.show()
     
+    # Primeira volta do laço de eventos: a janela já foi exibida
+    def janela_exibida():
+        medidor.marcar('janela exibida')
+        print(medidor.relatorio())
+    QTimer.singleShot(0, janela_exibida)
+    
     sys.exit(app.exec_())
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -4,6 +4,40 @@ import configparser
 
 CONFIG_FILE = 'config.ini'
 
+# Perfis de desempenho do SQLite. O perfil escolhido em [Database] perfil define os
+# valores base; qualquer pragma informado explicitamente na seção os sobrescreve.
+PERFIS_BANCO = {
+    'desempenho': {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'cache_size': '-32000',
+        'mmap_size': '268435456',
+        'temp_store': 'MEMORY',
+        'busy_timeout': '5000',
+        'wal_autocheckpoint': '1000'
+    },
+    'seguro': {
+        'journal_mode': 'WAL',
+        'synchronous': 'FULL',
+        'cache_size': '-8000',
+        'mmap_size': '0',
+        'temp_store': 'DEFAULT',
+        'busy_timeout': '10000',
+        'wal_autocheckpoint': '1000'
+    },
+    'compatibilidade': {
+        'journal_mode': 'DELETE',
+        'synchronous': 'FULL',
+        'cache_size': '-2000',
+        'mmap_size': '0',
+        'temp_store': 'DEFAULT',
+        'busy_timeout': '5000',
+        'wal_autocheckpoint': '1000'
+    }
+}
+
+PERFIL_BANCO_PADRAO = 'desempenho'
+
 class Config:
     """Classe para gerenciar configurações do sistema"""
     def __init__(self):
@@ -21,7 +55,22 @@ class Config:
         """Cria um arquivo de configuração padrão"""
         # Seção de banco de dados
         self.config['Database'] = {
-            'file': 'inventario.db'
+            'file': 'inventario.db',
+            'tamanho_lote': '5000',
+            'perfil': PERFIL_BANCO_PADRAO,
+            'max_conexoes': '8',
+            'diretorio_backup': 'backups',
+            'backup_geracoes': '7',
+            'backup_compactar': 'true',
+            'diretorio_arquivo': 'arquivo',
+            'arquivar_ao_finalizar': 'false',
+            'perfilar': 'false',
+            'consulta_lenta_ms': '100',
+            'log_consultas_lentas': 'logs/consultas_lentas.log',
+            'manutencao_ao_iniciar': 'true',
+            'manutencao_intervalo_horas': '24',
+            'manutencao_ociosidade_segundos': '300',
+            'manutencao_orcamento_segundos': '10'
         }
         
         # Seção de caminhos de arquivos
@@ -51,6 +100,77 @@ class Config:
         """Retorna o caminho do arquivo de banco de dados"""
         return self.config.get('Database', 'file', fallback='inventario.db')
     
+    def get_perfil_banco(self):
+        """Retorna o nome do perfil de desempenho do banco e os pragmas efetivos (perfil + sobrescritas)"""
+        nome = self.config.get('Database', 'perfil', fallback=PERFIL_BANCO_PADRAO)
+        if nome not in PERFIS_BANCO:
+            print(f"Aviso: perfil de banco desconhecido '{nome}', usando '{PERFIL_BANCO_PADRAO}'")
+            nome = PERFIL_BANCO_PADRAO
+        
+        pragmas = dict(PERFIS_BANCO[nome])
+        for pragma in pragmas:
+            valor = self.config.get('Database', pragma, fallback='').strip()
+            if valor:
+                pragmas[pragma] = valor
+        
+        return nome, pragmas
+    
+    def get_max_conexoes(self):
+        """Retorna o número máximo de conexões simultâneas do pool do banco"""
+        return self.config.getint('Database', 'max_conexoes', fallback=8)
+    
+    def get_diretorio_backup(self):
+        """Retorna o diretório onde são gravados os backups do banco"""
+        return self.config.get('Database', 'diretorio_backup', fallback='backups')
+    
+    def get_backup_geracoes(self):
+        """Retorna quantos backups periódicos são mantidos (0 = todos)"""
+        return self.config.getint('Database', 'backup_geracoes', fallback=7)
+    
+    def get_backup_compactar(self):
+        """Retorna se os backups periódicos são compactados com gzip"""
+        return self.config.getboolean('Database', 'backup_compactar', fallback=True)
+    
+    def get_diretorio_arquivo(self):
+        """Retorna o diretório dos arquivos de inventários finalizados"""
+        return self.config.get('Database', 'diretorio_arquivo', fallback='arquivo')
+    
+    def get_arquivar_ao_finalizar(self):
+        """Retorna se o inventário é movido para seu arquivo logo após ser finalizado"""
+        return self.config.getboolean('Database', 'arquivar_ao_finalizar', fallback=False)
+    
+    def get_perfilar(self):
+        """Retorna se as consultas SQL são instrumentadas pelo perfilador"""
+        return self.config.getboolean('Database', 'perfilar', fallback=False)
+    
+    def get_consulta_lenta_ms(self):
+        """Retorna o tempo (ms) a partir do qual uma consulta vai para o log de lentas"""
+        return self.config.getfloat('Database', 'consulta_lenta_ms', fallback=100.0)
+    
+    def get_log_consultas_lentas(self):
+        """Retorna o arquivo do log de consultas lentas"""
+        return self.config.get('Database', 'log_consultas_lentas', fallback='logs/consultas_lentas.log')
+    
+    def get_manutencao_ao_iniciar(self):
+        """Retorna se a manutenção pendente do banco roda logo após a abertura do sistema"""
+        return self.config.getboolean('Database', 'manutencao_ao_iniciar', fallback=True)
+    
+    def get_manutencao_intervalo_horas(self):
+        """Retorna o intervalo mínimo (horas) entre duas manutenções automáticas do banco"""
+        return self.config.getfloat('Database', 'manutencao_intervalo_horas', fallback=24.0)
+    
+    def get_manutencao_ociosidade_segundos(self):
+        """Retorna há quanto tempo (s) o banco deve estar sem uso para a manutenção automática"""
+        return self.config.getfloat('Database', 'manutencao_ociosidade_segundos', fallback=300.0)
+    
+    def get_manutencao_orcamento_segundos(self):
+        """Retorna o tempo máximo (s) de cada manutenção automática do banco"""
+        return self.config.getfloat('Database', 'manutencao_orcamento_segundos', fallback=10.0)
+    
+    def get_tamanho_lote(self):
+        """Retorna quantas linhas são gravadas por transação nas importações em lote"""
+        return self.config.getint('Database', 'tamanho_lote', fallback=5000)
+    
     def get_csv_paths(self):
         """Retorna os caminhos dos arquivos CSV"""
         return {
@@ -0,0 +1,36 @@
+# utils/medidor_inicializacao.py
+import time
+
+
+class MedidorInicializacao:
+    """Marcos de tempo da inicialização do sistema
+
+    Os tempos são contados a partir de `inicio` (normalmente o começo da execução de
+    main.py, antes das importações do Qt). Cada marco guarda o tempo acumulado e o tempo
+    desde o marco anterior.
+    """
+
+    def __init__(self, inicio=None):
+        self.inicio = time.perf_counter() if inicio is None else inicio
+        self.marcos = []
+
+    def marcar(self, nome):
+        """Registra um marco e retorna o tempo decorrido desde o início (ms)"""
+        decorrido_ms = (time.perf_counter() - self.inicio) * 1000
+        anterior_ms = self.marcos[-1][1] if self.marcos else 0.0
+        self.marcos.append((nome, decorrido_ms, decorrido_ms - anterior_ms))
+        return decorrido_ms
+
+    def tempo(self, nome):
+        """Retorna o tempo acumulado (ms) do marco informado, ou None"""
+        for marco, decorrido_ms, _ in self.marcos:
+            if marco == nome:
+                return decorrido_ms
+        return None
+
+    def relatorio(self):
+        """Retorna o relatório dos marcos em texto"""
+        linhas = ['Tempos de inicialização:']
+        for nome, decorrido_ms, passo_ms in self.marcos:
+            linhas.append(f'  {nome:<40} {decorrido_ms:8.0f} ms  (+{passo_ms:.0f} ms)')
+        return '\n'.join(linhas)